@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# analizar_consultas_lentas.py (Resumen de las consultas más costosas del registro de consultas lentas)
+
+import argparse
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from buscador_app.core.registro_consultas_lentas import analizar_registro, formatear_analisis, leer_registro
+
+logger = logging.getLogger("analizar_consultas_lentas")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agrega el registro JSONL de consultas lentas y muestra las peores.")
+    parser.add_argument("registro", help="Archivo JSONL generado por el registro de consultas lentas.")
+    parser.add_argument("--top", type=int, default=20, help="Número de consultas a mostrar.")
+    parser.add_argument("--criterio", choices=["total", "max", "media", "veces"], default="total",
+                        help="Ordenar por tiempo acumulado, máximo, medio o número de apariciones.")
+    parser.add_argument("--json", action="store_true", help="Emitir el resultado como JSON en lugar de tabla.")
+    parser.add_argument("--nivel-log", default="WARNING", help="Nivel de logging (DEBUG, INFO, WARNING...).")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, str(args.nivel_log).upper(), logging.WARNING),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    try:
+        entradas = list(leer_registro(args.registro))
+    except OSError as e_lectura:
+        logger.critical(f"No se pudo leer el registro '{args.registro}': {e_lectura}")
+        return 1
+    if not entradas:
+        print("El registro no contiene consultas lentas.")
+        return 0
+
+    filas = analizar_registro(entradas, top=args.top, criterio=args.criterio)
+    if args.json:
+        print(json.dumps(filas, indent=2, ensure_ascii=False))
+    else:
+        print(formatear_analisis(filas, len(entradas)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# benchmarks/__init__.py
+# Generador de corpus sintético y suite de rendimiento de MotorBusqueda (ejecutar con `python -m benchmarks`).
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# benchmarks/__main__.py (python -m benchmarks {generar,ejecutar,comparar,numeros,reglas} ...)
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .diferencial_numeros import comparar_parseo_numeros, formatear_comparacion_numeros
+from .diferencial_reglas import comparar_aplicacion_reglas, formatear_comparacion_reglas
+from .generador_corpus import ConfigCorpus, generar_corpus
+from .suite import FLUJOS, comparar_informes, ejecutar_suite, formatear_comparacion, formatear_informe
+
+logger = logging.getLogger("benchmarks")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Corpus sintético y suite de rendimiento de MotorBusqueda.")
+    parser.add_argument("--nivel-log", default="WARNING", help="Nivel de logging (DEBUG, INFO, WARNING...).")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_generar = subparsers.add_parser("generar", help="Genera diccionario.xlsx y descripciones.xlsx sintéticos.")
+    p_generar.add_argument("--salida", default="corpus_benchmark", help="Directorio de salida.")
+    p_generar.add_argument("--filas", type=int, default=20000, help="Filas de descripciones.")
+    p_generar.add_argument("--columnas", type=int, default=2, help="Columnas de texto en descripciones.")
+    p_generar.add_argument("--fcds", type=int, default=300, help="FCDs (filas) del diccionario, sin contar unidades.")
+    p_generar.add_argument("--sinonimos", type=int, default=3, help="Sinónimos por FCD.")
+    p_generar.add_argument("--densidad-numerica", type=float, default=0.5, help="Fracción de descripciones con 'número+unidad'.")
+    p_generar.add_argument("--duplicados", type=float, default=0.1, help="Fracción de descripciones duplicadas.")
+    p_generar.add_argument("--semilla", type=int, default=12345, help="Semilla (mismo valor -> mismos archivos).")
+
+    p_ejecutar = subparsers.add_parser("ejecutar", help="Mide los flujos de búsqueda y guarda el informe JSON.")
+    p_ejecutar.add_argument("--corpus", default=None, help="Directorio generado con 'generar' (alternativa a --diccionario/--descripciones).")
+    p_ejecutar.add_argument("--diccionario", default=None, help="Archivo Excel de diccionario.")
+    p_ejecutar.add_argument("--descripciones", default=None, help="Archivo Excel de descripciones.")
+    p_ejecutar.add_argument("--repeticiones", type=int, default=5, help="Repeticiones medidas por consulta (tras una de calentamiento).")
+    p_ejecutar.add_argument("--consultas", type=int, default=5, help="Consultas por flujo.")
+    p_ejecutar.add_argument("--semilla", type=int, default=2024, help="Semilla para elegir las consultas.")
+    p_ejecutar.add_argument("--flujos", nargs="+", choices=list(FLUJOS), default=None, help="Subconjunto de flujos a medir.")
+    p_ejecutar.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados.")
+
+    p_comparar = subparsers.add_parser("comparar", help="Compara un informe con una línea base y marca regresiones.")
+    p_comparar.add_argument("base", help="Informe JSON de referencia.")
+    p_comparar.add_argument("actual", help="Informe JSON a evaluar.")
+    p_comparar.add_argument("--tolerancia", type=float, default=0.15, help="Variación relativa tolerada (0.15 = 15%%).")
+    p_comparar.add_argument("--umbral-ms", type=float, default=1.0, help="Diferencia absoluta mínima para considerar regresión.")
+
+    p_numeros = subparsers.add_parser("numeros", help="Compara el parseo vectorizado de números con el de uno en uno.")
+    p_numeros.add_argument("--textos", type=int, default=200000, help="Textos numéricos generados.")
+    p_numeros.add_argument("--semilla", type=int, default=7, help="Semilla (mismo valor -> mismos textos).")
+
+    p_reglas = subparsers.add_parser("reglas", help="Compara aplicar muchas reglas en un lote con buscarlas una a una.")
+    p_reglas.add_argument("--corpus", default=None, help="Directorio generado con 'generar' (alternativa a --diccionario/--descripciones).")
+    p_reglas.add_argument("--diccionario", default=None, help="Archivo Excel de diccionario.")
+    p_reglas.add_argument("--descripciones", default=None, help="Archivo Excel de descripciones.")
+    p_reglas.add_argument("--reglas", type=int, default=400, help="Reglas generadas.")
+    p_reglas.add_argument("--semilla", type=int, default=11, help="Semilla para generar las reglas.")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, str(args.nivel_log).upper(), logging.WARNING),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.comando == "generar":
+        config = ConfigCorpus(filas=args.filas, columnas_texto=args.columnas, fcds=args.fcds, sinonimos_por_fcd=args.sinonimos,
+                              densidad_numerica=args.densidad_numerica, ratio_duplicados=args.duplicados, semilla=args.semilla)
+        manifiesto = generar_corpus(config, args.salida)
+        print(f"Corpus generado en '{args.salida}': {manifiesto['filas_diccionario']} filas de diccionario, {manifiesto['filas_descripciones']} descripciones.")
+        return 0
+
+    if args.comando in ("ejecutar", "reglas"):
+        ruta_diccionario, ruta_descripciones = args.diccionario, args.descripciones
+        if args.corpus:
+            ruta_diccionario = ruta_diccionario or str(Path(args.corpus) / "diccionario.xlsx")
+            ruta_descripciones = ruta_descripciones or str(Path(args.corpus) / "descripciones.xlsx")
+        if not ruta_diccionario or not ruta_descripciones:
+            parser.error("Indique --corpus o bien --diccionario y --descripciones.")
+        if args.comando == "reglas":
+            resultado = comparar_aplicacion_reglas(ruta_diccionario, ruta_descripciones, num_reglas=max(1, args.reglas), semilla=args.semilla)
+            print(formatear_comparacion_reglas(resultado))
+            return 1 if resultado["discrepancias"] else 0
+        informe = ejecutar_suite(ruta_diccionario, ruta_descripciones, repeticiones=max(1, args.repeticiones),
+                                 consultas_por_flujo=max(1, args.consultas), semilla=args.semilla, flujos=args.flujos)
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(formatear_informe(informe))
+        print(f"Informe guardado en '{args.salida}'.")
+        return 0
+
+    if args.comando == "numeros":
+        resultado = comparar_parseo_numeros(cantidad=max(1, args.textos), semilla=args.semilla)
+        print(formatear_comparacion_numeros(resultado))
+        return 1 if resultado["discrepancias"] else 0
+
+    with open(args.base, "r", encoding="utf-8") as f_base, open(args.actual, "r", encoding="utf-8") as f_actual:
+        filas, avisos = comparar_informes(json.load(f_base), json.load(f_actual), tolerancia=args.tolerancia, umbral_ms=args.umbral_ms)
+    print(formatear_comparacion(filas, avisos))
+    return 1 if any(fila["estado"] == "REGRESION" for fila in filas) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
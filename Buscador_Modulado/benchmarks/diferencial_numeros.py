@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# benchmarks/diferencial_numeros.py
+
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from buscador_app.core.indice_numerico import parsear_numeros
+from buscador_app.core.motor_busqueda import MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+# Piezas con las que se generan textos: las formas habituales y los casos límite de `_parse_numero`
+SEPARADORES = [".", ","]
+RAROS = ["", " ", "+", "-", "--", "e5", "E-3", "inf", "nan", "١٢", "²", "_", "kg", "\t", "\n", "..", ",."]
+
+
+def _grupo_digitos(aleatorio: random.Random) -> str:
+    return "".join(aleatorio.choice("0123456789") for _ in range(aleatorio.choice([1, 1, 2, 3, 3, 3, 4, 7, 20])))
+
+
+def generar_textos_numericos(cantidad: int, semilla: int = 7) -> List[Any]:
+    """ Textos numéricos reproducibles: grupos de dígitos con "." y "," como miles o decimales, con signo,
+    espacios, separadores finales y piezas que no son números; también algún valor que no es texto. """
+    aleatorio = random.Random(semilla)
+    textos: List[Any] = []
+    for _ in range(cantidad):
+        tipo = aleatorio.random()
+        if tipo < 0.02:
+            textos.append(aleatorio.choice([None, 5, 2.5, -0.0]))
+            continue
+        texto = ("-" if aleatorio.random() < 0.1 else "") + _grupo_digitos(aleatorio)
+        for _ in range(aleatorio.choice([0, 0, 1, 1, 2, 3])):
+            texto += aleatorio.choice(SEPARADORES) + _grupo_digitos(aleatorio)
+        if tipo < 0.15: # Pieza rara al principio, al final o en medio
+            pieza = aleatorio.choice(RAROS)
+            posicion = aleatorio.randint(0, len(texto))
+            texto = texto[:posicion] + pieza + texto[posicion:]
+        elif tipo < 0.2:
+            texto += aleatorio.choice(SEPARADORES)
+        textos.append(texto)
+    return textos
+
+
+def generar_numeros_escaneo(cantidad: int, semilla: int = 7) -> List[str]:
+    """ Textos distintos con la forma de los números que extrae el escaneo de columnas ("\\d+([.,]\\d+)?"):
+    lo que `parsear_numeros` recibe al indexar una columna. """
+    aleatorio = random.Random(semilla)
+    textos = set()
+    for _ in range(cantidad):
+        texto = str(aleatorio.randint(0, 10 ** aleatorio.randint(1, 5)))
+        if aleatorio.random() < 0.4:
+            texto += aleatorio.choice(SEPARADORES) + str(aleatorio.randint(0, 999))
+        textos.add(texto)
+    return sorted(textos)
+
+
+def _medir(funcion: Callable[[], Any], repeticiones: int = 3) -> Tuple[Any, float]:
+    """ Resultado de `funcion` y su mejor tiempo en `repeticiones` ejecuciones. """
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultado, mejor
+
+
+def comparar_parseo_numeros(cantidad: int = 200000, semilla: int = 7, max_ejemplos: int = 10) -> Dict[str, Any]:
+    """ Compara `parsear_numeros` con `MotorBusqueda._parse_numero` texto a texto (mismo float o ambos NaN/None)
+    y mide los dos, sobre los textos con casos límite y sobre números con la forma que da el escaneo de columnas.
+    Devuelve el número de discrepancias, algunos ejemplos y los tiempos. """
+    motor = MotorBusqueda()
+    textos = generar_textos_numericos(cantidad, semilla) + generar_numeros_escaneo(cantidad, semilla)
+    logger_motor = logging.getLogger("buscador_app.core.motor_busqueda")
+    nivel_anterior = logger_motor.level
+    logger_motor.setLevel(logging.ERROR) # Los avisos de textos no interpretables son esperados aquí
+    try:
+        escalares, segundos_escalar = _medir(lambda: [motor._parse_numero(texto) for texto in textos[:cantidad]])
+        vectorizados, segundos_vectorizado = _medir(lambda: parsear_numeros(textos[:cantidad], motor._parse_numero))
+        escalares_escaneo, segundos_escalar_escaneo = _medir(lambda: [motor._parse_numero(texto) for texto in textos[cantidad:]])
+        vectorizados_escaneo, segundos_vectorizado_escaneo = _medir(lambda: parsear_numeros(textos[cantidad:], motor._parse_numero))
+    finally:
+        logger_motor.setLevel(nivel_anterior)
+
+    escalares += escalares_escaneo
+    vectorizados = np.concatenate((vectorizados, vectorizados_escaneo))
+    esperados = np.array([np.nan if numero is None else numero for numero in escalares], dtype=np.float64)
+    iguales = (esperados == vectorizados) & (np.signbit(esperados) == np.signbit(vectorizados))
+    iguales |= np.isnan(esperados) & np.isnan(vectorizados)
+    distintos = np.flatnonzero(~iguales)
+    return {
+        "textos": len(textos),
+        "discrepancias": int(len(distintos)),
+        "ejemplos": [(textos[i], escalares[i], float(vectorizados[i])) for i in distintos[:max_ejemplos]],
+        "segundos_escalar": round(segundos_escalar, 4),
+        "segundos_vectorizado": round(segundos_vectorizado, 4),
+        "numeros_escaneo": len(textos) - cantidad,
+        "segundos_escalar_escaneo": round(segundos_escalar_escaneo, 4),
+        "segundos_vectorizado_escaneo": round(segundos_vectorizado_escaneo, 4),
+    }
+
+
+def formatear_comparacion_numeros(resultado: Dict[str, Any]) -> str:
+    lineas = [f"{resultado['textos']} textos: {resultado['discrepancias']} discrepancias.",
+              f"  Casos límite: escalar {resultado['segundos_escalar'] * 1000:.1f} ms, vectorizado {resultado['segundos_vectorizado'] * 1000:.1f} ms.",
+              f"  {resultado['numeros_escaneo']} números de escaneo: escalar {resultado['segundos_escalar_escaneo'] * 1000:.1f} ms, "
+              f"vectorizado {resultado['segundos_vectorizado_escaneo'] * 1000:.1f} ms."]
+    for texto, escalar, vectorizado in resultado["ejemplos"]:
+        lineas.append(f"  {texto!r}: _parse_numero={escalar!r}, parsear_numeros={vectorizado!r}")
+    return "\n".join(lineas)
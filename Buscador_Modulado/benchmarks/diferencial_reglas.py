@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# benchmarks/diferencial_reglas.py
+
+import json
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from buscador_app.core.motor_busqueda import MotorBusqueda
+from buscador_app.core.reglas import AlmacenReglas
+
+from .suite import FLUJOS, construir_consultas
+
+logger = logging.getLogger(__name__)
+
+
+def comparar_aplicacion_reglas(ruta_diccionario: str, ruta_descripciones: str, num_reglas: int = 400, semilla: int = 11,
+                               max_ejemplos: int = 10) -> Dict[str, Any]:
+    """ Compara `AlmacenReglas.aplicar_a` (todas las reglas en un lote) con buscar cada regla por separado: mismas filas,
+    origen, FCDs y error en cada regla. Las reglas se generan con las consultas de la suite, mezclando sus flujos.
+    La búsqueda una a una va primero, así la tabla numérica de las columnas ya está construida al aplicar el lote. """
+    motor = MotorBusqueda()
+    ok_dic, err_dic = motor.cargar_excel_diccionario(ruta_diccionario)
+    ok_desc, err_desc = motor.cargar_excel_descripcion(ruta_descripciones)
+    if not ok_dic or not ok_desc:
+        raise RuntimeError(f"No se pudieron cargar los archivos: {err_dic or err_desc}")
+
+    aleatorio = random.Random(semilla)
+    consultas = construir_consultas(motor, num_reglas, semilla)
+    candidatas = [(consulta, FLUJOS[flujo][0]) for flujo, lista in consultas.items() for consulta in lista]
+    reglas = aleatorio.sample(candidatas, k=min(num_reglas, len(candidatas)))
+
+    inicio = time.perf_counter()
+    una_a_una = [motor.buscar(consulta, via_diccionario) for consulta, via_diccionario in reglas]
+    segundos_una_a_una = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_reglas = Path(directorio) / "reglas.json"
+        with ruta_reglas.open("w", encoding="utf-8") as f:
+            json.dump({"version": 1, "reglas": [{"nombre": f"regla_{i}", "termino": consulta, "via_diccionario": via_diccionario}
+                                                for i, (consulta, via_diccionario) in enumerate(reglas)]}, f)
+        logger_reglas = logging.getLogger("buscador_app.core.reglas")
+        nivel_anterior = logger_reglas.level
+        logger_reglas.setLevel(logging.ERROR) # Sin .npz al lado: el aviso de reglas sin materializar es esperado
+        try:
+            almacen = AlmacenReglas(str(ruta_reglas))
+        finally:
+            logger_reglas.setLevel(nivel_anterior)
+        inicio = time.perf_counter()
+        aplicacion = almacen.aplicar_a(motor)
+        segundos_lote = time.perf_counter() - inicio
+
+    ejemplos = []
+    discrepancias = 0
+    for (consulta, via_diccionario), regla, (resultados_df, origen, fcds_df, _indices, mensaje_error) in zip(reglas, aplicacion.reglas, una_a_una):
+        esperadas = np.array([], dtype=np.int64) if resultados_df is None or resultados_df.empty else motor.datos_descripcion.index.get_indexer(resultados_df.index)
+        num_fcds = int(len(fcds_df)) if fcds_df is not None else 0
+        if (not np.array_equal(esperadas, aplicacion.matriz.filas_de(regla.nombre)) or origen.name != regla.origen
+                or num_fcds != regla.num_fcds or mensaje_error != regla.error):
+            discrepancias += 1
+            if len(ejemplos) < max_ejemplos:
+                ejemplos.append((consulta, via_diccionario, int(len(esperadas)), regla.num_filas, origen.name, regla.origen))
+    return {
+        "reglas": len(reglas),
+        "filas": aplicacion.matriz.num_filas,
+        "pertenencias": int(len(aplicacion.matriz.posiciones)),
+        "discrepancias": discrepancias,
+        "ejemplos": ejemplos,
+        "segundos_una_a_una": round(segundos_una_a_una, 3),
+        "segundos_lote": round(segundos_lote, 3),
+    }
+
+
+def formatear_comparacion_reglas(resultado: Dict[str, Any]) -> str:
+    lineas = [f"{resultado['reglas']} reglas x {resultado['filas']} filas ({resultado['pertenencias']} pertenencias): "
+              f"{resultado['discrepancias']} discrepancias. Una a una {resultado['segundos_una_a_una']:.2f}s, "
+              f"en lote {resultado['segundos_lote']:.2f}s."]
+    for consulta, via_diccionario, filas_una, filas_lote, origen_una, origen_lote in resultado["ejemplos"]:
+        lineas.append(f"  '{consulta}' ({'dicc.' if via_diccionario else 'directa'}): una a una {filas_una} filas ({origen_una}), "
+                      f"en lote {filas_lote} filas ({origen_lote})")
+    return "\n".join(lineas)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# benchmarks/generador_corpus.py
+
+import json
+import logging
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SILABAS = ["CA", "BLE", "CO", "NEC", "TOR", "TRA", "FO", "MO", "DU", "LO", "FUEN", "TE", "RU", "TER", "VAL",
+           "VU", "LA", "SEN", "SOR", "RE", "LE", "BO", "BI", "NA", "PLA", "CA", "TUER", "MI", "LLA", "JUN", "TA"]
+# (forma canónica, sinónimos) de las unidades; aparecen como FCDs en el diccionario igual que en los archivos reales
+UNIDADES: List[Tuple[str, List[str]]] = [
+    ("V", ["VOLTIO", "VOLTIOS", "VOLT"]),
+    ("W", ["VATIO", "VATIOS", "WATT"]),
+    ("A", ["AMPERIO", "AMPERIOS", "AMP"]),
+    ("MM", ["MILIMETRO", "MILIMETROS"]),
+    ("KG", ["KILO", "KILOGRAMO", "KILOGRAMOS"]),
+    ("HZ", ["HERCIO", "HERCIOS"]),
+]
+VALORES_NUMERICOS = ["1", "2,5", "3", "5", "10", "12", "24", "48", "100", "220", "230", "1.500", "0.5", "1500"]
+
+
+class ConfigCorpus:
+    """ Parámetros del corpus sintético. Con la misma semilla se generan exactamente los mismos archivos. """
+
+    def __init__(self, filas: int = 20000, columnas_texto: int = 2, fcds: int = 300, sinonimos_por_fcd: int = 3,
+                 densidad_numerica: float = 0.5, ratio_duplicados: float = 0.1, semilla: int = 12345):
+        self.filas = filas
+        self.columnas_texto = max(1, columnas_texto)
+        self.fcds = max(1, fcds)
+        self.sinonimos_por_fcd = max(0, sinonimos_por_fcd)
+        self.densidad_numerica = min(1.0, max(0.0, densidad_numerica))
+        self.ratio_duplicados = min(0.95, max(0.0, ratio_duplicados))
+        self.semilla = semilla
+
+    def a_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+def _palabra(aleatorio: random.Random, usadas: set) -> str:
+    """ Palabra pseudo-castellana nueva (de 2 a 4 sílabas) que no se ha usado antes. """
+    while True:
+        palabra = "".join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(2, 4)))
+        if palabra not in usadas:
+            usadas.add(palabra)
+            return palabra
+
+
+def generar_diccionario(config: ConfigCorpus, aleatorio: random.Random, usadas: set) -> pd.DataFrame:
+    """ Diccionario con el formato que espera el motor: FCD, categoría, info y sinónimos desde la 4ª columna. """
+    columnas = ["FCD", "CATEGORIA", "INFO"] + [f"SINONIMO_{i + 1}" for i in range(max(config.sinonimos_por_fcd, 3))]
+    filas: List[List[Optional[str]]] = []
+    for forma_canonica, sinonimos in UNIDADES:
+        fila = [forma_canonica, "UNIDAD", "medida"] + sinonimos
+        filas.append(fila + [None] * (len(columnas) - len(fila)))
+    for i in range(config.fcds):
+        forma_canonica = _palabra(aleatorio, usadas)
+        sinonimos = [_palabra(aleatorio, usadas) for _ in range(config.sinonimos_por_fcd)]
+        if config.sinonimos_por_fcd and aleatorio.random() < 0.2: # Algunos sinónimos de varias palabras
+            sinonimos[-1] = f"{sinonimos[-1]} {_palabra(aleatorio, usadas)}"
+        fila = [forma_canonica, f"CAT{i % 12:02d}", "articulo"] + sinonimos
+        filas.append(fila + [None] * (len(columnas) - len(fila)))
+    return pd.DataFrame(filas, columns=columnas)
+
+
+def generar_descripciones(config: ConfigCorpus, diccionario: pd.DataFrame, aleatorio: random.Random, usadas: set) -> pd.DataFrame:
+    """ Descripciones que mezclan FCDs/sinónimos, palabras de relleno y magnitudes "número+unidad". """
+    vocabulario_fcd: List[str] = []
+    for _, fila in diccionario.iterrows():
+        if fila["CATEGORIA"] == "UNIDAD":
+            continue
+        vocabulario_fcd.extend(str(v) for v in fila.iloc[[0] + list(range(3, len(fila)))] if pd.notna(v))
+    relleno = [_palabra(aleatorio, usadas) for _ in range(max(50, config.fcds // 2))] + ["NUEVO", "OBSOLETO", "REPUESTO", "INDUSTRIAL"]
+    textos_unidad = [u for forma, sinonimos in UNIDADES for u in [forma, forma.lower()] + sinonimos[:1]]
+
+    def _texto() -> str:
+        partes = aleatorio.sample(vocabulario_fcd, k=min(len(vocabulario_fcd), aleatorio.randint(1, 3)))
+        partes += aleatorio.sample(relleno, k=aleatorio.randint(0, 3))
+        aleatorio.shuffle(partes)
+        if aleatorio.random() < config.densidad_numerica:
+            separador = aleatorio.choice(["", " "])
+            partes.append(f"{aleatorio.choice(VALORES_NUMERICOS)}{separador}{aleatorio.choice(textos_unidad)}")
+        return " ".join(partes)
+
+    columnas_texto = ["Descripcion"] + [f"Texto_{i}" for i in range(1, config.columnas_texto)]
+    filas: List[Dict[str, Any]] = []
+    for i in range(config.filas):
+        if filas and aleatorio.random() < config.ratio_duplicados:
+            fila = dict(aleatorio.choice(filas)) # Duplicado de una fila anterior (mismo texto, otro código)
+        else:
+            fila = {col: (_texto() if col == "Descripcion" or aleatorio.random() < 0.6 else None) for col in columnas_texto}
+            fila["Cantidad"] = aleatorio.randint(1, 1000)
+        fila["Codigo"] = f"P{i:07d}"
+        filas.append(fila)
+    return pd.DataFrame(filas, columns=["Codigo"] + columnas_texto + ["Cantidad"])
+
+
+def generar_corpus(config: ConfigCorpus, directorio: str) -> Dict[str, Any]:
+    """ Escribe diccionario.xlsx, descripciones.xlsx y corpus.json (parámetros usados) en `directorio`. """
+    ruta_directorio = Path(directorio)
+    ruta_directorio.mkdir(parents=True, exist_ok=True)
+    aleatorio = random.Random(config.semilla)
+    usadas: set = set()
+
+    diccionario = generar_diccionario(config, aleatorio, usadas)
+    descripciones = generar_descripciones(config, diccionario, aleatorio, usadas)
+
+    ruta_diccionario = ruta_directorio / "diccionario.xlsx"
+    ruta_descripciones = ruta_directorio / "descripciones.xlsx"
+    logger.info(f"Escribiendo corpus sintético en '{ruta_directorio}' ({len(diccionario)} FCDs, {len(descripciones)} descripciones)...")
+    diccionario.to_excel(ruta_diccionario, index=False)
+    descripciones.to_excel(ruta_descripciones, index=False)
+
+    manifiesto = {
+        "config": config.a_dict(),
+        "diccionario": ruta_diccionario.name,
+        "descripciones": ruta_descripciones.name,
+        "filas_diccionario": int(len(diccionario)),
+        "filas_descripciones": int(len(descripciones)),
+    }
+    with (ruta_directorio / "corpus.json").open("w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
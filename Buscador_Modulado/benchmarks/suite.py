@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# benchmarks/suite.py
+
+import datetime
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from buscador_app.core.motor_busqueda import MotorBusqueda
+
+from .generador_corpus import UNIDADES
+
+logger = logging.getLogger(__name__)
+
+VERSION_FORMATO = 1
+
+# Flujos medidos: nombre -> (vía diccionario, descripción)
+FLUJOS: Dict[str, Tuple[bool, str]] = {
+    "palabra_simple": (True, "Una palabra del diccionario (FCD -> sinónimos -> descripciones)"),
+    "and_fcds": (True, "AND entre dos FCDs ('a + b')"),
+    "negacion_pura": (True, "Consulta puramente negativa ('#a')"),
+    "numerico_unidad": (False, "Texto AND comparación numérica con unidad en descripciones ('a + >10V')"),
+    "alternativa_unidad": (True, "Comparación con unidad vía diccionario (Intento 2: FCDs por unidad)"),
+    "directa": (False, "Una palabra buscada directamente en descripciones"),
+}
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    posicion = min(len(valores_ordenados) - 1, max(0, int(round(p / 100.0 * (len(valores_ordenados) - 1)))))
+    return valores_ordenados[posicion]
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        proceso = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                                 cwd=Path(__file__).resolve().parent)
+        return proceso.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def construir_consultas(motor: MotorBusqueda, consultas_por_flujo: int, semilla: int) -> Dict[str, List[str]]:
+    """ Genera, de forma reproducible, consultas de cada flujo a partir de los datos cargados en el motor. """
+    aleatorio = random.Random(semilla)
+    diccionario = motor.datos_diccionario
+    canonicas = {str(v).strip().upper() for v in diccionario.iloc[:, 0].dropna()}
+    unidades = [forma for forma, _sinonimos in UNIDADES if forma in canonicas] or ["V"]
+
+    # Palabras de FCDs que no son unidades (una sola palabra, para que sean consultas simples)
+    palabras_fcd: List[str] = []
+    for _, fila in diccionario.iterrows():
+        valor = str(fila.iloc[0]).strip()
+        if valor and " " not in valor and valor.upper() not in unidades:
+            palabras_fcd.append(valor)
+    if not palabras_fcd:
+        raise ValueError("El diccionario no contiene FCDs utilizables para construir consultas.")
+
+    # Pares de palabras que aparecen juntas en una descripción, para que el AND tenga resultados
+    vocabulario = {p.upper() for p in palabras_fcd}
+    pares: List[Tuple[str, str]] = []
+    columnas_desc = [c for c in motor.datos_descripcion.columns if pd.api.types.is_object_dtype(motor.datos_descripcion[c])]
+    textos = motor.datos_descripcion[columnas_desc[0]].dropna().astype(str).tolist() if columnas_desc else []
+    for texto in aleatorio.sample(textos, k=min(len(textos), 2000)):
+        palabras_en_texto = [p for p in dict.fromkeys(texto.upper().split()) if p in vocabulario]
+        if len(palabras_en_texto) >= 2:
+            pares.append((palabras_en_texto[0], palabras_en_texto[1]))
+        if len(pares) >= consultas_por_flujo:
+            break
+    while len(pares) < consultas_por_flujo:
+        pares.append(tuple(aleatorio.sample(palabras_fcd, k=2)) if len(palabras_fcd) >= 2 else (palabras_fcd[0], palabras_fcd[0]))
+
+    def _palabra() -> str:
+        return aleatorio.choice(palabras_fcd)
+
+    def _magnitud() -> str:
+        return f"{aleatorio.choice(['>', '>=', '<', '<='])}{aleatorio.choice(['5', '10', '24', '100'])}{aleatorio.choice(unidades)}"
+
+    return {
+        "palabra_simple": [_palabra() for _ in range(consultas_por_flujo)],
+        "and_fcds": [f"{a} + {b}" for a, b in pares[:consultas_por_flujo]],
+        "negacion_pura": [f"#{_palabra()}" for _ in range(consultas_por_flujo)],
+        "numerico_unidad": [f"{_palabra()} + {_magnitud()}" for _ in range(consultas_por_flujo)],
+        "alternativa_unidad": [_magnitud() for _ in range(consultas_por_flujo)],
+        "directa": [_palabra() for _ in range(consultas_por_flujo)],
+    }
+
+
+def _medir_flujo(motor: MotorBusqueda, via_diccionario: bool, consultas: List[str], repeticiones: int) -> Dict[str, Any]:
+    tiempos_ms: List[float] = []
+    por_consulta: List[Dict[str, Any]] = []
+    for consulta in consultas:
+        resultados_df, origen, _fcds, _indices, mensaje_error = motor.buscar(consulta, via_diccionario) # Calentamiento
+        tiempos_consulta: List[float] = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            motor.buscar(consulta, via_diccionario)
+            tiempos_consulta.append((time.perf_counter() - inicio) * 1000)
+        tiempos_ms.extend(tiempos_consulta)
+        por_consulta.append({
+            "consulta": consulta,
+            "origen": origen.name,
+            "filas": int(len(resultados_df)) if resultados_df is not None else 0,
+            "error": mensaje_error,
+            "mediana_ms": round(statistics.median(tiempos_consulta), 3),
+        })
+    tiempos_ordenados = sorted(tiempos_ms)
+    return {
+        "mediana_ms": round(statistics.median(tiempos_ordenados), 3),
+        "p95_ms": round(percentil(tiempos_ordenados, 95), 3),
+        "min_ms": round(tiempos_ordenados[0], 3),
+        "max_ms": round(tiempos_ordenados[-1], 3),
+        "mediciones": len(tiempos_ordenados),
+        "por_consulta": por_consulta,
+    }
+
+
+def ejecutar_suite(ruta_diccionario: str, ruta_descripciones: str, repeticiones: int = 5, consultas_por_flujo: int = 5,
+                   semilla: int = 2024, flujos: Optional[List[str]] = None) -> Dict[str, Any]:
+    """ Carga el motor, mide la carga y cada flujo de `buscar`, y devuelve el informe (serializable a JSON). """
+    inicio_carga = time.perf_counter()
+    motor = MotorBusqueda()
+    ok_dic, err_dic = motor.cargar_excel_diccionario(ruta_diccionario)
+    segundos_diccionario = time.perf_counter() - inicio_carga
+    ok_desc, err_desc = motor.cargar_excel_descripcion(ruta_descripciones)
+    segundos_carga = time.perf_counter() - inicio_carga
+    if not ok_dic or not ok_desc:
+        raise RuntimeError(f"No se pudieron cargar los archivos: {err_dic or err_desc}")
+
+    consultas = construir_consultas(motor, consultas_por_flujo, semilla)
+    resultados_flujos: Dict[str, Any] = {}
+    for nombre_flujo in (flujos or list(FLUJOS)):
+        if nombre_flujo not in FLUJOS:
+            raise ValueError(f"Flujo desconocido '{nombre_flujo}'. Disponibles: {', '.join(FLUJOS)}")
+        via_diccionario, descripcion_flujo = FLUJOS[nombre_flujo]
+        logger.info(f"Midiendo flujo '{nombre_flujo}' ({len(consultas[nombre_flujo])} consultas x {repeticiones} repeticiones)...")
+        resultados_flujos[nombre_flujo] = {"descripcion": descripcion_flujo, "via_diccionario": via_diccionario,
+                                           **_medir_flujo(motor, via_diccionario, consultas[nombre_flujo], repeticiones)}
+
+    return {
+        "version_formato": VERSION_FORMATO,
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+            "commit": _commit_actual(),
+        },
+        "corpus": {
+            "diccionario": str(ruta_diccionario),
+            "descripciones": str(ruta_descripciones),
+            "filas_diccionario": int(len(motor.datos_diccionario)),
+            "filas_descripciones": int(len(motor.datos_descripcion)),
+            "columnas_descripciones": int(motor.datos_descripcion.shape[1]),
+        },
+        "parametros": {"repeticiones": repeticiones, "consultas_por_flujo": consultas_por_flujo, "semilla": semilla},
+        "carga": {"segundos_diccionario": round(segundos_diccionario, 3), "segundos_total": round(segundos_carga, 3)},
+        "flujos": resultados_flujos,
+    }
+
+
+def comparar_informes(base: Dict[str, Any], actual: Dict[str, Any], tolerancia: float = 0.15, umbral_ms: float = 1.0) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """ Compara la mediana de cada flujo con la línea base.
+
+    Un flujo es regresión si es más lento que la base en más de `tolerancia` (relativo) y de `umbral_ms`
+    (absoluto, para no marcar ruido en flujos de pocos milisegundos). Devuelve (filas de comparación, avisos).
+    """
+    avisos: List[str] = []
+    corpus_base, corpus_actual = base.get("corpus", {}), actual.get("corpus", {})
+    for clave in ("filas_diccionario", "filas_descripciones", "columnas_descripciones"):
+        if corpus_base.get(clave) != corpus_actual.get(clave):
+            avisos.append(f"El corpus difiere en '{clave}': base={corpus_base.get(clave)}, actual={corpus_actual.get(clave)}.")
+    if base.get("parametros") != actual.get("parametros"):
+        avisos.append(f"Parámetros distintos: base={base.get('parametros')}, actual={actual.get('parametros')}.")
+
+    filas: List[Dict[str, Any]] = []
+    flujos_base, flujos_actual = base.get("flujos", {}), actual.get("flujos", {})
+    for nombre_flujo in sorted(set(flujos_base) | set(flujos_actual)):
+        if nombre_flujo not in flujos_base or nombre_flujo not in flujos_actual:
+            avisos.append(f"Flujo '{nombre_flujo}' solo presente en {'la base' if nombre_flujo in flujos_base else 'el informe actual'}.")
+            continue
+        ms_base = flujos_base[nombre_flujo]["mediana_ms"]
+        ms_actual = flujos_actual[nombre_flujo]["mediana_ms"]
+        variacion = (ms_actual - ms_base) / ms_base if ms_base > 0 else 0.0
+        es_regresion = variacion > tolerancia and (ms_actual - ms_base) > umbral_ms
+        es_mejora = variacion < -tolerancia and (ms_base - ms_actual) > umbral_ms
+        filas.append({"flujo": nombre_flujo, "base_ms": ms_base, "actual_ms": ms_actual, "variacion": round(variacion, 4),
+                      "estado": "REGRESION" if es_regresion else ("MEJORA" if es_mejora else "igual")})
+    return filas, avisos
+
+
+def formatear_comparacion(filas: List[Dict[str, Any]], avisos: List[str]) -> str:
+    lineas = [f"{'Flujo':<22}{'Base (ms)':>12}{'Actual (ms)':>14}{'Variación':>12}  Estado"]
+    for fila in filas:
+        lineas.append(f"{fila['flujo']:<22}{fila['base_ms']:>12.2f}{fila['actual_ms']:>14.2f}{fila['variacion'] * 100:>11.1f}%  {fila['estado']}")
+    lineas.extend(f"AVISO: {aviso}" for aviso in avisos)
+    return "\n".join(lineas)
+
+
+def formatear_informe(informe: Dict[str, Any]) -> str:
+    lineas = [f"Corpus: {informe['corpus']['filas_descripciones']} descripciones, {informe['corpus']['filas_diccionario']} FCDs. "
+              f"Carga: {informe['carga']['segundos_total']:.2f}s",
+              f"{'Flujo':<22}{'Mediana (ms)':>14}{'p95 (ms)':>12}{'Mín (ms)':>12}"]
+    for nombre_flujo, datos in informe["flujos"].items():
+        lineas.append(f"{nombre_flujo:<22}{datos['mediana_ms']:>14.2f}{datos['p95_ms']:>12.2f}{datos['min_ms']:>12.2f}")
+    return "\n".join(lineas)
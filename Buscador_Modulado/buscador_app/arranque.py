@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# buscador_app/arranque.py
+
+import importlib
+import importlib.util
+import logging
+import subprocess
+import sys
+import time
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from importlib import metadata as importlib_metadata # Python 3.8+
+except ImportError: # pragma: no cover - Python 3.7
+    importlib_metadata = None # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# (módulo importable, nombre de distribución en pip, ¿crítica?)
+DEPENDENCIAS_APP: List[Tuple[str, str, bool]] = [
+    ("pandas", "pandas", True),
+    ("openpyxl", "openpyxl", True),
+    ("numpy", "numpy", True),
+    ("xlrd", "xlrd", False),
+]
+
+
+class ModuloPerezoso(ModuleType):
+    """ Sustituto de un módulo que solo se importa al acceder al primero de sus atributos.
+
+    Permite escribir `pd = ModuloPerezoso("pandas")` a nivel de módulo sin pagar el coste
+    de importar pandas hasta que realmente se usa (p. ej. después de mostrar la ventana).
+    """
+
+    def __init__(self, nombre_modulo: str):
+        super().__init__(nombre_modulo)
+        self._nombre_modulo_real = nombre_modulo
+        self._modulo_real: Optional[ModuleType] = None
+
+    def _cargar(self) -> ModuleType:
+        if self._modulo_real is None:
+            self._modulo_real = importlib.import_module(self._nombre_modulo_real)
+        return self._modulo_real
+
+    def __getattr__(self, nombre_atributo: str):
+        return getattr(self._cargar(), nombre_atributo)
+
+
+def verificar_dependencias() -> Tuple[List[str], Dict[str, str]]:
+    """ Comprueba las dependencias sin importarlas (solo `find_spec` y metadatos instalados).
+
+    Devuelve (dependencias críticas faltantes, {nombre: versión} de las encontradas).
+    """
+    faltantes_criticas: List[str] = []
+    versiones: Dict[str, str] = {}
+    for nombre_modulo, nombre_distribucion, es_critica in DEPENDENCIAS_APP:
+        if importlib.util.find_spec(nombre_modulo) is None:
+            if es_critica:
+                faltantes_criticas.append(nombre_distribucion)
+            else:
+                logger.warning(f"{nombre_modulo} no encontrado. Carga de .xls antiguos podría fallar.")
+            continue
+        version = "desconocida"
+        if importlib_metadata is not None:
+            try:
+                version = importlib_metadata.version(nombre_distribucion)
+            except importlib_metadata.PackageNotFoundError:
+                pass
+        versiones[nombre_modulo] = version
+        logger.info(f"{nombre_modulo}: {version}")
+    return faltantes_criticas, versiones
+
+
+class MedidorArranque:
+    """ Registra hitos del arranque (en segundos desde la creación del medidor) y genera un informe. """
+
+    def __init__(self, activo: bool = True):
+        self.activo = activo
+        self._inicio = time.perf_counter()
+        self.hitos: List[Tuple[str, float]] = []
+
+    def marcar(self, nombre_hito: str):
+        if not self.activo:
+            return
+        transcurrido = time.perf_counter() - self._inicio
+        self.hitos.append((nombre_hito, transcurrido))
+        logger.info(f"Arranque: '{nombre_hito}' a los {transcurrido * 1000:.1f} ms")
+
+    def informe(self) -> str:
+        lineas = ["--- Tiempos de arranque (ms desde inicio) ---"]
+        anterior = 0.0
+        for nombre_hito, instante in self.hitos:
+            lineas.append(f"{instante * 1000:10.1f}  (+{(instante - anterior) * 1000:8.1f})  {nombre_hito}")
+            anterior = instante
+        return "\n".join(lineas)
+
+
+def desglose_importtime(modulo: str, top: int = 15) -> str:
+    """ Ejecuta `python -X importtime -c "import <modulo>"` en un subproceso y resume el resultado.
+
+    Agrupa por paquete de primer nivel (tiempo propio acumulado) y lista los `top` módulos
+    con mayor tiempo acumulado, al estilo de la salida de `-X importtime`.
+    """
+    comando = [sys.executable, "-X", "importtime", "-c", f"import {modulo}"]
+    try:
+        proceso = subprocess.run(comando, capture_output=True, text=True, timeout=300)
+    except (OSError, subprocess.SubprocessError) as e_proc:
+        return f"No se pudo medir importtime de '{modulo}': {e_proc}"
+
+    por_modulo: List[Tuple[int, int, str]] = [] # (propio_us, acumulado_us, módulo)
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        try: # Formato: "import time:   propio |  acumulado | módulo"
+            campo_propio, campo_acumulado, campo_nombre = linea.split(":", 1)[1].split("|")
+            propio_us = int(campo_propio.strip())
+            acumulado_us = int(campo_acumulado.strip())
+            nombre_modulo = campo_nombre.strip()
+        except ValueError:
+            continue
+        por_modulo.append((propio_us, acumulado_us, nombre_modulo))
+
+    if not por_modulo:
+        return f"Sin datos de importtime para '{modulo}' (código de salida {proceso.returncode}).\n{proceso.stderr[-500:]}"
+
+    por_paquete: Dict[str, int] = {}
+    for propio_us, _acumulado_us, nombre_modulo in por_modulo:
+        paquete = nombre_modulo.split(".")[0]
+        por_paquete[paquete] = por_paquete.get(paquete, 0) + propio_us
+
+    lineas = [f"--- Desglose -X importtime de '{modulo}' ---", "Por paquete (tiempo propio, ms):"]
+    for paquete, propio_us in sorted(por_paquete.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        lineas.append(f"{propio_us / 1000:10.1f}  {paquete}")
+    lineas.append("Módulos con mayor tiempo acumulado (ms):")
+    for _propio_us, acumulado_us, nombre_modulo in sorted(por_modulo, key=lambda t: t[1], reverse=True)[:top]:
+        lineas.append(f"{acumulado_us / 1000:10.1f}  {nombre_modulo}")
+    return "\n".join(lineas)
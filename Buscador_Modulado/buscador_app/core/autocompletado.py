@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/autocompletado.py
+
+import heapq
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Los prefijos que abarcan más de este número de términos tienen sus mejores sugerencias precalculadas;
+# para el resto basta recorrer su rango del array ordenado
+MAX_TERMINOS_RANGO_SIN_PRECALCULO = 256
+MAX_SUGERENCIAS_PRECALCULADAS = 20
+_FIN_PREFIJO = "\U0010ffff" # Mayor que cualquier carácter: prefijo + _FIN_PREFIJO acota el rango del prefijo
+MAX_PALABRAS_FRASE = 6 # Celdas más largas no se ofrecen como frase completa (solo sus palabras)
+
+
+def vocabulario_de_series(series: Iterable[pd.Series]) -> List[str]:
+    """ Palabras y frases (celdas de varias palabras) distintas de unas series de textos ya normalizados. """
+    vocabulario = set()
+    for serie in series:
+        for texto in serie.dropna().unique():
+            if not texto:
+                continue
+            palabras = texto.split()
+            vocabulario.update(palabras)
+            if 1 < len(palabras) <= MAX_PALABRAS_FRASE:
+                vocabulario.add(texto)
+    return sorted(vocabulario)
+
+
+def frecuencias_de_series(series: List[pd.Series]) -> Counter:
+    """ Para cada palabra, en cuántas filas aparece (en alguna de las series, alineadas por fila). """
+    frecuencias: Counter = Counter()
+    if not series:
+        return frecuencias
+    for textos_fila in zip(*(serie.tolist() for serie in series)):
+        palabras_fila = set()
+        for texto in textos_fila:
+            if texto:
+                palabras_fila.update(texto.split())
+        frecuencias.update(palabras_fila)
+    return frecuencias
+
+
+class IndiceAutocompletado:
+    """ Índice de prefijos sobre el vocabulario normalizado del diccionario.
+
+    Es un array ordenado (búsqueda binaria del rango de un prefijo) con un rango global por término:
+    más filas de descripciones con el término primero, después los más cortos. Para los prefijos
+    que abarcan muchos términos (los cortos), las mejores sugerencias se precalculan al construir,
+    así ninguna consulta recorre más de MAX_TERMINOS_RANGO_SIN_PRECALCULO términos.
+    La frecuencia de una frase es la de su palabra menos frecuente (cota superior de sus apariciones).
+    """
+
+    def __init__(self, vocabulario: List[str], frecuencias: Optional[Counter] = None):
+        inicio = time.perf_counter()
+        frecuencias = frecuencias or Counter()
+        self.terminos: List[str] = sorted(set(vocabulario))
+        self.frecuencias: List[int] = [min(frecuencias.get(palabra, 0) for palabra in termino.split()) for termino in self.terminos]
+
+        orden_global = sorted(range(len(self.terminos)), key=lambda i: (-self.frecuencias[i], len(self.terminos[i]), self.terminos[i]))
+        self._rango: List[int] = [0] * len(self.terminos)
+        for rango, posicion in enumerate(orden_global):
+            self._rango[posicion] = rango
+
+        self._mejores_por_prefijo: Dict[str, List[int]] = {}
+        self._precalcular_prefijos_amplios()
+        self.segundos_construccion = time.perf_counter() - inicio
+        logger.info(f"Índice de autocompletado: {len(self.terminos)} términos en {self.segundos_construccion:.3f}s.")
+
+    def _precalcular_prefijos_amplios(self):
+        """ Guarda las mejores posiciones de cada prefijo con más de MAX_TERMINOS_RANGO_SIN_PRECALCULO términos.
+
+        Se baja nivel a nivel (longitud de prefijo) solo por los rangos que siguen siendo amplios.
+        """
+        terminos = self.terminos
+        rangos_amplios = [(0, len(terminos))]
+        longitud = 1
+        while rangos_amplios:
+            siguientes = []
+            for desde, hasta in rangos_amplios:
+                posicion = desde
+                while posicion < hasta:
+                    if len(terminos[posicion]) < longitud: # Término igual al prefijo del nivel anterior: ya tratado
+                        posicion += 1
+                        continue
+                    prefijo = terminos[posicion][:longitud]
+                    fin = bisect_left(terminos, prefijo + _FIN_PREFIJO, posicion, hasta)
+                    if fin - posicion > MAX_TERMINOS_RANGO_SIN_PRECALCULO:
+                        self._mejores_por_prefijo[prefijo] = heapq.nsmallest(MAX_SUGERENCIAS_PRECALCULADAS, range(posicion, fin), key=self._rango.__getitem__)
+                        siguientes.append((posicion, fin))
+                    posicion = fin
+            rangos_amplios = siguientes
+            longitud += 1
+
+    def __len__(self) -> int:
+        return len(self.terminos)
+
+    def sugerir(self, prefijo_normalizado: str, limite: int = 10) -> List[str]:
+        """ Hasta `limite` términos que empiezan por `prefijo_normalizado`, los más frecuentes primero. """
+        if not prefijo_normalizado or limite <= 0:
+            return []
+        mejores = self._mejores_por_prefijo.get(prefijo_normalizado)
+        if mejores is not None and limite <= MAX_SUGERENCIAS_PRECALCULADAS:
+            posiciones = mejores[:limite]
+        else:
+            desde = bisect_left(self.terminos, prefijo_normalizado)
+            hasta = bisect_left(self.terminos, prefijo_normalizado + _FIN_PREFIJO, desde)
+            posiciones = heapq.nsmallest(limite, range(desde, hasta), key=self._rango.__getitem__)
+        return [self.terminos[posicion] for posicion in posiciones]
+
+    def frecuencia(self, termino_normalizado: str) -> int:
+        """ Filas de descripciones con el término (0 si no está en el vocabulario). """
+        posicion = bisect_left(self.terminos, termino_normalizado)
+        if posicion < len(self.terminos) and self.terminos[posicion] == termino_normalizado:
+            return self.frecuencias[posicion]
+        return 0
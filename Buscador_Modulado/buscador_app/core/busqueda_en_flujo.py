@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/busqueda_en_flujo.py
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..enums import OrigenResultados
+from .memoria import es_columna_texto, hay_pyarrow
+from .motor_busqueda import MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+FILAS_POR_BLOQUE_FLUJO = 100000 # Filas de descripciones en memoria a la vez
+FORMATOS_FLUJO = {".csv": "csv", ".parquet": "parquet"}
+
+
+def _formato_de(ruta: Path) -> str:
+    formato = FORMATOS_FLUJO.get(ruta.suffix.lower())
+    if formato is None:
+        raise ValueError(f"Formato no admitido para buscar por bloques: '{ruta.suffix}' (use {', '.join(FORMATOS_FLUJO)}).")
+    if formato == "parquet" and not hay_pyarrow():
+        raise ImportError("Para leer o escribir Parquet: pip install pyarrow")
+    return formato
+
+
+class FuenteEnFlujo:
+    """ Archivo CSV o Parquet de descripciones que se lee por bloques de `filas_por_bloque` filas.
+
+    Los tipos de las columnas se deducen del primer bloque (en Parquet, del esquema del archivo) y
+    las columnas de texto se leen como texto en todos los bloques, así las columnas de búsqueda son
+    las mismas en todo el archivo. Cada bloque conserva como índice la posición de sus filas en el archivo.
+    """
+
+    def __init__(self, ruta_str: str, filas_por_bloque: int = FILAS_POR_BLOQUE_FLUJO, separador: str = ","):
+        self.ruta = Path(ruta_str)
+        if not self.ruta.exists():
+            raise FileNotFoundError(f"¡Archivo no encontrado! Ruta: {self.ruta}")
+        self.formato = _formato_de(self.ruta)
+        self.filas_por_bloque = max(1, int(filas_por_bloque))
+        self.separador = separador
+        if self.formato == "csv":
+            muestra = pd.read_csv(self.ruta, sep=separador, nrows=self.filas_por_bloque, encoding="utf-8-sig")
+            self.columnas_texto = [c for c in muestra.columns if es_columna_texto(muestra[c])]
+            self.esquema = muestra.iloc[:1]
+        else:
+            import pyarrow.parquet as pq
+            archivo = pq.ParquetFile(self.ruta)
+            self.esquema = next(archivo.iter_batches(batch_size=1)).to_pandas() if archivo.metadata.num_rows else archivo.schema_arrow.empty_table().to_pandas()
+            self.columnas_texto = [c for c in self.esquema.columns if es_columna_texto(self.esquema[c])]
+
+    def bloques(self) -> Iterator[pd.DataFrame]:
+        if self.formato == "csv":
+            lector = pd.read_csv(self.ruta, sep=self.separador, chunksize=self.filas_por_bloque, encoding="utf-8-sig",
+                                 dtype={c: str for c in self.columnas_texto})
+            with lector:
+                yield from lector # El lector numera las filas de forma continua entre bloques
+            return
+        import pyarrow.parquet as pq
+        desde = 0
+        for lote in pq.ParquetFile(self.ruta).iter_batches(batch_size=self.filas_por_bloque):
+            bloque = lote.to_pandas()
+            bloque.index = pd.RangeIndex(desde, desde + len(bloque))
+            desde += len(bloque)
+            yield bloque
+
+
+class ResultadoFlujo:
+    """ Resultado de una búsqueda por bloques: se itera una vez y produce las filas encontradas en cada bloque.
+
+    Los metadatos se completan al iterar: `origen`, `fcds` e `indices_fcds` son los del primer bloque con filas
+    (o los del último si ninguno tiene) y `error` el del primer bloque que falló, que detiene la búsqueda.
+    """
+
+    def __init__(self, bloques: Iterator[Tuple[pd.DataFrame, Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]]]):
+        self._bloques = bloques
+        self.origen = OrigenResultados.NINGUNO
+        self.fcds: Optional[pd.DataFrame] = None
+        self.indices_fcds: Optional[List[int]] = None
+        self.error: Optional[str] = None
+        self.bloques_leidos = 0
+        self.filas_leidas = 0
+        self.filas_encontradas = 0
+        self._con_filas = False
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for bloque, (resultados_df, origen, fcds_df, indices_fcds, mensaje_error) in self._bloques:
+            self.bloques_leidos += 1
+            self.filas_leidas += len(bloque)
+            if not self._con_filas:
+                self.origen, self.fcds, self.indices_fcds = origen, fcds_df, indices_fcds
+            if resultados_df is None or mensaje_error is not None: # Errores de carga, configuración o sintaxis: iguales en todos los bloques
+                self.error = mensaje_error or "Error al buscar en el bloque."
+                return
+            if not resultados_df.empty:
+                self._con_filas = True
+                self.filas_encontradas += len(resultados_df)
+                yield resultados_df
+
+
+class EscritorResultados:
+    """ Escribe bloques de filas en un CSV o Parquet, a medida que llegan. El archivo se crea con el primer bloque. """
+
+    def __init__(self, ruta_str: str):
+        self.ruta = Path(ruta_str)
+        self.formato = _formato_de(self.ruta)
+        self.filas_escritas = 0
+        self._escritor_parquet: Any = None
+        self._esquema_parquet: Any = None
+
+    def escribir(self, filas_df: pd.DataFrame):
+        if self.formato == "csv":
+            filas_df.to_csv(self.ruta, mode="w" if self.filas_escritas == 0 else "a", header=self.filas_escritas == 0,
+                            index=False, encoding="utf-8-sig" if self.filas_escritas == 0 else "utf-8")
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._escritor_parquet is None:
+                esquema = pa.Schema.from_pandas(filas_df, preserve_index=False)
+                for i, campo in enumerate(esquema): # Texto siempre como texto: un bloque con la columna vacía no cambia el tipo
+                    if es_columna_texto(filas_df[campo.name]):
+                        esquema = esquema.set(i, pa.field(campo.name, pa.string()))
+                self._esquema_parquet = esquema
+                self._escritor_parquet = pq.ParquetWriter(self.ruta, esquema)
+            self._escritor_parquet.write_table(pa.Table.from_pandas(filas_df, schema=self._esquema_parquet, preserve_index=False))
+        self.filas_escritas += len(filas_df)
+
+    def cerrar(self, columnas: Optional[List[Any]] = None):
+        """ Cierra el archivo. Sin filas escritas, deja un archivo vacío con las `columnas` indicadas. """
+        if self.filas_escritas == 0 and columnas is not None:
+            self.escribir(pd.DataFrame(columns=columnas))
+        if self._escritor_parquet is not None:
+            self._escritor_parquet.close()
+            self._escritor_parquet = None
+
+
+class BusquedaEnFlujo:
+    """ Búsquedas sobre unas descripciones que no caben en memoria, leyéndolas por bloques.
+
+    Usa un motor propio que comparte el diccionario del motor base y cuyas "descripciones" son solo
+    una fila con los tipos de las columnas; cada bloque se evalúa con `MotorBusqueda.buscar_en_bloque`,
+    con la misma semántica que la búsqueda en memoria. La memoria usada es la de un bloque (y sus
+    máscaras) más las filas encontradas que se estén consumiendo.
+    """
+
+    def __init__(self, motor_base: MotorBusqueda, ruta_str: str, filas_por_bloque: int = FILAS_POR_BLOQUE_FLUJO, separador: str = ","):
+        self.fuente = FuenteEnFlujo(ruta_str, filas_por_bloque, separador)
+        self.motor = motor_base.motor_con_misma_configuracion()
+        self.motor.compartir_datos_de(motor_base, diccionario=True, descripcion=False)
+        self.motor.datos_descripcion = self.fuente.esquema
+        self.motor.archivo_descripcion_actual = self.fuente.ruta
+
+    def buscar(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool) -> ResultadoFlujo:
+        """ Resultado que, al iterarlo, lee el archivo bloque a bloque y produce las filas encontradas en cada uno. """
+        memo: Dict[Any, Any] = {} # Compartida por todos los bloques de esta búsqueda
+        bloques = ((bloque, self.motor.buscar_en_bloque(termino_busqueda_original, buscar_via_diccionario_flag, bloque, memo))
+                   for bloque in self.fuente.bloques())
+        return ResultadoFlujo(bloques)
+
+    def exportar(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, ruta_salida: str) -> Dict[str, Any]:
+        """ Escribe en `ruta_salida` (CSV o Parquet) las filas encontradas, bloque a bloque. Devuelve un resumen. """
+        return self.exportar_lote([(termino_busqueda_original, ruta_salida)], buscar_via_diccionario_flag)[0]
+
+    def exportar_lote(self, consultas_y_salidas: List[Tuple[str, str]], buscar_via_diccionario_flag: bool) -> List[Dict[str, Any]]:
+        """ Como `exportar` para varias consultas con una sola lectura del archivo: cada bloque se evalúa con todas. """
+        inicio = time.perf_counter()
+        escritores = [EscritorResultados(ruta_salida) for _consulta, ruta_salida in consultas_y_salidas]
+        resumenes: List[Dict[str, Any]] = [{"consulta": consulta, "archivo": str(escritor.ruta), "origen": OrigenResultados.NINGUNO.name,
+                                            "num_fcds": 0, "num_filas": 0, "error": None, "ms": 0.0}
+                                           for (consulta, _ruta), escritor in zip(consultas_y_salidas, escritores)]
+        memo: Dict[Any, Any] = {}
+        filas_leidas = bloques_leidos = 0
+        try:
+            for bloque in self.fuente.bloques():
+                bloques_leidos += 1
+                filas_leidas += len(bloque)
+                for (consulta, _ruta), escritor, resumen in zip(consultas_y_salidas, escritores, resumenes):
+                    if resumen["error"] is not None:
+                        continue
+                    inicio_consulta = time.perf_counter()
+                    resultados_df, origen, fcds_df, _indices, mensaje_error = self.motor.buscar_en_bloque(consulta, buscar_via_diccionario_flag, bloque, memo)
+                    if resumen["num_filas"] == 0: # Metadatos del primer bloque con filas (o del último)
+                        resumen["origen"], resumen["num_fcds"] = origen.name, int(len(fcds_df)) if fcds_df is not None else 0
+                    if resultados_df is None or mensaje_error is not None:
+                        resumen["error"] = mensaje_error or "Error al buscar en el bloque."
+                    elif not resultados_df.empty:
+                        escritor.escribir(resultados_df)
+                        resumen["num_filas"] += len(resultados_df)
+                    resumen["ms"] += (time.perf_counter() - inicio_consulta) * 1000
+        finally:
+            for escritor in escritores:
+                escritor.cerrar(columnas=list(self.fuente.esquema.columns))
+        for resumen in resumenes:
+            resumen["ms"] = round(resumen["ms"], 3)
+        logger.info(f"Búsqueda por bloques en '{self.fuente.ruta.name}': {len(consultas_y_salidas)} consultas, {filas_leidas} filas "
+                    f"en {bloques_leidos} bloques en {time.perf_counter() - inicio:.2f}s.")
+        return resumenes
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/concurrencia.py
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class CerrojoLectorEscritor:
+    """ Cerrojo de lectores/escritor con preferencia de escritura.
+
+    Muchos lectores (búsquedas) pueden mantenerlo a la vez. Un escritor espera a que terminen
+    los lectores en curso y, mientras espera, no se admiten lectores nuevos (evita inanición).
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores_activos = 0
+        self._escritores_esperando = 0
+        self._escritor_activo = False
+
+    def adquirir_lectura(self):
+        with self._condicion:
+            while self._escritor_activo or self._escritores_esperando > 0:
+                self._condicion.wait()
+            self._lectores_activos += 1
+
+    def liberar_lectura(self):
+        with self._condicion:
+            self._lectores_activos -= 1
+            if self._lectores_activos == 0:
+                self._condicion.notify_all()
+
+    def adquirir_escritura(self):
+        with self._condicion:
+            self._escritores_esperando += 1
+            try:
+                while self._escritor_activo or self._lectores_activos > 0:
+                    self._condicion.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escritor_activo = True
+
+    def liberar_escritura(self):
+        with self._condicion:
+            self._escritor_activo = False
+            self._condicion.notify_all()
+
+    @contextmanager
+    def lectura(self) -> Iterator[None]:
+        self.adquirir_lectura()
+        try:
+            yield
+        finally:
+            self.liberar_lectura()
+
+    @contextmanager
+    def escritura(self) -> Iterator[None]:
+        self.adquirir_escritura()
+        try:
+            yield
+        finally:
+            self.liberar_escritura()
+
+    @property
+    def lectores_activos(self) -> int:
+        return self._lectores_activos
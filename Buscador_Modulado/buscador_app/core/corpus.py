@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/corpus.py
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..enums import OrigenResultados
+from .concurrencia import CerrojoLectorEscritor
+from .motor_busqueda import MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+COLUMNA_FUENTE = "Fuente" # Columna que indica la fuente de cada fila del resultado
+NIVEL_INDICE_FUENTE = "nombre_fuente" # Primer nivel del índice del resultado (distinto de cualquier columna)
+COLUMNA_FUENTE_DEL_ARCHIVO = "Fuente (archivo)" # Nombre en el resultado de una columna "Fuente" propia de una fuente
+MAX_HILOS_CORPUS = min(8, os.cpu_count() or 1)
+
+ResultadoTupla = Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]
+
+
+class FuenteDescripciones:
+    """ Un archivo de descripciones del corpus con su propio motor (datos e índices), que comparte el diccionario. """
+
+    def __init__(self, nombre: str, ruta: Path, motor: MotorBusqueda, segundos_carga: float):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.motor = motor
+        self.segundos_carga = segundos_carga
+        self.instante_carga = time.time()
+
+    @property
+    def filas(self) -> int:
+        return int(len(self.motor.datos_descripcion)) if self.motor.datos_descripcion is not None else 0
+
+    def a_dict(self) -> Dict[str, object]:
+        return {"nombre": self.nombre, "ruta": str(self.ruta), "filas": self.filas,
+                "segundos_carga": round(self.segundos_carga, 3), "instante_carga": self.instante_carga}
+
+
+class CorpusDescripciones:
+    """ Varias fuentes de descripciones con nombre (una por planta o proveedor) y un diccionario común.
+
+    Cada fuente tiene su propio `MotorBusqueda`, que comparte sin copiar el diccionario del motor
+    base e indexa solo sus descripciones. Cargar, recargar o quitar una fuente construye o retira
+    solo su motor: las demás no se reindexan, y la sustitución es atómica (las búsquedas en curso
+    terminan con las fuentes que había al empezar). `buscar` consulta las fuentes en paralelo y
+    etiqueta cada fila con su fuente.
+    """
+
+    def __init__(self, motor_base: Optional[MotorBusqueda] = None, max_hilos: int = MAX_HILOS_CORPUS):
+        self.motor_base = motor_base or MotorBusqueda() # Diccionario y configuración que heredan las fuentes
+        self._fuentes: Dict[str, FuenteDescripciones] = {}
+        self._cerrojo = threading.Lock() # Solo protege el diccionario de fuentes, nunca una carga
+        self._cerrojo_cargas = CerrojoLectorEscritor() # Cargas de fuentes (lectura) frente a cambio de diccionario (escritura)
+        self._max_hilos = max(1, max_hilos)
+        self._ejecutor: Optional[ThreadPoolExecutor] = None
+
+    def _nuevo_motor(self) -> MotorBusqueda:
+        """ Motor sin descripciones con la configuración y el diccionario del motor base. """
+        motor = self.motor_base.motor_con_misma_configuracion()
+        motor.compartir_datos_de(self.motor_base, diccionario=True, descripcion=False)
+        return motor
+
+    def cargar_diccionario(self, ruta_str: str) -> Tuple[bool, Optional[str]]:
+        """ Carga el diccionario común y lo pasa a todas las fuentes, sin reindexar sus descripciones. """
+        motor_base = self.motor_base.motor_con_misma_configuracion()
+        ok_dic, err_dic = motor_base.cargar_excel_diccionario(ruta_str)
+        if not ok_dic:
+            return False, err_dic
+        with self._cerrojo_cargas.escritura(): # Las cargas de fuentes en curso terminan antes con el diccionario anterior
+            self.motor_base = motor_base
+            with self._cerrojo:
+                fuentes = list(self._fuentes.values())
+            for fuente in fuentes:
+                motor = self._nuevo_motor()
+                motor.compartir_datos_de(fuente.motor, diccionario=False, descripcion=True)
+                self._publicar(FuenteDescripciones(fuente.nombre, fuente.ruta, motor, fuente.segundos_carga), sustituye_a=fuente)
+        logger.info(f"Corpus: diccionario '{Path(ruta_str).name}' aplicado a {len(fuentes)} fuentes.")
+        return True, None
+
+    def _publicar(self, fuente: FuenteDescripciones, sustituye_a: Optional[FuenteDescripciones] = None):
+        with self._cerrojo:
+            # Si la fuente se quitó o se volvió a cargar mientras tanto, no se pisa el cambio más reciente
+            if sustituye_a is None or self._fuentes.get(fuente.nombre) is sustituye_a:
+                self._fuentes[fuente.nombre] = fuente
+
+    def cargar_fuente(self, nombre: str, ruta_str: str) -> Tuple[bool, Optional[str]]:
+        """ Añade la fuente `nombre` (o la sustituye si ya existía) con las descripciones de `ruta_str`. """
+        nombre = str(nombre).strip()
+        if not nombre:
+            return False, "La fuente necesita un nombre."
+        inicio = time.perf_counter()
+        with self._cerrojo_cargas.lectura(): # Varias fuentes pueden cargarse a la vez; las búsquedas no esperan
+            motor = self._nuevo_motor()
+            ok_desc, err_desc = motor.cargar_excel_descripcion(ruta_str)
+            if not ok_desc:
+                return False, err_desc
+            if COLUMNA_FUENTE in motor.datos_descripcion.columns:
+                logger.warning(f"Corpus: la fuente '{nombre}' ya tiene una columna '{COLUMNA_FUENTE}'; "
+                               f"en los resultados del corpus aparece como '{COLUMNA_FUENTE_DEL_ARCHIVO}'.")
+            fuente = FuenteDescripciones(nombre, Path(ruta_str), motor, time.perf_counter() - inicio)
+            self._publicar(fuente)
+        logger.info(f"Corpus: fuente '{nombre}' cargada desde '{fuente.ruta.name}' ({fuente.filas} filas) en {fuente.segundos_carga:.2f}s.")
+        return True, None
+
+    def recargar_fuente(self, nombre: str) -> Tuple[bool, Optional[str]]:
+        """ Vuelve a leer del disco el archivo de la fuente `nombre`. """
+        fuente = self._fuentes.get(nombre)
+        if fuente is None:
+            return False, f"Fuente '{nombre}' no cargada."
+        return self.cargar_fuente(nombre, str(fuente.ruta))
+
+    def descargar_fuente(self, nombre: str) -> bool:
+        with self._cerrojo:
+            fuente = self._fuentes.pop(nombre, None)
+        if fuente is not None:
+            logger.info(f"Corpus: fuente '{nombre}' descargada.")
+        return fuente is not None
+
+    def nombres_fuentes(self) -> List[str]:
+        with self._cerrojo:
+            return list(self._fuentes)
+
+    def fuente(self, nombre: str) -> Optional[FuenteDescripciones]:
+        return self._fuentes.get(nombre)
+
+    def estado(self) -> List[Dict[str, object]]:
+        with self._cerrojo:
+            fuentes = list(self._fuentes.values())
+        return [fuente.a_dict() for fuente in fuentes]
+
+    def _obtener_ejecutor(self) -> ThreadPoolExecutor:
+        with self._cerrojo:
+            if self._ejecutor is None:
+                self._ejecutor = ThreadPoolExecutor(max_workers=self._max_hilos, thread_name_prefix="fuente")
+            return self._ejecutor
+
+    def cerrar(self):
+        """ Detiene los hilos de búsqueda (se vuelven a crear si se busca de nuevo). """
+        with self._cerrojo:
+            ejecutor, self._ejecutor = self._ejecutor, None
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=True)
+
+    def buscar_por_fuente(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool,
+                          fuentes: Optional[List[str]] = None) -> Dict[str, ResultadoTupla]:
+        """ Resultado de `MotorBusqueda.buscar` en cada fuente (todas, o las de `fuentes`), buscadas en paralelo. """
+        with self._cerrojo:
+            elegidas = [self._fuentes[n] for n in (fuentes if fuentes is not None else self._fuentes) if n in self._fuentes]
+        if fuentes is not None and len(elegidas) < len(fuentes):
+            logger.warning(f"Corpus: fuentes no cargadas ignoradas: {sorted(set(fuentes) - {f.nombre for f in elegidas})}")
+        if len(elegidas) <= 1: # Sin paralelismo que aprovechar
+            return {f.nombre: f.motor.buscar(termino_busqueda_original, buscar_via_diccionario_flag) for f in elegidas}
+
+        ejecutor = self._obtener_ejecutor()
+        futuros = {f.nombre: ejecutor.submit(f.motor.buscar, termino_busqueda_original, buscar_via_diccionario_flag) for f in elegidas}
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+    def buscar(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, fuentes: Optional[List[str]] = None) -> ResultadoTupla:
+        """ Busca en todas las fuentes (o en `fuentes`) y une las filas, con el mismo formato que `MotorBusqueda.buscar`.
+
+        Las filas van en el orden de las fuentes y, dentro de cada una, en el de su archivo. El índice es
+        (fuente, id de fila en su archivo), la primera columna, `COLUMNA_FUENTE`, repite la fuente y el resto
+        son la unión de las columnas de las fuentes (vacías en las filas de fuentes que no las tienen; una columna
+        "Fuente" propia de una fuente se llama `COLUMNA_FUENTE_DEL_ARCHIVO`). El
+        origen es el de la primera fuente con filas (o el de la primera si ninguna tiene); los FCDs son
+        los del diccionario común. El error solo se devuelve si ninguna fuente tuvo resultados.
+        """
+        inicio = time.perf_counter()
+        por_fuente = self.buscar_por_fuente(termino_busqueda_original, buscar_via_diccionario_flag, fuentes)
+        if not por_fuente:
+            return None, OrigenResultados.ERROR_CARGA_DESCRIPCION, None, None, "No hay fuentes de descripciones cargadas."
+
+        partes: Dict[str, pd.DataFrame] = {}
+        errores: List[str] = []
+        for nombre, (resultados_df, _origen, _fcds, _indices, mensaje_error) in por_fuente.items():
+            if mensaje_error:
+                errores.append(f"{nombre}: {mensaje_error}")
+            if resultados_df is not None and not resultados_df.empty:
+                partes[nombre] = resultados_df.rename(columns={COLUMNA_FUENTE: COLUMNA_FUENTE_DEL_ARCHIVO}) \
+                    if COLUMNA_FUENTE in resultados_df.columns else resultados_df
+        con_filas = [nombre for nombre in por_fuente if nombre in partes]
+        _df, origen, fcds_df, indices_fcds, mensaje_error = por_fuente[con_filas[0] if con_filas else next(iter(por_fuente))]
+        if errores:
+            logger.warning(f"Corpus: errores en {len(errores)} fuentes para '{termino_busqueda_original}': {errores}")
+
+        if partes:
+            resultados_df = pd.concat(list(partes.values()), keys=list(partes), names=[NIVEL_INDICE_FUENTE, None])
+            resultados_df.insert(0, COLUMNA_FUENTE, resultados_df.index.get_level_values(0))
+            mensaje_error = None
+        else:
+            resultados_df = pd.DataFrame(columns=[COLUMNA_FUENTE])
+            if mensaje_error and len(errores) > 1:
+                mensaje_error = "; ".join(errores)
+        logger.info(f"Corpus.buscar: '{termino_busqueda_original}' en {len(por_fuente)} fuentes: {len(resultados_df)} filas "
+                    f"de {len(partes)} fuentes en {time.perf_counter() - inicio:.3f}s.")
+        return resultados_df, origen, fcds_df, indices_fcds, mensaje_error
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/estadisticas.py
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Orden de presentación de las etapas conocidas (las desconocidas se muestran al final)
+ORDEN_ETAPAS = ["parseo", "busqueda_diccionario", "expansion", "expansion_difusa", "busqueda_descripciones", "negaciones", "relevancia", "materializacion"]
+
+
+class MedicionEtapa:
+    """ Acumulado de una etapa: tiempo propio (sin etapas anidadas), llamadas y filas de entrada/salida. """
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.segundos = 0.0
+        self.llamadas = 0
+        self.filas_entrada = 0
+        self.filas_salida = 0
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {"segundos": round(self.segundos, 6), "llamadas": self.llamadas,
+                "filas_entrada": self.filas_entrada, "filas_salida": self.filas_salida}
+
+
+class RegistroEtapa:
+    """ Lo que recibe el bloque `with estadisticas.etapa(...)`: permite anotar las filas que sobreviven. """
+
+    def __init__(self):
+        self.filas_salida: Optional[int] = None
+
+
+class EstadisticasBusqueda:
+    """ Estadísticas de una llamada a `MotorBusqueda.buscar` (se pasa como `estadisticas=` y el motor la rellena).
+
+    Las etapas anidadas descuentan su tiempo de la etapa que las contiene, así que la suma de las
+    etapas más el tiempo "sin etapa" es el total de la búsqueda.
+    """
+
+    def __init__(self):
+        self.consulta: str = ""
+        self.via_diccionario: bool = True
+        self.origen: Optional[str] = None
+        self.segundos_total = 0.0
+        self.filas_resultado = 0
+        self.fcds_encontrados = 0
+        self.sinonimos_expandidos = 0
+        self.plan: Dict[str, Any] = {} # Consulta parseada: positivos, negativos, filtro numérico, partes AND...
+        self.etapas: Dict[str, MedicionEtapa] = {}
+        self.aciertos_cache: Dict[str, int] = {}
+        self.fallos_cache: Dict[str, int] = {}
+        self._pila: List[List[Any]] = [] # [nombre, inicio, segundos de etapas hijas]
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: int = 0) -> Iterator[RegistroEtapa]:
+        registro = RegistroEtapa()
+        marco = [nombre, time.perf_counter(), 0.0]
+        self._pila.append(marco)
+        try:
+            yield registro
+        finally:
+            self._pila.pop()
+            transcurrido = time.perf_counter() - marco[1]
+            if self._pila:
+                self._pila[-1][2] += transcurrido
+            medicion = self.etapas.get(nombre)
+            if medicion is None:
+                medicion = self.etapas[nombre] = MedicionEtapa(nombre)
+            medicion.segundos += transcurrido - marco[2]
+            medicion.llamadas += 1
+            medicion.filas_entrada += filas_entrada
+            medicion.filas_salida += registro.filas_salida if registro.filas_salida is not None else 0
+
+    def registrar_cache(self, nombre_cache: str, acierto: bool, cantidad: int = 1):
+        destino = self.aciertos_cache if acierto else self.fallos_cache
+        destino[nombre_cache] = destino.get(nombre_cache, 0) + cantidad
+
+    def etapas_ordenadas(self) -> List[MedicionEtapa]:
+        return sorted(self.etapas.values(), key=lambda m: (ORDEN_ETAPAS.index(m.nombre) if m.nombre in ORDEN_ETAPAS else len(ORDEN_ETAPAS), m.nombre))
+
+    def resumen(self) -> str:
+        """ Una línea para la barra de estado. """
+        partes = [f"{self.segundos_total * 1000:.0f} ms"]
+        for medicion in self.etapas_ordenadas():
+            if medicion.segundos * 1000 >= 1:
+                partes.append(f"{medicion.nombre} {medicion.segundos * 1000:.0f}")
+        if self.sinonimos_expandidos:
+            partes.append(f"{self.sinonimos_expandidos} sinónimos")
+        return " · ".join(partes)
+
+    def detalle(self) -> str:
+        """ Desglose completo en texto (varias líneas). """
+        lineas = [
+            f"Consulta: '{self.consulta}' ({'vía diccionario' if self.via_diccionario else 'directa'})",
+            f"Origen: {self.origen}",
+            f"Plan: {self.plan}",
+            f"Total: {self.segundos_total * 1000:.2f} ms  |  Filas resultado: {self.filas_resultado}  |  FCDs: {self.fcds_encontrados}  |  Sinónimos expandidos: {self.sinonimos_expandidos}",
+            "",
+            f"{'Etapa':<24}{'ms':>10}{'%':>7}{'Llamadas':>10}{'Filas entrada':>15}{'Filas salida':>14}",
+        ]
+        segundos_en_etapas = 0.0
+        for medicion in self.etapas_ordenadas():
+            segundos_en_etapas += medicion.segundos
+            porcentaje = medicion.segundos / self.segundos_total * 100 if self.segundos_total > 0 else 0.0
+            lineas.append(f"{medicion.nombre:<24}{medicion.segundos * 1000:>10.2f}{porcentaje:>7.1f}{medicion.llamadas:>10}{medicion.filas_entrada:>15}{medicion.filas_salida:>14}")
+        lineas.append(f"{'(sin etapa)':<24}{max(0.0, self.segundos_total - segundos_en_etapas) * 1000:>10.2f}")
+        if self.aciertos_cache or self.fallos_cache:
+            lineas.append("")
+            lineas.append("Cachés (aciertos / fallos):")
+            for nombre_cache in sorted(set(self.aciertos_cache) | set(self.fallos_cache)):
+                lineas.append(f"  {nombre_cache}: {self.aciertos_cache.get(nombre_cache, 0)} / {self.fallos_cache.get(nombre_cache, 0)}")
+        return "\n".join(lineas)
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            "consulta": self.consulta,
+            "via_diccionario": self.via_diccionario,
+            "origen": self.origen,
+            "segundos_total": round(self.segundos_total, 6),
+            "filas_resultado": self.filas_resultado,
+            "fcds_encontrados": self.fcds_encontrados,
+            "sinonimos_expandidos": self.sinonimos_expandidos,
+            "plan": self.plan,
+            "etapas": {m.nombre: m.a_dict() for m in self.etapas_ordenadas()},
+            "aciertos_cache": dict(self.aciertos_cache),
+            "fallos_cache": dict(self.fallos_cache),
+        }
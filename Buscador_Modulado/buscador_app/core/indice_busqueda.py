@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/indice_busqueda.py
+
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .memoria import normalizar_serie
+from .indice_difuso import IndiceDifuso, palabras_de_series
+from .indice_palabras import IndicePalabras
+from .relevancia import IndiceRelevancia
+from .indice_numerico import ColumnaNumerica
+
+logger = logging.getLogger(__name__)
+
+# Clave usada en DataFrame.attrs para reconocer el índice del que deriva un DataFrame.
+# pandas propaga `attrs` en copias, filtrados por máscara y selecciones .loc/.iloc,
+# por lo que los subconjuntos de filas que maneja el motor conservan la referencia.
+CLAVE_ATTRS_INDICE = "token_indice_busqueda"
+
+_contador_tokens = itertools.count(1)
+
+
+class IndiceBusqueda:
+    """ Índice en memoria de un DataFrame cargado (diccionario o descripciones).
+
+    Guarda, por cada columna de búsqueda, la serie de textos ya normalizados con el
+    normalizador del motor. Así las búsquedas no vuelven a normalizar cada celda en
+    cada término: toman la serie cacheada y la recortan a las filas del DataFrame objetivo.
+    """
+
+    def __init__(self, df_base: pd.DataFrame, columnas: List[str], normalizador: Callable[[str], str], nombre: str = ""):
+        self.nombre = nombre
+        self.token = f"{nombre or 'indice'}-{next(_contador_tokens)}"
+        self.columnas: List[str] = [c for c in columnas if c in df_base.columns]
+        self.num_filas = len(df_base)
+        self.indice_filas: pd.Index = df_base.index
+        self.series_normalizadas: Dict[str, pd.Series] = {}
+        self.series_originales: Dict[str, pd.Series] = {c: df_base[c] for c in self.columnas} # Sin copiar: las ocurrencias numéricas se leen del texto original
+
+        inicio = time.perf_counter()
+        for nombre_columna in self.columnas:
+            self.series_normalizadas[nombre_columna] = normalizar_serie(df_base[nombre_columna], normalizador)
+        self.segundos_construccion = time.perf_counter() - inicio
+
+        self._indice_difuso: Optional[IndiceDifuso] = None # Se construye con la primera búsqueda difusa (`~término`)
+        self._cerrojo_difuso = threading.Lock()
+        # Posiciones del último conjunto de filas recortado: los términos de una consulta recortan muchas series a las mismas filas
+        self._ultimo_recorte: Optional[Tuple[pd.Index, np.ndarray]] = None
+        self._indice_relevancia: Optional[IndiceRelevancia] = None # Se construye con la primera búsqueda por relevancia
+        self._filas_sin_valores: Optional[pd.DataFrame] = None # Se construye con la primera búsqueda por relevancia
+        self._cerrojo_relevancia = threading.Lock()
+        self._indices_palabras: Dict[str, IndicePalabras] = {} # Por columna, construidos con el primer lote que los usa
+        self._cerrojo_palabras = threading.Lock()
+        # Ocurrencias numéricas por columna, construidas con la primera comparación numérica; dependen de las
+        # unidades del diccionario, así que se descartan si cambia el álgebra de unidades con que se pidieron
+        self._columnas_numericas: Dict[str, ColumnaNumerica] = {}
+        self._algebra_columnas_numericas: Any = None
+        self._cerrojo_numerico = threading.Lock()
+
+        df_base.attrs[CLAVE_ATTRS_INDICE] = self.token # Marcar el DataFrame base (y sus derivados)
+        logger.info(f"Índice '{self.token}' construido: {len(self.columnas)} columnas, {self.num_filas} filas en {self.segundos_construccion:.3f}s.")
+
+    def indice_difuso(self) -> IndiceDifuso:
+        """ Índice de trigramas del vocabulario de las columnas indexadas, construido la primera vez que se pide. """
+        with self._cerrojo_difuso:
+            if self._indice_difuso is None:
+                self._indice_difuso = IndiceDifuso(palabras_de_series(self.series_normalizadas.values()))
+            return self._indice_difuso
+
+    def indice_relevancia(self, obtener_series: Callable[[], List[pd.Series]]) -> IndiceRelevancia:
+        """ Listas invertidas BM25 de las filas, construidas la primera vez que se piden con las series de `obtener_series`. """
+        with self._cerrojo_relevancia:
+            if self._indice_relevancia is None:
+                self._indice_relevancia = IndiceRelevancia(obtener_series())
+            return self._indice_relevancia
+
+    def filas_sin_valores(self) -> pd.DataFrame:
+        """ Las filas del DataFrame base con sus columnas indexadas a cero (int8), marcado con el token del índice.
+
+        Una búsqueda sobre él lee los textos del índice y no las celdas, así que encuentra las mismas filas que
+        sobre el DataFrame base sin copiar sus valores: sirve cuando solo interesan los ids de fila del resultado.
+        """
+        with self._cerrojo_relevancia:
+            if self._filas_sin_valores is None:
+                ceros = np.zeros(self.num_filas, dtype=np.int8)
+                self._filas_sin_valores = pd.DataFrame({c: ceros for c in self.columnas}, index=self.indice_filas)
+                self._filas_sin_valores.attrs[CLAVE_ATTRS_INDICE] = self.token
+            return self._filas_sin_valores
+
+    def indice_palabras(self, nombre_columna: str) -> Optional[IndicePalabras]:
+        """ Listas invertidas de palabras de la columna normalizada, construidas la primera vez que se piden. """
+        serie_normalizada = self.series_normalizadas.get(nombre_columna)
+        if serie_normalizada is None:
+            return None
+        with self._cerrojo_palabras:
+            indice = self._indices_palabras.get(nombre_columna)
+            if indice is None:
+                indice = IndicePalabras(serie_normalizada)
+                self._indices_palabras[nombre_columna] = indice
+            return indice
+
+    def columna_numerica(self, nombre_columna: str, algebra: Any, construir: Callable[[pd.Series], ColumnaNumerica]) -> Optional[ColumnaNumerica]:
+        """ Ocurrencias numéricas de la columna (en unidades base de `algebra`), construidas con `construir` la primera vez. """
+        serie_original = self.series_originales.get(nombre_columna)
+        if serie_original is None:
+            return None
+        with self._cerrojo_numerico:
+            if self._algebra_columnas_numericas is not algebra: # Diccionario recargado: otras unidades
+                self._columnas_numericas = {}
+                self._algebra_columnas_numericas = algebra
+            columna = self._columnas_numericas.get(nombre_columna)
+            if columna is None:
+                columna = construir(serie_original)
+                self._columnas_numericas[nombre_columna] = columna
+            return columna
+
+    def serie_normalizada(self, nombre_columna: str, indice_filas: pd.Index) -> Optional[pd.Series]:
+        """ Devuelve la columna normalizada restringida a `indice_filas` (None si la columna no está indexada). """
+        serie_completa = self.series_normalizadas.get(nombre_columna)
+        if serie_completa is None:
+            return None
+        return self.restringir(serie_completa, indice_filas)
+
+    def restringir(self, serie_completa: pd.Series, indice_filas: pd.Index) -> Optional[pd.Series]:
+        """ Recorta una serie alineada con el DataFrame base a `indice_filas` (None si hay filas ajenas al base). """
+        if len(indice_filas) == self.num_filas and indice_filas.equals(serie_completa.index):
+            return serie_completa
+        if self.indice_filas.is_unique:
+            recorte = self._ultimo_recorte
+            if recorte is not None and recorte[0] is indice_filas:
+                posiciones = recorte[1]
+            else:
+                posiciones = self.indice_filas.get_indexer(indice_filas)
+                if (posiciones < 0).any():
+                    logger.debug(f"Índice '{self.token}': filas fuera del DataFrame base al restringir '{serie_completa.name}'.")
+                    return None
+                self._ultimo_recorte = (indice_filas, posiciones)
+            return serie_completa.iloc[posiciones]
+        try:
+            return serie_completa.loc[indice_filas]
+        except KeyError: # Filas que no pertenecen al DataFrame base: no se puede usar el índice
+            logger.debug(f"Índice '{self.token}': filas fuera del DataFrame base al restringir '{serie_completa.name}'.")
+            return None
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/indice_difuso.py
+
+import logging
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DISTANCIA_MAXIMA_DIFUSA = 2 # Errores (inserción, borrado o sustitución) admitidos como mucho por palabra
+MAX_VARIANTES_POR_PALABRA = 50 # Las más cercanas; acota el tamaño de la regex resultante
+LONGITUD_NGRAMA = 3
+_RELLENO = "\x00" # Relleno de los extremos: los n-gramas del borde distinguen principio y final de palabra
+
+
+def distancia_maxima_para(palabra: str) -> int:
+    """ Errores admitidos según la longitud: ninguno hasta 3 letras, uno hasta 7 y dos a partir de 8. """
+    if len(palabra) <= 3:
+        return 0
+    return min(1 if len(palabra) <= 7 else 2, DISTANCIA_MAXIMA_DIFUSA)
+
+
+def distancia_edicion_acotada(a: str, b: str, maximo: int) -> int:
+    """ Distancia de Levenshtein entre `a` y `b`, o `maximo + 1` en cuanto se sabe que la supera. """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    fila_anterior = list(range(len(b) + 1))
+    for i, caracter_a in enumerate(a, 1):
+        fila_actual = [i]
+        for j, caracter_b in enumerate(b, 1):
+            fila_actual.append(min(fila_anterior[j] + 1, fila_actual[j - 1] + 1, fila_anterior[j - 1] + (caracter_a != caracter_b)))
+        if min(fila_actual) > maximo: # Ninguna alineación puede bajar ya del máximo
+            return maximo + 1
+        fila_anterior = fila_actual
+    return min(fila_anterior[-1], maximo + 1)
+
+
+def _ngramas(palabra: str) -> set:
+    rellena = _RELLENO * (LONGITUD_NGRAMA - 1) + palabra + _RELLENO * (LONGITUD_NGRAMA - 1)
+    return {rellena[i:i + LONGITUD_NGRAMA] for i in range(len(rellena) - LONGITUD_NGRAMA + 1)}
+
+
+def palabras_de_series(series: Iterable[pd.Series]) -> List[str]:
+    """ Palabras distintas de unas series de textos ya normalizados. """
+    palabras = set()
+    for serie in series:
+        for texto in serie.dropna().unique():
+            if texto:
+                palabras.update(texto.split())
+    return sorted(palabras)
+
+
+class IndiceDifuso:
+    """ Índice de n-gramas (trigramas) del vocabulario para encontrar palabras con pocos errores.
+
+    Una palabra a distancia de edición k de la consulta conserva, como mínimo, todos los trigramas
+    distintos de la consulta menos 3·k (cada edición destruye a lo sumo 3). Las listas de cada trigrama
+    se cuentan con numpy; solo las palabras que superan ese mínimo y tienen una longitud compatible
+    se verifican con la distancia de edición acotada.
+    """
+
+    def __init__(self, vocabulario: Iterable[str]):
+        inicio = time.perf_counter()
+        self.palabras: List[str] = sorted(set(vocabulario))
+        self._posiciones: Dict[str, int] = {palabra: i for i, palabra in enumerate(self.palabras)}
+        self._longitudes = np.fromiter((len(palabra) for palabra in self.palabras), dtype=np.int32, count=len(self.palabras))
+        listas: Dict[str, List[int]] = {}
+        for posicion, palabra in enumerate(self.palabras):
+            for ngrama in _ngramas(palabra):
+                listas.setdefault(ngrama, []).append(posicion)
+        self._listas_ngrama: Dict[str, np.ndarray] = {ngrama: np.array(posiciones, dtype=np.int32) for ngrama, posiciones in listas.items()}
+        self.segundos_construccion = time.perf_counter() - inicio
+        logger.info(f"Índice difuso: {len(self.palabras)} palabras, {len(self._listas_ngrama)} trigramas en {self.segundos_construccion:.3f}s.")
+
+    def __len__(self) -> int:
+        return len(self.palabras)
+
+    def candidatos(self, palabra: str, distancia_maxima: int) -> List[str]:
+        """ Palabras del vocabulario a distancia de edición <= `distancia_maxima`, las más cercanas primero. """
+        if distancia_maxima <= 0 or not self.palabras:
+            return [palabra] if palabra in self._posiciones else []
+        ngramas_consulta = _ngramas(palabra)
+        minimo_comunes = len(ngramas_consulta) - LONGITUD_NGRAMA * distancia_maxima
+        longitud_compatible = np.abs(self._longitudes - len(palabra)) <= distancia_maxima
+        if minimo_comunes > 0:
+            listas = [self._listas_ngrama[ngrama] for ngrama in ngramas_consulta if ngrama in self._listas_ngrama]
+            if not listas:
+                return []
+            comunes = np.bincount(np.concatenate(listas), minlength=len(self.palabras))
+            posiciones_candidatas = np.flatnonzero((comunes >= minimo_comunes) & longitud_compatible)
+        else: # Palabra demasiado corta para filtrar por trigramas: solo por longitud
+            posiciones_candidatas = np.flatnonzero(longitud_compatible)
+
+        encontradas = []
+        for posicion in posiciones_candidatas:
+            candidata = self.palabras[posicion]
+            distancia = distancia_edicion_acotada(palabra, candidata, distancia_maxima)
+            if distancia <= distancia_maxima:
+                encontradas.append((distancia, candidata))
+        encontradas.sort()
+        return [candidata for _distancia, candidata in encontradas[:MAX_VARIANTES_POR_PALABRA]]
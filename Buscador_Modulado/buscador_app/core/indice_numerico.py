@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/indice_numerico.py
+
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .terminos import TerminoAnalizado
+
+logger = logging.getLogger(__name__)
+
+# Bytes de los números que se interpretan vectorizados (-?[0-9]+ con grupos separados por "." o ",")
+BYTE_SALTO, BYTE_MENOS, BYTE_PUNTO, BYTE_COMA, BYTE_CERO, BYTE_NUEVE = (ord(c) for c in "\n-.,09")
+
+
+def parsear_numeros(textos: Sequence[Any], parsear_uno: Callable[[Any], Optional[float]]) -> np.ndarray:
+    """ Versión vectorizada de `MotorBusqueda._parse_numero` para muchos textos: array de floats (NaN si no se interpreta).
+
+    Con las mismas reglas: sin separadores, el número tal cual; si tras el último separador hay 3 o más
+    dígitos, todos los separadores son de miles ("1.234.567"); si hay 1 o 2, ese es el decimal y los
+    anteriores de miles ("1.234,5"). Los textos se unen en líneas y se tratan como un array de bytes:
+    validar la forma y decidir qué hace cada separador son operaciones sobre todos los bytes a la vez.
+    Los textos que no tienen la forma simple "-?[0-9]+([.,][0-9]+)*" (vacíos, con espacios, separador
+    final, signo "+", otros dígitos o caracteres) se interpretan de uno en uno con `parsear_uno`.
+    """
+    num_textos = len(textos)
+    if not num_textos:
+        return np.array([], dtype=np.float64)
+    try:
+        texto_unido = "\n".join(textos)
+    except TypeError:
+        texto_unido = None
+    if texto_unido is None or texto_unido.count("\n") != num_textos - 1:
+        # Lo que no es texto o tiene saltos de línea va como línea vacía: no es vectorizable y se interpreta después
+        texto_unido = "\n".join(texto if isinstance(texto, str) and "\n" not in texto else "" for texto in textos)
+    octetos = np.frombuffer(texto_unido.encode("utf-8") + b"\n", dtype=np.uint8) # Salto final: fin de la última línea
+    es_salto = octetos == BYTE_SALTO
+    es_digito = (octetos >= BYTE_CERO) & (octetos <= BYTE_NUEVE)
+    es_separador = (octetos == BYTE_PUNTO) | (octetos == BYTE_COMA)
+    es_menos = octetos == BYTE_MENOS
+    fines = np.flatnonzero(es_salto) # Posición del salto que cierra cada línea
+    inicios = np.concatenate(([0], fines[:-1] + 1))
+    linea_de_octeto = np.cumsum(es_salto) - es_salto # Los saltos cuentan en la línea que cierran
+
+    # Forma válida: "-" solo al principio, empieza y acaba en dígito, y cada separador va seguido de un dígito
+    con_menos = es_menos[inicios]
+    empieza_en_digito = es_digito[np.minimum(inicios + con_menos, len(octetos) - 1)]
+    acaba_en_digito = es_digito[fines - 1] & (fines > inicios)
+    invalidos = ~(es_digito | es_separador | es_menos | es_salto)
+    invalidos[es_menos] = True
+    invalidos[inicios[con_menos]] = False
+    invalidos[:-1] |= es_separador[:-1] & ~es_digito[1:]
+    con_octeto_invalido = np.bincount(linea_de_octeto[invalidos], minlength=num_textos) > 0
+    validos = empieza_en_digito & acaba_en_digito & ~con_octeto_invalido
+
+    # El último separador de la línea es el decimal si le siguen 1 o 2 dígitos; los demás son de miles y se quitan
+    posiciones_separador = np.flatnonzero(es_separador)
+    linea_de_separador = linea_de_octeto[posiciones_separador]
+    es_ultimo = np.append(linea_de_separador[1:] != linea_de_separador[:-1], True)
+    es_decimal = es_ultimo & (fines[linea_de_separador] - posiciones_separador - 1 <= 2)
+    normalizados = octetos.copy()
+    normalizados[posiciones_separador[es_decimal]] = BYTE_PUNTO
+    conservar = np.ones(len(octetos), dtype=bool)
+    conservar[posiciones_separador[~es_decimal]] = False
+    lineas = normalizados[conservar][:-1].tobytes().decode("latin-1").split("\n") # Las líneas válidas son ASCII
+
+    numeros = np.full(num_textos, np.nan, dtype=np.float64)
+    numeros[validos] = np.fromiter(map(float, itertools.compress(lineas, validos)), dtype=np.float64, count=int(validos.sum()))
+    for posicion in np.flatnonzero(~validos):
+        numero = parsear_uno(textos[posicion])
+        numeros[posicion] = np.nan if numero is None else numero
+    return numeros
+
+
+def ocurrencias_vacias() -> pd.DataFrame:
+    """ Tabla de ocurrencias sin filas: posición del texto, número, unidad base (o None) y número en la unidad base. """
+    return pd.DataFrame({"texto": np.array([], dtype=np.int64), "numero": np.array([], dtype=np.float64),
+                         "unidad": np.array([], dtype=object), "numero_base": np.array([], dtype=np.float64)})
+
+
+class ColumnaNumerica:
+    """ Ocurrencias "número unidad" de una columna, con cada número también en su unidad base.
+
+    Se guardan en arrays paralelos (posición de la fila, número tal cual, número en unidad base,
+    código de la unidad base o -1), así una comparación numérica es una operación vectorizada sobre
+    todas las ocurrencias. `escanear` recibe los textos distintos de la columna y devuelve sus
+    ocurrencias (las columnas de `ocurrencias_vacias`, en orden de texto): cada texto se analiza una vez.
+    """
+
+    def __init__(self, serie: pd.Series, escanear: Callable[[pd.Series], pd.DataFrame]):
+        inicio = time.perf_counter()
+        codigos_fila, valores_distintos = pd.factorize(serie) # Celdas vacías (NaN) con código -1
+        textos = pd.Series([str(valor) for valor in valores_distintos], dtype=object)
+        ocurrencias = escanear(textos) if len(textos) else ocurrencias_vacias()
+        codigos_unidad, unidades_base = pd.factorize(ocurrencias["unidad"]) # Sin unidad reconocida: -1
+        self.codigos_unidad: Dict[str, int] = {unidad: codigo for codigo, unidad in enumerate(unidades_base)}
+        ocurrencias_por_valor = np.bincount(ocurrencias["texto"].to_numpy(dtype=np.int64), minlength=len(textos))
+
+        # Repetir las ocurrencias de cada texto distinto en todas las filas que lo contienen
+        con_valor = codigos_fila >= 0
+        ocurrencias_por_fila = np.zeros(len(codigos_fila), dtype=np.int64)
+        ocurrencias_por_fila[con_valor] = ocurrencias_por_valor[codigos_fila[con_valor]]
+        primera_de_valor = np.cumsum(ocurrencias_por_valor) - ocurrencias_por_valor
+        total = int(ocurrencias_por_fila.sum())
+        desplazamientos = np.arange(total) - np.repeat(np.cumsum(ocurrencias_por_fila) - ocurrencias_por_fila, ocurrencias_por_fila)
+        seleccion = np.repeat(primera_de_valor[np.where(con_valor, codigos_fila, 0)], ocurrencias_por_fila) + desplazamientos
+
+        self.num_filas = len(codigos_fila)
+        self.filas = np.repeat(np.arange(self.num_filas, dtype=np.int64), ocurrencias_por_fila)
+        self.numeros = ocurrencias["numero"].to_numpy(dtype=np.float64)[seleccion]
+        self.unidades = codigos_unidad.astype(np.int32)[seleccion]
+        self.numeros_base = ocurrencias["numero_base"].to_numpy(dtype=np.float64)[seleccion]
+        self.segundos_construccion = time.perf_counter() - inicio
+        logger.debug(f"Columna numérica '{serie.name}': {total} ocurrencias en {self.num_filas} filas "
+                     f"({len(textos)} textos distintos) en {self.segundos_construccion:.3f}s.")
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+    def mascara(self, comparacion: TerminoAnalizado) -> np.ndarray:
+        """ Filas (por posición) con alguna ocurrencia que cumple `comparacion`.
+
+        Si la comparación tiene unidad reconocida, solo cuentan las ocurrencias de su misma unidad base
+        y se comparan en esa base (la cota se convierte una vez); si no, se comparan los números tal cual.
+        """
+        if comparacion.unidad_base is None:
+            cumplen = comparacion.cumple_array(self.numeros)
+        else:
+            codigo = self.codigos_unidad.get(comparacion.unidad_base)
+            if codigo is None:
+                return np.zeros(self.num_filas, dtype=bool)
+            misma_unidad = self.unidades == codigo
+            cumplen = np.zeros(len(self.filas), dtype=bool)
+            cumplen[misma_unidad] = comparacion.cumple_array(self.numeros_base[misma_unidad], comparacion.factor_unidad)
+        mascara_filas = np.zeros(self.num_filas, dtype=bool)
+        mascara_filas[self.filas[cumplen]] = True
+        return mascara_filas
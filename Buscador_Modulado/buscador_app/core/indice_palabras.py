@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/indice_palabras.py
+
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .terminos import patron_palabra
+
+logger = logging.getLogger(__name__)
+
+_PATRON_PALABRAS = re.compile(r"\w+")
+_SIN_TEXTOS = np.array([], dtype=np.int32)
+
+
+class IndicePalabras:
+    """ Listas invertidas palabra -> textos distintos de una columna normalizada, construidas en una pasada.
+
+    Sirve para calcular de una vez las máscaras de muchos términos (las reglas de un lote y sus
+    sinónimos) sin recorrer la columna con una regex por término. Un término que empieza y acaba en
+    carácter de palabra solo puede coincidir como `\\btérmino\\b` en textos que contengan su primera y
+    su última palabra completas: si es una sola palabra, esa lista ya es el resultado exacto; si no, se
+    verifica con la regex del término solo en esos textos. Los demás términos devuelven None y se
+    buscan con la regex sobre toda la columna.
+    """
+
+    def __init__(self, serie_normalizada: pd.Series):
+        inicio = time.perf_counter()
+        codigos, textos = pd.factorize(serie_normalizada, sort=False)
+        self._codigos = codigos # Texto distinto de cada fila (-1 si es nulo)
+        self._textos = textos.to_numpy(dtype=object)
+        listas: Dict[str, List[int]] = {}
+        for posicion, texto in enumerate(self._textos):
+            if isinstance(texto, str):
+                for palabra in set(_PATRON_PALABRAS.findall(texto)):
+                    listas.setdefault(palabra, []).append(posicion)
+        self._listas: Dict[str, np.ndarray] = {palabra: np.array(posiciones, dtype=np.int32) for palabra, posiciones in listas.items()}
+        self.segundos_construccion = time.perf_counter() - inicio
+        logger.info(f"Índice de palabras '{serie_normalizada.name}': {len(self._textos)} textos distintos, "
+                    f"{len(listas)} palabras en {self.segundos_construccion:.3f}s.")
+
+    def mascara(self, valor_normalizado: str) -> Optional[np.ndarray]:
+        """ Filas (máscara booleana por posición) con `valor_normalizado` como palabra/frase completa, o None si
+        el término no empieza y acaba en carácter de palabra. """
+        palabras = _PATRON_PALABRAS.findall(valor_normalizado)
+        if not palabras or not valor_normalizado.startswith(palabras[0]) or not valor_normalizado.endswith(palabras[-1]):
+            return None
+        candidatos = self._listas.get(palabras[0], _SIN_TEXTOS)
+        if len(palabras) > 1 and len(candidatos):
+            candidatos = np.intersect1d(candidatos, self._listas.get(palabras[-1], _SIN_TEXTOS), assume_unique=True)
+            patron = patron_palabra(valor_normalizado)
+            candidatos = np.array([c for c in candidatos if patron.search(self._textos[c])], dtype=np.int32)
+        coincide = np.zeros(len(self._textos) + 1, dtype=bool) # Última posición: filas nulas (código -1), nunca coinciden
+        coincide[candidatos] = True
+        return coincide[self._codigos]
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/memoria.py
+
+import importlib.util
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Una columna de texto pasa a categórica si tiene, como mucho, esta fracción de valores distintos
+FRACCION_MAX_CATEGORICA = 0.5
+MIN_FILAS_CATEGORICA = 50 # Con menos filas el coste fijo de las categorías no compensa
+
+
+def hay_pyarrow() -> bool:
+    """ True si pyarrow (opcional) está instalado y pandas puede usar cadenas respaldadas por Arrow. """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def es_columna_texto(serie: pd.Series) -> bool:
+    """ True para columnas de texto: object, string (Python o Arrow) o categóricas de textos. """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        return pd.api.types.is_object_dtype(categorias.dtype) or pd.api.types.is_string_dtype(categorias.dtype)
+    return pd.api.types.is_string_dtype(serie) or pd.api.types.is_object_dtype(serie)
+
+
+def serie_como_texto(serie: pd.Series) -> pd.Series:
+    """ `serie.astype(str)` con la misma semántica para cualquier tipo de columna.
+
+    Las columnas `string` representan los vacíos como pd.NA ('<NA>' al pasar a str); se convierten
+    como las de tipo object ('nan'), para que una columna compacta busque igual que la original.
+    """
+    if isinstance(serie.dtype, pd.StringDtype):
+        serie = serie.astype(object).where(serie.notna(), np.nan)
+    return serie.astype(str)
+
+
+def normalizar_serie(serie: pd.Series, normalizador: Callable[[str], str]) -> pd.Series:
+    """ Aplica `normalizador` al texto de cada celda. En categóricas normaliza cada categoría una sola vez. """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie_como_texto(serie).map(normalizador)
+    categorias_normalizadas = [normalizador(texto) for texto in serie.cat.categories.astype(str)]
+    valores = np.array(categorias_normalizadas + [normalizador("nan")], dtype=object) # Último hueco: celdas vacías
+    codigos = serie.cat.codes.to_numpy(copy=True)
+    codigos[codigos < 0] = len(categorias_normalizadas)
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name, dtype=object)
+
+
+def memoria_columnas(df: pd.DataFrame) -> Dict[str, int]:
+    """ Bytes ocupados por cada columna (contando el contenido de los objetos Python). """
+    uso = df.memory_usage(deep=True, index=False)
+    return {str(columna): int(bytes_columna) for columna, bytes_columna in uso.items()}
+
+
+def formatear_bytes(num_bytes: float) -> str:
+    for unidad in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024 or unidad == "GB":
+            return f"{num_bytes:.0f} {unidad}" if unidad == "B" else f"{num_bytes:.1f} {unidad}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+class ColumnaInforme:
+    """ Tipo y memoria de una columna antes y después de compactar. """
+
+    def __init__(self, nombre: str, tipo_antes: str, bytes_antes: int, tipo_despues: Optional[str], bytes_despues: int):
+        self.nombre = nombre
+        self.tipo_antes = tipo_antes
+        self.bytes_antes = bytes_antes
+        self.tipo_despues = tipo_despues # None: columna diferida (se lee del archivo bajo demanda)
+        self.bytes_despues = bytes_despues
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {"columna": self.nombre, "tipo_antes": self.tipo_antes, "bytes_antes": self.bytes_antes,
+                "tipo_despues": self.tipo_despues, "bytes_despues": self.bytes_despues}
+
+
+class InformeMemoria:
+    """ Memoria de un DataFrame cargado antes y después de la representación compacta. """
+
+    def __init__(self, nombre: str, filas: int, columnas: List[ColumnaInforme], bytes_indice: int):
+        self.nombre = nombre
+        self.filas = filas
+        self.columnas = columnas
+        self.bytes_indice = bytes_indice
+
+    @property
+    def bytes_antes(self) -> int:
+        return self.bytes_indice + sum(c.bytes_antes for c in self.columnas)
+
+    @property
+    def bytes_despues(self) -> int:
+        return self.bytes_indice + sum(c.bytes_despues for c in self.columnas)
+
+    @property
+    def columnas_diferidas(self) -> List[str]:
+        return [c.nombre for c in self.columnas if c.tipo_despues is None]
+
+    def resumen(self) -> str:
+        ahorro = 1 - self.bytes_despues / self.bytes_antes if self.bytes_antes else 0.0
+        return (f"{self.nombre}: {formatear_bytes(self.bytes_antes)} -> {formatear_bytes(self.bytes_despues)} "
+                f"({ahorro:.0%} menos, {self.filas} filas)")
+
+    def detalle(self) -> str:
+        lineas = [self.resumen(), "", f"{'Columna':<32}{'Antes':>12}  {'Tipo antes':<14}{'Después':>12}  Tipo después"]
+        for c in self.columnas:
+            lineas.append(f"{c.nombre[:31]:<32}{formatear_bytes(c.bytes_antes):>12}  {c.tipo_antes:<14}"
+                          f"{formatear_bytes(c.bytes_despues):>12}  {c.tipo_despues or '(bajo demanda)'}")
+        if self.columnas_diferidas:
+            lineas += ["", f"Columnas bajo demanda (se leen del archivo al exportar): {', '.join(self.columnas_diferidas)}"]
+        return "\n".join(lineas)
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {"nombre": self.nombre, "filas": self.filas, "bytes_antes": self.bytes_antes, "bytes_despues": self.bytes_despues,
+                "columnas_diferidas": self.columnas_diferidas, "columnas": [c.a_dict() for c in self.columnas]}
+
+
+def _compactar_texto(serie: pd.Series) -> pd.Series:
+    no_nulos = serie.dropna()
+    if no_nulos.empty:
+        return serie
+    num_distintos = no_nulos.nunique()
+    if len(no_nulos) >= MIN_FILAS_CATEGORICA and num_distintos <= FRACCION_MAX_CATEGORICA * len(no_nulos):
+        return serie.astype("category")
+    # Solo columnas de textos puros: con números mezclados, str() del valor Arrow no sería el del objeto original
+    if hay_pyarrow() and pd.api.types.infer_dtype(no_nulos, skipna=True) == "string":
+        return serie.astype("string[pyarrow]")
+    return serie
+
+
+def _compactar_numerica(serie: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(serie):
+        return serie
+    if pd.api.types.is_integer_dtype(serie):
+        por_defecto = "unsigned" if len(serie) and serie.min() >= 0 else "integer"
+        return pd.to_numeric(serie, downcast=por_defecto)
+    if pd.api.types.is_float_dtype(serie) and serie.dtype != np.float32:
+        reducida = serie.astype(np.float32)
+        # Solo si float32 representa exactamente todos los valores: la búsqueda compara el texto de la celda
+        if ((reducida.astype(serie.dtype) == serie) | serie.isna()).all():
+            return reducida
+    return serie
+
+
+def compactar_dataframe(df: pd.DataFrame, nombre: str, columnas_diferibles: Optional[List[str]] = None) -> Tuple[pd.DataFrame, InformeMemoria]:
+    """ Devuelve una copia compacta de `df` y el informe de memoria antes/después.
+
+    - Textos con pocos valores distintos -> categóricas; el resto -> `string[pyarrow]` si pyarrow está instalado.
+    - Enteros y flotantes -> el tipo más pequeño que conserve los valores.
+    - `columnas_diferibles` se descartan de memoria (el llamador las lee del archivo cuando hagan falta).
+    """
+    columnas_diferibles = set(columnas_diferibles or [])
+    bytes_antes = memoria_columnas(df)
+    columnas_compactas: Dict[Any, pd.Series] = {}
+    filas_informe: List[ColumnaInforme] = []
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in columnas_diferibles:
+            filas_informe.append(ColumnaInforme(str(columna), str(serie.dtype), bytes_antes[str(columna)], None, 0))
+            continue
+        if es_columna_texto(serie) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            compacta = _compactar_texto(serie)
+        elif pd.api.types.is_numeric_dtype(serie):
+            compacta = _compactar_numerica(serie)
+        else:
+            compacta = serie
+        columnas_compactas[columna] = compacta
+        filas_informe.append(ColumnaInforme(str(columna), str(serie.dtype), bytes_antes[str(columna)],
+                                            str(compacta.dtype), int(compacta.memory_usage(deep=True, index=False))))
+
+    df_compacto = pd.DataFrame(columnas_compactas, index=df.index)
+    df_compacto.attrs.update(df.attrs)
+    informe = InformeMemoria(nombre, len(df), filas_informe, int(df.index.memory_usage(deep=True)))
+    logger.info(f"Memoria compacta: {informe.resumen()}")
+    return df_compacto, informe
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/metricas.py
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .estadisticas import EstadisticasBusqueda
+
+try:
+    import resource # Solo Unix: memoria máxima del proceso
+except ImportError: # pragma: no cover - Windows
+    resource = None # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (en segundos) de los cubos de los histogramas de latencia
+CUBOS_LATENCIA_SEGUNDOS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+FORMATO_PROMETHEUS = "prometheus"
+FORMATO_JSON = "json"
+
+_patron_comparacion = re.compile(r"[<>]=?\s*\d|\d\s*-\s*\d")
+
+
+def clasificar_consulta(consulta: str, estadisticas: Optional[EstadisticasBusqueda] = None) -> str:
+    """ Clase de consulta para agrupar métricas: vacia, negacion_pura, numerica, and, or, frase o simple. """
+    texto = consulta.strip()
+    if not texto:
+        return "vacia"
+    plan = estadisticas.plan if estadisticas is not None else {}
+    positivos = plan.get("positivos", texto)
+    if plan.get("negativos") and not str(positivos).strip():
+        return "negacion_pura"
+    if plan.get("filtro_numerico") or _patron_comparacion.search(texto):
+        return "numerica"
+    if "+" in texto:
+        return "and"
+    if "|" in texto:
+        return "or"
+    if '"' in texto:
+        return "frase"
+    return "simple"
+
+
+class Histograma:
+    """ Histograma acumulativo al estilo Prometheus (cubos fijos, suma y cuenta). """
+
+    def __init__(self, cubos: Tuple[float, ...] = CUBOS_LATENCIA_SEGUNDOS):
+        self.cubos = cubos
+        self.cuentas = [0] * len(cubos) # No acumuladas; se acumulan al exportar
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor: float):
+        self.suma += valor
+        self.cuenta += 1
+        for i, limite in enumerate(self.cubos):
+            if valor <= limite:
+                self.cuentas[i] += 1
+                return
+
+    def cubos_acumulados(self) -> List[Tuple[str, int]]:
+        acumulado = 0
+        filas: List[Tuple[str, int]] = []
+        for limite, cuenta in zip(self.cubos, self.cuentas):
+            acumulado += cuenta
+            filas.append((repr(limite), acumulado))
+        filas.append(("+Inf", self.cuenta))
+        return filas
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {"cuenta": self.cuenta, "suma_segundos": round(self.suma, 6),
+                "media_ms": round(self.suma / self.cuenta * 1000, 3) if self.cuenta else 0.0,
+                "cubos": {limite: cuenta for limite, cuenta in self.cubos_acumulados()}}
+
+
+def _escapar_etiqueta(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(pares: Dict[str, Any]) -> str:
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{clave}="{_escapar_etiqueta(valor)}"' for clave, valor in pares.items()) + "}"
+
+
+class MetricasMotor:
+    """ Contadores e histogramas de un MotorBusqueda (se activan con `MotorBusqueda.activar_metricas`).
+
+    Se alimentan de las `EstadisticasBusqueda` de cada búsqueda: búsquedas y latencia por flujo
+    (`OrigenResultados`) y por clase de consulta, tiempo por etapa, aciertos/fallos de cachés y
+    construcciones de índices. La memoria de los datos cargados se mide al exportar (una vez por
+    archivo cargado). Todo es acumulado desde `instante_inicio`, como espera Prometheus.
+    """
+
+    def __init__(self):
+        self.instante_inicio = time.time()
+        self._cerrojo = threading.Lock()
+        self.busquedas: Dict[Tuple[str, str, str], int] = {} # (origen, clase, modo) -> cuenta
+        self.latencia_por_origen: Dict[str, Histograma] = {}
+        self.latencia_por_clase: Dict[str, Histograma] = {}
+        self.segundos_por_etapa: Dict[str, float] = {}
+        self.filas_resultado_total = 0
+        self.aciertos_cache: Dict[str, int] = {}
+        self.fallos_cache: Dict[str, int] = {}
+        self.construcciones_indice: Dict[str, int] = {}
+        self.segundos_construccion_indice: Dict[str, float] = {}
+        self.filas_indice: Dict[str, int] = {}
+        self.errores = 0
+        self._memoria_por_token: Dict[Any, int] = {}
+
+    def registrar_busqueda(self, estadisticas: EstadisticasBusqueda, con_error: bool = False):
+        origen = estadisticas.origen or "DESCONOCIDO"
+        clase = clasificar_consulta(estadisticas.consulta, estadisticas)
+        modo = "diccionario" if estadisticas.via_diccionario else "directo"
+        with self._cerrojo:
+            clave = (origen, clase, modo)
+            self.busquedas[clave] = self.busquedas.get(clave, 0) + 1
+            self.latencia_por_origen.setdefault(origen, Histograma()).observar(estadisticas.segundos_total)
+            self.latencia_por_clase.setdefault(clase, Histograma()).observar(estadisticas.segundos_total)
+            for medicion in estadisticas.etapas.values():
+                self.segundos_por_etapa[medicion.nombre] = self.segundos_por_etapa.get(medicion.nombre, 0.0) + medicion.segundos
+            for nombre_cache, cantidad in estadisticas.aciertos_cache.items():
+                self.aciertos_cache[nombre_cache] = self.aciertos_cache.get(nombre_cache, 0) + cantidad
+            for nombre_cache, cantidad in estadisticas.fallos_cache.items():
+                self.fallos_cache[nombre_cache] = self.fallos_cache.get(nombre_cache, 0) + cantidad
+            self.filas_resultado_total += estadisticas.filas_resultado
+            if con_error:
+                self.errores += 1
+
+    def registrar_indice(self, nombre: str, segundos: float, filas: int):
+        with self._cerrojo:
+            self.construcciones_indice[nombre] = self.construcciones_indice.get(nombre, 0) + 1
+            self.segundos_construccion_indice[nombre] = self.segundos_construccion_indice.get(nombre, 0.0) + segundos
+            self.filas_indice[nombre] = filas
+
+    def _memoria(self, clave: Any, calcular: Callable[[], int]) -> int:
+        """ Memoria de un objeto inmutable tras la carga, medida una sola vez por `clave`. """
+        with self._cerrojo:
+            if clave in self._memoria_por_token:
+                return self._memoria_por_token[clave]
+        bytes_medidos = int(calcular())
+        with self._cerrojo:
+            self._memoria_por_token[clave] = bytes_medidos
+            if len(self._memoria_por_token) > 16: # Archivos ya descargados: no retener claves viejas
+                self._memoria_por_token.pop(next(iter(self._memoria_por_token)))
+        return bytes_medidos
+
+    def memoria_motor(self, motor: Any) -> Dict[str, int]:
+        """ Bytes de los DataFrames cargados y de sus índices normalizados (deep=True: incluye los textos). """
+        memoria: Dict[str, int] = {}
+        for componente, df, indice in (("diccionario", motor.datos_diccionario, motor.indice_diccionario),
+                                       ("descripciones", motor.datos_descripcion, motor.indice_descripcion)):
+            if df is not None:
+                clave_df = (componente, indice.token if indice is not None else id(df))
+                memoria[componente] = self._memoria(clave_df, lambda df=df: df.memory_usage(index=True, deep=True).sum())
+            if indice is not None:
+                memoria[f"indice_{componente}"] = self._memoria(
+                    ("indice", indice.token), lambda indice=indice: sum(serie.memory_usage(index=False, deep=True) for serie in indice.series_normalizadas.values()))
+        return memoria
+
+    @staticmethod
+    def memoria_maxima_proceso() -> Optional[int]:
+        if resource is None:
+            return None
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(maximo if sys.platform == "darwin" else maximo * 1024) # Linux informa en KiB
+
+    def a_dict(self, motor: Any = None) -> Dict[str, Any]:
+        """ Instantánea JSON de todas las métricas. """
+        with self._cerrojo:
+            total_busquedas = sum(self.busquedas.values())
+            segundos_activo = max(1e-9, time.time() - self.instante_inicio)
+            instantanea: Dict[str, Any] = {
+                "instante": time.time(),
+                "instante_inicio": self.instante_inicio,
+                "busquedas_total": total_busquedas,
+                "busquedas_por_segundo": round(total_busquedas / segundos_activo, 4),
+                "errores_total": self.errores,
+                "filas_resultado_total": self.filas_resultado_total,
+                "busquedas": [{"origen": o, "clase": c, "modo": m, "cuenta": n} for (o, c, m), n in sorted(self.busquedas.items())],
+                "latencia_por_origen": {o: h.a_dict() for o, h in sorted(self.latencia_por_origen.items())},
+                "latencia_por_clase": {c: h.a_dict() for c, h in sorted(self.latencia_por_clase.items())},
+                "segundos_por_etapa": {e: round(s, 6) for e, s in sorted(self.segundos_por_etapa.items())},
+                "cache": {nombre: {"aciertos": self.aciertos_cache.get(nombre, 0), "fallos": self.fallos_cache.get(nombre, 0)}
+                          for nombre in sorted(set(self.aciertos_cache) | set(self.fallos_cache))},
+                "indices": {nombre: {"construcciones": self.construcciones_indice[nombre],
+                                     "segundos_total": round(self.segundos_construccion_indice[nombre], 6),
+                                     "filas": self.filas_indice.get(nombre, 0)}
+                            for nombre in sorted(self.construcciones_indice)},
+            }
+        instantanea["memoria_bytes"] = self.memoria_motor(motor) if motor is not None else {}
+        instantanea["memoria_maxima_proceso_bytes"] = self.memoria_maxima_proceso()
+        return instantanea
+
+    def a_prometheus(self, motor: Any = None) -> str:
+        """ Formato de texto de exposición de Prometheus (para el textfile collector de node_exporter o similar). """
+        lineas: List[str] = []
+
+        def _cabecera(nombre: str, tipo: str, ayuda: str):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+
+        def _histograma(nombre: str, etiqueta: str, histogramas: Dict[str, Histograma]):
+            for valor_etiqueta, histograma in sorted(histogramas.items()):
+                for limite, cuenta in histograma.cubos_acumulados():
+                    lineas.append(f"{nombre}_bucket{_etiquetas({etiqueta: valor_etiqueta, 'le': limite})} {cuenta}")
+                lineas.append(f"{nombre}_sum{_etiquetas({etiqueta: valor_etiqueta})} {histograma.suma:.6f}")
+                lineas.append(f"{nombre}_count{_etiquetas({etiqueta: valor_etiqueta})} {histograma.cuenta}")
+
+        with self._cerrojo:
+            _cabecera("buscador_busquedas_total", "counter", "Búsquedas atendidas por flujo (OrigenResultados), clase de consulta y modo.")
+            for (origen, clase, modo), cuenta in sorted(self.busquedas.items()):
+                lineas.append(f"buscador_busquedas_total{_etiquetas({'origen': origen, 'clase': clase, 'modo': modo})} {cuenta}")
+            _cabecera("buscador_errores_total", "counter", "Búsquedas terminadas con un mensaje de error.")
+            lineas.append(f"buscador_errores_total {self.errores}")
+            _cabecera("buscador_filas_resultado_total", "counter", "Filas devueltas por todas las búsquedas.")
+            lineas.append(f"buscador_filas_resultado_total {self.filas_resultado_total}")
+            _cabecera("buscador_latencia_origen_segundos", "histogram", "Duración de buscar() por flujo.")
+            _histograma("buscador_latencia_origen_segundos", "origen", self.latencia_por_origen)
+            _cabecera("buscador_latencia_clase_segundos", "histogram", "Duración de buscar() por clase de consulta.")
+            _histograma("buscador_latencia_clase_segundos", "clase", self.latencia_por_clase)
+            _cabecera("buscador_etapa_segundos_total", "counter", "Tiempo propio acumulado por etapa de búsqueda.")
+            for etapa, segundos in sorted(self.segundos_por_etapa.items()):
+                lineas.append(f"buscador_etapa_segundos_total{_etiquetas({'etapa': etapa})} {segundos:.6f}")
+            _cabecera("buscador_cache_aciertos_total", "counter", "Aciertos por caché.")
+            for nombre, cuenta in sorted(self.aciertos_cache.items()):
+                lineas.append(f"buscador_cache_aciertos_total{_etiquetas({'cache': nombre})} {cuenta}")
+            _cabecera("buscador_cache_fallos_total", "counter", "Fallos por caché.")
+            for nombre, cuenta in sorted(self.fallos_cache.items()):
+                lineas.append(f"buscador_cache_fallos_total{_etiquetas({'cache': nombre})} {cuenta}")
+            _cabecera("buscador_indice_construcciones_total", "counter", "Índices normalizados construidos.")
+            for nombre, cuenta in sorted(self.construcciones_indice.items()):
+                lineas.append(f"buscador_indice_construcciones_total{_etiquetas({'indice': nombre})} {cuenta}")
+            _cabecera("buscador_indice_construccion_segundos_total", "counter", "Tiempo acumulado construyendo índices.")
+            for nombre, segundos in sorted(self.segundos_construccion_indice.items()):
+                lineas.append(f"buscador_indice_construccion_segundos_total{_etiquetas({'indice': nombre})} {segundos:.6f}")
+            _cabecera("buscador_indice_filas", "gauge", "Filas del último índice construido.")
+            for nombre, filas in sorted(self.filas_indice.items()):
+                lineas.append(f"buscador_indice_filas{_etiquetas({'indice': nombre})} {filas}")
+            instante_inicio = self.instante_inicio
+
+        if motor is not None:
+            _cabecera("buscador_memoria_bytes", "gauge", "Memoria de los datos cargados y sus índices.")
+            for componente, bytes_usados in sorted(self.memoria_motor(motor).items()):
+                lineas.append(f"buscador_memoria_bytes{_etiquetas({'componente': componente})} {bytes_usados}")
+        memoria_proceso = self.memoria_maxima_proceso()
+        if memoria_proceso is not None:
+            _cabecera("buscador_proceso_memoria_maxima_bytes", "gauge", "Memoria residente máxima del proceso.")
+            lineas.append(f"buscador_proceso_memoria_maxima_bytes {memoria_proceso}")
+        _cabecera("buscador_inicio_segundos", "gauge", "Instante (epoch) desde el que se acumulan las métricas.")
+        lineas.append(f"buscador_inicio_segundos {instante_inicio:.3f}")
+        return "\n".join(lineas) + "\n"
+
+
+def escribir_metricas(metricas: MetricasMotor, motor: Any, ruta: str, formato: str = FORMATO_PROMETHEUS):
+    """ Escribe las métricas de forma atómica (archivo temporal + rename), para que un lector nunca vea un archivo a medias. """
+    contenido = metricas.a_prometheus(motor) if formato == FORMATO_PROMETHEUS else \
+        json.dumps(metricas.a_dict(motor), indent=2, ensure_ascii=False)
+    ruta_final = Path(ruta)
+    ruta_final.parent.mkdir(parents=True, exist_ok=True)
+    ruta_temporal = ruta_final.with_name(ruta_final.name + ".tmp")
+    ruta_temporal.write_text(contenido, encoding="utf-8")
+    os.replace(ruta_temporal, ruta_final)
+
+
+class ExportadorMetricas:
+    """ Hilo que escribe las métricas cada `intervalo_segundos` (y una última vez al detenerse).
+
+    `obtener_motor` devuelve el motor actual: en el servicio, una recarga sustituye el motor.
+    """
+
+    def __init__(self, obtener_motor: Callable[[], Any], ruta: str, formato: str = FORMATO_PROMETHEUS, intervalo_segundos: float = 15.0):
+        self.obtener_motor = obtener_motor
+        self.ruta = ruta
+        self.formato = formato
+        self.intervalo_segundos = max(0.5, float(intervalo_segundos))
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def _exportar(self):
+        motor = self.obtener_motor()
+        if motor is None or motor.metricas is None:
+            return
+        try:
+            escribir_metricas(motor.metricas, motor, self.ruta, self.formato)
+        except OSError as e_escritura:
+            logger.error(f"No se pudieron escribir las métricas en '{self.ruta}': {e_escritura}")
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo_segundos):
+            self._exportar()
+
+    def iniciar(self):
+        self._exportar()
+        self._hilo = threading.Thread(target=self._bucle, name="exportador_metricas", daemon=True)
+        self._hilo.start()
+        logger.info(f"Exportando métricas ({self.formato}) cada {self.intervalo_segundos:.0f}s en '{self.ruta}'.")
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+        self._exportar()
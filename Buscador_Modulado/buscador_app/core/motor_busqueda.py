@@ -3,17 +3,42 @@
 
 import re
 import unicodedata
+import itertools
 import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional, List, Tuple, Set, Dict, Any, Union
-import pandas as pd
+from typing import Optional, List, Tuple, Set, Dict, Any, Union, Callable, Pattern
 import numpy as np
+import pandas as pd
 
 from ..enums import OrigenResultados 
 from ..utils import ExtractorMagnitud, ManejadorExcel 
+from ..registro import logger_traza, muestreo_traza
+from .indice_busqueda import IndiceBusqueda, CLAVE_ATTRS_INDICE
+from .estadisticas import EstadisticasBusqueda, RegistroEtapa
+from .registro_consultas_lentas import RegistroConsultasLentas
+from .perfilador import PerfiladorBusquedas
+from .metricas import MetricasMotor
+from .memoria import InformeMemoria, compactar_dataframe, es_columna_texto, normalizar_serie
+from .terminos import PlanConsulta, PlanSegmento, TerminoAnalizado, patron_palabra, patron_variantes
+from .indice_difuso import IndiceDifuso, distancia_maxima_para, palabras_de_series
+from .autocompletado import IndiceAutocompletado, frecuencias_de_series, vocabulario_de_series
+from .relevancia import MAX_RESULTADOS_RELEVANCIA, PESO_SINONIMO, PESO_TERMINO_ORIGINAL
+from .resultado_busqueda import ResultadoBusqueda
+from .unidades import AlgebraUnidades, parsear_equivalencia
+from .indice_numerico import ColumnaNumerica, ocurrencias_vacias, parsear_numeros
 
 logger = logging.getLogger(__name__)
 
+# Máximo de entradas memorizadas durante un `buscar_lote` antes de vaciar la memoria del lote
+# (cada máscara ocupa un byte por fila del DataFrame base).
+MAX_ENTRADAS_MEMO_LOTE = 2000
+FILAS_MIN_BLOQUE_LIMITE = 2000 # Primer bloque de descripciones al buscar con límite (después, cada bloque dobla al anterior)
+SEPARADOR_ESCANEO = "\x00" # Entre los textos de una columna al buscar sus números en una sola pasada
+
 class MotorBusqueda:
     def __init__(self, indices_diccionario_cfg: Optional[List[int]] = None):
         self.datos_diccionario: Optional[pd.DataFrame] = None
@@ -27,10 +52,91 @@ class MotorBusqueda:
         # Patrones Regex (compilados para eficiencia)
         self.patron_comparacion = re.compile(r"^\s*([<>]=?)\s*(\d+(?:[.,]\d+)?)\s*([a-zA-ZáéíóúÁÉÍÓÚñÑµΩ\.\/\-\_]+)?\s*$")
         self.patron_rango = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*-\s*(\d+(?:[.,]\d+)?)\s*([a-zA-ZáéíóúÁÉÍÓÚñÑµΩ\.\/\-\_]+)?\s*$")
-        self.patron_termino_negado = re.compile(r'#\s*(?:\"([^\"]+)\"|([a-zA-ZáéíóúÁÉÍÓÚñÑ0-9\.\-\_]+))', re.IGNORECASE | re.UNICODE)
+        self.patron_termino_negado = re.compile(r'#\s*(~?)\s*(?:\"([^\"]+)\"|([a-zA-ZáéíóúÁÉÍÓÚñÑ0-9\.\-\_]+))', re.IGNORECASE | re.UNICODE) # "#~término": negación difusa
         self.patron_num_unidad_df = re.compile(r"(\d+(?:[.,]\d+)?)[\s\-]*([a-zA-ZáéíóúÁÉÍÓÚñÑµΩ\.\/\-\_]+)?") # Para extraer num-unidad de celdas DF
+        # El mismo, con el carácter anterior y el siguiente capturados sin consumirlos, o el separador de textos (ver `_escanear_ocurrencias_numericas`)
+        self.patron_num_unidad_con_contexto = re.compile(SEPARADOR_ESCANEO + r"|(?=\d)(?:(?<=(.))|^)" + self.patron_num_unidad_df.pattern + r"(?=(.?))", re.DOTALL)
         
         self.extractor_magnitud = ExtractorMagnitud() # Instancia del extractor de magnitudes
+        self.algebra_unidades = AlgebraUnidades(self.extractor_magnitud) # Unidad base y escala de cada unidad (KW -> W x 1000)
+
+        # Índices de columnas normalizadas (por token), construidos al cargar cada archivo.
+        # El cerrojo permite cargar diccionario y descripciones en paralelo desde hilos distintos.
+        self.indice_diccionario: Optional[IndiceBusqueda] = None
+        self.indice_descripcion: Optional[IndiceBusqueda] = None
+        self._indices_por_token: Dict[str, IndiceBusqueda] = {}
+        self._cerrojo_indices = threading.Lock()
+
+        # Estado por hilo: memoria del lote en curso (ver `buscar_lote`) y estadísticas de la búsqueda en curso.
+        # Cada hilo tiene el suyo, así un motor compartido entre hilos puede atender varias búsquedas a la vez.
+        self._estado_hilo = threading.local()
+
+        # Registro opcional de consultas lentas (ver `configurar_registro_consultas_lentas`)
+        self.registro_consultas_lentas: Optional[RegistroConsultasLentas] = None
+        # Perfilado bajo demanda de las próximas búsquedas (`perfilador.activar(n)`)
+        self.perfilador = PerfiladorBusquedas()
+        # Contadores e histogramas acumulados (ver `activar_metricas`)
+        self.metricas: Optional[MetricasMotor] = None
+
+        # Representación compacta en memoria (ver `configurar_memoria`)
+        self.memoria_compacta = False
+        self.columnas_visibles_descripcion: List[str] = [] # Vacía = todas visibles
+        self.informes_memoria: Dict[str, InformeMemoria] = {} # "diccionario"/"descripcion" -> informe de la última carga
+        self.columnas_diferidas_descripcion: List[str] = []
+        self._orden_columnas_descripcion: List[Any] = [] # Orden de las columnas en el archivo (incluidas las diferidas)
+
+        # Autocompletado: vocabulario del diccionario ordenado por frecuencia en las descripciones (ver `sugerir_terminos`)
+        self.autocompletado: Optional[IndiceAutocompletado] = None
+        self._vocabulario_diccionario: List[str] = []
+        self._frecuencias_descripcion: Optional[Counter] = None
+        self._cerrojo_autocompletado = threading.Lock()
+
+    def configurar_memoria(self, compacta: bool, columnas_visibles_descripcion: Optional[List[str]] = None):
+        """ Activa la representación compacta para las próximas cargas.
+
+        Con `compacta`, los textos repetitivos pasan a categóricas (o a cadenas Arrow si pyarrow está
+        instalado) y los números al tipo más pequeño que los conserve. Si además se indican las
+        columnas visibles de las descripciones, las que no son visibles ni de búsqueda no se guardan
+        en memoria: `obtener_columnas_diferidas` las lee del archivo cuando hacen falta (p. ej. al exportar).
+        """
+        self.memoria_compacta = bool(compacta)
+        self.columnas_visibles_descripcion = [str(c) for c in (columnas_visibles_descripcion or [])]
+        logger.info(f"Memoria compacta {'activada' if self.memoria_compacta else 'desactivada'}"
+                    f"{f' (columnas visibles: {self.columnas_visibles_descripcion})' if self.columnas_visibles_descripcion else ''}.")
+
+    def _compactar_si_procede(self, df: pd.DataFrame, nombre: str, columnas_diferibles: Optional[List[str]] = None) -> pd.DataFrame:
+        if not self.memoria_compacta:
+            self.informes_memoria.pop(nombre, None)
+            return df
+        df_compacto, informe = compactar_dataframe(df, nombre, columnas_diferibles)
+        self.informes_memoria[nombre] = informe
+        return df_compacto
+
+    def _columnas_diferibles_descripcion(self, df: pd.DataFrame) -> List[str]:
+        """ Columnas de las descripciones que no se buscan ni se muestran (solo si hay columnas visibles configuradas). """
+        if not self.memoria_compacta or not self.columnas_visibles_descripcion:
+            return []
+        columnas_busqueda, _ = self._obtener_nombres_columnas_busqueda_df(df, [], "descripcion")
+        necesarias = {str(c) for c in columnas_busqueda or []} | set(self.columnas_visibles_descripcion)
+        return [c for c in df.columns if str(c) not in necesarias]
+
+    def obtener_columnas_diferidas(self, indice_filas: pd.Index) -> Optional[pd.DataFrame]:
+        """ Lee del archivo de descripciones las columnas diferidas de las filas `indice_filas` (None si no hay). """
+        if not self.columnas_diferidas_descripcion or self.archivo_descripcion_actual is None:
+            return None
+        df_diferidas, error_carga = ManejadorExcel.cargar_excel(self.archivo_descripcion_actual, columnas=self.columnas_diferidas_descripcion)
+        if df_diferidas is None:
+            logger.error(f"No se pudieron leer las columnas diferidas de '{self.archivo_descripcion_actual}': {error_carga}")
+            return None
+        return df_diferidas.reindex(indice_filas)
+
+    def filas_descripcion_completas(self, df_filas: pd.DataFrame) -> pd.DataFrame:
+        """ `df_filas` (filas de las descripciones) con las columnas diferidas añadidas, en el orden del archivo. """
+        df_diferidas = self.obtener_columnas_diferidas(df_filas.index)
+        if df_diferidas is None:
+            return df_filas
+        df_completo = pd.concat([df_filas, df_diferidas], axis=1)
+        return df_completo[[c for c in self._orden_columnas_descripcion if c in df_completo.columns]]
 
     def cargar_excel_diccionario(self, ruta_str: str) -> Tuple[bool, Optional[str]]:
         ruta = Path(ruta_str)
@@ -40,9 +146,15 @@ class MotorBusqueda:
             self.datos_diccionario = None
             self.archivo_diccionario_actual = None
             self.extractor_magnitud = ExtractorMagnitud() # Resetear
+            self.algebra_unidades = AlgebraUnidades(self.extractor_magnitud)
+            self.indice_diccionario = self._reemplazar_indice(self.indice_diccionario, None)
+            self._vocabulario_diccionario = []
+            self._reconstruir_autocompletado()
             return False, error_msg_carga
 
         mapeo_dinamico_para_extractor: Dict[str, List[str]] = {}
+        # Equivalencias de unidades declaradas en las columnas de información ("KW = 1000 W"; "DECA = 10" declara un prefijo)
+        equivalencias_unidades: Dict[str, Tuple[float, Optional[str]]] = {}
         
         if df_cargado.shape[1] > 0: # Si el DataFrame tiene al menos una columna
             columna_canonica_nombre = df_cargado.columns[0] # Primera columna para formas canónicas
@@ -57,6 +169,12 @@ class MotorBusqueda:
                 forma_canonica_str = str(forma_canonica_raw).strip()
                 sinonimos_para_esta_canonica: List[str] = [forma_canonica_str] # Incluir la propia forma canónica
 
+                for i in range(1, min(inicio_col_sinonimos, df_cargado.shape[1])):
+                    equivalencia = parsear_equivalencia(fila.iloc[i])
+                    if equivalencia is not None:
+                        nombre_equivalencia, factor_equivalencia, unidad_destino = equivalencia
+                        equivalencias_unidades[nombre_equivalencia] = (factor_equivalencia, unidad_destino)
+
                 # Recorrer columnas de sinónimos (desde la 4ta en adelante, índice 3)
                 for i in range(inicio_col_sinonimos, max_cols_a_chequear_para_sinonimos):
                     if i < len(df_cargado.columns): # Asegurar que el índice de columna es válido
@@ -76,7 +194,15 @@ class MotorBusqueda:
         else:
             logger.warning(f"El archivo de diccionario '{ruta.name}' no tiene columnas. No se pudo actualizar el extractor de magnitudes.")
             self.extractor_magnitud = ExtractorMagnitud() # Re-inicializar
-
+        self.algebra_unidades = AlgebraUnidades(self.extractor_magnitud, equivalencias_unidades)
+        if equivalencias_unidades:
+            logger.info(f"{len(equivalencias_unidades)} equivalencias de unidades declaradas en '{ruta.name}'.")
+
+        df_cargado = self._compactar_si_procede(df_cargado, "diccionario")
+        # Construir el índice antes de publicar el DataFrame, para que una búsqueda nunca vea datos sin índice
+        self.indice_diccionario = self._reemplazar_indice(self.indice_diccionario, self._construir_indice(df_cargado, "diccionario"))
+        self._vocabulario_diccionario = vocabulario_de_series(self._series_indice_sin_vacios(self.indice_diccionario, df_cargado))
+        self._reconstruir_autocompletado()
         self.datos_diccionario = df_cargado
         self.archivo_diccionario_actual = ruta
 
@@ -92,13 +218,248 @@ class MotorBusqueda:
         if df_cargado is None:
             self.datos_descripcion = None
             self.archivo_descripcion_actual = None
+            self.indice_descripcion = self._reemplazar_indice(self.indice_descripcion, None)
+            self.columnas_diferidas_descripcion = []
+            self._frecuencias_descripcion = None
+            self._reconstruir_autocompletado()
             return False, error_msg_carga
             
+        columnas_originales = df_cargado.columns
+        columnas_diferibles = self._columnas_diferibles_descripcion(df_cargado)
+        df_cargado = self._compactar_si_procede(df_cargado, "descripcion", columnas_diferibles)
+        self.indice_descripcion = self._reemplazar_indice(self.indice_descripcion, self._construir_indice(df_cargado, "descripcion"))
+        self._frecuencias_descripcion = frecuencias_de_series(self._series_indice_sin_vacios(self.indice_descripcion, df_cargado))
+        self._reconstruir_autocompletado()
         self.datos_descripcion = df_cargado
         self.archivo_descripcion_actual = ruta
+        self.columnas_diferidas_descripcion = columnas_diferibles
+        self._orden_columnas_descripcion = list(columnas_originales)
         logger.info(f"Archivo de descripciones '{ruta.name}' cargado.")
         return True, None
 
+    def motor_con_misma_configuracion(self) -> "MotorBusqueda":
+        """ Motor nuevo, sin datos, con la configuración de este (memoria, registro de lentas, métricas). """
+        motor = MotorBusqueda(indices_diccionario_cfg=self.indices_columnas_busqueda_dic_preview)
+        motor.configurar_memoria(self.memoria_compacta, self.columnas_visibles_descripcion)
+        motor.registro_consultas_lentas = self.registro_consultas_lentas
+        if self.metricas is not None: # Las métricas siguen acumulando en el mismo objeto
+            motor.activar_metricas(self.metricas)
+        return motor
+
+    def compartir_datos_de(self, otro: "MotorBusqueda", diccionario: bool = True, descripcion: bool = True):
+        """ Reutiliza (sin copiar) los datos ya cargados e indexados de otro motor.
+
+        Los DataFrames y los índices no se modifican tras la carga, por lo que pueden compartirse
+        entre motores; sirve para recargar solo uno de los dos archivos.
+        """
+        if diccionario:
+            self.datos_diccionario = otro.datos_diccionario
+            self.archivo_diccionario_actual = otro.archivo_diccionario_actual
+            self.extractor_magnitud = otro.extractor_magnitud
+            self.algebra_unidades = otro.algebra_unidades
+            self.indice_diccionario = self._reemplazar_indice(self.indice_diccionario, otro.indice_diccionario)
+            if "diccionario" in otro.informes_memoria:
+                self.informes_memoria["diccionario"] = otro.informes_memoria["diccionario"]
+        if descripcion:
+            self.datos_descripcion = otro.datos_descripcion
+            self.archivo_descripcion_actual = otro.archivo_descripcion_actual
+            self.indice_descripcion = self._reemplazar_indice(self.indice_descripcion, otro.indice_descripcion)
+            self.columnas_diferidas_descripcion = list(otro.columnas_diferidas_descripcion)
+            self._orden_columnas_descripcion = list(otro._orden_columnas_descripcion)
+            if "descripcion" in otro.informes_memoria:
+                self.informes_memoria["descripcion"] = otro.informes_memoria["descripcion"]
+            self._frecuencias_descripcion = otro._frecuencias_descripcion
+        if diccionario:
+            self._vocabulario_diccionario = otro._vocabulario_diccionario
+        if diccionario and descripcion:
+            self.autocompletado = otro.autocompletado # Mismo vocabulario y frecuencias: el índice se comparte
+        elif diccionario or descripcion:
+            self._reconstruir_autocompletado()
+
+    @staticmethod
+    def _series_indice_sin_vacios(indice: Optional[IndiceBusqueda], df: pd.DataFrame) -> List[pd.Series]:
+        """ Columnas normalizadas del índice con "" en las celdas vacías (normalizadas serían "NAN"). """
+        if indice is None:
+            return []
+        return [serie.where(df[nombre_columna].notna().to_numpy(), "") for nombre_columna, serie in indice.series_normalizadas.items()]
+
+    def _reconstruir_autocompletado(self):
+        """ Rehace el índice de autocompletado con el vocabulario del diccionario y las frecuencias de las descripciones. """
+        with self._cerrojo_autocompletado: # Diccionario y descripciones pueden cargarse en paralelo
+            vocabulario = self._vocabulario_diccionario
+            self.autocompletado = IndiceAutocompletado(vocabulario, self._frecuencias_descripcion) if vocabulario else None
+
+    def sugerir_terminos(self, fragmento: str, limite: int = 10) -> List[str]:
+        """ Términos del diccionario (palabras y frases normalizadas) que completan `fragmento`, los más frecuentes
+        en las descripciones primero. Un espacio final en `fragmento` pide frases que continúen la palabra escrita. """
+        indice = self.autocompletado
+        prefijo = self._normalizar_para_busqueda(fragmento)
+        if indice is None or not prefijo:
+            return []
+        if fragmento[-1:].isspace():
+            prefijo += " "
+        return indice.sugerir(prefijo, limite)
+
+    def _construir_indice(self, df: pd.DataFrame, nombre: str) -> Optional[IndiceBusqueda]:
+        """ Construye el índice de columnas normalizadas para las columnas de búsqueda por defecto de `df`. """
+        columnas_indice, err_cols = self._obtener_nombres_columnas_busqueda_df(df, [], f"indice_{nombre}")
+        if not columnas_indice:
+            logger.warning(f"No se construyó índice para '{nombre}': {err_cols}")
+            return None
+        indice = IndiceBusqueda(df, columnas_indice, self._normalizar_para_busqueda, nombre=nombre)
+        if self.metricas is not None:
+            self.metricas.registrar_indice(nombre, indice.segundos_construccion, indice.num_filas)
+        return indice
+
+    def _reemplazar_indice(self, indice_anterior: Optional[IndiceBusqueda], indice_nuevo: Optional[IndiceBusqueda]) -> Optional[IndiceBusqueda]:
+        """ Registra `indice_nuevo` y retira `indice_anterior` del registro. Devuelve el nuevo índice. """
+        with self._cerrojo_indices:
+            if indice_anterior is not None:
+                self._indices_por_token.pop(indice_anterior.token, None)
+            if indice_nuevo is not None:
+                self._indices_por_token[indice_nuevo.token] = indice_nuevo
+        return indice_nuevo
+
+    def _obtener_serie_normalizada(self, df: pd.DataFrame, nombre_columna: str) -> pd.Series:
+        """ Columna normalizada de `df`, tomada del índice si `df` deriva de un DataFrame indexado. """
+        indice = self._indices_por_token.get(df.attrs.get(CLAVE_ATTRS_INDICE))
+        if indice is not None:
+            serie_indexada = indice.serie_normalizada(nombre_columna, df.index)
+            if serie_indexada is not None:
+                self._registrar_cache("indice_normalizado", True)
+                return serie_indexada
+        self._registrar_cache("indice_normalizado", False)
+        return normalizar_serie(df[nombre_columna], self._normalizar_para_busqueda)
+
+    def _memo_lote(self) -> Optional[Dict[Any, Any]]:
+        """ Memoria del `buscar_lote` en curso en este hilo (None fuera de un lote). """
+        return getattr(self._estado_hilo, "memo_lote", None)
+
+    def _estadisticas_activas(self) -> Optional[EstadisticasBusqueda]:
+        return getattr(self._estado_hilo, "estadisticas", None)
+
+    def _descripciones_base(self) -> Optional[pd.DataFrame]:
+        """ Descripciones sobre las que busca la consulta en curso: todas, o solo las filas candidatas de un refinamiento. """
+        bloque = getattr(self._estado_hilo, "bloque_descripciones", None)
+        if bloque is not None: # Búsqueda con límite: solo el bloque en curso
+            return bloque
+        datos = getattr(self._estado_hilo, "descripciones_sin_valores", None) # Búsqueda por relevancia: solo ids de fila
+        if datos is None:
+            datos = self.datos_descripcion
+        filas_candidatas = getattr(self._estado_hilo, "filas_candidatas", None)
+        if filas_candidatas is None or datos is None:
+            return datos
+        # Máscara booleana (y no .loc) para conservar el orden original e ignorar ids de unas descripciones ya reemplazadas
+        return datos[datos.index.isin(filas_candidatas)]
+
+    def _etapa(self, nombre_etapa: str, filas_entrada: int = 0):
+        """ Mide una etapa en las estadísticas de la búsqueda en curso (sin coste si no se pidieron). """
+        estadisticas = self._estadisticas_activas()
+        if estadisticas is None:
+            return nullcontext(RegistroEtapa())
+        return estadisticas.etapa(nombre_etapa, filas_entrada)
+
+    def _anotar_plan(self, **campos: Any):
+        """ Añade campos al plan de la búsqueda en curso (consulta parseada y decisiones de flujo). """
+        estadisticas = self._estadisticas_activas()
+        if estadisticas is not None:
+            estadisticas.plan.update(campos)
+
+    def _registrar_cache(self, nombre_cache: str, acierto: bool):
+        estadisticas = self._estadisticas_activas()
+        if estadisticas is not None:
+            estadisticas.registrar_cache(nombre_cache, acierto)
+
+    def _es_del_diccionario(self, df: Optional[pd.DataFrame]) -> bool:
+        """ True si `df` es el diccionario cargado o un subconjunto de sus filas. """
+        if df is None:
+            return False
+        if df is self.datos_diccionario:
+            return True
+        return self.indice_diccionario is not None and df.attrs.get(CLAVE_ATTRS_INDICE) == self.indice_diccionario.token
+
+    def _calcular_mascara_texto(self, indice_filas: pd.Index, cols: List[str], obtener_serie: Callable[[str], pd.Series], valor_normalizado: str,
+                                patron_regex: Optional[Pattern[str]] = None) -> pd.Series:
+        mascara = pd.Series(False, index=indice_filas)
+        # Word boundaries (\b) para buscar la palabra/frase exacta; la regex compilada se reutiliza entre búsquedas
+        patron_regex = patron_regex or patron_palabra(valor_normalizado)
+        for nombre_columna in cols:
+            try:
+                mascara |= obtener_serie(nombre_columna).str.contains(patron_regex, regex=True, na=False)
+            except Exception as e_col:
+                logger.warning(f"Error búsqueda STR en columna '{nombre_columna}' para término '{valor_normalizado}': {e_col}")
+        return mascara
+
+    @staticmethod
+    def _mascara_texto_por_palabras(indice: IndiceBusqueda, cols: List[str], valor_normalizado: str) -> Optional[pd.Series]:
+        """ Máscara de `valor_normalizado` sobre todo el DataFrame indexado, con las listas de palabras de cada columna
+        (None si el término no se puede resolver así). """
+        coincide = np.zeros(indice.num_filas, dtype=bool)
+        for nombre_columna in cols:
+            indice_palabras = indice.indice_palabras(nombre_columna)
+            mascara_columna = indice_palabras.mascara(valor_normalizado) if indice_palabras is not None else None
+            if mascara_columna is None:
+                return None
+            coincide |= mascara_columna
+        return pd.Series(coincide, index=indice.indice_filas)
+
+    def _mascara_texto_en_columnas(self, df: pd.DataFrame, cols: List[str], valor_normalizado: str, patron_regex: Optional[Pattern[str]] = None) -> pd.Series:
+        """ Filas de `df` con `valor_normalizado` como palabra/frase completa en alguna de `cols`.
+
+        Dentro de un lote, la máscara de cada término distinto se calcula una vez sobre el DataFrame
+        base indexado (con sus listas de palabras, sin recorrer la columna con la regex) y después solo
+        se recorta a las filas de `df`. Con `patron_regex` se busca esa regex en lugar de la de
+        `valor_normalizado`, que entonces solo identifica la máscara en el lote.
+        """
+        if not valor_normalizado:
+            return pd.Series(False, index=df.index)
+        cols_presentes = [c for c in cols if c in df.columns]
+
+        memo = self._memo_lote()
+        indice = self._indices_por_token.get(df.attrs.get(CLAVE_ATTRS_INDICE)) if memo is not None else None
+        if indice is not None and all(c in indice.series_normalizadas for c in cols_presentes):
+            clave_memo = ("texto", indice.token, tuple(cols_presentes), valor_normalizado)
+            mascara_base = memo.get(clave_memo)
+            self._registrar_cache("mascara_lote", mascara_base is not None)
+            if mascara_base is None:
+                if len(memo) >= self._estado_hilo.max_entradas_memo:
+                    memo.clear()
+                mascara_base = self._mascara_texto_por_palabras(indice, cols_presentes, valor_normalizado) if patron_regex is None else None
+                if mascara_base is None:
+                    mascara_base = self._calcular_mascara_texto(indice.indice_filas, cols_presentes, indice.series_normalizadas.__getitem__, valor_normalizado, patron_regex)
+                memo[clave_memo] = mascara_base
+            mascara_recortada = indice.restringir(mascara_base, df.index)
+            if mascara_recortada is not None:
+                return mascara_recortada
+
+        return self._calcular_mascara_texto(df.index, cols_presentes, lambda col: self._obtener_serie_normalizada(df, col), valor_normalizado, patron_regex)
+
+    def _indice_difuso_de(self, df: pd.DataFrame, cols: List[str]) -> IndiceDifuso:
+        """ Índice difuso del vocabulario de `df`: el del DataFrame base indexado o, si no lo hay, uno temporal. """
+        indice = self._indices_por_token.get(df.attrs.get(CLAVE_ATTRS_INDICE))
+        if indice is not None and all(c in indice.series_normalizadas for c in cols if c in df.columns):
+            return indice.indice_difuso()
+        return IndiceDifuso(palabras_de_series(self._obtener_serie_normalizada(df, c) for c in cols if c in df.columns))
+
+    def _mascara_difusa_en_columnas(self, df: pd.DataFrame, cols: List[str], term_an: TerminoAnalizado) -> pd.Series:
+        """ Filas de `df` con el término difuso escrito con hasta `distancia_maxima_para(palabra)` errores por palabra.
+
+        Cada palabra se expande a sus variantes del vocabulario (índice de trigramas) y la máscara se
+        calcula como la de una palabra/frase normal, con una regex que admite cualquiera de las variantes.
+        """
+        with self._etapa("expansion_difusa") as registro_etapa:
+            indice_difuso = self._indice_difuso_de(df, cols)
+            variantes_por_palabra = tuple(tuple(indice_difuso.candidatos(palabra, distancia_maxima_para(palabra))) for palabra in term_an.tokens)
+            registro_etapa.filas_salida = sum(len(variantes) for variantes in variantes_por_palabra)
+        estadisticas = self._estadisticas_activas()
+        if estadisticas is not None:
+            estadisticas.plan.setdefault("expansiones_difusas", {})[term_an.original] = [list(variantes) for variantes in variantes_por_palabra]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Término difuso '{term_an.original}' expandido a: {variantes_por_palabra}")
+        if not variantes_por_palabra or not all(variantes_por_palabra): # Alguna palabra sin ninguna variante en el vocabulario
+            return pd.Series(False, index=df.index)
+        return self._mascara_texto_en_columnas(df, cols, f"~{term_an.valor}", patron_variantes(variantes_por_palabra))
+
     def _obtener_nombres_columnas_busqueda_df(self, df: pd.DataFrame, indices_cfg: List[int], tipo_busqueda: str) -> Tuple[Optional[List[str]], Optional[str]]:
         if df is None or df.empty:
             return None, f"DF para '{tipo_busqueda}' vacío."
@@ -112,7 +473,7 @@ class MotorBusqueda:
         usar_columnas_por_defecto = not indices_cfg or indices_cfg == [-1] # -1 como indicador de usar todas texto/objeto
 
         if usar_columnas_por_defecto:
-            cols_texto_obj = [col for col in columnas_disponibles if pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col])]
+            cols_texto_obj = [col for col in columnas_disponibles if es_columna_texto(df[col])]
             if cols_texto_obj:
                 logger.debug(f"Para '{tipo_busqueda}', usando columnas de tipo texto/objeto (defecto): {cols_texto_obj}")
                 return cols_texto_obj, None
@@ -160,7 +521,9 @@ class MotorBusqueda:
     def _aplicar_negaciones_y_extraer_positivos(self, df_original: pd.DataFrame, cols: List[str], texto: str) -> Tuple[pd.DataFrame, str, List[str]]:
         texto_limpio_entrada = texto.strip()
         terminos_negados_encontrados: List[str] = []
-        df_a_procesar = df_original.copy() if df_original is not None else pd.DataFrame()
+        with self._etapa("materializacion", filas_entrada=len(df_original) if df_original is not None else 0) as registro_etapa:
+            df_a_procesar = df_original.copy() if df_original is not None else pd.DataFrame()
+            registro_etapa.filas_salida = len(df_a_procesar)
 
         if not texto_limpio_entrada:
             return df_a_procesar, "", terminos_negados_encontrados
@@ -171,9 +534,11 @@ class MotorBusqueda:
         for match_negado in self.patron_termino_negado.finditer(texto_limpio_entrada):
             partes_positivas.append(texto_limpio_entrada[ultimo_indice_fin_negado:match_negado.start()])
             ultimo_indice_fin_negado = match_negado.end()
-            termino_negado_raw = match_negado.group(1) or match_negado.group(2) # group(1) para comillas, group(2) sin comillas
+            termino_negado_raw = match_negado.group(2) or match_negado.group(3) # group(2) para comillas, group(3) sin comillas
             if termino_negado_raw:
                 termino_negado_normalizado = self._normalizar_para_busqueda(termino_negado_raw.strip('"')) # Quitar comillas si las hay
+                if termino_negado_normalizado and match_negado.group(1): # Los negados difusos se guardan como "~término"
+                    termino_negado_normalizado = f"~{termino_negado_normalizado}"
                 if termino_negado_normalizado and termino_negado_normalizado not in terminos_negados_encontrados:
                     terminos_negados_encontrados.append(termino_negado_normalizado)
         
@@ -181,32 +546,26 @@ class MotorBusqueda:
         terminos_positivos_final_str = ' '.join("".join(partes_positivas).split()).strip()
 
         if df_a_procesar.empty or not terminos_negados_encontrados or not cols:
-            logger.debug(f"Parseo negación: Query='{texto_limpio_entrada}', Positivos='{terminos_positivos_final_str}', Negados={terminos_negados_encontrados}. No se aplicó filtro al DF.")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Parseo negación: Query='{texto_limpio_entrada}', Positivos='{terminos_positivos_final_str}', Negados={terminos_negados_encontrados}. No se aplicó filtro al DF.")
             return df_a_procesar, terminos_positivos_final_str, terminos_negados_encontrados
 
-        mascara_exclusion_total = pd.Series(False, index=df_a_procesar.index)
-        for termino_negado_actual in terminos_negados_encontrados:
-            if not termino_negado_actual: # Skip si el término negado es vacío después de normalizar
-                continue
-            
-            mascara_para_este_termino_negado = pd.Series(False, index=df_a_procesar.index)
-            # Usar word boundaries (\b) para buscar la palabra/frase exacta negada
-            patron_regex_negado = r"\b" + re.escape(termino_negado_actual) + r"\b"
-            
-            for nombre_columna in cols:
-                if nombre_columna not in df_a_procesar.columns:
+        with self._etapa("negaciones", filas_entrada=len(df_a_procesar)) as registro_etapa:
+            mascara_exclusion_total = pd.Series(False, index=df_a_procesar.index)
+            for termino_negado_actual in terminos_negados_encontrados:
+                if not termino_negado_actual: # Skip si el término negado es vacío después de normalizar
                     continue
-                try:
-                    # Normalizar la columna del DataFrame para la comparación
-                    serie_columna_normalizada = df_a_procesar[nombre_columna].astype(str).map(self._normalizar_para_busqueda)
-                    mascara_para_este_termino_negado |= serie_columna_normalizada.str.contains(patron_regex_negado, regex=True, na=False)
-                except Exception as e_neg_col:
-                    logger.error(f"Error aplicando negación en col '{nombre_columna}', term '{termino_negado_actual}': {e_neg_col}")
-
-            mascara_exclusion_total |= mascara_para_este_termino_negado
-        
-        df_resultado_filtrado = df_a_procesar[~mascara_exclusion_total]
-        logger.info(f"Filtrado por negación (Query='{texto_limpio_entrada}'): {len(df_a_procesar)} -> {len(df_resultado_filtrado)} filas. Negados: {terminos_negados_encontrados}. Positivos: '{terminos_positivos_final_str}'")
+                
+                if termino_negado_actual.startswith("~"):
+                    termino_difuso = TerminoAnalizado(termino_negado_actual, "str", termino_negado_actual[1:], termino_negado_actual[1:], difuso=True)
+                    mascara_exclusion_total |= self._mascara_difusa_en_columnas(df_a_procesar, cols, termino_difuso)
+                else:
+                    mascara_exclusion_total |= self._mascara_texto_en_columnas(df_a_procesar, cols, termino_negado_actual)
+            
+            df_resultado_filtrado = df_a_procesar[~mascara_exclusion_total]
+            registro_etapa.filas_salida = len(df_resultado_filtrado)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Filtrado por negación (Query='{texto_limpio_entrada}'): {len(df_a_procesar)} -> {len(df_resultado_filtrado)} filas. Negados: {terminos_negados_encontrados}. Positivos: '{terminos_positivos_final_str}'")
         return df_resultado_filtrado, terminos_positivos_final_str, terminos_negados_encontrados
 
     def _descomponer_nivel1_or(self, texto_complejo: str) -> Tuple[str, List[str]]:
@@ -218,7 +577,8 @@ class MotorBusqueda:
         # Esto es para manejar casos como "A + B | C + D" donde el OR es el principal.
         # Pero si es solo "A + B", el "+" es AND.
         if '+' in texto_complejo and not (texto_limpio.startswith("(") and texto_limpio.endswith(")")):
-             logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Detectado '+' de alto nivel, tratando como AND. Segmento=['{texto_complejo}']")
+             if logger.isEnabledFor(logging.DEBUG):
+                 logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Detectado '+' de alto nivel, tratando como AND. Segmento=['{texto_complejo}']")
              return "AND", [texto_limpio] # Se devuelve como un único segmento que se tratará como AND en N2
 
         # Solo "|" es un separador OR de alto nivel. Ya no se usa '/' para OR.
@@ -233,11 +593,13 @@ class MotorBusqueda:
                 segmentos_potenciales = [s.strip() for s in re.split(sep_regex, texto_complejo) if s.strip()]
                 # Comprobar si la división realmente ocurrió o si el separador estaba al inicio/final
                 if len(segmentos_potenciales) > 1 or (len(segmentos_potenciales) == 1 and texto_limpio != segmentos_potenciales[0]):
-                    logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Op=OR, Segs={segmentos_potenciales}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Op=OR, Segs={segmentos_potenciales}")
                     return "OR", segmentos_potenciales
         
         # Si no hay OR explícito de alto nivel, se asume AND para este segmento (que puede ser único)
-        logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Op=AND (no OR explícito de alto nivel), Seg=['{texto_limpio}']")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Descomp. N1 (OR) para '{texto_complejo}': Op=AND (no OR explícito de alto nivel), Seg=['{texto_limpio}']")
         return "AND", [texto_limpio]
 
     def _descomponer_nivel2_and(self, termino_segmento_n1: str) -> Tuple[str, List[str]]:
@@ -249,17 +611,23 @@ class MotorBusqueda:
         partes_crudas = re.split(r'\s+\+\s+', termino_limpio) # El '+' es literal, \s+ es uno o más espacios
         partes_limpias_finales = [p.strip() for p in partes_crudas if p.strip()]
 
-        logger.debug(f"Descomp. N2 (AND) para '{termino_segmento_n1}': Partes={partes_limpias_finales}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Descomp. N2 (AND) para '{termino_segmento_n1}': Partes={partes_limpias_finales}")
         return "AND", partes_limpias_finales # El operador siempre es AND en este nivel
 
-    def _analizar_terminos(self, terminos_brutos: List[str]) -> List[Dict[str, Any]]:
-        terminos_analizados: List[Dict[str, Any]] = []
+    def _analizar_terminos(self, terminos_brutos: List[str]) -> List[TerminoAnalizado]:
+        terminos_analizados: List[TerminoAnalizado] = []
 
         for termino_original_bruto in terminos_brutos:
             termino_original_procesado = str(termino_original_bruto).strip()
             es_frase_exacta = False
             termino_final_para_analisis = termino_original_procesado
 
+            # Detectar si es un término difuso ("~término" o "~\"frase\""): admite errores de escritura
+            es_difuso = termino_final_para_analisis.startswith("~")
+            if es_difuso:
+                termino_final_para_analisis = termino_final_para_analisis[1:].strip()
+
             # Detectar si es una frase exacta (entre comillas)
             if len(termino_final_para_analisis) >= 2 and \
                termino_final_para_analisis.startswith('"') and \
@@ -270,28 +638,31 @@ class MotorBusqueda:
             if not termino_final_para_analisis: # Si el término queda vacío (ej. solo comillas "")
                 continue
 
-            item_analizado: Dict[str, Any] = {"original": termino_final_para_analisis} # Guardar el término sin comillas si era frase
+            # El texto normalizado sirve como valor de los términos de texto y, en los numéricos, para exigir
+            # el sinónimo en la celda cuando se aplica un filtro numérico original
+            texto_normalizado = self._normalizar_para_busqueda(termino_final_para_analisis)
+            item_analizado: Optional[TerminoAnalizado] = None
 
             # Primero, intentar parsear como comparación o rango, solo si NO es frase exacta
             match_comparacion = self.patron_comparacion.match(termino_final_para_analisis)
             match_rango = self.patron_rango.match(termino_final_para_analisis)
 
-            if match_comparacion and not es_frase_exacta:
+            if es_difuso:
+                pass # Un término difuso siempre es de texto
+            elif match_comparacion and not es_frase_exacta:
                 operador_str, valor_str, unidad_str_raw = match_comparacion.groups()
                 valor_numerico = self._parse_numero(valor_str)
                 if valor_numerico is not None:
                     mapa_operadores = {">": "gt", "<": "lt", ">=": "ge", "<=": "le", "=": "eq"}
                     unidad_canonica: Optional[str] = None
+                    unidad_base, factor_unidad = None, 1.0
                     if unidad_str_raw and unidad_str_raw.strip():
                         unidad_canonica = self.extractor_magnitud.obtener_magnitud_normalizada(unidad_str_raw.strip())
-                    
-                    item_analizado.update({
-                        "tipo": mapa_operadores.get(operador_str), 
-                        "valor": valor_numerico, 
-                        "unidad_busqueda": unidad_canonica # Puede ser None si no hay unidad o no se normaliza
-                    })
-                else: # No se pudo parsear como número, tratar como string
-                    item_analizado.update({"tipo": "str", "valor": self._normalizar_para_busqueda(termino_final_para_analisis)})
+                        unidad_base, factor_unidad = self.algebra_unidades.resolver(unidad_str_raw.strip()) or (None, 1.0)
+                    # La unidad puede ser None si no hay unidad o no se normaliza
+                    item_analizado = TerminoAnalizado(termino_final_para_analisis, mapa_operadores.get(operador_str), valor_numerico,
+                                                      texto_normalizado, unidad_busqueda=unidad_canonica,
+                                                      unidad_base=unidad_base, factor_unidad=factor_unidad)
             
             elif match_rango and not es_frase_exacta:
                 valor1_str, valor2_str, unidad_str_r_raw = match_rango.groups()
@@ -299,47 +670,57 @@ class MotorBusqueda:
                 valor2_num = self._parse_numero(valor2_str)
                 if valor1_num is not None and valor2_num is not None:
                     unidad_canonica_r: Optional[str] = None
+                    unidad_base_r, factor_unidad_r = None, 1.0
                     if unidad_str_r_raw and unidad_str_r_raw.strip():
                         unidad_canonica_r = self.extractor_magnitud.obtener_magnitud_normalizada(unidad_str_r_raw.strip())
-                    
-                    item_analizado.update({
-                        "tipo": "range", 
-                        "valor": sorted([valor1_num, valor2_num]), # Guardar como [min, max]
-                        "unidad_busqueda": unidad_canonica_r
-                    })
-                else: # No se pudo parsear como rango numérico, tratar como string
-                    item_analizado.update({"tipo": "str", "valor": self._normalizar_para_busqueda(termino_final_para_analisis)})
+                        unidad_base_r, factor_unidad_r = self.algebra_unidades.resolver(unidad_str_r_raw.strip()) or (None, 1.0)
+                    item_analizado = TerminoAnalizado(termino_final_para_analisis, "range", sorted([valor1_num, valor2_num]), # [min, max]
+                                                      texto_normalizado, unidad_busqueda=unidad_canonica_r,
+                                                      unidad_base=unidad_base_r, factor_unidad=factor_unidad_r)
             
-            else: # Si no es comparación, ni rango, o si es una frase exacta, tratar como string
-                  # Si era frase exacta, ya se quitaron las comillas de `termino_final_para_analisis`
-                  # La normalización se aplica para la búsqueda, pero el "original" se mantiene para otros usos.
-                item_analizado.update({"tipo": "str", "valor": self._normalizar_para_busqueda(termino_final_para_analisis)})
+            if item_analizado is None:
+                # Ni comparación ni rango (o no se pudo parsear el número), o frase exacta: término de texto.
+                # La normalización se aplica para la búsqueda, pero el "original" se mantiene para otros usos.
+                texto_original_termino = f"~{termino_final_para_analisis}" if es_difuso else termino_final_para_analisis
+                item_analizado = TerminoAnalizado(texto_original_termino, "str", texto_normalizado, texto_normalizado, es_frase=es_frase_exacta, difuso=es_difuso)
             
             terminos_analizados.append(item_analizado)
 
-        logger.debug(f"Términos (post-AND) analizados para búsqueda detallada: {terminos_analizados}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Términos (post-AND) analizados para búsqueda detallada: {terminos_analizados}")
         return terminos_analizados
 
+    def _construir_plan(self, terminos_positivos: str) -> PlanConsulta:
+        """ Descompone la consulta positiva en segmentos OR de términos AND ya analizados. """
+        operador_nivel1, segmentos_nivel1_or = self._descomponer_nivel1_or(terminos_positivos)
+        segmentos: List[PlanSegmento] = []
+        for segmento_or in segmentos_nivel1_or:
+            _operador_nivel2, terminos_brutos_nivel2_and = self._descomponer_nivel2_and(segmento_or)
+            segmentos.append(PlanSegmento(segmento_or, self._analizar_terminos(terminos_brutos_nivel2_and)))
+        return PlanConsulta(operador_nivel1, segmentos)
+
     def _parse_numero(self, num_str: Any) -> Optional[float]:
         if isinstance(num_str, (int, float)):
             return float(num_str)
         
+        # Se llama por cada número de cada celda: la traza solo se formatea si el modo traza la elige
+        traza = muestreo_traza.activo and muestreo_traza.tomar()
         if not isinstance(num_str, str):
-            logger.debug(f"Parseo num: Entrada '{num_str}' no es string.")
+            if traza: logger_traza.debug(f"Parseo num: Entrada '{num_str}' no es string.")
             return None
             
         s_limpio = num_str.strip()
         if not s_limpio:
-            logger.debug(f"Parseo num: Entrada '{num_str}' vacía tras limpiar.")
+            if traza: logger_traza.debug(f"Parseo num: Entrada '{num_str}' vacía tras limpiar.")
             return None
         
         # Loguear el intento
-        logger.debug(f"Parseo num: Intentando convertir '{s_limpio}' (originado de '{num_str}')")
+        if traza: logger_traza.debug(f"Parseo num: Intentando convertir '{s_limpio}' (originado de '{num_str}')")
 
         try:
             # Caso 1: Sin comas ni puntos (ej. "123", "-45")
             if ',' not in s_limpio and '.' not in s_limpio:
-                logger.debug(f"  '{s_limpio}': Sin separadores. Intento de float directo.")
+                if traza: logger_traza.debug(f"  '{s_limpio}': Sin separadores. Intento de float directo.")
                 return float(s_limpio)
             
             # Normalizar separador decimal a punto (.)
@@ -348,7 +729,7 @@ class MotorBusqueda:
             
             # Caso 2: Un solo "punto" después de normalizar comas (ej. "123.45", "1.234" si la coma era decimal)
             if len(partes) == 1: # Esto sucedería si era "123" o si la coma era el único separador y se convirtió a punto
-                logger.debug(f"  '{s_limpio}' -> '{s_con_puntos}': Sin puntos post-normalización. Intento float directo.")
+                if traza: logger_traza.debug(f"  '{s_limpio}' -> '{s_con_puntos}': Sin puntos post-normalización. Intento float directo.")
                 return float(s_con_puntos) # Ej: "1234" o "-500"
 
             # Caso 3: Múltiples "puntos" (ej. "1.234.567,89" -> "1.234.567.89")
@@ -363,14 +744,14 @@ class MotorBusqueda:
                 if len(ultima_parte) >= 3: 
                     # Considerar que los puntos eran separadores de miles
                     numero_reconstruido_str = "".join(partes) # Unir todo sin puntos
-                    logger.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte '{ultima_parte}' (>=3 dig) -> miles. Reconstruido: '{numero_reconstruido_str}'")
+                    if traza: logger_traza.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte '{ultima_parte}' (>=3 dig) -> miles. Reconstruido: '{numero_reconstruido_str}'")
                     return float(numero_reconstruido_str)
                 
                 # Subcaso 3b: Última parte tiene 1 o 2 dígitos (probable decimal, ej. xxx.1 o xxx.12)
                 elif len(ultima_parte) == 1 or len(ultima_parte) == 2 :
                     # Considerar el último punto como decimal
                     numero_reconstruido_str = f"{partes_principales_str}.{ultima_parte}"
-                    logger.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte '{ultima_parte}' (1-2 dig) -> decimal. Reconstruido: '{numero_reconstruido_str}'")
+                    if traza: logger_traza.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte '{ultima_parte}' (1-2 dig) -> decimal. Reconstruido: '{numero_reconstruido_str}'")
                     return float(numero_reconstruido_str)
                 
                 # Subcaso 3c: Última parte es vacía (ej. "123." o "1.234.")
@@ -378,7 +759,7 @@ class MotorBusqueda:
                     if not ultima_parte: # Es decir, terminaba en "."
                         # Interpretar "123." como 123.0, o "1.234." como 1234.0
                         if partes_principales_str.isdigit() or (partes_principales_str.startswith('-') and partes_principales_str[1:].isdigit()):
-                             logger.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte vacía. Reconstruido: '{partes_principales_str}'")
+                             if traza: logger_traza.debug(f"  '{s_limpio}' -> '{s_con_puntos}' -> partes={partes}. Última parte vacía. Reconstruido: '{partes_principales_str}'")
                              return float(partes_principales_str)
                         else:
                             logger.warning(f"  Formato no reconocido tras quitar punto/coma final para '{num_str}'. Parte principal: '{partes_principales_str}'")
@@ -393,7 +774,7 @@ class MotorBusqueda:
                 if s_con_puntos.count('.') <= 1:
                     try:
                         val_fallback = float(s_con_puntos)
-                        logger.debug(f"  Fallback a conversión directa para '{s_con_puntos}' -> {val_fallback}")
+                        if traza: logger_traza.debug(f"  Fallback a conversión directa para '{s_con_puntos}' -> {val_fallback}")
                         return val_fallback
                     except ValueError:
                         logger.warning(f"  Fallback falló para '{s_con_puntos}'.")
@@ -407,131 +788,105 @@ class MotorBusqueda:
             logger.error(f"  Excepción inesperada '{type(e_parse).__name__}' en _parse_numero para '{s_limpio}': {e_parse}")
             return None
 
-    def _generar_mascara_para_un_termino(self, df: pd.DataFrame, cols: List[str], term_an: Dict[str, Any], filtro_numerico_original: Optional[Dict[str, Any]] = None) -> pd.Series:
-        tipo_termino = term_an["tipo"]
-        valor_termino = term_an["valor"]
-        unidad_requerida_canonica_query = term_an.get("unidad_busqueda")
-
+    def _generar_mascara_para_un_termino(self, df: pd.DataFrame, cols: List[str], term_an: TerminoAnalizado, filtro_numerico_original: Optional[TerminoAnalizado] = None) -> pd.Series:
         # Si se pasa un filtro numérico original (ej. de la query principal cuando este término es un sinónimo de FCD),
         # se usa ese filtro en lugar del que podría tener el término sinónimo.
-        valor_a_comparar_final = valor_termino
-        unidad_final_para_comparar_canonica = unidad_requerida_canonica_query
-        operador_final_para_comparar = tipo_termino
-        
+        comparacion = term_an
         if filtro_numerico_original:
-            logger.debug(f"  Aplicando filtro numérico original: {filtro_numerico_original} sobre término actual (sinónimo): {term_an}")
-            valor_a_comparar_final = filtro_numerico_original["valor"]
-            unidad_final_para_comparar_canonica = filtro_numerico_original.get("unidad_busqueda")
-            operador_final_para_comparar = filtro_numerico_original["tipo"]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"  Aplicando filtro numérico original: {filtro_numerico_original} sobre término actual (sinónimo): {term_an}")
+            comparacion = filtro_numerico_original
+
+        # Búsqueda de texto (string) - solo si no estamos aplicando un filtro_numerico_original
+        # (porque si hay filtro_numerico_original, la parte textual se verifica en la búsqueda numérica)
+        if term_an.tipo == "str" and not filtro_numerico_original: # `valor` aquí ya está normalizado por `_analizar_terminos`
+            if term_an.difuso:
+                return self._mascara_difusa_en_columnas(df, cols, term_an)
+            return self._mascara_texto_en_columnas(df, cols, str(term_an.valor))
 
         mascara_total_termino = pd.Series(False, index=df.index)
+        if not comparacion.es_numerico:
+            return mascara_total_termino
 
+        # Búsqueda numérica (gt, lt, ge, le, range, eq con unidad)
         for nombre_columna in cols:
             if nombre_columna not in df.columns:
                 continue
-            
-            columna_serie = df[nombre_columna]
-            
-            # Búsqueda numérica (gt, lt, ge, le, range, eq con unidad)
-            if operador_final_para_comparar in ["gt", "lt", "ge", "le", "range", "eq"]: # "eq" aquí es para numérico+unidad
-                mascara_columna_actual_numerica = pd.Series(False, index=df.index)
-                
-                for indice_fila, valor_celda_raw in columna_serie.items():
-                    if pd.isna(valor_celda_raw) or str(valor_celda_raw).strip() == "":
-                        continue
-                    
-                    texto_celda_str = str(valor_celda_raw)
-                    # Iterar sobre todos los posibles "numero unidad" en la celda
-                    for match_num_unidad_celda in self.patron_num_unidad_df.finditer(texto_celda_str):
-                        try:
-                            # Validar delimitadores del match para evitar sub-matches incorrectos
-                            match_text_completo = match_num_unidad_celda.group(0)
-                            inicio_match_en_celda = match_num_unidad_celda.start()
-                            fin_match_en_celda = match_num_unidad_celda.end()
-
-                            char_antes_valido = (inicio_match_en_celda == 0) or \
-                                                (not texto_celda_str[inicio_match_en_celda - 1].isalnum())
-                            char_despues_valido = (fin_match_en_celda == len(texto_celda_str)) or \
-                                                  (not texto_celda_str[fin_match_en_celda].isalnum())
-
-                            if not (char_antes_valido and char_despues_valido):
-                                logger.debug(f"    Match '{match_text_completo}' descartado por delimitadores en celda: '{texto_celda_str}'")
-                                continue # Ir al siguiente match en la misma celda
-
-                            num_celda_str = match_num_unidad_celda.group(1) # El número
-                            num_celda_val = self._parse_numero(num_celda_str)
-                            unidad_celda_raw = match_num_unidad_celda.group(2) # La unidad (opcional)
-
-                            if num_celda_val is None:
-                                continue # No se pudo parsear el número, probar el siguiente match en la celda
-                            
-                            unidad_celda_canonica = self.extractor_magnitud.obtener_magnitud_normalizada(unidad_celda_raw.strip()) \
-                                                    if unidad_celda_raw and unidad_celda_raw.strip() else None
-                            
-                            # Comprobar coincidencia de unidades:
-                            # 1. Si la query no especificó unidad, cualquier unidad de celda es válida (o ninguna).
-                            # 2. Si la query especificó unidad, la unidad de la celda (normalizada) debe coincidir.
-                            # 3. O si la unidad de la celda (raw normalizada) coincide directamente con la unidad canónica de la query (útil si la normalización de ExtractorMagnitud cambia mucho)
-                            unidad_coincide = (unidad_final_para_comparar_canonica is None) or \
-                                              (unidad_celda_canonica is not None and unidad_celda_canonica == unidad_final_para_comparar_canonica) or \
-                                              (unidad_celda_raw and unidad_final_para_comparar_canonica and self.extractor_magnitud._normalizar_texto(unidad_celda_raw.strip()) == unidad_final_para_comparar_canonica)
-
-                            if not unidad_coincide:
-                                continue # Unidad no coincide, probar siguiente match en la celda
-
-                            # Comparación numérica
-                            condicion_numerica_cumplida = False
-                            if operador_final_para_comparar == "eq" and np.isclose(num_celda_val, valor_a_comparar_final): condicion_numerica_cumplida = True
-                            elif operador_final_para_comparar == "gt" and num_celda_val > valor_a_comparar_final and not np.isclose(num_celda_val, valor_a_comparar_final): condicion_numerica_cumplida = True
-                            elif operador_final_para_comparar == "lt" and num_celda_val < valor_a_comparar_final and not np.isclose(num_celda_val, valor_a_comparar_final): condicion_numerica_cumplida = True
-                            elif operador_final_para_comparar == "ge" and (num_celda_val >= valor_a_comparar_final or np.isclose(num_celda_val, valor_a_comparar_final)): condicion_numerica_cumplida = True
-                            elif operador_final_para_comparar == "le" and (num_celda_val <= valor_a_comparar_final or np.isclose(num_celda_val, valor_a_comparar_final)): condicion_numerica_cumplida = True
-                            elif operador_final_para_comparar == "range" and \
-                                 ((valor_a_comparar_final[0] <= num_celda_val or np.isclose(num_celda_val, valor_a_comparar_final[0])) and \
-                                  (num_celda_val <= valor_a_comparar_final[1] or np.isclose(num_celda_val, valor_a_comparar_final[1]))):
-                                condicion_numerica_cumplida = True
-                            
-                            if condicion_numerica_cumplida:
-                                # Si estamos aplicando un filtro numérico original (es decir, term_an es un sinónimo de FCD),
-                                # también debemos asegurarnos de que el texto del sinónimo esté presente en la celda.
-                                if filtro_numerico_original:
-                                    texto_sinonimo_normalizado_de_fcd = self._normalizar_para_busqueda(term_an["original"]) # "original" es el texto del sinónimo
-                                    patron_regex_sinonimo = r"\b" + re.escape(texto_sinonimo_normalizado_de_fcd) + r"\b"
-                                    if re.search(patron_regex_sinonimo, self._normalizar_para_busqueda(texto_celda_str)):
-                                        mascara_columna_actual_numerica.at[indice_fila] = True
-                                        break # Match encontrado para esta celda, salir del bucle de matches de num_unidad_df
-                                    # else: el sinónimo no está, aunque el número/unidad coincida, no es un match para este sinónimo específico
-                                else: # No hay filtro numérico original, solo el término actual
-                                    mascara_columna_actual_numerica.at[indice_fila] = True
-                                    break # Match encontrado para esta celda
-                        
-                        except ValueError: # Error en _parse_numero para la celda
-                            continue # Probar el siguiente match en la celda
-                    
-                    if mascara_columna_actual_numerica.at[indice_fila]: # Si se marcó True para esta fila, no seguir en otras columnas
-                        break # Salir del bucle de celdas de `columna_serie`
-                
-                mascara_total_termino |= mascara_columna_actual_numerica
-            
-            # Búsqueda de texto (string) - solo si no es un término numérico o si no estamos aplicando un filtro_numerico_original
-            # (porque si hay filtro_numerico_original, la parte textual ya se verificó arriba)
-            if tipo_termino == "str" and not filtro_numerico_original : # `valor_termino` aquí ya está normalizado por `_analizar_terminos`
-                try:
-                    valor_normalizado_busqueda = str(valor_termino) # Asegurar que sea string
-                    if not valor_normalizado_busqueda: # Si el término de búsqueda es vacío
-                        continue
-
-                    serie_normalizada_df_columna = columna_serie.astype(str).map(self._normalizar_para_busqueda)
-                    # Usar word boundaries (\b) para buscar la palabra/frase exacta
-                    patron_regex = r"\b" + re.escape(valor_normalizado_busqueda) + r"\b"
-                    mascara_columna_actual_str = serie_normalizada_df_columna.str.contains(patron_regex, regex=True, na=False)
-                    mascara_total_termino |= mascara_columna_actual_str
-                except Exception as e:
-                    logger.warning(f"Error búsqueda STR en columna '{nombre_columna}' para término '{valor_termino}': {e}")
+            mascara_columna_actual_numerica = self._mascara_numerica_en_columna(df, nombre_columna, comparacion)
+            # Si estamos aplicando un filtro numérico original a un sinónimo de FCD, también debemos asegurarnos
+            # de que el texto del sinónimo esté presente en la misma celda (un término numérico no tiene texto que exigir).
+            if filtro_numerico_original and term_an.tipo == "str" and mascara_columna_actual_numerica.any():
+                # `patron_original`: regex del texto del sinónimo normalizado, compilada al analizar la consulta
+                mascara_columna_actual_numerica &= self._mascara_texto_en_columnas(df, [nombre_columna], term_an.valor_normalizado_original,
+                                                                                   term_an.patron_original).to_numpy()
+            mascara_total_termino |= mascara_columna_actual_numerica
         
         return mascara_total_termino
 
-    def _aplicar_mascara_combinada_para_segmento_and(self, df: pd.DataFrame, cols: List[str], term_an_seg: List[Dict[str, Any]], filtro_numerico_original_para_desc: Optional[Dict] = None) -> pd.Series:
+    def _escanear_ocurrencias_numericas(self, textos: pd.Series) -> pd.DataFrame:
+        """ Ocurrencias "número unidad" de unos textos, con una sola pasada de regex para todos ellos.
+
+        Los textos se unen con un separador ("\x00": ni espacio, ni unidad, ni alfanumérico) que el patrón
+        también reconoce, así cada coincidencia sabe de qué texto es. El patrón es el de celdas con el carácter
+        anterior y el siguiente capturados sin consumirlos: las coincidencias son las mismas que las de `finditer`
+        sobre cada texto y los delimitadores se validan sobre todas a la vez. Cada número y cada unidad distintos
+        se interpretan una sola vez (los números, todos juntos con `parsear_numeros`).
+        """
+        lista_textos = textos.tolist()
+        texto_unido = SEPARADOR_ESCANEO.join(lista_textos)
+        if texto_unido.count(SEPARADOR_ESCANEO) != len(lista_textos) - 1: # Algún texto ya lo contenía: se sustituye por otro carácter neutro
+            texto_unido = SEPARADOR_ESCANEO.join(texto.replace(SEPARADOR_ESCANEO, "\x01") for texto in lista_textos)
+        grupos = self.patron_num_unidad_con_contexto.findall(texto_unido)
+        if not grupos:
+            return ocurrencias_vacias()
+        caracter_antes, numero_str, unidad_str, caracter_despues = (np.array(columna, dtype=object) for columna in zip(*grupos))
+        separadores = numero_str == "" # Las coincidencias del separador no capturan número
+        texto_de_coincidencia = np.cumsum(separadores)[~separadores]
+        caracter_antes, numero_str, unidad_str, caracter_despues = (c[~separadores] for c in (caracter_antes, numero_str, unidad_str, caracter_despues))
+        if not len(numero_str):
+            return ocurrencias_vacias()
+        # Validar delimitadores para evitar sub-matches incorrectos ("A12V", "12VX"): ni letra ni dígito pegados
+        delimitadas = ~(np.char.isalnum(caracter_antes.astype("U1")) | np.char.isalnum(caracter_despues.astype("U1")))
+        if muestreo_traza.activo and muestreo_traza.tomar():
+            logger_traza.debug(f"    {int((~delimitadas).sum())} de {len(delimitadas)} coincidencias descartadas por delimitadores en {len(lista_textos)} textos.")
+
+        codigos_numero, numeros_distintos = pd.factorize(numero_str)
+        numeros = parsear_numeros(numeros_distintos, self._parse_numero)[codigos_numero] # No interpretable -> NaN
+        # Unidad vacía: la coincidencia no tenía unidad; sin unidad o no reconocida, la ocurrencia queda sin unidad base
+        unidad_de = {texto_unidad: self.algebra_unidades.resolver(texto_unidad) if texto_unidad else None for texto_unidad in set(unidad_str)}
+        unidades = np.array([(unidad_de[texto_unidad] or (None,))[0] for texto_unidad in unidad_str], dtype=object)
+        factores = np.array([(unidad_de[texto_unidad] or (None, 1.0))[1] for texto_unidad in unidad_str], dtype=np.float64)
+
+        validas = delimitadas & ~np.isnan(numeros) # Número no interpretable: se ignora la ocurrencia
+        return pd.DataFrame({
+            "texto": texto_de_coincidencia[validas],
+            "numero": numeros[validas],
+            "unidad": unidades[validas],
+            "numero_base": (numeros * factores)[validas],
+        })
+
+    def _construir_columna_numerica(self, serie: pd.Series) -> ColumnaNumerica:
+        return ColumnaNumerica(serie, self._escanear_ocurrencias_numericas)
+
+    def _mascara_numerica_en_columna(self, df: pd.DataFrame, nombre_columna: str, comparacion: TerminoAnalizado) -> pd.Series:
+        """ Filas de `df` con algún "número unidad" en la columna que cumple `comparacion`.
+
+        Las ocurrencias (ya en unidades base) salen del índice del DataFrame base, que las extrae una vez
+        por columna, y la máscara se recorta a las filas de `df`; sin índice se extraen de `df` en el momento.
+        """
+        indice = self._indices_por_token.get(df.attrs.get(CLAVE_ATTRS_INDICE))
+        if indice is not None:
+            columna_numerica = indice.columna_numerica(nombre_columna, self.algebra_unidades, self._construir_columna_numerica)
+            if columna_numerica is not None:
+                mascara_base = pd.Series(columna_numerica.mascara(comparacion), index=indice.indice_filas, name=nombre_columna)
+                mascara = indice.restringir(mascara_base, df.index)
+                if mascara is not None:
+                    self._registrar_cache("indice_numerico", True)
+                    return mascara
+        self._registrar_cache("indice_numerico", False)
+        return pd.Series(self._construir_columna_numerica(df[nombre_columna]).mascara(comparacion), index=df.index)
+
+    def _aplicar_mascara_combinada_para_segmento_and(self, df: pd.DataFrame, cols: List[str], term_an_seg: List[TerminoAnalizado], filtro_numerico_original_para_desc: Optional[TerminoAnalizado] = None) -> pd.Series:
         if df is None or df.empty or not cols:
             return pd.Series(False, index=df.index if df is not None else None) # Devolver serie vacía con índice correcto si es posible
         
@@ -543,19 +898,17 @@ class MotorBusqueda:
         for term_ind_an in term_an_seg:
             # Manejar sub-queries OR dentro de un segmento AND, ej: "A + (B|C) + D"
             # Si un término 'str' contiene '|' y está entre paréntesis, se trata como sub-query OR.
-            if term_ind_an["tipo"] == "str" and \
-               ("|" in term_ind_an["original"]) and \
-               term_ind_an["original"].startswith("(") and term_ind_an["original"].endswith(")"):
-                logger.debug(f"Segmento AND contiene sub-query OR: '{term_ind_an['original']}'. Se procesará por separado.")
+            if term_ind_an.es_subconsulta_or:
+                logger.debug(f"Segmento AND contiene sub-query OR: '{term_ind_an.original}'. Se procesará por separado.")
                 
                 sub_mascara_or_series, err_sub_or = self._procesar_busqueda_en_df_objetivo(
-                    df, cols, term_ind_an["original"], 
+                    df, cols, term_ind_an.original, 
                     None, # No pasar negativos adicionales aquí, se manejan globalmente
                     return_mask_only=True,
                     filtro_numerico_original_desc=None # El filtro numérico original no aplica a esta sub-query textual
                 )
                 if err_sub_or or sub_mascara_or_series is None:
-                    logger.warning(f"Sub-query OR '{term_ind_an['original']}' falló o no devolvió máscara: {err_sub_or}")
+                    logger.warning(f"Sub-query OR '{term_ind_an.original}' falló o no devolvió máscara: {err_sub_or}")
                     return pd.Series(False, index=df.index) # Falla el AND completo si la sub-query falla
                 
                 # Asegurar que la máscara de la sub-query tenga el mismo índice que el DF principal
@@ -610,10 +963,40 @@ class MotorBusqueda:
                                         termino_busqueda_original_para_este_df: str, 
                                         terminos_negativos_adicionales: Optional[List[str]] = None,
                                         return_mask_only: bool = False,
-                                        filtro_numerico_original_desc: Optional[Dict] = None
+                                        filtro_numerico_original_desc: Optional[TerminoAnalizado] = None
+                                        ) -> Union[Tuple[pd.DataFrame, Optional[str]], Tuple[Optional[pd.Series], Optional[str]]]:
+        nombre_etapa = "busqueda_diccionario" if self._es_del_diccionario(df_obj) else "busqueda_descripciones"
+        with self._etapa(nombre_etapa, filas_entrada=len(df_obj) if df_obj is not None else 0) as registro_etapa:
+            memo = self._memo_lote()
+            # En un lote, las búsquedas sobre los DataFrames cargados completos (expansión de FCDs en el diccionario,
+            # queries OR de sinónimos en descripciones) se repiten mucho entre consultas: se resuelven una vez.
+            if memo is None or df_obj is None or not (df_obj is self.datos_diccionario or df_obj is self.datos_descripcion):
+                resultado, error = self._evaluar_busqueda_en_df_objetivo(df_obj, cols_obj, termino_busqueda_original_para_este_df, terminos_negativos_adicionales, return_mask_only, filtro_numerico_original_desc)
+            else:
+                clave_memo = ("proceso", id(df_obj), tuple(cols_obj), termino_busqueda_original_para_este_df,
+                              tuple(terminos_negativos_adicionales or ()), repr(filtro_numerico_original_desc), return_mask_only)
+                self._registrar_cache("busqueda_lote", clave_memo in memo)
+                if clave_memo not in memo:
+                    memo[clave_memo] = self._evaluar_busqueda_en_df_objetivo(df_obj, cols_obj, termino_busqueda_original_para_este_df, terminos_negativos_adicionales, return_mask_only, filtro_numerico_original_desc)
+                resultado, error = memo[clave_memo]
+                # Copia para que cada consulta del lote reciba su propio DataFrame
+                if isinstance(resultado, pd.DataFrame):
+                    resultado = resultado.copy()
+            if resultado is not None:
+                registro_etapa.filas_salida = int(resultado.sum()) if isinstance(resultado, pd.Series) else len(resultado)
+        return resultado, error
+
+    def _evaluar_busqueda_en_df_objetivo(self, 
+                                        df_obj: pd.DataFrame, 
+                                        cols_obj: List[str], 
+                                        termino_busqueda_original_para_este_df: str, 
+                                        terminos_negativos_adicionales: Optional[List[str]] = None,
+                                        return_mask_only: bool = False,
+                                        filtro_numerico_original_desc: Optional[TerminoAnalizado] = None
                                         ) -> Union[Tuple[pd.DataFrame, Optional[str]], Tuple[Optional[pd.Series], Optional[str]]]:
         
-        logger.debug(f"Proc. búsqueda DF: Query='{termino_busqueda_original_para_este_df}' en {len(cols_obj)} cols de DF ({len(df_obj if df_obj is not None else [])} filas). Neg. Adic: {terminos_negativos_adicionales}, ReturnMask: {return_mask_only}, FiltroNumDesc: {filtro_numerico_original_desc is not None}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Proc. búsqueda DF: Query='{termino_busqueda_original_para_este_df}' en {len(cols_obj)} cols de DF ({len(df_obj if df_obj is not None else [])} filas). Neg. Adic: {terminos_negativos_adicionales}, ReturnMask: {return_mask_only}, FiltroNumDesc: {filtro_numerico_original_desc is not None}")
 
         if df_obj is None: df_obj = pd.DataFrame() # Asegurar que df_obj no sea None
 
@@ -658,10 +1041,11 @@ class MotorBusqueda:
             else:
                 return df_actual_procesando.copy(), None
 
-        # 5. Descomponer términos positivos en OR (Nivel 1) y luego AND (Nivel 2)
-        operador_nivel1, segmentos_nivel1_or = self._descomponer_nivel1_or(terminos_positivos_final_para_parseo)
+        # 5. Descomponer términos positivos en OR (Nivel 1) y luego AND (Nivel 2), analizando cada término una vez
+        plan_consulta = self._construir_plan(terminos_positivos_final_para_parseo)
+        operador_nivel1 = plan_consulta.operador
 
-        if not segmentos_nivel1_or: # Si la descomposición OR no da segmentos válidos
+        if not plan_consulta.segmentos: # Si la descomposición OR no da segmentos válidos
             # Esto puede pasar si la query positiva es inválida después del parseo OR (ej. solo operadores)
             if termino_busqueda_original_para_este_df.strip() or terminos_positivos_final_para_parseo.strip(): # Si había algo en la query
                 msg_error_segmentos = f"Término positivo '{terminos_positivos_final_para_parseo}' (de query original '{termino_busqueda_original_para_este_df}') es inválido o no generó segmentos de búsqueda."
@@ -682,9 +1066,9 @@ class MotorBusqueda:
 
         # Procesar cada segmento OR
         lista_mascaras_para_or: List[pd.Series] = []
-        for segmento_or_actual in segmentos_nivel1_or:
-            _operador_nivel2, terminos_brutos_nivel2_and = self._descomponer_nivel2_and(segmento_or_actual)
-            terminos_atomicos_analizados_and = self._analizar_terminos(terminos_brutos_nivel2_and)
+        for segmento_plan in plan_consulta.segmentos:
+            segmento_or_actual = segmento_plan.texto
+            terminos_atomicos_analizados_and = segmento_plan.terminos
             
             mascara_para_segmento_or_actual: pd.Series
             if not terminos_atomicos_analizados_and: # Si un segmento AND no tiene términos atómicos
@@ -725,7 +1109,8 @@ class MotorBusqueda:
 
         # 6. Devolver resultado final
         if return_mask_only:
-            logger.debug(f"Devolviendo solo máscara para '{termino_busqueda_original_para_este_df}': {mascara_final_df_objetivo.sum()} coincidencias.")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Devolviendo solo máscara para '{termino_busqueda_original_para_este_df}': {mascara_final_df_objetivo.sum()} coincidencias.")
             return mascara_final_df_objetivo, None
         else:
             df_resultado_final: pd.DataFrame
@@ -735,9 +1120,12 @@ class MotorBusqueda:
             elif not mascara_final_df_objetivo.any(): # Si la máscara no tiene ningún True
                  df_resultado_final = pd.DataFrame(columns=df_obj.columns if df_obj is not None else []) # DataFrame vacío con las columnas correctas
             else: # Aplicar la máscara al DataFrame que ya fue filtrado por negaciones
-                df_resultado_final = df_actual_procesando[mascara_final_df_objetivo].copy()
+                with self._etapa("materializacion", filas_entrada=len(df_actual_procesando)) as registro_etapa:
+                    df_resultado_final = df_actual_procesando[mascara_final_df_objetivo].copy()
+                    registro_etapa.filas_salida = len(df_resultado_final)
             
-            logger.debug(f"Resultado _procesar_busqueda_en_df_objetivo para '{termino_busqueda_original_para_este_df}': {len(df_resultado_final)} filas.")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Resultado _procesar_busqueda_en_df_objetivo para '{termino_busqueda_original_para_este_df}': {len(df_resultado_final)} filas.")
             return df_resultado_final, None
 
     def _extraer_terminos_de_fila_completa(self, fila_df: pd.Series) -> Set[str]:
@@ -764,38 +1152,388 @@ class MotorBusqueda:
 
         return terminos_extraidos_de_fila
 
-    def buscar(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+    def _extraer_terminos_de_fcds(self, fcds_df: pd.DataFrame) -> Set[str]:
+        """ Une los términos de todas las filas FCD. En un lote, los términos de cada fila del diccionario se extraen una vez. """
+        terminos_fcds: Set[str] = set()
+        with self._etapa("expansion", filas_entrada=len(fcds_df)) as registro_etapa:
+            memo = self._memo_lote()
+            if memo is None:
+                for _, fila_fcd in fcds_df.iterrows():
+                    terminos_fcds.update(self._extraer_terminos_de_fila_completa(fila_fcd))
+            else:
+                for indice_fila in fcds_df.index:
+                    clave_memo = ("terminos_fila", id(self.datos_diccionario), indice_fila)
+                    terminos_fila = memo.get(clave_memo)
+                    self._registrar_cache("terminos_fila_lote", terminos_fila is not None)
+                    if terminos_fila is None:
+                        terminos_fila = self._extraer_terminos_de_fila_completa(fcds_df.loc[indice_fila])
+                        memo[clave_memo] = terminos_fila
+                    terminos_fcds.update(terminos_fila)
+            registro_etapa.filas_salida = len(terminos_fcds)
+
+        estadisticas = self._estadisticas_activas()
+        if estadisticas is not None:
+            estadisticas.sinonimos_expandidos += len(terminos_fcds)
+        return terminos_fcds
+
+    def buscar_lote(self, consultas: List[str], buscar_via_diccionario_flag: bool, max_entradas_memo: int = MAX_ENTRADAS_MEMO_LOTE) -> List[Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]]:
+        """ Ejecuta muchas consultas compartiendo el trabajo común entre ellas.
+
+        Durante el lote se memorizan las expansiones del diccionario (FCDs y sus términos), la máscara de
+        cada término de texto distinto sobre el DataFrame base y las búsquedas repetidas sobre los
+        DataFrames completos. Devuelve un resultado por consulta, en el mismo orden y formato que `buscar`;
+        las consultas idénticas comparten la misma tupla de resultado.
+        """
+        inicio_lote = time.perf_counter()
+        resultados_por_consulta: Dict[str, Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]] = {}
+        with self.memoria_de_lote(max_entradas_memo) as memo:
+            for consulta in consultas:
+                if consulta not in resultados_por_consulta:
+                    resultados_por_consulta[consulta] = self.buscar(consulta, buscar_via_diccionario_flag)
+            entradas_memo = len(memo)
+
+        logger.info(f"Motor.buscar_lote: {len(consultas)} consultas ({len(resultados_por_consulta)} distintas) en {time.perf_counter() - inicio_lote:.2f}s. Entradas memorizadas: {entradas_memo}.")
+        return [resultados_por_consulta[consulta] for consulta in consultas]
+
+    @contextmanager
+    def memoria_de_lote(self, max_entradas_memo: int = MAX_ENTRADAS_MEMO_LOTE):
+        """ Las búsquedas de este hilo dentro del bloque `with` comparten el trabajo común, como en `buscar_lote`.
+
+        Permite lotes de consultas con distinto modo (vía diccionario o directa) o con `EstadisticasBusqueda`
+        propias. Un bloque anidado reutiliza la memoria del exterior.
+        """
+        memo = self._memo_lote()
+        if memo is not None:
+            yield memo
+            return
+        memo = {}
+        self._estado_hilo.memo_lote = memo
+        self._estado_hilo.max_entradas_memo = max(1, max_entradas_memo)
+        try:
+            yield memo
+        finally:
+            self._estado_hilo.memo_lote = None
+
+    @contextmanager
+    def sin_perfilar(self):
+        """ Las búsquedas de este hilo dentro del bloque `with` no se perfilan ni gastan las pendientes del perfilador.
+
+        Para las búsquedas que no pide el usuario (en vivo, sincronización de reglas...): el perfilador se
+        reserva para las que sí lanza.
+        """
+        previo = getattr(self._estado_hilo, "sin_perfilar", False)
+        self._estado_hilo.sin_perfilar = True
+        try:
+            yield
+        finally:
+            self._estado_hilo.sin_perfilar = previo
+
+    def configurar_registro_consultas_lentas(self, ruta: Optional[str], umbral_ms: Optional[float] = None):
+        """ Activa (o desactiva con `ruta=None`) el registro JSONL de búsquedas que tarden `umbral_ms` o más. """
+        if not ruta:
+            self.registro_consultas_lentas = None
+            return
+        registro = RegistroConsultasLentas(ruta) if umbral_ms is None else RegistroConsultasLentas(ruta, umbral_ms)
+        self.registro_consultas_lentas = registro
+        logger.info(f"Registro de consultas lentas activo: '{registro.ruta}' (umbral {registro.umbral_ms:.0f} ms).")
+
+    def activar_metricas(self, metricas: Optional[MetricasMotor] = None) -> MetricasMotor:
+        """ Empieza a acumular métricas de búsqueda (o continúa con `metricas`, p. ej. tras recargar en otro motor). """
+        if metricas is None:
+            metricas = self.metricas or MetricasMotor()
+            for indice in (self.indice_diccionario, self.indice_descripcion): # Índices construidos antes de activar
+                if indice is not None:
+                    metricas.registrar_indice(indice.nombre, indice.segundos_construccion, indice.num_filas)
+        self.metricas = metricas
+        return metricas
+
+    @staticmethod
+    def _es_and_diccionario(terminos_positivos: str) -> bool:
+        """ True si la búsqueda vía diccionario trata los positivos como partes AND ("A + B"). """
+        return "+" in terminos_positivos and not (terminos_positivos.startswith('"') and terminos_positivos.endswith('"'))
+
+    def metadatos_dependen_de_filas(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool) -> bool:
+        """ True si, cuando no hay resultados, el origen y los FCDs dependen de en qué filas se buscó: el AND vía
+        diccionario se corta en la primera parte que deja el resultado vacío. Buscando solo en parte de las filas
+        sin encontrar ninguna, esos metadatos pueden no ser los de la búsqueda completa. """
+        if not buscar_via_diccionario_flag:
+            return False
+        _, terminos_positivos, _ = self._aplicar_negaciones_y_extraer_positivos(None, [], termino_busqueda_original)
+        return self._es_and_diccionario(terminos_positivos)
+
+    def es_refinamiento(self, consulta_previa: str, consulta_nueva: str, buscar_via_diccionario_flag: bool) -> bool:
+        """ True si los resultados de `consulta_nueva` están contenidos en los de `consulta_previa`.
+
+        En ese caso `consulta_nueva` puede evaluarse solo sobre las filas que devolvió la previa
+        (`buscar(..., filas_candidatas=...)`). Se reconocen las extensiones que se hacen al escribir:
+        añadir negaciones (`#término`) o añadir al final partes AND (`+ término`). Cualquier OR, o un
+        cambio en los términos ya escritos, obliga a buscar desde cero.
+        """
+        _df, positivos_previos, negativos_previos = self._aplicar_negaciones_y_extraer_positivos(pd.DataFrame(), [], consulta_previa)
+        _df, positivos_nuevos, negativos_nuevos = self._aplicar_negaciones_y_extraer_positivos(pd.DataFrame(), [], consulta_nueva)
+        if not (positivos_previos or negativos_previos) or not set(negativos_previos) <= set(negativos_nuevos):
+            return False
+        if positivos_nuevos == positivos_previos: # Solo se añadieron negaciones
+            return True
+        if not positivos_previos or "|" in positivos_nuevos or not positivos_nuevos.startswith(positivos_previos + " + "):
+            return False
+        # Vía diccionario, "A" y "A + B" siguen flujos distintos (el simple aplica el filtro numérico de la query)
+        return not buscar_via_diccionario_flag or (self._es_and_diccionario(positivos_previos) and self._es_and_diccionario(positivos_nuevos))
+
+    def buscar(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, estadisticas: Optional[EstadisticasBusqueda] = None,
+               filas_candidatas: Optional[pd.Index] = None) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ Busca la consulta (vía diccionario o directa). Si se pasa `estadisticas`, se rellena con tiempos por etapa, filas y cachés.
+
+        Con `filas_candidatas` (ids de fila de las descripciones) la búsqueda en descripciones se limita a esas
+        filas. Solo da el mismo resultado que la búsqueda completa si las candidatas son los resultados de una
+        consulta previa de la que la nueva es refinamiento (ver `es_refinamiento`).
+        """
+        if filas_candidatas is not None:
+            candidatas_previas = getattr(self._estado_hilo, "filas_candidatas", None)
+            self._estado_hilo.filas_candidatas = filas_candidatas
+            try:
+                return self.buscar(termino_busqueda_original, buscar_via_diccionario_flag, estadisticas)
+            finally:
+                self._estado_hilo.filas_candidatas = candidatas_previas
+
+        return self._buscar_midiendo(termino_busqueda_original, buscar_via_diccionario_flag, estadisticas, self._ejecutar_busqueda)
+
+    def _buscar_midiendo(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, estadisticas: Optional[EstadisticasBusqueda],
+                         ejecutar: Callable[[str, bool], Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]]
+                         ) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ Ejecuta `ejecutar` (perfilado si procede) con estadísticas, registro de lentas y métricas. """
+        registro_lentas = self.registro_consultas_lentas
+        metricas = self.metricas
+        if estadisticas is None:
+            if registro_lentas is None and metricas is None:
+                return self._ejecutar_busqueda_perfilable(termino_busqueda_original, buscar_via_diccionario_flag, ejecutar)
+            estadisticas = EstadisticasBusqueda() # El registro de lentas y las métricas necesitan las etapas de cada búsqueda
+
+        estadisticas_previas = self._estadisticas_activas()
+        self._estado_hilo.estadisticas = estadisticas
+        estadisticas.consulta = termino_busqueda_original
+        estadisticas.via_diccionario = buscar_via_diccionario_flag
+        inicio_busqueda = time.perf_counter()
+        try:
+            resultado_busqueda = self._ejecutar_busqueda_perfilable(termino_busqueda_original, buscar_via_diccionario_flag, ejecutar)
+        finally:
+            estadisticas.segundos_total += time.perf_counter() - inicio_busqueda
+            self._estado_hilo.estadisticas = estadisticas_previas
+
+        resultados_df, origen, fcds_df, _indices_fcds, mensaje_error = resultado_busqueda
+        estadisticas.origen = origen.name
+        estadisticas.filas_resultado = len(resultados_df) if resultados_df is not None else 0
+        estadisticas.fcds_encontrados = len(fcds_df) if fcds_df is not None else 0
+        if registro_lentas is not None:
+            registro_lentas.registrar(estadisticas, self)
+        if metricas is not None:
+            metricas.registrar_busqueda(estadisticas, con_error=mensaje_error is not None)
+        return resultado_busqueda
+
+    def buscar_relevantes(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, k: int = MAX_RESULTADOS_RELEVANCIA,
+                          estadisticas: Optional[EstadisticasBusqueda] = None, filas_candidatas: Optional[pd.Index] = None
+                          ) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ Como `buscar`, pero devuelve solo las `k` filas de descripciones más relevantes, de mayor a menor relevancia.
+
+        La relevancia es BM25 sobre las columnas indexadas de las descripciones: las palabras de la consulta
+        pesan PESO_TERMINO_ORIGINAL y las de los sinónimos de los FCDs encontrados, PESO_SINONIMO.
+        `estadisticas.filas_resultado` sigue contando todas las filas encontradas. La búsqueda se hace sobre
+        `IndiceBusqueda.filas_sin_valores`: da los ids de las filas encontradas sin copiar sus valores, y de las
+        descripciones solo se toman las `k` filas elegidas.
+        """
+        indice = self.indice_descripcion
+        df_base = self.datos_descripcion
+        if indice is None or df_base is None or df_base.attrs.get(CLAVE_ATTRS_INDICE) != indice.token:
+            resultados_df, origen, fcds_df, indices_fcds, mensaje_error = self.buscar(termino_busqueda_original, buscar_via_diccionario_flag, estadisticas, filas_candidatas)
+            if resultados_df is None or len(resultados_df) == 0:
+                return resultados_df, origen, fcds_df, indices_fcds, mensaje_error
+            logger.warning(f"Relevancia: resultados de '{termino_busqueda_original}' sin índice de descripciones; se devuelven las primeras {k} filas.")
+            return resultados_df.iloc[:k], origen, fcds_df, indices_fcds, mensaje_error
+
+        previas = getattr(self._estado_hilo, "descripciones_sin_valores", None)
+        self._estado_hilo.descripciones_sin_valores = indice.filas_sin_valores()
+        try:
+            filas_df, origen, fcds_df, indices_fcds, mensaje_error = self.buscar(termino_busqueda_original, buscar_via_diccionario_flag, estadisticas, filas_candidatas)
+        finally:
+            self._estado_hilo.descripciones_sin_valores = previas
+        if filas_df is None:
+            return filas_df, origen, fcds_df, indices_fcds, mensaje_error
+        if len(filas_df) == 0:
+            return df_base.iloc[:0], origen, fcds_df, indices_fcds, mensaje_error
+
+        estadisticas_previas = self._estadisticas_activas()
+        self._estado_hilo.estadisticas = estadisticas
+        try:
+            with self._etapa("relevancia", filas_entrada=len(filas_df)) as registro_etapa:
+                indice_relevancia = indice.indice_relevancia(lambda: self._series_indice_sin_vacios(indice, df_base))
+                pesos_por_palabra = self._pesos_relevancia(termino_busqueda_original, fcds_df, indice)
+                posiciones_candidatas = indice.indice_filas.get_indexer(filas_df.index)
+                posiciones, puntuaciones = indice_relevancia.mejores(posiciones_candidatas, pesos_por_palabra, k)
+                mejores_df = df_base.iloc[posiciones]
+                registro_etapa.filas_salida = len(mejores_df)
+            self._anotar_plan(relevancia={"k": k, "candidatas": len(filas_df), "palabras": len(pesos_por_palabra),
+                                          "puntuacion_max": round(float(puntuaciones[0]), 4) if len(puntuaciones) else None})
+        finally:
+            self._estado_hilo.estadisticas = estadisticas_previas
+        return mejores_df, origen, fcds_df, indices_fcds, mensaje_error
+
+    def _pesos_relevancia(self, termino_busqueda_original: str, fcds_df: Optional[pd.DataFrame], indice: IndiceBusqueda) -> Dict[str, float]:
+        """ Palabras a puntuar con su peso: las de la consulta (y las variantes de sus términos `~difusos`) y las de los sinónimos. """
+        pesos_por_palabra: Dict[str, float] = {}
+        if fcds_df is not None:
+            for _, fila_fcd in fcds_df.iterrows():
+                for termino in self._extraer_terminos_de_fila_completa(fila_fcd):
+                    for palabra in termino.split():
+                        pesos_por_palabra[palabra] = PESO_SINONIMO
+        _, terminos_positivos, _ = self._aplicar_negaciones_y_extraer_positivos(None, [], termino_busqueda_original)
+        for segmento in self._construir_plan(terminos_positivos).segmentos:
+            for term_an in segmento.terminos:
+                for palabra in term_an.tokens:
+                    variantes = indice.indice_difuso().candidatos(palabra, distancia_maxima_para(palabra)) if term_an.difuso else [palabra]
+                    for variante in variantes:
+                        pesos_por_palabra[variante] = PESO_TERMINO_ORIGINAL
+        return pesos_por_palabra
+
+    def _ejecutar_busqueda_perfilable(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool,
+                                      ejecutar: Optional[Callable[[str, bool], Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]]] = None
+                                      ) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        ejecutar = ejecutar or self._ejecutar_busqueda
+        if self.perfilador.pendientes > 0 and not getattr(self._estado_hilo, "sin_perfilar", False):
+            return self.perfilador.perfilar(termino_busqueda_original, buscar_via_diccionario_flag, ejecutar)
+        return ejecutar(termino_busqueda_original, buscar_via_diccionario_flag)
+
+    def buscar_perezoso(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, limite: Optional[int] = None,
+                        estadisticas: Optional[EstadisticasBusqueda] = None, filas_candidatas: Optional[pd.Index] = None) -> ResultadoBusqueda:
+        """ Como `buscar`, pero devuelve un `ResultadoBusqueda` (ids de fila y metadatos) en lugar del DataFrame.
+
+        Con `limite`, las descripciones se evalúan por bloques consecutivos y la búsqueda se detiene en cuanto
+        hay `limite` filas: el resultado son las primeras `limite` coincidencias, en el orden del archivo.
+        """
+        if filas_candidatas is not None:
+            candidatas_previas = getattr(self._estado_hilo, "filas_candidatas", None)
+            self._estado_hilo.filas_candidatas = filas_candidatas
+            try:
+                return self.buscar_perezoso(termino_busqueda_original, buscar_via_diccionario_flag, limite, estadisticas)
+            finally:
+                self._estado_hilo.filas_candidatas = candidatas_previas
+
+        datos = self.datos_descripcion
+        if limite is None:
+            ejecutar = self._ejecutar_busqueda
+        else:
+            ejecutar = lambda termino, via_diccionario: self._ejecutar_por_bloques(termino, via_diccionario, max(0, int(limite)))
+        resultados_df, origen, fcds_df, indices_fcds, mensaje_error = self._buscar_midiendo(termino_busqueda_original, buscar_via_diccionario_flag, estadisticas, ejecutar)
+        ids_filas = resultados_df.index if resultados_df is not None else pd.Index([])
+        truncado = limite is not None and len(ids_filas) >= limite
+        return ResultadoBusqueda(self, datos, ids_filas, origen, fcds_df, indices_fcds, mensaje_error, truncado)
+
+    def _ejecutar_por_bloques(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, limite: int
+                              ) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ Evalúa la consulta sobre bloques consecutivos de las descripciones hasta reunir `limite` filas.
+
+        Cada fila de las descripciones se filtra con independencia de las demás (lo que se busca en ellas solo
+        depende del diccionario), así que la unión de los bloques es el resultado completo. Los metadatos (origen,
+        FCDs) se toman del primer bloque con filas. Si ningún bloque tiene filas, el AND vía diccionario se repite
+        completo: sus FCDs dependen de en qué parte se quedó vacío el resultado.
+        """
+        df_base = self._descripciones_base()
+        if df_base is None or limite <= 0:
+            return self._ejecutar_busqueda(termino_busqueda_original, buscar_via_diccionario_flag)
+
+        partes: List[pd.DataFrame] = []
+        filas_reunidas = 0
+        resultado_con_filas = None
+        resultado_bloque = None
+        desde, tamano_bloque, num_bloques = 0, max(FILAS_MIN_BLOQUE_LIMITE, 4 * limite), 0
+        bloque_previo = getattr(self._estado_hilo, "bloque_descripciones", None)
+        try:
+            while True:
+                self._estado_hilo.bloque_descripciones = df_base.iloc[desde:desde + tamano_bloque]
+                resultado_bloque = self._ejecutar_busqueda(termino_busqueda_original, buscar_via_diccionario_flag)
+                num_bloques += 1
+                df_bloque, origen_bloque, _fcds, _indices, error_bloque = resultado_bloque
+                if df_bloque is None or error_bloque is not None: # Errores de carga, configuración o sintaxis: iguales en todos los bloques
+                    return resultado_bloque
+                if not df_bloque.empty:
+                    partes.append(df_bloque)
+                    filas_reunidas += len(df_bloque)
+                    resultado_con_filas = resultado_con_filas or resultado_bloque
+                desde += tamano_bloque
+                tamano_bloque *= 2
+                if filas_reunidas >= limite or desde >= len(df_base):
+                    break
+        finally:
+            self._estado_hilo.bloque_descripciones = bloque_previo
+
+        self._anotar_plan(limite=limite, bloques=num_bloques, filas_exploradas=min(desde, len(df_base)))
+        if resultado_con_filas is None:
+            if num_bloques > 1 and self.metadatos_dependen_de_filas(termino_busqueda_original, buscar_via_diccionario_flag):
+                return self._ejecutar_busqueda(termino_busqueda_original, buscar_via_diccionario_flag)
+            return resultado_bloque
+        _, origen, fcds_df, indices_fcds, _ = resultado_con_filas
+        resultados_df = pd.concat(partes).iloc[:limite] if len(partes) > 1 else partes[0].iloc[:limite]
+        resultados_df.attrs.update(df_base.attrs)
+        return resultados_df, origen, fcds_df, indices_fcds, None
+
+    def buscar_en_bloque(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool, bloque: pd.DataFrame,
+                         memo: Optional[Dict[Any, Any]] = None) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ Busca la consulta solo en `bloque`: un trozo de unas descripciones que no caben en memoria (ver `busqueda_en_flujo`).
+
+        Las descripciones cargadas solo deciden las columnas de búsqueda (basta una fila con los tipos de cada
+        columna) y `bloque` se filtra como si fuera el archivo completo, con la semántica de `buscar`. Pasando el
+        mismo `memo` en bloques sucesivos, lo que no depende del bloque (FCDs del diccionario y sus términos) se
+        resuelve una sola vez, como en `buscar_lote`.
+        """
+        estado = self._estado_hilo
+        previos = (getattr(estado, "bloque_descripciones", None), getattr(estado, "memo_lote", None),
+                   getattr(estado, "max_entradas_memo", MAX_ENTRADAS_MEMO_LOTE))
+        estado.bloque_descripciones = bloque
+        if memo is not None:
+            estado.memo_lote, estado.max_entradas_memo = memo, MAX_ENTRADAS_MEMO_LOTE
+        try:
+            return self._ejecutar_busqueda(termino_busqueda_original, buscar_via_diccionario_flag)
+        finally:
+            estado.bloque_descripciones, estado.memo_lote, estado.max_entradas_memo = previos
+
+    def _ejecutar_busqueda(self, termino_busqueda_original: str, buscar_via_diccionario_flag: bool) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
         logger.info(f"Motor.buscar INICIO: termino='{termino_busqueda_original}', via_dicc={buscar_via_diccionario_flag}")
         
         columnas_descripcion_ref = self.datos_descripcion.columns if self.datos_descripcion is not None else []
         df_vacio_para_descripciones = pd.DataFrame(columns=columnas_descripcion_ref)
+        df_descripciones_base = self._descripciones_base() # Todas las descripciones o, al refinar, solo las candidatas
+        if getattr(self._estado_hilo, "filas_candidatas", None) is not None and df_descripciones_base is not None and getattr(self._estado_hilo, "bloque_descripciones", None) is None:
+            self._anotar_plan(filas_candidatas=len(df_descripciones_base))
         fcds_obtenidos_final_para_ui: Optional[pd.DataFrame] = None
         indices_fcds_a_resaltar_en_preview: Optional[List[int]] = None
 
         # --- Manejo de query vacía ---
         if not termino_busqueda_original.strip():
             if self.datos_descripcion is not None:
-                return self.datos_descripcion.copy(), OrigenResultados.DIRECTO_DESCRIPCION_VACIA, None, None, None
+                return df_descripciones_base.copy(), OrigenResultados.DIRECTO_DESCRIPCION_VACIA, None, None, None
             else:
                 return df_vacio_para_descripciones, OrigenResultados.DIRECTO_DESCRIPCION_VACIA, None, None, "Descripciones no cargadas."
 
-        # --- Parseo global de negaciones y positivos ---
-        _df_dummy, terminos_positivos_globales, terminos_negativos_globales = self._aplicar_negaciones_y_extraer_positivos(pd.DataFrame(), [], termino_busqueda_original)
-        logger.info(f"Parseo global: Positivos='{terminos_positivos_globales}', Negativos Globales={terminos_negativos_globales}")
+        with self._etapa("parseo"):
+            # --- Parseo global de negaciones y positivos ---
+            _df_dummy, terminos_positivos_globales, terminos_negativos_globales = self._aplicar_negaciones_y_extraer_positivos(pd.DataFrame(), [], termino_busqueda_original)
+            logger.info(f"Parseo global: Positivos='{terminos_positivos_globales}', Negativos Globales={terminos_negativos_globales}")
         
-        # --- Detección de filtro numérico/unidad en la query original (si existe y es el primer término) ---
-        filtro_numerico_original_de_query: Optional[Dict[str, Any]] = None
-        if terminos_positivos_globales.strip():
-            _op_l1, segs_l1 = self._descomponer_nivel1_or(terminos_positivos_globales)
-            if segs_l1: # Tomar el primer segmento OR (que podría ser toda la query si no hay OR)
-                _op_l2, segs_l2 = self._descomponer_nivel2_and(segs_l1[0]) # Tomar el primer sub-término AND
-                if segs_l2:
-                    terminos_analizados_temp = self._analizar_terminos([segs_l2[0]]) # Analizar solo el primer sub-término
-                    if terminos_analizados_temp and \
-                       terminos_analizados_temp[0]["tipo"] in ["gt", "lt", "ge", "le", "eq", "range"] and \
-                       terminos_analizados_temp[0].get("unidad_busqueda"): # Solo si tiene unidad explícita
-                        filtro_numerico_original_de_query = terminos_analizados_temp[0].copy()
-                        logger.info(f"Detectado filtro numérico/unidad en query original: {filtro_numerico_original_de_query}")
+            # --- Detección de filtro numérico/unidad en la query original (si existe y es el primer término) ---
+            filtro_numerico_original_de_query: Optional[TerminoAnalizado] = None
+            if terminos_positivos_globales.strip():
+                _op_l1, segs_l1 = self._descomponer_nivel1_or(terminos_positivos_globales)
+                if segs_l1: # Tomar el primer segmento OR (que podría ser toda la query si no hay OR)
+                    _op_l2, segs_l2 = self._descomponer_nivel2_and(segs_l1[0]) # Tomar el primer sub-término AND
+                    if segs_l2:
+                        terminos_analizados_temp = self._analizar_terminos([segs_l2[0]]) # Analizar solo el primer sub-término
+                        if terminos_analizados_temp and \
+                           terminos_analizados_temp[0].es_numerico and \
+                           terminos_analizados_temp[0].unidad_busqueda: # Solo si tiene unidad explícita
+                            filtro_numerico_original_de_query = terminos_analizados_temp[0] # Inmutable: se comparte sin copiar
+                            logger.info(f"Detectado filtro numérico/unidad en query original: {filtro_numerico_original_de_query}")
+
+            self._anotar_plan(positivos=terminos_positivos_globales, negativos=list(terminos_negativos_globales),
+                              filtro_numerico=filtro_numerico_original_de_query.a_dict() if filtro_numerico_original_de_query else None)
 
         # --- Flujo Principal: Búsqueda Vía Diccionario ---
         if buscar_via_diccionario_flag:
@@ -810,11 +1548,12 @@ class MotorBusqueda:
 
             # --- Sub-flujo: Manejo de AND explícito en la query positiva global ---
             # (Ej: "terminoA + terminoB", donde cada parte se busca en FCDs y luego sus sinónimos se combinan en descripciones)
-            if "+" in terminos_positivos_globales and not (terminos_positivos_globales.startswith('"') and terminos_positivos_globales.endswith('"')):
+            if self._es_and_diccionario(terminos_positivos_globales):
                 logger.info(f"Detectada búsqueda AND en positivos globales: '{terminos_positivos_globales}'")
                 partes_and = [p.strip() for p in terminos_positivos_globales.split("+") if p.strip()]
+                self._anotar_plan(flujo="and_diccionario", partes_and=partes_and)
                 
-                df_resultado_acumulado_desc = self.datos_descripcion.copy() if self.datos_descripcion is not None else pd.DataFrame(columns=columnas_descripcion_ref)
+                df_resultado_acumulado_desc = df_descripciones_base.copy() if df_descripciones_base is not None else pd.DataFrame(columns=columnas_descripcion_ref)
                 fcds_indices_acumulados = set() # Para la preview de FCDs
                 todas_partes_and_produjeron_terminos_validos = True
                 hay_error_en_busqueda_de_parte_o_desc = False
@@ -846,9 +1585,7 @@ class MotorBusqueda:
                     
                     fcds_indices_acumulados.update(fcds_para_esta_parte.index.tolist()) # Acumular índices para la UI
 
-                    terminos_extraidos_de_esta_parte_set: Set[str] = set()
-                    for _, fila_fcd in fcds_para_esta_parte.iterrows():
-                        terminos_extraidos_de_esta_parte_set.update(self._extraer_terminos_de_fila_completa(fila_fcd))
+                    terminos_extraidos_de_esta_parte_set: Set[str] = self._extraer_terminos_de_fcds(fcds_para_esta_parte)
                     
                     if not terminos_extraidos_de_esta_parte_set:
                         todas_partes_and_produjeron_terminos_validos = False
@@ -908,6 +1645,7 @@ class MotorBusqueda:
             else:
                 origen_propuesto_flujo_simple: OrigenResultados = OrigenResultados.NINGUNO
                 fcds_intento1: Optional[pd.DataFrame] = None
+                self._anotar_plan(flujo="simple_diccionario" if terminos_positivos_globales.strip() else "negacion_pura_diccionario")
 
                 if terminos_positivos_globales.strip(): # Si hay términos positivos
                     logger.info(f"BUSCAR EN DICC (FCDs) - Intento 1 (Query Original): Query='{terminos_positivos_globales}'")
@@ -952,9 +1690,10 @@ class MotorBusqueda:
                 # --- Sub-flujo: Intento 2 (Búsqueda alternativa por unidad si Intento 1 falló y la query original tenía unidad) ---
                 if (fcds_obtenidos_final_para_ui is None or fcds_obtenidos_final_para_ui.empty) and \
                    filtro_numerico_original_de_query and \
-                   filtro_numerico_original_de_query.get("unidad_busqueda"):
+                   filtro_numerico_original_de_query.unidad_busqueda:
                     
-                    unidad_query_original_can = filtro_numerico_original_de_query["unidad_busqueda"]
+                    unidad_query_original_can = filtro_numerico_original_de_query.unidad_busqueda
+                    self._anotar_plan(flujo="alternativa_unidad_diccionario", unidad_alternativa=unidad_query_original_can)
                     logger.info(f"Intento 1 (numérico+unidad) falló. Iniciando Intento 2: buscando FCDs solo por unidad '{unidad_query_original_can}' en diccionario.")
                     
                     query_solo_unidad_para_fcd = f'"{unidad_query_original_can}"' # Buscar la unidad como frase exacta
@@ -972,9 +1711,7 @@ class MotorBusqueda:
                         fcds_obtenidos_final_para_ui = fcds_por_unidad # Actualizar los FCDs para la UI
                         indices_fcds_a_resaltar_en_preview = fcds_obtenidos_final_para_ui.index.tolist()
 
-                        terminos_de_unidad_para_desc_set: Set[str] = set()
-                        for _, fila_fcd_unidad in fcds_por_unidad.iterrows():
-                            terminos_de_unidad_para_desc_set.update(self._extraer_terminos_de_fila_completa(fila_fcd_unidad))
+                        terminos_de_unidad_para_desc_set: Set[str] = self._extraer_terminos_de_fcds(fcds_por_unidad)
 
                         if not terminos_de_unidad_para_desc_set:
                             logger.info("Intento 2: FCDs por unidad encontrados, pero no se extrajeron términos para descripciones.")
@@ -997,7 +1734,7 @@ class MotorBusqueda:
                         neg_glob_alt = terminos_negativos_globales if origen_propuesto_flujo_simple != OrigenResultados.VIA_DICCIONARIO_PURAMENTE_NEGATIVA_CON_RESULTADOS_DESC else []
                         
                         resultados_desc_alt, error_desc_alt = self._procesar_busqueda_en_df_objetivo(
-                            self.datos_descripcion, columnas_desc_alt, query_or_de_unidades_para_desc,
+                            df_descripciones_base, columnas_desc_alt, query_or_de_unidades_para_desc,
                             terminos_negativos_adicionales=neg_glob_alt, # Aplicar negativos globales
                             filtro_numerico_original_desc=filtro_numerico_original_de_query # Aplicar el filtro numérico original
                         )
@@ -1024,9 +1761,7 @@ class MotorBusqueda:
                     if self.datos_descripcion is None:
                         return None, OrigenResultados.ERROR_CARGA_DESCRIPCION, fcds_obtenidos_final_para_ui, indices_fcds_a_resaltar_en_preview, "Descripciones no cargadas."
                     
-                    terminos_para_buscar_en_descripcion_set: Set[str] = set()
-                    for _, fila_fcd in fcds_obtenidos_final_para_ui.iterrows():
-                        terminos_para_buscar_en_descripcion_set.update(self._extraer_terminos_de_fila_completa(fila_fcd))
+                    terminos_para_buscar_en_descripcion_set: Set[str] = self._extraer_terminos_de_fcds(fcds_obtenidos_final_para_ui)
 
                     if not terminos_para_buscar_en_descripcion_set:
                         logger.info("FCDs encontrados (flujo estándar), pero no se extrajeron términos para descripciones.")
@@ -1057,7 +1792,7 @@ class MotorBusqueda:
                     logger.info(f"BUSCAR EN DESC (vía FCD estándar): Query='{query_or_para_desc_simple[:200]}...'. Neg. Adicionales a aplicar en Desc: {negativos_a_aplicar_desc_simple}")
                     try:
                         resultados_desc_final_simple, error_busqueda_desc_simple = self._procesar_busqueda_en_df_objetivo(
-                            self.datos_descripcion, columnas_desc_final_simple, query_or_para_desc_simple,
+                            df_descripciones_base, columnas_desc_final_simple, query_or_para_desc_simple,
                             terminos_negativos_adicionales=negativos_a_aplicar_desc_simple
                             # NO se pasa filtro_numerico_original_desc aquí, porque la query original (si era numérica) ya filtró los FCDs.
                             # La búsqueda en descripciones es por los sinónimos de esos FCDs.
@@ -1091,12 +1826,13 @@ class MotorBusqueda:
             if not columnas_desc_directo:
                 return None, OrigenResultados.ERROR_CONFIGURACION_COLUMNAS_DESC, None, None, err_cols_desc_directo
             
+            self._anotar_plan(flujo="directo_descripciones")
             try:
                 logger.info(f"BUSCAR EN DESC (DIRECTO): Query '{termino_busqueda_original}'")
                 # La query original (con sus negaciones) se pasa directamente.
                 # El filtro numérico (si existe en la query original) se aplicará directamente en descripciones.
                 resultados_directos_desc, error_busqueda_desc_dir = self._procesar_busqueda_en_df_objetivo(
-                    self.datos_descripcion, columnas_desc_directo, termino_busqueda_original, None,
+                    df_descripciones_base, columnas_desc_directo, termino_busqueda_original, None,
                     filtro_numerico_original_desc=filtro_numerico_original_de_query # Aplicar el numérico de la query si existe
                 )
 
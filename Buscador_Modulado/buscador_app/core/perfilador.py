@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/perfilador.py
+
+import cProfile
+import datetime
+import importlib.util
+import io
+import logging
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODO_CPROFILE = "cprofile"
+MODO_MUESTREO = "muestreo" # pyinstrument, si está instalado
+MAX_PERFILES_EN_MEMORIA = 50
+TOP_FUNCIONES_POR_DEFECTO = 25
+
+
+def hay_perfilador_muestreo() -> bool:
+    """ True si pyinstrument (perfilador por muestreo, opcional) está instalado. """
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+class PerfiladorNoDisponible(RuntimeError):
+    """ Otro perfilador ya está activo en el proceso (Python solo admite uno a la vez). """
+
+
+class FuncionPerfil:
+    """ Una fila del top de funciones de un perfil. """
+
+    def __init__(self, funcion: str, llamadas: int, segundos_propios: float, segundos_acumulados: float):
+        self.funcion = funcion
+        self.llamadas = llamadas
+        self.segundos_propios = segundos_propios
+        self.segundos_acumulados = segundos_acumulados
+
+
+class PerfilBusqueda:
+    """ Perfil de una llamada a `buscar`: archivo guardado y top de funciones por tiempo acumulado. """
+
+    def __init__(self, consulta: str, via_diccionario: bool, modo: str, segundos: float, ruta_archivo: Optional[Path],
+                 top_funciones: List[FuncionPerfil], texto_muestreo: Optional[str] = None):
+        self.consulta = consulta
+        self.via_diccionario = via_diccionario
+        self.modo = modo
+        self.segundos = segundos
+        self.ruta_archivo = ruta_archivo
+        self.top_funciones = top_funciones
+        self.texto_muestreo = texto_muestreo
+        self.instante = time.time()
+
+    def informe(self) -> str:
+        """ Texto para adjuntar a una incidencia: consulta, archivo y top de funciones. """
+        lineas = [
+            f"Consulta: '{self.consulta}' ({'vía diccionario' if self.via_diccionario else 'directa'})",
+            f"Perfilador: {self.modo}  |  Duración: {self.segundos * 1000:.1f} ms",
+            f"Archivo: {self.ruta_archivo if self.ruta_archivo else '(no guardado)'}",
+            "",
+        ]
+        if self.texto_muestreo is not None:
+            lineas.append(self.texto_muestreo)
+            return "\n".join(lineas)
+        lineas.append(f"{'Acumulado (ms)':>15}{'Propio (ms)':>13}{'Llamadas':>10}  Función")
+        for fila in self.top_funciones:
+            lineas.append(f"{fila.segundos_acumulados * 1000:>15.2f}{fila.segundos_propios * 1000:>13.2f}{fila.llamadas:>10}  {fila.funcion}")
+        return "\n".join(lineas)
+
+
+def top_funciones(estadisticas: pstats.Stats, cantidad: int = TOP_FUNCIONES_POR_DEFECTO) -> List[FuncionPerfil]:
+    """ Las `cantidad` funciones con más tiempo acumulado de un pstats.Stats. """
+    filas: List[FuncionPerfil] = []
+    for (archivo, linea, nombre), (_llamadas_primitivas, llamadas, propio, acumulado, _llamantes) in estadisticas.stats.items():
+        ubicacion = f"{Path(archivo).name}:{linea}" if archivo != "~" else "(integrada)"
+        filas.append(FuncionPerfil(f"{nombre} ({ubicacion})", llamadas, propio, acumulado))
+    filas.sort(key=lambda fila: fila.segundos_acumulados, reverse=True)
+    return filas[:cantidad]
+
+
+def _nombre_archivo_perfil(consulta: str) -> str:
+    marca = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    fragmento = re.sub(r"[^\w\-]+", "_", consulta, flags=re.UNICODE).strip("_")[:40] or "vacia"
+    return f"busqueda_{marca}_{fragmento}"
+
+
+class PerfiladorBusquedas:
+    """ Perfila las próximas N llamadas a `MotorBusqueda.buscar` y guarda un archivo por consulta.
+
+    Con cProfile se guarda un `.pstats` (abrible con `python -m pstats` o snakeviz); en modo muestreo
+    (pyinstrument) un `.txt` con el árbol de llamadas. Python solo admite un perfilador activo a la
+    vez, así que las búsquedas concurrentes con una ya perfilándose se ejecutan sin perfilar y no
+    consumen turno.
+    """
+
+    def __init__(self):
+        self.directorio = Path("perfiles_busqueda")
+        self.modo = MODO_CPROFILE
+        self.top = TOP_FUNCIONES_POR_DEFECTO
+        self.perfiles: List[PerfilBusqueda] = [] # Los últimos MAX_PERFILES_EN_MEMORIA
+        self.total_perfiles = 0
+        self._pendientes = 0
+        self._cerrojo = threading.Lock()
+        self._cerrojo_perfilado = threading.Lock()
+
+    @property
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    def activar(self, cantidad: int, directorio: Optional[str] = None, modo: str = MODO_CPROFILE, top: int = TOP_FUNCIONES_POR_DEFECTO):
+        """ Perfila las próximas `cantidad` búsquedas (0 cancela las pendientes). """
+        if modo == MODO_MUESTREO and not hay_perfilador_muestreo():
+            logger.warning("pyinstrument no está instalado; se usará cProfile.")
+            modo = MODO_CPROFILE
+        with self._cerrojo:
+            self._pendientes = max(0, int(cantidad))
+            self.modo = modo
+            self.top = max(1, int(top))
+            if directorio:
+                self.directorio = Path(directorio)
+        logger.info(f"Perfilador: se perfilarán las próximas {self._pendientes} búsquedas ({self.modo}) en '{self.directorio}'.")
+
+    def _tomar_turno(self) -> bool:
+        with self._cerrojo:
+            if self._pendientes <= 0:
+                return False
+            self._pendientes -= 1
+            return True
+
+    def _devolver_turno(self):
+        with self._cerrojo:
+            self._pendientes += 1
+
+    def perfilar(self, consulta: str, via_diccionario: bool, funcion: Callable[[str, bool], Any]) -> Any:
+        """ Ejecuta `funcion(consulta, via_diccionario)`, perfilándola si quedan búsquedas pendientes. """
+        if not self._cerrojo_perfilado.acquire(blocking=False): # Otra búsqueda se está perfilando
+            return funcion(consulta, via_diccionario)
+        try:
+            if not self._tomar_turno():
+                return funcion(consulta, via_diccionario)
+            try:
+                if self.modo == MODO_MUESTREO:
+                    resultado, perfil = self._perfilar_muestreo(consulta, via_diccionario, funcion)
+                else:
+                    resultado, perfil = self._perfilar_cprofile(consulta, via_diccionario, funcion)
+            except PerfiladorNoDisponible as e_perfilador:
+                logger.warning(f"No se pudo perfilar la búsqueda '{consulta}': {e_perfilador}")
+                self._devolver_turno()
+                return funcion(consulta, via_diccionario)
+        finally:
+            self._cerrojo_perfilado.release()
+
+        with self._cerrojo:
+            self.perfiles.append(perfil)
+            self.total_perfiles += 1
+            del self.perfiles[:-MAX_PERFILES_EN_MEMORIA]
+        logger.info(f"Perfil de '{consulta}' guardado en '{perfil.ruta_archivo}' ({perfil.segundos * 1000:.1f} ms). Quedan {self._pendientes}.")
+        return resultado
+
+    def _ruta_salida(self, consulta: str, extension: str) -> Optional[Path]:
+        try:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+        except OSError as e_dir:
+            logger.error(f"No se pudo crear el directorio de perfiles '{self.directorio}': {e_dir}")
+            return None
+        return self.directorio / f"{_nombre_archivo_perfil(consulta)}{extension}"
+
+    def _perfilar_cprofile(self, consulta: str, via_diccionario: bool, funcion: Callable[[str, bool], Any]) -> Tuple[Any, PerfilBusqueda]:
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            perfil.enable()
+        except ValueError as e_activar: # p. ej. otra herramienta de perfilado (depurador, cobertura...) activa
+            raise PerfiladorNoDisponible(str(e_activar)) from e_activar
+        try:
+            resultado = funcion(consulta, via_diccionario)
+        finally:
+            perfil.disable()
+        segundos = time.perf_counter() - inicio
+
+        estadisticas = pstats.Stats(perfil, stream=io.StringIO())
+        ruta = self._ruta_salida(consulta, ".pstats")
+        if ruta is not None:
+            try:
+                estadisticas.dump_stats(str(ruta))
+            except OSError as e_guardar:
+                logger.error(f"No se pudo guardar el perfil en '{ruta}': {e_guardar}")
+                ruta = None
+        return resultado, PerfilBusqueda(consulta, via_diccionario, MODO_CPROFILE, segundos, ruta, top_funciones(estadisticas, self.top))
+
+    def _perfilar_muestreo(self, consulta: str, via_diccionario: bool, funcion: Callable[[str, bool], Any]) -> Tuple[Any, PerfilBusqueda]:
+        from pyinstrument import Profiler # Opcional: solo se importa si se eligió este modo
+
+        perfilador = Profiler()
+        inicio = time.perf_counter()
+        try:
+            perfilador.start()
+        except RuntimeError as e_activar:
+            raise PerfiladorNoDisponible(str(e_activar)) from e_activar
+        try:
+            resultado = funcion(consulta, via_diccionario)
+        finally:
+            perfilador.stop()
+        segundos = time.perf_counter() - inicio
+
+        texto = perfilador.output_text(unicode=True, color=False)
+        ruta = self._ruta_salida(consulta, ".txt")
+        if ruta is not None:
+            try:
+                ruta.write_text(texto, encoding="utf-8")
+            except OSError as e_guardar:
+                logger.error(f"No se pudo guardar el perfil en '{ruta}': {e_guardar}")
+                ruta = None
+        return resultado, PerfilBusqueda(consulta, via_diccionario, MODO_MUESTREO, segundos, ruta, [], texto_muestreo=texto)
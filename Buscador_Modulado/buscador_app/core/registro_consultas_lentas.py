@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/registro_consultas_lentas.py
+
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .estadisticas import EstadisticasBusqueda
+from .indice_busqueda import CLAVE_ATTRS_INDICE
+
+logger = logging.getLogger(__name__)
+
+UMBRAL_LENTAS_MS_POR_DEFECTO = 500.0
+
+
+def huella_dataframe(df: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+    """ Huella del contenido de un DataFrame: forma y hash de columnas, filas e índice (mismo hash -> mismos datos).
+
+    El hash recorre los hashes de fila en orden, así que dos DataFrames con las mismas filas en otro orden
+    tienen huellas distintas.
+    """
+    if df is None:
+        return None
+    try:
+        hashes_filas = pd.util.hash_pandas_object(df, index=True).to_numpy()
+        hasher = hashlib.blake2b(digest_size=8)
+        hasher.update(repr([str(c) for c in df.columns]).encode("utf-8"))
+        hasher.update(hashes_filas.tobytes())
+        texto_hash = hasher.hexdigest()
+    except TypeError as e_hash: # Celdas no hasheables (listas, dicts...)
+        logger.debug(f"No se pudo calcular el hash del DataFrame: {e_hash}")
+        texto_hash = None
+    return {"filas": int(len(df)), "columnas": int(df.shape[1]), "hash": texto_hash}
+
+
+class RegistroConsultasLentas:
+    """ Registro JSONL de las búsquedas que superan `umbral_ms`.
+
+    Cada línea lleva la consulta, el flujo (`OrigenResultados`), el plan parseado, los términos
+    expandidos, los tiempos por etapa, el tamaño del resultado y las huellas de los datos cargados,
+    para poder reproducir la consulta lenta contra los mismos archivos. Las huellas se calculan una
+    vez por archivo cargado (los DataFrames no cambian tras la carga) y solo si hay algo que registrar.
+    """
+
+    def __init__(self, ruta: str, umbral_ms: float = UMBRAL_LENTAS_MS_POR_DEFECTO):
+        self.ruta = Path(ruta)
+        self.umbral_ms = max(0.0, float(umbral_ms))
+        self.consultas_registradas = 0
+        self._cerrojo = threading.Lock()
+        self._huellas_por_clave: Dict[Any, Optional[Dict[str, Any]]] = {}
+
+    def supera_umbral(self, estadisticas: EstadisticasBusqueda) -> bool:
+        return estadisticas.segundos_total * 1000 >= self.umbral_ms
+
+    def _huella(self, df: Optional[pd.DataFrame], ruta_archivo: Optional[Path]) -> Optional[Dict[str, Any]]:
+        if df is None:
+            return None
+        clave = df.attrs.get(CLAVE_ATTRS_INDICE) or id(df)
+        with self._cerrojo:
+            if clave in self._huellas_por_clave:
+                return self._huellas_por_clave[clave]
+        huella = huella_dataframe(df)
+        if huella is not None:
+            huella["archivo"] = ruta_archivo.name if ruta_archivo else None
+        with self._cerrojo:
+            self._huellas_por_clave[clave] = huella
+        return huella
+
+    def registrar(self, estadisticas: EstadisticasBusqueda, motor: Any) -> bool:
+        """ Añade la búsqueda al registro si supera el umbral. Devuelve True si se escribió la línea. """
+        if not self.supera_umbral(estadisticas):
+            return False
+        entrada = {
+            "fecha": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "ms": round(estadisticas.segundos_total * 1000, 3),
+            "umbral_ms": self.umbral_ms,
+            "consulta": estadisticas.consulta,
+            "via_diccionario": estadisticas.via_diccionario,
+            "origen": estadisticas.origen,
+            "plan": estadisticas.plan,
+            "sinonimos_expandidos": estadisticas.sinonimos_expandidos,
+            "fcds_encontrados": estadisticas.fcds_encontrados,
+            "filas_resultado": estadisticas.filas_resultado,
+            "etapas": {m.nombre: m.a_dict() for m in estadisticas.etapas_ordenadas()},
+            "aciertos_cache": dict(estadisticas.aciertos_cache),
+            "fallos_cache": dict(estadisticas.fallos_cache),
+            "datos": {
+                "diccionario": self._huella(motor.datos_diccionario, motor.archivo_diccionario_actual),
+                "descripciones": self._huella(motor.datos_descripcion, motor.archivo_descripcion_actual),
+            },
+        }
+        linea = json.dumps(entrada, ensure_ascii=False, default=str)
+        try:
+            with self._cerrojo:
+                self.ruta.parent.mkdir(parents=True, exist_ok=True)
+                with self.ruta.open("a", encoding="utf-8") as f:
+                    f.write(linea + "\n")
+                self.consultas_registradas += 1
+        except OSError as e_escritura: # Un registro de diagnóstico nunca debe romper la búsqueda
+            logger.error(f"No se pudo escribir en el registro de consultas lentas '{self.ruta}': {e_escritura}")
+            return False
+        logger.info(f"Consulta lenta registrada ({entrada['ms']:.0f} ms >= {self.umbral_ms:.0f} ms): '{estadisticas.consulta}'")
+        return True
+
+
+def leer_registro(ruta: str) -> Iterator[Dict[str, Any]]:
+    """ Recorre las entradas del registro, saltando las líneas corruptas (p. ej. una escritura cortada). """
+    with Path(ruta).open("r", encoding="utf-8") as f:
+        for num_linea, linea in enumerate(f, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                logger.warning(f"Línea {num_linea} de '{ruta}' no es JSON válido; se ignora.")
+
+
+def analizar_registro(entradas: List[Dict[str, Any]], top: int = 10, criterio: str = "total") -> List[Dict[str, Any]]:
+    """ Agrupa las entradas por (consulta, modo) y devuelve las `top` peores.
+
+    `criterio` ordena por tiempo acumulado ("total"), máximo ("max"), medio ("media") o número de apariciones ("veces").
+    """
+    grupos: Dict[Any, Dict[str, Any]] = {}
+    for entrada in entradas:
+        consulta = str(entrada.get("consulta", ""))
+        clave = (" ".join(consulta.split()).upper(), bool(entrada.get("via_diccionario", True)))
+        grupo = grupos.get(clave)
+        if grupo is None:
+            grupo = grupos[clave] = {"consulta": consulta, "via_diccionario": clave[1], "veces": 0, "tiempos_ms": [],
+                                     "origenes": {}, "etapas_ms": {}, "filas_resultado": 0, "sinonimos_expandidos": 0,
+                                     "ultima_fecha": None, "huellas_datos": set()}
+        ms = float(entrada.get("ms", 0.0))
+        grupo["veces"] += 1
+        grupo["tiempos_ms"].append(ms)
+        origen = entrada.get("origen") or "?"
+        grupo["origenes"][origen] = grupo["origenes"].get(origen, 0) + 1
+        for nombre_etapa, datos_etapa in (entrada.get("etapas") or {}).items():
+            grupo["etapas_ms"][nombre_etapa] = grupo["etapas_ms"].get(nombre_etapa, 0.0) + float(datos_etapa.get("segundos", 0.0)) * 1000
+        grupo["filas_resultado"] = max(grupo["filas_resultado"], int(entrada.get("filas_resultado", 0)))
+        grupo["sinonimos_expandidos"] = max(grupo["sinonimos_expandidos"], int(entrada.get("sinonimos_expandidos", 0)))
+        grupo["ultima_fecha"] = max(filter(None, [grupo["ultima_fecha"], entrada.get("fecha")]), default=None)
+        datos = entrada.get("datos") or {}
+        grupo["huellas_datos"].add(tuple((datos.get(n) or {}).get("hash") for n in ("diccionario", "descripciones")))
+
+    filas: List[Dict[str, Any]] = []
+    for grupo in grupos.values():
+        tiempos = grupo.pop("tiempos_ms")
+        etapa_dominante = max(grupo["etapas_ms"].items(), key=lambda par: par[1])[0] if grupo["etapas_ms"] else None
+        filas.append({
+            **grupo,
+            "total_ms": round(sum(tiempos), 3),
+            "media_ms": round(sum(tiempos) / len(tiempos), 3),
+            "max_ms": round(max(tiempos), 3),
+            "etapa_dominante": etapa_dominante,
+            "etapas_ms": {nombre: round(ms, 3) for nombre, ms in grupo["etapas_ms"].items()},
+            "huellas_datos": len(grupo["huellas_datos"]), # >1: la consulta fue lenta con distintos datos cargados
+        })
+    clave_orden = {"total": "total_ms", "max": "max_ms", "media": "media_ms", "veces": "veces"}.get(criterio, "total_ms")
+    filas.sort(key=lambda fila: fila[clave_orden], reverse=True)
+    return filas[:max(1, top)]
+
+
+def formatear_analisis(filas: List[Dict[str, Any]], total_entradas: int) -> str:
+    lineas = [f"{total_entradas} consultas lentas registradas, {len(filas)} mostradas.",
+              f"{'Total (ms)':>12}{'Media (ms)':>12}{'Máx (ms)':>12}{'Veces':>7}  {'Etapa dominante':<24}{'Consulta':<40}Origen"]
+    for fila in filas:
+        origen = max(fila["origenes"].items(), key=lambda par: par[1])[0] if fila["origenes"] else "?"
+        modo = "" if fila["via_diccionario"] else " [directa]"
+        lineas.append(f"{fila['total_ms']:>12.1f}{fila['media_ms']:>12.1f}{fila['max_ms']:>12.1f}{fila['veces']:>7}  "
+                      f"{str(fila['etapa_dominante']):<24}{(fila['consulta'] + modo):<40} {origen}")
+    return "\n".join(lineas)
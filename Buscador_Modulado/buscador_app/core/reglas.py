@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/reglas.py
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..enums import OrigenResultados
+from .estadisticas import EstadisticasBusqueda
+from .indice_busqueda import CLAVE_ATTRS_INDICE
+from .memoria import es_columna_texto
+from .motor_busqueda import MotorBusqueda
+from .registro_consultas_lentas import huella_dataframe
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_REGLAS_POR_DEFECTO = "reglas_buscador.json" # Las filas de cada regla van al lado, en un .npz con el mismo nombre
+VERSION_FORMATO_REGLAS = 1
+
+
+def hashes_filas(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """ Hash del contenido de cada fila (sin el índice), o None si alguna celda no es hasheable. """
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    except (TypeError, ValueError) as e_hash:
+        logger.debug(f"No se pudo calcular el hash de las filas: {e_hash}")
+        return None
+
+
+def _clave_datos(df: Optional[pd.DataFrame]) -> Any:
+    """ Identifica unos datos cargados: el token de su índice o, sin índice, el propio objeto (no cambian tras la carga). """
+    if df is None:
+        return None
+    return df.attrs.get(CLAVE_ATTRS_INDICE) or id(df)
+
+
+class ReglaGuardada:
+    """ Una búsqueda guardada con su resultado materializado: las posiciones de sus filas en las descripciones. """
+
+    def __init__(self, nombre: str, termino: str, via_diccionario: bool):
+        self.nombre = nombre
+        self.termino = termino
+        self.via_diccionario = via_diccionario
+        self.origen = OrigenResultados.NINGUNO.name
+        self.num_fcds = 0
+        self.plan: Dict[str, Any] = {} # Consulta parseada en la última evaluación completa (ver `EstadisticasBusqueda.plan`)
+        self.error: Optional[str] = None
+        self.fecha_guardado = datetime.datetime.now().isoformat(timespec="seconds")
+        self.fecha_evaluacion: Optional[str] = None
+        self.posiciones = np.array([], dtype=np.int64) # Posición (iloc) de cada fila del resultado, en orden
+        self.ms_evaluacion: Optional[float] = None # Duración de la última evaluación completa (no se guarda)
+
+    @property
+    def num_filas(self) -> int:
+        return int(len(self.posiciones))
+
+    def a_dict(self) -> Dict[str, Any]:
+        """ Metadatos de la regla (sin las filas), serializables en JSON. """
+        return {"nombre": self.nombre, "termino": self.termino, "via_diccionario": self.via_diccionario,
+                "origen": self.origen, "num_fcds": self.num_fcds, "num_filas": self.num_filas, "error": self.error,
+                "plan": self.plan, "fecha_guardado": self.fecha_guardado, "fecha_evaluacion": self.fecha_evaluacion}
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> "ReglaGuardada":
+        regla = cls(str(datos["nombre"]), str(datos["termino"]), bool(datos.get("via_diccionario", True)))
+        regla.origen = datos.get("origen", OrigenResultados.NINGUNO.name)
+        regla.num_fcds = int(datos.get("num_fcds", 0))
+        regla.plan = datos.get("plan") or {}
+        regla.error = datos.get("error")
+        regla.fecha_guardado = datos.get("fecha_guardado", regla.fecha_guardado)
+        regla.fecha_evaluacion = datos.get("fecha_evaluacion")
+        return regla
+
+    def _aplicar_resultado(self, posiciones: np.ndarray, origen: OrigenResultados, fcds_df: Optional[pd.DataFrame], mensaje_error: Optional[str],
+                           conservar_metadatos: bool = False):
+        """ Con `conservar_metadatos`, el origen y `num_fcds` no cambian (ver `AlmacenReglas.sincronizar`). """
+        self.posiciones = posiciones.astype(np.int64, copy=False)
+        if not conservar_metadatos:
+            self.origen = origen.name
+            self.num_fcds = int(len(fcds_df)) if fcds_df is not None else 0
+        self.error = mensaje_error
+        self.fecha_evaluacion = datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class AlmacenReglas:
+    """ Reglas guardadas en disco como vistas materializadas de las descripciones cargadas.
+
+    Cada regla guarda su consulta, el plan con que se evaluó y las filas de su resultado, así abrirla
+    no vuelve a buscar. Junto a las reglas se guarda el hash del contenido de cada fila de las
+    descripciones con que se evaluaron: al cargar otras descripciones, `sincronizar` solo busca en
+    las filas cuyo contenido no estaba antes (nuevas o cambiadas). Una fila con el mismo contenido
+    coincide con la misma regla esté donde esté, porque cada fila se evalúa por sí sola; si cambia el
+    diccionario o las columnas de búsqueda, las reglas se evalúan de nuevo completas.
+
+    Los metadatos van en un JSON y las filas en un .npz al lado; ambos llevan un número de versión, y si
+    no coinciden (una escritura cortada) las reglas se conservan pero se evalúan completas al sincronizar.
+    """
+
+    def __init__(self, ruta_str: str = ARCHIVO_REGLAS_POR_DEFECTO):
+        self.ruta = Path(ruta_str)
+        self.ruta_filas = self.ruta.with_suffix(".npz")
+        self._reglas: Dict[str, ReglaGuardada] = {}
+        self._cerrojo = threading.RLock()
+        self._version = 0
+        # Datos contra los que están materializadas las reglas
+        self._hashes_filas: Optional[np.ndarray] = None
+        self._huella_diccionario: Optional[str] = None
+        self._columnas: Optional[List[List[Any]]] = None
+        self._clave_sincronizada: Any = None # (descripciones, diccionario) cargados con los que ya se sincronizó
+        if self.ruta.exists():
+            self.cargar()
+
+    def cargar(self):
+        """ Lee las reglas del disco. Si el archivo de filas falta o no corresponde, las reglas quedan sin materializar. """
+        with self.ruta.open("r", encoding="utf-8") as f:
+            contenido = json.load(f)
+        reglas = [ReglaGuardada.desde_dict(datos) for datos in contenido.get("reglas", [])]
+        hashes = None
+        try:
+            with np.load(self.ruta_filas, allow_pickle=False) as filas:
+                if int(filas["version"]) == contenido.get("version"):
+                    hashes = filas["hashes_filas"]
+                    for i, regla in enumerate(reglas):
+                        regla.posiciones = filas[f"regla_{i}"]
+        except (OSError, KeyError, ValueError) as e_filas:
+            logger.warning(f"Filas de las reglas no disponibles en '{self.ruta_filas}' ({e_filas}); se evaluarán de nuevo.")
+        if hashes is None:
+            for regla in reglas:
+                regla.posiciones = np.array([], dtype=np.int64)
+        with self._cerrojo:
+            self._reglas = {regla.nombre: regla for regla in reglas}
+            self._version = int(contenido.get("version", 0))
+            self._hashes_filas = hashes
+            self._huella_diccionario = contenido.get("huella_diccionario") if hashes is not None else None
+            self._columnas = contenido.get("columnas") if hashes is not None else None
+            self._clave_sincronizada = None
+        logger.info(f"{len(reglas)} reglas cargadas de '{self.ruta}'" + ("" if hashes is not None else " (sin materializar)") + ".")
+
+    def guardar(self):
+        """ Escribe las reglas y sus filas. Cada archivo se escribe aparte y se sustituye de una vez. """
+        with self._cerrojo:
+            self._version += 1
+            reglas = list(self._reglas.values())
+            contenido = {"version": self._version, "formato": VERSION_FORMATO_REGLAS, "huella_diccionario": self._huella_diccionario,
+                         "columnas": self._columnas, "reglas": [regla.a_dict() for regla in reglas]}
+            filas: Dict[str, np.ndarray] = {f"regla_{i}": regla.posiciones for i, regla in enumerate(reglas)}
+            filas["version"] = np.array(self._version)
+            filas["hashes_filas"] = self._hashes_filas if self._hashes_filas is not None else np.array([], dtype=np.uint64)
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            temporal_filas = self.ruta_filas.with_name(self.ruta_filas.stem + ".tmp.npz")
+            np.savez_compressed(temporal_filas, **filas)
+            os.replace(temporal_filas, self.ruta_filas)
+            temporal = self.ruta.with_name(self.ruta.name + ".tmp")
+            with temporal.open("w", encoding="utf-8") as f:
+                json.dump(contenido, f, indent=4, ensure_ascii=False, default=str)
+            os.replace(temporal, self.ruta)
+
+    def reglas(self) -> List[ReglaGuardada]:
+        with self._cerrojo:
+            return list(self._reglas.values())
+
+    def regla(self, nombre: str) -> Optional[ReglaGuardada]:
+        with self._cerrojo:
+            return self._reglas.get(nombre)
+
+    def eliminar(self, nombre: str) -> bool:
+        with self._cerrojo:
+            eliminada = self._reglas.pop(nombre, None) is not None
+            if eliminada:
+                self.guardar()
+        return eliminada
+
+    def sincronizada_con(self, motor: MotorBusqueda) -> bool:
+        """ True si las filas de las reglas corresponden a los datos cargados en `motor`. """
+        return self._clave_sincronizada is not None and self._clave_sincronizada == self._clave_motor(motor)
+
+    def ids_resultado(self, regla: ReglaGuardada, motor: MotorBusqueda) -> Optional[pd.Index]:
+        """ Ids de fila del resultado materializado de `regla` en las descripciones de `motor` (None si no está sincronizado). """
+        if motor.datos_descripcion is None or not self.sincronizada_con(motor):
+            return None
+        return motor.datos_descripcion.index[regla.posiciones]
+
+    @staticmethod
+    def _clave_motor(motor: MotorBusqueda) -> Tuple[Any, Any]:
+        return _clave_datos(motor.datos_descripcion), _clave_datos(motor.datos_diccionario)
+
+    @staticmethod
+    def _huella_diccionario_de(motor: MotorBusqueda) -> Optional[str]:
+        huella = huella_dataframe(motor.datos_diccionario)
+        if huella is None or huella["hash"] is None:
+            return None
+        return f"{huella['hash']}:{sorted(motor.indices_columnas_busqueda_dic_preview or [])}"
+
+    @staticmethod
+    def _columnas_de(datos: pd.DataFrame) -> List[List[Any]]:
+        """ Columnas de las descripciones y si son de texto: deciden en qué columnas se busca. """
+        return [[str(columna), bool(es_columna_texto(datos[columna]))] for columna in datos.columns]
+
+    def guardar_regla(self, motor: MotorBusqueda, nombre: str, termino: str, via_diccionario: bool) -> ReglaGuardada:
+        """ Evalúa `termino` sobre los datos de `motor`, lo guarda como regla `nombre` (sustituye a una regla con
+        ese nombre) y escribe el almacén. Las demás reglas se sincronizan antes con los mismos datos. """
+        if motor.datos_descripcion is None:
+            raise ValueError("No hay descripciones cargadas para evaluar la regla.")
+        with self._cerrojo:
+            self.sincronizar(motor, guardar=False)
+            regla = ReglaGuardada(nombre, termino, via_diccionario)
+            self._evaluar_completa(regla, motor)
+            self._reglas[nombre] = regla
+            self.guardar()
+        logger.info(f"Regla '{nombre}' guardada: '{termino}' ({regla.num_filas} filas, {regla.origen}).")
+        return regla
+
+    def aplicar_a(self, motor: MotorBusqueda, nombres: Optional[List[str]] = None) -> "AplicacionReglas":
+        """ Evalúa todas las reglas (o las de `nombres`) sobre las descripciones de `motor` de una vez, p. ej. un
+        catálogo nuevo de un proveedor. Las reglas guardadas y sus filas materializadas no cambian. """
+        if motor.datos_descripcion is None:
+            raise ValueError("No hay descripciones cargadas para aplicar las reglas.")
+        inicio = time.perf_counter()
+        with self._cerrojo:
+            reglas = [ReglaGuardada.desde_dict(regla.a_dict()) for regla in self._reglas.values() if nombres is None or regla.nombre in nombres]
+        self._evaluar_completas(reglas, motor)
+        aplicacion = AplicacionReglas(reglas, motor.datos_descripcion, time.perf_counter() - inicio)
+        nombre_archivo = Path(motor.archivo_descripcion_actual).name if motor.archivo_descripcion_actual else None
+        logger.info(f"{len(reglas)} reglas aplicadas a '{nombre_archivo}' ({len(motor.datos_descripcion)} filas) en {aplicacion.segundos:.2f}s.")
+        return aplicacion
+
+    def _evaluar_completas(self, reglas: List[ReglaGuardada], motor: MotorBusqueda):
+        """ Evalúa las reglas sobre todas las descripciones en un solo lote: cada término distinto (de las reglas o de
+        sus sinónimos) se busca una vez, con las listas de palabras del índice, y la tabla numérica se construye una vez. """
+        with motor.memoria_de_lote():
+            for regla in reglas:
+                self._evaluar_completa(regla, motor)
+
+    def _evaluar_completa(self, regla: ReglaGuardada, motor: MotorBusqueda):
+        inicio = time.perf_counter()
+        estadisticas = EstadisticasBusqueda()
+        resultados_df, origen, fcds_df, _indices, mensaje_error = motor.buscar(regla.termino, regla.via_diccionario, estadisticas)
+        posiciones = np.array([], dtype=np.int64)
+        if resultados_df is not None and not resultados_df.empty:
+            posiciones = motor.datos_descripcion.index.get_indexer(resultados_df.index)
+        regla.plan = estadisticas.plan
+        regla._aplicar_resultado(posiciones, origen, fcds_df, mensaje_error)
+        regla.ms_evaluacion = round((time.perf_counter() - inicio) * 1000, 3)
+
+    def sincronizar(self, motor: MotorBusqueda, guardar: bool = True) -> Dict[str, Any]:
+        """ Pone las reglas al día con los datos cargados en `motor`, evaluando solo las filas nuevas o cambiadas.
+
+        Devuelve un resumen: filas evaluadas, si la evaluación fue completa y el tiempo empleado.
+        """
+        datos = motor.datos_descripcion
+        clave = self._clave_motor(motor)
+        resumen: Dict[str, Any] = {"reglas": 0, "filas": 0, "filas_evaluadas": 0, "completa": False, "segundos": 0.0}
+        if datos is None:
+            return resumen
+        with self._cerrojo:
+            if clave == self._clave_sincronizada:
+                resumen.update(reglas=len(self._reglas), filas=len(datos))
+                return resumen
+            inicio = time.perf_counter()
+            hashes = hashes_filas(datos)
+            huella_diccionario = self._huella_diccionario_de(motor)
+            columnas = self._columnas_de(datos)
+            completa = (hashes is None or self._hashes_filas is None or huella_diccionario is None
+                        or huella_diccionario != self._huella_diccionario or columnas != self._columnas)
+
+            nuevas = np.arange(len(datos))
+            conocidas = np.zeros(len(datos), dtype=bool)
+            posicion_anterior = np.zeros(len(datos), dtype=np.int64)
+            if not completa and len(self._hashes_filas):
+                # Cada fila con un contenido que ya existía hereda el resultado de la fila anterior con ese contenido
+                hashes_unicos, primera_posicion = np.unique(self._hashes_filas, return_index=True)
+                encontrados = np.minimum(np.searchsorted(hashes_unicos, hashes), len(hashes_unicos) - 1)
+                conocidas = hashes_unicos[encontrados] == hashes
+                posicion_anterior = primera_posicion[encontrados]
+                nuevas = np.flatnonzero(~conocidas)
+            # Sin memo de lote: con él, las máscaras de texto se calcularían sobre todas las filas indexadas
+            bloque_nuevas = datos.iloc[nuevas] if not completa and len(nuevas) else None
+
+            if completa:
+                self._evaluar_completas(list(self._reglas.values()), motor)
+            else:
+                for regla in self._reglas.values():
+                    coincidia = np.zeros(len(self._hashes_filas), dtype=bool)
+                    coincidia[regla.posiciones] = True
+                    coincide = np.zeros(len(datos), dtype=bool)
+                    coincide[conocidas] = coincidia[posicion_anterior[conocidas]]
+                    if bloque_nuevas is None: # Mismas filas, quizá en otro orden: nada que buscar
+                        regla.posiciones = np.flatnonzero(coincide)
+                        continue
+                    resultados_df, origen, fcds_df, _indices, mensaje_error = motor.buscar_en_bloque(regla.termino, regla.via_diccionario, bloque_nuevas)
+                    con_filas_nuevas = resultados_df is not None and not resultados_df.empty
+                    if con_filas_nuevas:
+                        coincide[datos.index.get_indexer(resultados_df.index)] = True
+                    elif mensaje_error is None and not coincide.any() and motor.metadatos_dependen_de_filas(regla.termino, regla.via_diccionario):
+                        self._evaluar_completa(regla, motor) # Sin filas en ninguna parte: origen y FCDs de la búsqueda completa
+                        continue
+                    # Si solo conserva filas anteriores, el origen "con resultados" y los FCDs son los de la evaluación que las encontró:
+                    # los de `bloque_nuevas` pueden ser otros (un AND vía diccionario se corta donde se queda sin filas)
+                    regla._aplicar_resultado(np.flatnonzero(coincide), origen, fcds_df, mensaje_error,
+                                             conservar_metadatos=not con_filas_nuevas and mensaje_error is None and coincide.any())
+
+            self._hashes_filas = hashes
+            self._huella_diccionario = huella_diccionario
+            self._columnas = columnas
+            self._clave_sincronizada = clave
+            resumen.update(reglas=len(self._reglas), filas=len(datos), completa=completa,
+                           filas_evaluadas=len(datos) if completa else int(len(nuevas)),
+                           segundos=round(time.perf_counter() - inicio, 3))
+            if guardar and self._reglas:
+                self.guardar()
+        nombre_archivo = Path(motor.archivo_descripcion_actual).name if motor.archivo_descripcion_actual else None
+        logger.info(f"Reglas sincronizadas con '{nombre_archivo}': {resumen['reglas']} reglas, {resumen['filas_evaluadas']} "
+                    f"de {resumen['filas']} filas evaluadas{' (completa)' if completa else ''} en {resumen['segundos']:.2f}s.")
+        return resumen
+
+
+class MatrizPertenencia:
+    """ Pertenencia regla x fila de unas descripciones, dispersa: las posiciones (iloc) de las filas de cada regla,
+    concatenadas, y `punteros[i]:punteros[i + 1]` el tramo de la regla i (formato CSR, sin depender de scipy). """
+
+    def __init__(self, nombres: List[str], num_filas: int, posiciones_por_regla: List[np.ndarray]):
+        self.nombres = list(nombres)
+        self.num_filas = int(num_filas)
+        self.punteros = np.zeros(len(self.nombres) + 1, dtype=np.int64)
+        self.punteros[1:] = np.cumsum([len(posiciones) for posiciones in posiciones_por_regla], dtype=np.int64)
+        self.posiciones = np.concatenate(posiciones_por_regla).astype(np.int64, copy=False) if posiciones_por_regla else np.array([], dtype=np.int64)
+        self._numero_regla = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def filas_de(self, nombre: str) -> np.ndarray:
+        """ Posiciones de las filas de la regla `nombre`, en orden. """
+        i = self._numero_regla[nombre]
+        return self.posiciones[self.punteros[i]:self.punteros[i + 1]]
+
+    def reglas_de_fila(self, posicion: int) -> List[str]:
+        """ Nombres de las reglas que contienen la fila en `posicion`. """
+        numeros = np.searchsorted(self.punteros, np.flatnonzero(self.posiciones == posicion), side="right") - 1
+        return [self.nombres[i] for i in numeros]
+
+    def reglas_por_fila(self) -> np.ndarray:
+        """ Número de reglas que contienen cada fila. """
+        return np.bincount(self.posiciones, minlength=self.num_filas)
+
+    def densa(self) -> np.ndarray:
+        """ Matriz booleana (reglas x filas). Ocupa reglas x filas bytes: solo para tamaños moderados. """
+        matriz = np.zeros((len(self.nombres), self.num_filas), dtype=bool)
+        matriz[np.repeat(np.arange(len(self.nombres)), np.diff(self.punteros)), self.posiciones] = True
+        return matriz
+
+    def guardar(self, ruta_str: str):
+        np.savez_compressed(ruta_str, nombres=np.array(self.nombres, dtype=str), num_filas=np.array(self.num_filas),
+                            punteros=self.punteros, posiciones=self.posiciones)
+
+    @classmethod
+    def cargar(cls, ruta_str: str) -> "MatrizPertenencia":
+        with np.load(ruta_str, allow_pickle=False) as datos:
+            punteros = datos["punteros"]
+            posiciones = datos["posiciones"]
+            return cls([str(nombre) for nombre in datos["nombres"]], int(datos["num_filas"]),
+                       [posiciones[punteros[i]:punteros[i + 1]] for i in range(len(punteros) - 1)])
+
+
+class AplicacionReglas:
+    """ Resultado de aplicar reglas guardadas a unas descripciones de una vez (ver `AlmacenReglas.aplicar_a`). """
+
+    def __init__(self, reglas: List[ReglaGuardada], datos: pd.DataFrame, segundos: float):
+        self.reglas = reglas
+        self.datos = datos
+        self.segundos = segundos
+        self.matriz = MatrizPertenencia([regla.nombre for regla in reglas], len(datos), [regla.posiciones for regla in reglas])
+
+    def filas_de(self, nombre: str) -> pd.DataFrame:
+        return self.datos.iloc[self.matriz.filas_de(nombre)]
+
+    def exportar(self, directorio_str: str) -> List[Dict[str, Any]]:
+        """ Escribe en `directorio_str` un CSV con las filas de cada regla que tenga alguna (regla_00001.csv, ...),
+        la matriz de pertenencia (pertenencia.npz) y los metadatos de cada regla (reglas.jsonl). Devuelve esos metadatos. """
+        directorio = Path(directorio_str)
+        directorio.mkdir(parents=True, exist_ok=True)
+        registros: List[Dict[str, Any]] = []
+        with (directorio / "reglas.jsonl").open("w", encoding="utf-8") as f_indice:
+            for i, regla in enumerate(self.reglas, start=1):
+                registro = {"id": i, **regla.a_dict(), "ms": regla.ms_evaluacion, "archivo": None}
+                if regla.num_filas:
+                    archivo = directorio / f"regla_{i:05d}.csv"
+                    self.filas_de(regla.nombre).to_csv(archivo, index=False, encoding="utf-8-sig")
+                    registro["archivo"] = archivo.name
+                f_indice.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                registros.append(registro)
+        self.matriz.guardar(str(directorio / "pertenencia.npz"))
+        return registros
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/relevancia.py
+
+import itertools
+import logging
+import math
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2 # Saturación de la frecuencia del término en la fila
+BM25_B = 0.75 # Peso de la normalización por longitud de la fila
+PESO_TERMINO_ORIGINAL = 2.0 # Las palabras de la consulta puntúan más que los sinónimos añadidos por el diccionario
+PESO_SINONIMO = 1.0
+MAX_RESULTADOS_RELEVANCIA = 200
+
+
+class IndiceRelevancia:
+    """ Listas invertidas (palabra -> filas y frecuencia en cada fila) para puntuar filas con BM25.
+
+    Una fila es el texto normalizado de todas las columnas indexadas. Las listas se guardan en
+    dos arrays ordenados por palabra (`_filas`, `_frecuencias`) con el rango de cada palabra,
+    así que puntuar solo recorre las listas de las palabras de la consulta.
+    """
+
+    def __init__(self, series: List[pd.Series]):
+        inicio = time.perf_counter()
+        textos = series[0] if series else pd.Series(dtype=object)
+        for serie in series[1:]:
+            textos = textos + " " + serie
+        palabras_por_fila = [texto.split() for texto in textos.tolist()]
+        self.num_filas = len(palabras_por_fila)
+        self.longitudes = np.fromiter((len(palabras) for palabras in palabras_por_fila), dtype=np.float64, count=self.num_filas)
+        self.longitud_media = float(self.longitudes.mean()) if self.num_filas and self.longitudes.any() else 1.0
+
+        pares = pd.DataFrame({
+            "palabra": list(itertools.chain.from_iterable(palabras_por_fila)),
+            "fila": np.repeat(np.arange(self.num_filas, dtype=np.int32), self.longitudes.astype(np.int64)),
+        })
+        conteos = pares.groupby(["palabra", "fila"], sort=True).size()
+        palabras = conteos.index.get_level_values(0).to_numpy()
+        self._filas = conteos.index.get_level_values(1).to_numpy(dtype=np.int32)
+        self._frecuencias = conteos.to_numpy(dtype=np.float64)
+        cambios = np.flatnonzero(palabras[1:] != palabras[:-1]) + 1 if len(palabras) else np.array([], dtype=np.int64)
+        inicios = np.concatenate(([0], cambios)) if len(palabras) else cambios
+        fines = np.concatenate((cambios, [len(palabras)])) if len(palabras) else cambios
+        self._rangos: Dict[str, Tuple[int, int]] = {palabras[i]: (int(i), int(f)) for i, f in zip(inicios, fines)}
+
+        self.segundos_construccion = time.perf_counter() - inicio
+        logger.info(f"Índice de relevancia: {self.num_filas} filas, {len(self._rangos)} palabras en {self.segundos_construccion:.3f}s.")
+
+    def idf(self, palabra: str) -> float:
+        desde, hasta = self._rangos.get(palabra, (0, 0))
+        num_filas_con_palabra = hasta - desde
+        return math.log(1 + (self.num_filas - num_filas_con_palabra + 0.5) / (num_filas_con_palabra + 0.5))
+
+    def puntuar(self, pesos_por_palabra: Dict[str, float]) -> np.ndarray:
+        """ Puntuación BM25 de cada fila (0 en las que no tienen ninguna palabra), ponderada por palabra. """
+        puntuaciones = np.zeros(self.num_filas, dtype=np.float64)
+        normalizacion_longitud = BM25_K1 * (1 - BM25_B + BM25_B * self.longitudes / self.longitud_media)
+        for palabra, peso in pesos_por_palabra.items():
+            rango = self._rangos.get(palabra)
+            if rango is None:
+                continue
+            filas = self._filas[rango[0]:rango[1]]
+            frecuencias = self._frecuencias[rango[0]:rango[1]]
+            # Cada fila aparece una vez en la lista de una palabra: la suma por índice no tiene repeticiones
+            puntuaciones[filas] += peso * self.idf(palabra) * frecuencias * (BM25_K1 + 1) / (frecuencias + normalizacion_longitud[filas])
+        return puntuaciones
+
+    def mejores(self, posiciones_candidatas: np.ndarray, pesos_por_palabra: Dict[str, float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Las `k` posiciones de `posiciones_candidatas` con mayor puntuación y sus puntuaciones, de mayor a menor.
+
+        La selección es parcial (np.partition): solo se ordenan las `k` elegidas, no todas las candidatas.
+        A igual puntuación se mantiene el orden de `posiciones_candidatas` (el de los resultados).
+        """
+        if k <= 0 or len(posiciones_candidatas) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        puntuaciones = self.puntuar(pesos_por_palabra)[posiciones_candidatas]
+        if len(posiciones_candidatas) > k:
+            umbral = np.partition(puntuaciones, len(puntuaciones) - k)[len(puntuaciones) - k] # k-ésima mayor puntuación
+            superiores = np.flatnonzero(puntuaciones > umbral)
+            empatadas = np.flatnonzero(puntuaciones == umbral)[:k - len(superiores)]
+            elegidas = np.concatenate((superiores, empatadas))
+        else:
+            elegidas = np.arange(len(posiciones_candidatas))
+        elegidas = elegidas[np.lexsort((elegidas, -puntuaciones[elegidas]))]
+        return posiciones_candidatas[elegidas], puntuaciones[elegidas]
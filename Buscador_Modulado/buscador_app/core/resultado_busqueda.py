@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/resultado_busqueda.py
+
+import logging
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..enums import OrigenResultados
+
+if TYPE_CHECKING:
+    from .motor_busqueda import MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+TAMANO_PAGINA_ITERACION = 1000 # Filas que se materializan a la vez al iterar un resultado
+
+
+class ResultadoBusqueda:
+    """ Resultado perezoso de una búsqueda: ids de las filas de descripciones y metadatos, sin copiar filas.
+
+    Las filas se toman de las descripciones vigentes al buscar (`datos`) solo cuando se piden, por
+    páginas (`page`), completas (`to_frame`) o de página en página al iterar. Si la búsqueda tenía
+    un límite y se alcanzó, `truncado` es True: puede haber más coincidencias que `count()`.
+    """
+
+    def __init__(self, motor: "MotorBusqueda", datos: Optional[pd.DataFrame], ids_filas: pd.Index, origen: OrigenResultados,
+                 fcds: Optional[pd.DataFrame] = None, indices_fcds: Optional[List[int]] = None, error: Optional[str] = None,
+                 truncado: bool = False):
+        self._motor = motor
+        self._datos = datos
+        self.ids_filas = ids_filas
+        self.origen = origen
+        self.fcds = fcds
+        self.indices_fcds = indices_fcds
+        self.error = error
+        self.truncado = truncado
+
+    def count(self) -> int:
+        return len(self.ids_filas)
+
+    def __len__(self) -> int:
+        return len(self.ids_filas)
+
+    def page(self, offset: int = 0, n: int = 100, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """ Filas `offset` a `offset + n` del resultado (solo esas se materializan). """
+        offset = max(0, int(offset))
+        return self._filas(self.ids_filas[offset:offset + max(0, int(n))], columns)
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """ Todas las filas del resultado. `columns` puede incluir columnas diferidas de la memoria compacta. """
+        return self._filas(self.ids_filas, columns)
+
+    def __iter__(self) -> Iterator[Tuple[object, pd.Series]]:
+        """ (id de fila, fila), como `DataFrame.iterrows`, materializando una página cada vez. """
+        for offset in range(0, len(self.ids_filas), TAMANO_PAGINA_ITERACION):
+            yield from self.page(offset, TAMANO_PAGINA_ITERACION).iterrows()
+
+    def como_tupla(self) -> Tuple[Optional[pd.DataFrame], OrigenResultados, Optional[pd.DataFrame], Optional[List[int]], Optional[str]]:
+        """ La misma tupla que devuelve `MotorBusqueda.buscar` (con el DataFrame materializado). """
+        return self.to_frame(), self.origen, self.fcds, self.indices_fcds, self.error
+
+    def _filas(self, ids_filas: pd.Index, columns: Optional[List[str]]) -> pd.DataFrame:
+        if self._datos is None:
+            return pd.DataFrame(columns=columns or [])
+        df_filas = self._datos.loc[ids_filas]
+        if columns is None:
+            return df_filas
+        faltantes = [c for c in columns if c not in df_filas.columns]
+        if faltantes:
+            if self._datos is not self._motor.datos_descripcion:
+                raise KeyError(f"Columnas {faltantes} no disponibles: las descripciones se han recargado desde la búsqueda.")
+            df_filas = self._motor.filas_descripcion_completas(df_filas)
+        return df_filas[list(columns)]
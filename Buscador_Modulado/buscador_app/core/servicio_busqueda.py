@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/servicio_busqueda.py
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .concurrencia import CerrojoLectorEscritor
+from .estadisticas import EstadisticasBusqueda
+from .motor_busqueda import MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+
+def df_a_registros(df: Optional[pd.DataFrame]) -> List[Dict[str, Any]]:
+    """ Convierte un DataFrame en una lista de dicts serializable a JSON (NaN -> None, escalares numpy -> Python). """
+    if df is None or df.empty:
+        return []
+    registros: List[Dict[str, Any]] = []
+    for fila in df.astype(object).where(df.notna(), None).to_dict(orient="records"):
+        registros.append({str(col): (val.item() if hasattr(val, "item") else val) for col, val in fila.items()})
+    return registros
+
+
+class ServicioBusqueda:
+    """ Mantiene un único MotorBusqueda "caliente" compartido por muchos lectores concurrentes.
+
+    Cada búsqueda toma el cerrojo de lectura solo para leer el motor y su versión, y busca fuera de él.
+    Una recarga construye un motor nuevo fuera del cerrojo (lo costoso) y solo toma el cerrojo de
+    escritura para sustituir la referencia, de forma que las consultas en curso terminan con los datos
+    anteriores, las siguientes ven los nuevos de forma atómica y la recarga no espera a ninguna búsqueda.
+    """
+
+    def __init__(self, motor: MotorBusqueda):
+        self._motor = motor
+        self._cerrojo = CerrojoLectorEscritor()
+        self.version_datos = 1
+        self.instante_carga = time.time()
+        self._busquedas_en_curso = 0
+        self._cerrojo_busquedas = threading.Lock()
+
+    @property
+    def motor(self) -> MotorBusqueda:
+        return self._motor
+
+    def buscar(self, consulta: str, via_diccionario: bool = True, offset: int = 0, limite: Optional[int] = 100, relevancia: bool = False,
+               contar: bool = True) -> Dict[str, Any]:
+        """ Una página de resultados. Con `relevancia` (y un `limite`), las filas van de mayor a menor relevancia
+        y solo se seleccionan las `offset + limite` mejores; `total` sigue siendo el de todas las encontradas.
+        Con `contar=False` (y un `limite`) la búsqueda se detiene al reunir `offset + limite` filas: `total` es
+        None y `hay_mas` indica si puede haber más coincidencias. """
+        inicio = time.perf_counter()
+        offset = max(0, int(offset))
+        with self._cerrojo.lectura(): # El motor publicado no cambia: basta con leer la referencia y su versión juntas
+            motor = self._motor
+            version = self.version_datos
+        with self._cerrojo_busquedas:
+            self._busquedas_en_curso += 1
+        try:
+            hay_mas = None
+            if not contar and not relevancia and limite is not None:
+                resultado = motor.buscar_perezoso(consulta, via_diccionario, limite=offset + limite)
+                pagina = resultado.page(offset, limite) # Solo se materializan las filas de la página
+                origen, fcds, indices_fcds, mensaje_error = resultado.origen, resultado.fcds, resultado.indices_fcds, resultado.error
+                total, hay_mas = None, resultado.truncado
+            elif relevancia and limite is not None:
+                estadisticas = EstadisticasBusqueda()
+                resultados_df, origen, fcds, indices_fcds, mensaje_error = motor.buscar_relevantes(consulta, via_diccionario, offset + limite, estadisticas=estadisticas)
+                total = estadisticas.filas_resultado
+                pagina = resultados_df.iloc[offset: offset + limite] if resultados_df is not None else None
+            else:
+                resultados_df, origen, fcds, indices_fcds, mensaje_error = motor.buscar(consulta, via_diccionario)
+                total = int(len(resultados_df)) if resultados_df is not None else 0
+                pagina = resultados_df.iloc[offset: offset + limite] if (resultados_df is not None and limite is not None) else \
+                         (resultados_df.iloc[offset:] if resultados_df is not None else None)
+        finally:
+            with self._cerrojo_busquedas:
+                self._busquedas_en_curso -= 1
+        return {
+            "consulta": consulta,
+            "via_diccionario": via_diccionario,
+            "relevancia": relevancia,
+            "origen": origen.name,
+            "error": mensaje_error,
+            "total": total,
+            "hay_mas": hay_mas,
+            "offset": offset,
+            "limite": limite,
+            "columnas": [str(c) for c in pagina.columns] if pagina is not None else [],
+            "filas": df_a_registros(pagina),
+            "num_fcds": int(len(fcds)) if fcds is not None else 0,
+            "indices_fcds": [int(i) for i in indices_fcds] if indices_fcds else [],
+            "version_datos": version,
+            "ms": round((time.perf_counter() - inicio) * 1000, 3),
+        }
+
+    def recargar(self, ruta_diccionario: Optional[str] = None, ruta_descripciones: Optional[str] = None) -> Dict[str, Any]:
+        """ Carga los archivos indicados en un motor nuevo y lo publica atómicamente. """
+        if not ruta_diccionario and not ruta_descripciones:
+            return {"ok": False, "error": "Indique 'diccionario' y/o 'descripciones' a recargar."}
+
+        inicio = time.perf_counter()
+        motor_actual = self._motor
+        # Mismo registro de lentas y mismas métricas tras recargar (que cuentan la construcción de los índices nuevos)
+        motor_nuevo = motor_actual.motor_con_misma_configuracion()
+        motor_nuevo.compartir_datos_de(motor_actual, diccionario=not ruta_diccionario, descripcion=not ruta_descripciones)
+        if ruta_diccionario:
+            ok_dic, err_dic = motor_nuevo.cargar_excel_diccionario(ruta_diccionario)
+            if not ok_dic:
+                return {"ok": False, "error": f"Diccionario: {err_dic}"}
+        if ruta_descripciones:
+            ok_desc, err_desc = motor_nuevo.cargar_excel_descripcion(ruta_descripciones)
+            if not ok_desc:
+                return {"ok": False, "error": f"Descripciones: {err_desc}"}
+
+        with self._cerrojo.escritura(): # Solo el intercambio de referencias ocurre bajo el cerrojo exclusivo
+            self._motor = motor_nuevo
+            self.version_datos += 1
+            self.instante_carga = time.time()
+            version = self.version_datos
+        logger.info(f"Servicio: datos recargados (versión {version}) en {time.perf_counter() - inicio:.2f}s.")
+        return {"ok": True, "version_datos": version, "segundos": round(time.perf_counter() - inicio, 3)}
+
+    def estado(self) -> Dict[str, Any]:
+        with self._cerrojo.lectura():
+            motor = self._motor
+            version = self.version_datos
+        return {
+            "version_datos": version,
+            "instante_carga": self.instante_carga,
+            "diccionario": str(motor.archivo_diccionario_actual) if motor.archivo_diccionario_actual else None,
+            "filas_diccionario": int(len(motor.datos_diccionario)) if motor.datos_diccionario is not None else 0,
+            "descripciones": str(motor.archivo_descripcion_actual) if motor.archivo_descripcion_actual else None,
+            "filas_descripciones": int(len(motor.datos_descripcion)) if motor.datos_descripcion is not None else 0,
+            "busquedas_en_curso": self._busquedas_en_curso,
+            "memoria": {nombre: informe.a_dict() for nombre, informe in motor.informes_memoria.items()},
+        }
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/terminos.py
+
+import math
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+import numpy as np
+
+TIPOS_NUMERICOS = ("gt", "lt", "ge", "le", "range", "eq")
+
+# Tolerancias de np.isclose (rtol, atol), que el motor usaba para comparar números de celdas y consultas
+_TOLERANCIA_RELATIVA = 1e-05
+_TOLERANCIA_ABSOLUTA = 1e-08
+
+
+@lru_cache(maxsize=1024)
+def patron_variantes(variantes_por_palabra: Tuple[Tuple[str, ...], ...]) -> Pattern[str]:
+    """ Regex de palabra/frase completa en la que cada palabra puede ser cualquiera de sus variantes. """
+    partes = ["(?:" + "|".join(re.escape(variante) for variante in variantes) + ")" for variantes in variantes_por_palabra]
+    return re.compile(r"\b" + " ".join(partes) + r"\b")
+
+
+@lru_cache(maxsize=4096)
+def patron_palabra(valor_normalizado: str) -> Pattern[str]:
+    """ Regex compilada que busca `valor_normalizado` como palabra/frase completa (\\b...\\b). """
+    return re.compile(r"\b" + re.escape(valor_normalizado) + r"\b")
+
+
+class CotaNumerica:
+    """ Valor de comparación con su tolerancia precalculada: `cerca(x)` equivale a `np.isclose(x, valor)`. """
+
+    __slots__ = ("valor", "tolerancia")
+
+    def __init__(self, valor: float):
+        self.valor = valor
+        # Con un valor infinito np.isclose solo admite la igualdad exacta
+        self.tolerancia = _TOLERANCIA_ABSOLUTA + _TOLERANCIA_RELATIVA * abs(valor) if math.isfinite(valor) else 0.0
+
+    def cerca(self, x: float) -> bool:
+        return x == self.valor or abs(x - self.valor) <= self.tolerancia
+
+    def cerca_array(self, x: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore"): # inf - inf en las celdas cuando la cota es infinita
+            return (x == self.valor) | (np.abs(x - self.valor) <= self.tolerancia)
+
+
+class TerminoAnalizado:
+    """ Un término atómico de la consulta, con todo lo que necesita la evaluación calculado una sola vez.
+
+    `tipo` es "str" o un operador numérico (gt, lt, ge, le, eq, range). Para los de texto, `valor` es el
+    texto normalizado y `patron` su regex de palabra completa; para los numéricos, `valor` es el número
+    (o [mínimo, máximo] en rangos) y `cotas` las cotas con su tolerancia. `patron_original` es la regex del
+    texto original normalizado, usada para exigir el sinónimo en la celda cuando se aplica un filtro numérico.
+    `unidad_busqueda` es la forma canónica de la unidad en el diccionario; `unidad_base` y `factor_unidad`,
+    la unidad base a la que se reduce y su escala (">1KW": W y 1000), con las que se compara (ver `AlgebraUnidades`).
+    Los términos `difuso` (`~término`) admiten errores de escritura en cada palabra (ver `IndiceDifuso`).
+    """
+
+    __slots__ = ("original", "tipo", "valor", "unidad_busqueda", "unidad_base", "factor_unidad", "es_frase", "valor_normalizado_original",
+                 "patron", "patron_original", "tokens", "cotas", "es_subconsulta_or", "difuso")
+
+    def __init__(self, original: str, tipo: str, valor: Any, valor_normalizado_original: str,
+                 unidad_busqueda: Optional[str] = None, es_frase: bool = False, difuso: bool = False,
+                 unidad_base: Optional[str] = None, factor_unidad: float = 1.0):
+        self.original = original
+        self.tipo = tipo
+        self.valor = valor
+        self.unidad_busqueda = unidad_busqueda
+        self.unidad_base = unidad_base
+        self.factor_unidad = factor_unidad
+        self.es_frase = es_frase
+        self.valor_normalizado_original = valor_normalizado_original
+        self.difuso = difuso
+        self.patron_original = patron_palabra(valor_normalizado_original)
+        if tipo == "str":
+            self.patron = patron_palabra(valor)
+            self.tokens: Tuple[str, ...] = tuple(sys.intern(token) for token in valor.split())
+            self.cotas: Tuple[CotaNumerica, ...] = ()
+        else:
+            self.patron = None
+            self.tokens = ()
+            self.cotas = tuple(CotaNumerica(v) for v in valor) if tipo == "range" else (CotaNumerica(valor),)
+        # "(A|B)" dentro de un segmento AND se evalúa como subconsulta OR
+        self.es_subconsulta_or = tipo == "str" and "|" in original and original.startswith("(") and original.endswith(")")
+
+    @property
+    def es_numerico(self) -> bool:
+        return self.tipo in TIPOS_NUMERICOS
+
+    def cumple(self, numero: float) -> bool:
+        """ True si `numero` satisface la comparación numérica del término (con la tolerancia de np.isclose). """
+        tipo = self.tipo
+        cota = self.cotas[0]
+        if tipo == "eq":
+            return cota.cerca(numero)
+        if tipo == "gt":
+            return numero > cota.valor and not cota.cerca(numero)
+        if tipo == "lt":
+            return numero < cota.valor and not cota.cerca(numero)
+        if tipo == "ge":
+            return numero >= cota.valor or cota.cerca(numero)
+        if tipo == "le":
+            return numero <= cota.valor or cota.cerca(numero)
+        if tipo == "range":
+            cota_max = self.cotas[1]
+            return (cota.valor <= numero or cota.cerca(numero)) and (numero <= cota_max.valor or cota_max.cerca(numero))
+        return False
+
+    def cumple_array(self, numeros: np.ndarray, factor: float = 1.0) -> np.ndarray:
+        """ `cumple` vectorizado sobre un array de números, con las cotas multiplicadas por `factor` (cambio de unidad). """
+        cotas = self.cotas if factor == 1.0 else tuple(CotaNumerica(cota.valor * factor) for cota in self.cotas)
+        tipo = self.tipo
+        cota = cotas[0]
+        if tipo == "eq":
+            return cota.cerca_array(numeros)
+        if tipo == "gt":
+            return (numeros > cota.valor) & ~cota.cerca_array(numeros)
+        if tipo == "lt":
+            return (numeros < cota.valor) & ~cota.cerca_array(numeros)
+        if tipo == "ge":
+            return (numeros >= cota.valor) | cota.cerca_array(numeros)
+        if tipo == "le":
+            return (numeros <= cota.valor) | cota.cerca_array(numeros)
+        if tipo == "range":
+            cota_max = cotas[1]
+            return ((cota.valor <= numeros) | cota.cerca_array(numeros)) & ((numeros <= cota_max.valor) | cota_max.cerca_array(numeros))
+        return np.zeros(len(numeros), dtype=bool)
+
+    def a_dict(self) -> Dict[str, Any]:
+        """ Forma serializable (la misma que el antiguo dict por término): original, tipo, valor y unidad. """
+        datos: Dict[str, Any] = {"original": self.original, "tipo": self.tipo, "valor": self.valor}
+        if self.es_numerico:
+            datos["unidad_busqueda"] = self.unidad_busqueda
+            if self.unidad_base is not None and (self.unidad_base != self.unidad_busqueda or self.factor_unidad != 1.0):
+                datos["unidad_base"] = self.unidad_base
+                datos["factor_unidad"] = self.factor_unidad
+        if self.difuso:
+            datos["difuso"] = True
+        return datos
+
+    def __repr__(self) -> str:
+        return repr(self.a_dict())
+
+
+class PlanSegmento:
+    """ Un segmento OR de la consulta positiva: sus partes AND ya analizadas. """
+
+    __slots__ = ("texto", "terminos")
+
+    def __init__(self, texto: str, terminos: List[TerminoAnalizado]):
+        self.texto = texto
+        self.terminos = terminos
+
+
+class PlanConsulta:
+    """ Consulta positiva descompuesta: operador de nivel 1 ("OR"/"AND") y sus segmentos analizados. """
+
+    __slots__ = ("operador", "segmentos")
+
+    def __init__(self, operador: str, segmentos: List[PlanSegmento]):
+        self.operador = operador
+        self.segmentos = segmentos
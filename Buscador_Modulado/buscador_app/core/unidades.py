@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# buscador_app/core/unidades.py
+
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..utils import ExtractorMagnitud
+
+logger = logging.getLogger(__name__)
+
+# Prefijos escritos como palabra delante de una unidad (sobre el texto normalizado, en mayúsculas): no son ambiguos
+# y valen delante de cualquier unidad conocida (KILOVATIO, MILIMETRO). Las filas "DECA = 10" del diccionario añaden más.
+PREFIJOS_PREDEFINIDOS: Dict[str, float] = {
+    "GIGA": 1e9, "MEGA": 1e6, "KILO": 1e3, "CENTI": 1e-2, "MILI": 1e-3, "MICRO": 1e-6, "NANO": 1e-9,
+}
+_MILI, _MEGA = 1e-3, 1e6
+# Símbolos de unidad (SI y habituales en catálogos) y los prefijos de una letra que admite cada uno. Solo se parte
+# un texto en prefijo de una letra + resto si el resto es uno de estos símbolos (o un sinónimo suyo en el diccionario)
+# y el prefijo está en su lista: así CV (caballos), NM (newton metro) o palabras como CATE no se toman por unidades
+# con prefijo, y "M" es mili o mega según la unidad (MM, MA frente a MHZ, MW).
+PREFIJOS_POR_UNIDAD: Dict[str, Dict[str, float]] = {
+    "M": {"K": 1e3, "C": 1e-2, "M": _MILI, "U": 1e-6},
+    "G": {"K": 1e3, "M": _MILI},
+    "L": {"C": 1e-2, "M": _MILI},
+    "S": {"M": _MILI, "U": 1e-6},
+    "V": {"K": 1e3, "M": _MILI},
+    "A": {"K": 1e3, "M": _MILI, "U": 1e-6},
+    "AH": {"M": _MILI},
+    "W": {"K": 1e3, "M": _MEGA, "G": 1e9},
+    "WH": {"K": 1e3, "M": _MEGA, "G": 1e9},
+    "VA": {"K": 1e3, "M": _MEGA},
+    "VAR": {"K": 1e3, "M": _MEGA},
+    "HZ": {"K": 1e3, "M": _MEGA, "G": 1e9},
+    "OHM": {"K": 1e3, "M": _MEGA},
+    "F": {"U": 1e-6, "N": 1e-9},
+    "N": {"K": 1e3},
+    "J": {"K": 1e3, "M": _MEGA},
+    "PA": {"K": 1e3, "M": _MEGA},
+    "BAR": {"M": _MILI},
+    "CAL": {"K": 1e3},
+    "B": {"K": 1e3, "M": _MEGA, "G": 1e9},
+}
+
+# Equivalencia declarada en una columna de información del diccionario: "KW = 1000 W" (unidad) o "DECA = 10" (prefijo).
+# No empieza por "=" para que Excel no la tome por una fórmula.
+PATRON_EQUIVALENCIA = re.compile(r"^\s*([^\s=\d][^\s=]*)\s*=\s*(\d+(?:[.,]\d+)?(?:[eE][-+]?\d+)?)\s*([^\s\d].*?)?\s*$")
+
+
+def parsear_equivalencia(texto: str) -> Optional[Tuple[str, float, Optional[str]]]:
+    """ (unidad, factor, unidad destino) de "KW = 1000 W", (prefijo, factor, None) de "DECA = 10", o None. """
+    coincidencia = PATRON_EQUIVALENCIA.match(texto) if isinstance(texto, str) else None
+    if not coincidencia:
+        return None
+    factor = float(coincidencia.group(2).replace(",", "."))
+    if factor <= 0:
+        return None
+    return coincidencia.group(1), factor, coincidencia.group(3) or None
+
+
+class AlgebraUnidades:
+    """ Reduce una unidad a su unidad base y factor de escala: KW -> (W, 1000), CM -> (M, 0.01).
+
+    Las unidades se reconocen con los sinónimos del `ExtractorMagnitud` y cada forma canónica se
+    resuelve, por orden: con la equivalencia declarada en el diccionario ("KW = 1000 W"); como base de sí
+    misma si es (o tiene como sinónimo) un símbolo de `PREFIJOS_POR_UNIDAD`; como prefijo + unidad; o
+    como base de sí misma. Un prefijo escrito como palabra (KILO, o uno declarado "DECA = 10") vale
+    delante de cualquier unidad; uno de una letra, solo delante de un símbolo que lo admita (KW, MHZ,
+    pero no CV ni NM). Las formas canónicas que no son unidades (la mayoría de FCDs) no se parten nunca.
+    """
+
+    def __init__(self, extractor: ExtractorMagnitud, equivalencias: Optional[Dict[str, Tuple[float, Optional[str]]]] = None,
+                 prefijos: Optional[Dict[str, float]] = None):
+        normalizar = ExtractorMagnitud._normalizar_texto
+        self._canonica_de = extractor.sinonimo_a_canonico_normalizado
+        self.prefijos: Dict[str, float] = {normalizar(p): f for p, f in (PREFIJOS_PREDEFINIDOS if prefijos is None else prefijos).items()}
+        self.prefijos_por_unidad: Dict[str, Dict[str, float]] = {}
+        for simbolo, admitidos in PREFIJOS_POR_UNIDAD.items():
+            self.prefijos_por_unidad[simbolo] = dict(admitidos)
+            if "U" in admitidos: # µ, tal como queda al normalizar
+                self.prefijos_por_unidad[simbolo][normalizar("µ")] = admitidos["U"]
+        self.equivalencias: Dict[str, Tuple[float, str]] = {} # Forma canónica (o nombre declarado) -> (factor, unidad destino normalizada)
+        for nombre, (factor, destino) in (equivalencias or {}).items():
+            nombre_norm = normalizar(nombre)
+            if not nombre_norm:
+                continue
+            if destino:
+                self.equivalencias[self._canonica_de.get(nombre_norm, nombre_norm)] = (factor, normalizar(destino))
+            else: # Sin unidad destino: la fila declara un prefijo
+                self.prefijos[nombre_norm] = factor
+        self._prefijos_ordenados: List[str] = sorted(self.prefijos, key=len, reverse=True) # El más largo primero (MEGA antes que DECA si se solapan)
+        # Símbolo de cada forma canónica que es una unidad conocida: ella misma o un sinónimo (VOLTIO con el sinónimo V)
+        self._simbolo_de: Dict[str, str] = {}
+        for forma, canonica in self._canonica_de.items():
+            if forma in self.prefijos_por_unidad and (canonica not in self._simbolo_de or forma == canonica):
+                self._simbolo_de[canonica] = forma
+
+        self._por_canonica: Dict[str, Tuple[str, float]] = {}
+        for canonica in set(self._canonica_de.values()) | set(self.equivalencias):
+            self._por_canonica[canonica] = self._resolver_canonica(canonica, set())
+        # Bases a las que se reduce alguna unidad del diccionario (p. ej. "M" por MM): un texto fuera del
+        # diccionario solo se reconoce como unidad si se reduce a una de ellas
+        self._bases: Set[str] = {base for base, _factor in self._por_canonica.values()}
+        self._resueltas: Dict[str, Optional[Tuple[str, float]]] = {} # Por texto normalizado
+        self._resueltas_por_texto: Dict[str, Optional[Tuple[str, float]]] = {} # Por texto tal cual: una consulta al diccionario
+        convertidas = sum(1 for canonica, (base, factor) in self._por_canonica.items() if base != canonica or factor != 1.0)
+        logger.debug(f"Álgebra de unidades: {len(self._por_canonica)} formas canónicas ({convertidas} con escala), "
+                     f"{len(self.prefijos)} prefijos, {len(self.equivalencias)} equivalencias declaradas.")
+
+    def _canonica(self, normalizada: str) -> Optional[str]:
+        """ Forma canónica de una unidad normalizada: la del diccionario o la propia si solo se declaró su equivalencia. """
+        return self._canonica_de.get(normalizada, normalizada if normalizada in self.equivalencias else None)
+
+    def _simbolo(self, normalizada: str) -> Optional[str]:
+        """ Símbolo de `PREFIJOS_POR_UNIDAD` que denota `normalizada` (directamente o como sinónimo en el diccionario). """
+        canonica = self._canonica_de.get(normalizada)
+        if canonica is not None and canonica in self._simbolo_de:
+            return self._simbolo_de[canonica]
+        return normalizada if normalizada in self.prefijos_por_unidad else None
+
+    def _unidad(self, normalizada: str, visitadas: Set[str]) -> Optional[Tuple[str, float]]:
+        """ (base, factor) de `normalizada` si es una unidad conocida: un símbolo, un sinónimo suyo o una unidad
+        con equivalencia declarada. None para cualquier otra palabra. """
+        canonica = self._canonica(normalizada)
+        if canonica is not None and (canonica in self._simbolo_de or canonica in self.equivalencias):
+            return self._por_canonica.get(canonica) or self._resolver_canonica(canonica, visitadas)
+        if canonica is None and normalizada in self.prefijos_por_unidad:
+            return normalizada, 1.0
+        return None
+
+    def _partir_prefijo(self, normalizada: str, visitadas: Set[str]) -> Optional[Tuple[str, float]]:
+        """ (base, factor) de `normalizada` como prefijo + unidad conocida, o None si no se puede partir así. """
+        if " " in normalizada:
+            return None
+        for prefijo in self._prefijos_ordenados:
+            if normalizada.startswith(prefijo) and len(normalizada) > len(prefijo):
+                unidad = self._unidad(normalizada[len(prefijo):], visitadas)
+                if unidad is not None:
+                    return unidad[0], self.prefijos[prefijo] * unidad[1]
+        prefijo, resto = normalizada[:1], normalizada[1:]
+        simbolo = self._simbolo(resto) if resto else None
+        if simbolo is not None and prefijo in self.prefijos_por_unidad[simbolo]:
+            unidad = self._unidad(resto, visitadas)
+            if unidad is not None:
+                return unidad[0], self.prefijos_por_unidad[simbolo][prefijo] * unidad[1]
+        return None
+
+    def _resolver_canonica(self, canonica: str, visitadas: Set[str]) -> Tuple[str, float]:
+        if canonica in self._por_canonica:
+            return self._por_canonica[canonica]
+        if canonica in visitadas:
+            logger.warning(f"Equivalencias de unidades circulares en '{canonica}': se toma como unidad base.")
+            return canonica, 1.0
+        visitadas.add(canonica)
+
+        equivalencia = self.equivalencias.get(canonica)
+        if equivalencia is not None:
+            factor, destino = equivalencia
+            canonica_destino = self._canonica(destino)
+            if canonica_destino is None: # Destino fuera del diccionario: es una base
+                return destino, factor
+            base, factor_destino = self._resolver_canonica(canonica_destino, visitadas)
+            return base, factor * factor_destino
+        if canonica in self._simbolo_de: # Una unidad sin prefijo (V, o VOLTIO con el sinónimo V)
+            return canonica, 1.0
+        return self._partir_prefijo(canonica, visitadas) or (canonica, 1.0)
+
+    def resolver(self, texto_unidad: str) -> Optional[Tuple[str, float]]:
+        """ (unidad base, factor) de `texto_unidad`, o None si no se reconoce como unidad. """
+        try:
+            return self._resueltas_por_texto[texto_unidad]
+        except KeyError:
+            pass
+        resultado = self._resolver_normalizada(ExtractorMagnitud._normalizar_texto(texto_unidad))
+        self._resueltas_por_texto[texto_unidad] = resultado # Lo escriben varios hilos, pero siempre con el mismo valor
+        return resultado
+
+    def _resolver_normalizada(self, normalizada: str) -> Optional[Tuple[str, float]]:
+        if not normalizada:
+            return None
+        try:
+            return self._resueltas[normalizada]
+        except KeyError:
+            pass
+        canonica = self._canonica(normalizada)
+        resultado: Optional[Tuple[str, float]] = None
+        if canonica is not None:
+            resultado = self._por_canonica[canonica]
+        elif normalizada in self._bases:
+            resultado = (normalizada, 1.0)
+        else:
+            partida = self._partir_prefijo(normalizada, set())
+            if partida is not None and partida[0] in self._bases:
+                resultado = partida
+        self._resueltas[normalizada] = resultado
+        return resultado
@@ -1,28 +1,41 @@
 # -*- coding: utf-8 -*-
 # buscador_app/gui/interfaz_grafica.py
 
+from __future__ import annotations # Las anotaciones con pd.* no deben forzar la importación de pandas
+
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from typing import Optional, List, Dict, Any, Union
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from typing import Optional, List, Dict, Any, Union, Tuple, TYPE_CHECKING
 import platform
+import re
 import json
 import os
 from pathlib import Path
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor, Future
 
 # Importaciones de otros módulos del paquete buscador_app
-from ..core.motor_busqueda import MotorBusqueda # Importación relativa
 from ..enums import OrigenResultados # Importación relativa
+from ..arranque import ModuloPerezoso, MedidorArranque
+from ..core.estadisticas import EstadisticasBusqueda # Ligero: no importa pandas
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ..core.motor_busqueda import MotorBusqueda
+    from ..core.reglas import AlmacenReglas, ReglaGuardada
+else:
+    # pandas (y el motor, que lo usa) se importan después de mostrar la ventana
+    pd = ModuloPerezoso("pandas")
 
 logger = logging.getLogger(__name__)
 
 class InterfazGrafica(tk.Tk):
     CONFIG_FILE_NAME = "config_buscador_avanzado_ui.json" # Nombre del archivo de configuración
 
-    def __init__(self):
+    def __init__(self, medidor_arranque: Optional[MedidorArranque] = None):
         super().__init__()
+        self.medidor_arranque = medidor_arranque or MedidorArranque(activo=False)
         self.title("Buscador Avanzado v1.10.3 Mod (Modularizado)") 
         self.geometry("1250x800") # Tamaño inicial de la ventana
 
@@ -30,21 +43,47 @@ class InterfazGrafica(tk.Tk):
         self.config: Dict[str, Any] = self._cargar_configuracion_app()
         indices_cfg_preview_dic = self.config.get("indices_columnas_busqueda_dic_preview", [])
         
-        # Inicializar el motor de búsqueda
-        self.motor = MotorBusqueda(indices_diccionario_cfg=indices_cfg_preview_dic)
-
-        # Variables de estado de la UI
-        self.resultados_actuales: Optional[pd.DataFrame] = None
+        # El motor de búsqueda (pandas, numpy...) se importa en segundo plano con la ventana ya visible
+        self.motor: Optional[MotorBusqueda] = None
+        self._indices_cfg_preview_dic = indices_cfg_preview_dic
+        self._ejecutor_arranque = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arranque_motor")
+        self._futuro_motor: Optional[Future] = None
+
+        # Variables de estado de la UI. Los resultados se guardan como ids de fila de las descripciones
+        # cargadas (ver la propiedad `resultados_actuales`), no como copias de las filas.
+        self.ids_resultados_actuales: Optional[pd.Index] = None
         self.texto_busqueda_var = tk.StringVar(self)
         self.texto_busqueda_var.trace_add("write", self._on_texto_busqueda_change) # Actualizar botones al escribir
         self.ultimo_termino_buscado: Optional[str] = None
-        self.reglas_guardadas: List[Dict[str, Any]] = [] # Para la funcionalidad "Salvar Regla"
+        # Reglas guardadas en disco con su resultado; se crean al arrancar el motor y se sincronizan con cada carga
+        self.almacen_reglas: Optional[AlmacenReglas] = None
+        self._ejecutor_reglas: Optional[ThreadPoolExecutor] = None
+        self._futuro_reglas: Optional[Future] = None
+        self._futuro_guardado_regla: Optional[Future] = None # "Salvar Regla" en curso (en el mismo hilo de fondo)
 
         # Datos de la última búsqueda para la UI y "Salvar Regla"
         self.fcds_de_ultima_busqueda: Optional[pd.DataFrame] = None
-        self.desc_finales_de_ultima_busqueda: Optional[pd.DataFrame] = None
+        self.ids_desc_finales_de_ultima_busqueda: Optional[pd.Index] = None
         self.indices_fcds_resaltados: Optional[List[int]] = None
         self.origen_principal_resultados: OrigenResultados = OrigenResultados.NINGUNO
+        self.estadisticas_ultima_busqueda: Optional[EstadisticasBusqueda] = None
+        self._perfiles_mostrados = 0 # Perfiles del perfilador del motor ya enseñados al usuario
+
+        # Búsqueda mientras se escribe (opcional): una búsqueda en segundo plano tras cada pausa al teclear.
+        # El historial guarda los ids de resultado de las últimas consultas en vivo para refinarlas.
+        self.busqueda_en_vivo_var = tk.BooleanVar(self, value=bool(self.config.get("busqueda_en_vivo", False)))
+        self._ejecutor_en_vivo: Optional[ThreadPoolExecutor] = None
+        self._futuro_en_vivo: Optional[Future] = None
+        self._id_programado_en_vivo: Optional[str] = None
+        self._generacion_en_vivo = 0 # Aumenta con cada cambio de texto: descarta los resultados obsoletos
+        self._en_vivo_pendiente = False # Texto cambiado mientras corría otra búsqueda en vivo
+        self._historial_en_vivo: List[Tuple[str, pd.Index]] = []
+
+        # Autocompletado: lista desplegable bajo la entrada con términos del diccionario
+        self._ventana_sugerencias: Optional[tk.Toplevel] = None
+        self.lista_sugerencias: Optional[tk.Listbox] = None
+        self._inicio_fragmento_sugerido = 0 # Posición del texto donde empieza el término que se está completando
+        self._aplicando_sugerencia = False
 
         # Colores para las tablas Treeview
         self.color_fila_par: str = "white"
@@ -53,8 +92,17 @@ class InterfazGrafica(tk.Tk):
 
         self.op_buttons: Dict[str, ttk.Button] = {} # Diccionario para botones de operadores
 
+        # Modo relevancia: la tabla muestra solo las mejores filas (BM25), no todas en el orden del archivo
+        self.modo_relevancia_var = tk.BooleanVar(self, value=bool(self.config.get("modo_relevancia", False)))
+
+        # Carga en segundo plano de los archivos de la última sesión
+        self.restaurar_sesion_var = tk.BooleanVar(self, value=bool(self.config.get("restaurar_ultima_sesion", False)))
+        self._ejecutor_cargas: Optional[ThreadPoolExecutor] = None
+        self._cargas_pendientes: Dict[str, Tuple[Path, Future]] = {} # tipo -> (ruta, futuro)
+
         # Configuración inicial de la UI
         self._configurar_estilo_ttk_app()
+        self._crear_menu_app()
         self._crear_widgets_app()
         self._configurar_grid_layout_app()
         self._configurar_eventos_globales_app()
@@ -62,11 +110,80 @@ class InterfazGrafica(tk.Tk):
         self._configurar_funcionalidad_orden_tabla(self.tabla_resultados)
         self._configurar_funcionalidad_orden_tabla(self.tabla_diccionario)
 
-        self._actualizar_mensaje_barra_estado("Listo. Cargue Diccionario y Descripciones.")
         self._deshabilitar_botones_operadores() # Deshabilitar al inicio
         self._actualizar_estado_general_botones_y_controles() # Actualizar estado inicial de botones
         
         logger.info(f"Interfaz Gráfica (v1.10.3 Modularizada) inicializada.")
+        self.medidor_arranque.marcar("ventana_construida")
+        self.after_idle(lambda: self.medidor_arranque.marcar("ventana_visible"))
+
+        # Importar los módulos pesados sin bloquear la ventana
+        self.btn_cargar_diccionario["state"] = "disabled"
+        self.btn_cargar_descripciones["state"] = "disabled"
+        self._actualizar_mensaje_barra_estado("Iniciando motor de búsqueda...")
+        self._futuro_motor = self._ejecutor_arranque.submit(self._importar_clase_motor)
+        self.after(50, self._sondear_carga_motor)
+
+    @property
+    def resultados_actuales(self) -> Optional[pd.DataFrame]:
+        """ Filas de los resultados actuales, seleccionadas de las descripciones cargadas a partir de sus ids. """
+        if self.ids_resultados_actuales is None:
+            return None
+        datos = self.motor.datos_descripcion if self.motor is not None else None
+        if datos is None:
+            return pd.DataFrame()
+        try:
+            return datos.loc[self.ids_resultados_actuales]
+        except KeyError: # Ids de unas descripciones ya reemplazadas
+            logger.warning("Los resultados actuales no corresponden a las descripciones cargadas; se descartan.")
+            self.ids_resultados_actuales = None
+            return None
+
+    @resultados_actuales.setter
+    def resultados_actuales(self, df: Optional[pd.DataFrame]):
+        self.ids_resultados_actuales = None if df is None else df.index
+
+    def _hay_resultados_actuales(self) -> bool:
+        return self.ids_resultados_actuales is not None and len(self.ids_resultados_actuales) > 0
+
+    @staticmethod
+    def _importar_clase_motor():
+        """ Importa el módulo del motor (y con él pandas/numpy). Se ejecuta en un hilo de fondo. """
+        from ..core.motor_busqueda import MotorBusqueda
+        return MotorBusqueda
+
+    def _sondear_carga_motor(self):
+        """ Crea el motor en el hilo de Tk cuando termina la importación en segundo plano. """
+        if self._futuro_motor is None or not self._futuro_motor.done():
+            self.after(50, self._sondear_carga_motor)
+            return
+        try:
+            clase_motor = self._futuro_motor.result()
+        except Exception as e_import:
+            logger.critical("No se pudo importar el motor de búsqueda.", exc_info=True)
+            messagebox.showerror("Error Fatal", f"No se pudo iniciar el motor de búsqueda:\n{e_import}")
+            self._actualizar_mensaje_barra_estado("Error al iniciar el motor de búsqueda. Consulte el log.")
+            return
+        finally:
+            self._ejecutor_arranque.shutdown(wait=False)
+
+        self.motor = clase_motor(indices_diccionario_cfg=self._indices_cfg_preview_dic)
+        self.motor.configurar_registro_consultas_lentas(self.config.get("registro_consultas_lentas"), self.config.get("umbral_consultas_lentas_ms"))
+        self.motor.configurar_memoria(self.config.get("memoria_compacta", False), self.config.get("columnas_visibles_descripcion"))
+        from ..core.reglas import AlmacenReglas # pandas ya está importado
+        try:
+            self.almacen_reglas = AlmacenReglas(self.config.get("archivo_reglas") or "reglas_buscador.json")
+        except (OSError, ValueError) as e_reglas:
+            logger.error(f"No se pudieron leer las reglas guardadas: {e_reglas}")
+        self.medidor_arranque.marcar("motor_listo")
+        self.btn_cargar_diccionario["state"] = "normal"
+        self.btn_cargar_descripciones["state"] = "normal"
+        self._actualizar_mensaje_barra_estado("Listo. Cargue Diccionario y Descripciones.")
+        self._actualizar_estado_general_botones_y_controles()
+
+        # Restaurar la última sesión una vez la ventana ya es visible
+        if self.restaurar_sesion_var.get():
+            self.after(100, lambda: self._try_except_wrapper(self._restaurar_ultima_sesion_ui))
 
     def _try_except_wrapper(self, func, *args, **kwargs):
         """ Wrapper para capturar excepciones en funciones de UI y loggearlas. """
@@ -94,6 +211,181 @@ class InterfazGrafica(tk.Tk):
     def _on_texto_busqueda_change(self, var_name: str, index: str, mode: str):
         """ Se llama cada vez que el texto en la entrada de búsqueda cambia. """
         self._actualizar_estado_botones_operadores()
+        if not self._aplicando_sugerencia:
+            self._actualizar_sugerencias()
+        if self.busqueda_en_vivo_var.get():
+            self._programar_busqueda_en_vivo()
+
+    def _fragmento_a_completar(self) -> Tuple[int, str]:
+        """ Término que se está escribiendo: desde el último operador (+ | # paréntesis) hasta el cursor. """
+        texto_antes_cursor = self.texto_busqueda_var.get()[:self.entrada_busqueda.index(tk.INSERT)]
+        match_fragmento = re.search(r"[^+|#()~\"]*$", texto_antes_cursor)
+        fragmento = match_fragmento.group(0).lstrip()
+        return len(texto_antes_cursor) - len(fragmento), fragmento
+
+    def _actualizar_sugerencias(self):
+        """ Muestra (u oculta) la lista de términos del diccionario que completan el término en curso. """
+        if self.motor is None or not self.config.get("autocompletado", True):
+            self._ocultar_sugerencias()
+            return
+        inicio_fragmento, fragmento = self._fragmento_a_completar()
+        # Comparaciones y rangos numéricos (">10", "5-10V") no se completan
+        if not fragmento.strip() or fragmento.lstrip()[0] in "<>=" or fragmento.lstrip()[0].isdigit():
+            self._ocultar_sugerencias()
+            return
+        sugerencias = self.motor.sugerir_terminos(fragmento, int(self.config.get("max_sugerencias", 10)))
+        if not sugerencias or sugerencias == [self.motor._normalizar_para_busqueda(fragmento)]:
+            self._ocultar_sugerencias()
+            return
+
+        self._inicio_fragmento_sugerido = inicio_fragmento
+        if self._ventana_sugerencias is None:
+            self._ventana_sugerencias = tk.Toplevel(self)
+            self._ventana_sugerencias.overrideredirect(True) # Sin bordes ni barra de título
+            self.lista_sugerencias = tk.Listbox(self._ventana_sugerencias, activestyle="dotbox", exportselection=False)
+            self.lista_sugerencias.pack(fill="both", expand=True)
+            self.lista_sugerencias.bind("<Return>", lambda event: self._aplicar_sugerencia())
+            self.lista_sugerencias.bind("<Double-Button-1>", lambda event: self._aplicar_sugerencia())
+            self.lista_sugerencias.bind("<Escape>", lambda event: self._ocultar_sugerencias(devolver_foco=True))
+            self.lista_sugerencias.bind("<FocusOut>", lambda event: self.after(100, self._ocultar_sugerencias_sin_foco))
+        self.lista_sugerencias.delete(0, tk.END)
+        for sugerencia in sugerencias:
+            self.lista_sugerencias.insert(tk.END, sugerencia)
+        self.lista_sugerencias.config(height=len(sugerencias))
+        x = self.entrada_busqueda.winfo_rootx()
+        y = self.entrada_busqueda.winfo_rooty() + self.entrada_busqueda.winfo_height()
+        self._ventana_sugerencias.geometry(f"{self.entrada_busqueda.winfo_width()}x{self.lista_sugerencias.winfo_reqheight()}+{x}+{y}")
+        self._ventana_sugerencias.deiconify()
+        self._ventana_sugerencias.lift()
+
+    def _ocultar_sugerencias(self, devolver_foco: bool = False):
+        if self._ventana_sugerencias is not None:
+            self._ventana_sugerencias.withdraw()
+        if devolver_foco:
+            self.entrada_busqueda.focus_set()
+
+    def _ocultar_sugerencias_sin_foco(self):
+        """ Oculta la lista si el foco ya no está ni en la entrada ni en la lista. """
+        if self.focus_get() not in (self.entrada_busqueda, self.lista_sugerencias):
+            self._ocultar_sugerencias()
+
+    def _hay_sugerencias_visibles(self) -> bool:
+        return self._ventana_sugerencias is not None and self._ventana_sugerencias.winfo_viewable()
+
+    def _enfocar_sugerencias(self):
+        """ Flecha abajo en la entrada: pasa a la lista de sugerencias. """
+        if not self._hay_sugerencias_visibles():
+            return
+        self.lista_sugerencias.focus_set()
+        self.lista_sugerencias.selection_clear(0, tk.END)
+        self.lista_sugerencias.selection_set(0)
+        self.lista_sugerencias.activate(0)
+
+    def _aplicar_sugerencia(self):
+        """ Sustituye el término en curso por la sugerencia elegida. """
+        seleccion = self.lista_sugerencias.curselection()
+        if not seleccion:
+            return
+        sugerencia = self.lista_sugerencias.get(seleccion[0])
+        texto_actual = self.texto_busqueda_var.get()
+        posicion_cursor = self.entrada_busqueda.index(tk.INSERT)
+        texto_nuevo = texto_actual[:self._inicio_fragmento_sugerido] + sugerencia + texto_actual[posicion_cursor:]
+        self._aplicando_sugerencia = True
+        try:
+            self.texto_busqueda_var.set(texto_nuevo)
+        finally:
+            self._aplicando_sugerencia = False
+        self.entrada_busqueda.icursor(self._inicio_fragmento_sugerido + len(sugerencia))
+        self._ocultar_sugerencias(devolver_foco=True)
+
+    def _on_cambio_busqueda_en_vivo(self):
+        """ Activa/desactiva la búsqueda mientras se escribe (opción del menú). """
+        self._guardar_configuracion_app()
+        if self.busqueda_en_vivo_var.get():
+            self._programar_busqueda_en_vivo()
+        else:
+            self._cancelar_busqueda_en_vivo()
+
+    def _cancelar_busqueda_en_vivo(self):
+        """ Anula la búsqueda en vivo programada; la que esté en curso se ignorará al terminar. """
+        if self._id_programado_en_vivo is not None:
+            self.after_cancel(self._id_programado_en_vivo)
+            self._id_programado_en_vivo = None
+        self._generacion_en_vivo += 1
+        self._en_vivo_pendiente = False
+
+    def _programar_busqueda_en_vivo(self):
+        """ Reinicia la espera: la búsqueda se lanza cuando se deja de teclear durante el retardo configurado. """
+        self._cancelar_busqueda_en_vivo()
+        retardo_ms = int(self.config.get("retardo_busqueda_en_vivo_ms", 150))
+        self._id_programado_en_vivo = self.after(retardo_ms, self._lanzar_busqueda_en_vivo)
+
+    def _lanzar_busqueda_en_vivo(self):
+        """ Lanza en segundo plano la búsqueda del texto actual, refinando un resultado previo si es posible. """
+        self._id_programado_en_vivo = None
+        if self.motor is None or self._cargas_pendientes or self.motor.datos_diccionario is None or self.motor.datos_descripcion is None:
+            return
+        if self._futuro_en_vivo is not None and not self._futuro_en_vivo.done():
+            self._en_vivo_pendiente = True # Se relanzará al terminar la búsqueda en curso
+            return
+        termino = self.texto_busqueda_var.get()
+        if not termino.strip():
+            return
+
+        # El resultado previo más reciente del que la consulta nueva es refinamiento (p. ej. se añadió "+ término" o "#neg")
+        consulta_previa, filas_candidatas = None, None
+        for consulta_historial, ids_historial in reversed(self._historial_en_vivo):
+            if self.motor.es_refinamiento(consulta_historial, termino, True):
+                consulta_previa, filas_candidatas = consulta_historial, ids_historial
+                break
+
+        if self._ejecutor_en_vivo is None:
+            self._ejecutor_en_vivo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="busqueda_en_vivo")
+        generacion = self._generacion_en_vivo
+        self._futuro_en_vivo = self._ejecutor_en_vivo.submit(self._buscar_en_vivo, self.motor, termino, filas_candidatas)
+        self.after(20, lambda: self._sondear_busqueda_en_vivo(generacion, termino, consulta_previa))
+
+    @staticmethod
+    def _buscar_en_vivo(motor: MotorBusqueda, termino: str, filas_candidatas: Optional[pd.Index]):
+        """ Búsqueda vía diccionario para el modo en vivo. Se ejecuta en el hilo de fondo y no se perfila. """
+        estadisticas = EstadisticasBusqueda()
+        with motor.sin_perfilar():
+            resultado = motor.buscar(termino, True, estadisticas, filas_candidatas=filas_candidatas)
+            if filas_candidatas is not None and resultado[0] is not None and resultado[0].empty:
+                # Sin filas, el flujo AND corta antes y el origen y los FCDs podrían diferir de la búsqueda completa
+                estadisticas = EstadisticasBusqueda()
+                resultado = motor.buscar(termino, True, estadisticas)
+                filas_candidatas = None
+        return resultado, estadisticas, filas_candidatas is not None
+
+    def _sondear_busqueda_en_vivo(self, generacion: int, termino: str, consulta_previa: Optional[str]):
+        """ Muestra, en el hilo de Tk, el recuento y los FCDs de la búsqueda en vivo cuando termina. """
+        if not self._futuro_en_vivo.done():
+            self.after(20, lambda: self._sondear_busqueda_en_vivo(generacion, termino, consulta_previa))
+            return
+        try:
+            (resultados_df, origen, fcds_df, indices_resaltar, msg_error), estadisticas, refinada = self._futuro_en_vivo.result()
+        except Exception:
+            logger.exception(f"Excepción en la búsqueda en vivo de '{termino}'.")
+            resultados_df, msg_error = None, "error interno"
+
+        if resultados_df is not None and msg_error is None and not resultados_df.empty:
+            self._historial_en_vivo = [(c, ids) for c, ids in self._historial_en_vivo if c != termino][-7:] + [(termino, resultados_df.index)]
+
+        if self._en_vivo_pendiente:
+            self._en_vivo_pendiente = False
+            self._lanzar_busqueda_en_vivo()
+        if generacion != self._generacion_en_vivo or not self.busqueda_en_vivo_var.get():
+            return # El texto cambió mientras se buscaba
+
+        if msg_error is not None or resultados_df is None:
+            self.barra_estado.config(text=f"En vivo: '{termino}' (consulta incompleta o no válida)")
+            return
+        self._mostrar_fcds_en_diccionario_ui(origen, indices_resaltar)
+        num_fcds = len(fcds_df) if fcds_df is not None else 0
+        detalle_refinado = f", refinando '{consulta_previa}'" if refinada else ""
+        self.barra_estado.config(text=f"En vivo: '{termino}' -> {len(resultados_df)} filas en Descripciones, {num_fcds} FCDs "
+                                      f"({estadisticas.segundos_total * 1000:.0f} ms{detalle_refinado}). Pulse Enter para ver los resultados.")
 
     def _cargar_configuracion_app(self) -> Dict[str, Any]:
         """ Carga la configuración de la aplicación desde un archivo JSON. """
@@ -117,15 +409,34 @@ class InterfazGrafica(tk.Tk):
         
         # Asegurar que la clave de índices para preview exista
         config_cargada.setdefault("indices_columnas_busqueda_dic_preview", []) # Por defecto, lista vacía
+        config_cargada.setdefault("restaurar_ultima_sesion", False) # Precargar los últimos archivos al iniciar
+        config_cargada.setdefault("registro_consultas_lentas", None) # Ruta del JSONL de consultas lentas (None = desactivado)
+        config_cargada.setdefault("umbral_consultas_lentas_ms", 500)
+        config_cargada.setdefault("directorio_perfiles", "perfiles_busqueda")
+        config_cargada.setdefault("modo_perfilador", "cprofile") # "cprofile" o "muestreo" (requiere pyinstrument)
+        config_cargada.setdefault("memoria_compacta", False) # Categóricas, cadenas Arrow y números reducidos al cargar
+        config_cargada.setdefault("columnas_visibles_descripcion", []) # Vacía = todas; con memoria compacta, el resto (no buscable) se lee bajo demanda
+        config_cargada.setdefault("busqueda_en_vivo", False) # Buscar en segundo plano mientras se escribe
+        config_cargada.setdefault("retardo_busqueda_en_vivo_ms", 150) # Pausa al teclear antes de lanzar la búsqueda en vivo
+        config_cargada.setdefault("autocompletado", True) # Lista de términos del diccionario bajo la entrada de búsqueda
+        config_cargada.setdefault("max_sugerencias", 10)
+        config_cargada.setdefault("archivo_reglas", "reglas_buscador.json") # Reglas guardadas (con un .npz al lado con sus filas)
         return config_cargada
 
     def _guardar_configuracion_app(self):
         """ Guarda la configuración actual de la aplicación en un archivo JSON. """
-        # Actualizar rutas de los últimos archivos cargados
-        self.config["last_dic_path"] = str(self.motor.archivo_diccionario_actual) if self.motor.archivo_diccionario_actual else None
-        self.config["last_desc_path"] = str(self.motor.archivo_descripcion_actual) if self.motor.archivo_descripcion_actual else None
-        # Guardar configuración de columnas de preview del diccionario
-        self.config["indices_columnas_busqueda_dic_preview"] = self.motor.indices_columnas_busqueda_dic_preview
+        if self.motor is not None: # Si el motor aún no ha arrancado, se conservan las rutas y columnas ya guardadas
+            # Actualizar rutas de los últimos archivos cargados (conservando las que aún se están restaurando)
+            for tipo_archivo, clave_ruta, ruta_motor in [("diccionario", "last_dic_path", self.motor.archivo_diccionario_actual),
+                                                         ("descripcion", "last_desc_path", self.motor.archivo_descripcion_actual)]:
+                if ruta_motor is None and tipo_archivo in self._cargas_pendientes:
+                    ruta_motor = self._cargas_pendientes[tipo_archivo][0]
+                self.config[clave_ruta] = str(ruta_motor) if ruta_motor else None
+            # Guardar configuración de columnas de preview del diccionario
+            self.config["indices_columnas_busqueda_dic_preview"] = self.motor.indices_columnas_busqueda_dic_preview
+        self.config["restaurar_ultima_sesion"] = bool(self.restaurar_sesion_var.get())
+        self.config["busqueda_en_vivo"] = bool(self.busqueda_en_vivo_var.get())
+        self.config["modo_relevancia"] = bool(self.modo_relevancia_var.get())
 
         try:
             with open(self.CONFIG_FILE_NAME, "w", encoding="utf-8") as f:
@@ -165,6 +476,36 @@ class InterfazGrafica(tk.Tk):
             logger.warning(f"Fallo al aplicar tema TTK '{chosen_theme}'. Usando tema por defecto.")
             # No es necesario hacer nada más, Tkinter usará un tema por defecto.
 
+    def _crear_menu_app(self):
+        """ Crea la barra de menú con las opciones de la aplicación. """
+        self.barra_menu = tk.Menu(self)
+        self.menu_opciones = tk.Menu(self.barra_menu, tearoff=0)
+        self.menu_opciones.add_checkbutton(
+            label="Restaurar última sesión al iniciar", variable=self.restaurar_sesion_var,
+            command=self._guardar_configuracion_app
+        )
+        self.menu_opciones.add_checkbutton(
+            label="Buscar mientras se escribe", variable=self.busqueda_en_vivo_var,
+            command=self._on_cambio_busqueda_en_vivo
+        )
+        self.menu_opciones.add_checkbutton(
+            label="Ordenar resultados por relevancia", variable=self.modo_relevancia_var,
+            command=self._guardar_configuracion_app
+        )
+        self.barra_menu.add_cascade(label="Opciones", menu=self.menu_opciones)
+        self.menu_herramientas = tk.Menu(self.barra_menu, tearoff=0)
+        self.menu_herramientas.add_command(label="Detalle de la última búsqueda...", command=self._mostrar_detalle_estadisticas_ui)
+        self.menu_herramientas.add_separator()
+        self.menu_herramientas.add_command(label="Perfilar próximas búsquedas...", command=self._activar_perfilador_ui)
+        self.menu_herramientas.add_command(label="Último perfil de búsqueda...", command=self._mostrar_ultimo_perfil_ui)
+        self.menu_herramientas.add_separator()
+        self.menu_herramientas.add_command(label="Memoria de los datos cargados...", command=self._mostrar_informe_memoria_ui)
+        self.barra_menu.add_cascade(label="Herramientas", menu=self.menu_herramientas)
+        self.menu_reglas = tk.Menu(self.barra_menu, tearoff=0)
+        self.menu_reglas.add_command(label="Reglas guardadas...", command=lambda: self._try_except_wrapper(self._mostrar_reglas_guardadas_ui))
+        self.barra_menu.add_cascade(label="Reglas", menu=self.menu_reglas)
+        self.configure(menu=self.barra_menu)
+
     def _crear_widgets_app(self):
         """ Crea todos los widgets de la interfaz gráfica. """
         # --- Marco de Controles Principal ---
@@ -180,7 +521,7 @@ class InterfazGrafica(tk.Tk):
 
         # Botones de Operadores de Búsqueda
         self.frame_ops = ttk.Frame(self.marco_controles)
-        op_buttons_defs = [("+", "+"), ("|", "|"), ("#", "#"), ("> ", ">"), ("< ", "<"), ("≥ ", ">="), ("≤ ", "<="), ("-", "-")]
+        op_buttons_defs = [("+", "+"), ("|", "|"), ("#", "#"), ("~", "~"), ("> ", ">"), ("< ", "<"), ("≥ ", ">="), ("≤ ", "<="), ("-", "-")]
         for i, (text, op_val_clean) in enumerate(op_buttons_defs):
             btn = ttk.Button(self.frame_ops, text=text, command=lambda op=op_val_clean: self._insertar_operador_validado(op), style="Operator.TButton", width=3)
             btn.grid(row=0, column=i, padx=1, pady=1, sticky="nsew")
@@ -211,6 +552,9 @@ class InterfazGrafica(tk.Tk):
 
         # --- Barra de Estado ---
         self.barra_estado = ttk.Label(self, text="Listo.", relief=tk.SUNKEN, anchor=tk.W, borderwidth=1)
+        # Resumen de tiempos de la última búsqueda (doble clic: desglose por etapas)
+        self.lbl_estadisticas = ttk.Label(self, text="", anchor=tk.E, cursor="hand2")
+        self.lbl_estadisticas.bind("<Double-Button-1>", lambda event: self._mostrar_detalle_estadisticas_ui())
         self._actualizar_etiquetas_archivos_cargados() # Inicializar etiquetas de archivos
 
     def _configurar_grid_layout_app(self):
@@ -265,11 +609,16 @@ class InterfazGrafica(tk.Tk):
 
         # Barra de Estado (al final de la ventana)
         self.barra_estado.grid(row=5, column=0, sticky="sew", padx=0, pady=(5,0)) # Ocupa todo el ancho en la parte inferior
+        self.lbl_estadisticas.grid(row=5, column=0, sticky="se", padx=(0, 4), pady=(5, 1)) # Sobre el extremo derecho de la barra de estado
 
     def _configurar_eventos_globales_app(self):
         """ Configura bindings de eventos globales. """
         # Bind para buscar al presionar Enter en la entrada de búsqueda
         self.entrada_busqueda.bind("<Return>", lambda event: self._try_except_wrapper(self._ejecutar_busqueda_ui))
+        # Autocompletado: flecha abajo entra en la lista de sugerencias; Escape o perder el foco la cierran
+        self.entrada_busqueda.bind("<Down>", lambda event: self._enfocar_sugerencias())
+        self.entrada_busqueda.bind("<Escape>", lambda event: self._ocultar_sugerencias())
+        self.entrada_busqueda.bind("<FocusOut>", lambda event: self.after(100, self._ocultar_sugerencias_sin_foco))
         # Protocolo para manejar el cierre de la ventana
         self.protocol("WM_DELETE_WINDOW", self.on_closing_app)
 
@@ -279,6 +628,76 @@ class InterfazGrafica(tk.Tk):
         logger.info(f"Mensaje UI (BarraEstado): {mensaje}")
         self.update_idletasks() # Forzar actualización inmediata de la UI
 
+    def _mostrar_estadisticas_busqueda(self, estadisticas: EstadisticasBusqueda):
+        """ Guarda las estadísticas de la última búsqueda y muestra su resumen junto a la barra de estado. """
+        self.estadisticas_ultima_busqueda = estadisticas
+        self.lbl_estadisticas.config(text=f"⏱ {estadisticas.resumen()}")
+        logger.info(f"Estadísticas de búsqueda: {estadisticas.a_dict()}")
+        self._mostrar_perfiles_nuevos()
+
+    def _mostrar_texto_en_ventana(self, titulo: str, contenido: str, ancho: int = 90, alto: int = 22):
+        """ Ventana con un texto de solo lectura (copiable al portapapeles). """
+        ventana = tk.Toplevel(self)
+        ventana.title(titulo)
+        ventana.transient(self)
+        texto = tk.Text(ventana, width=ancho, height=alto, font=("Courier New", 9), wrap="none")
+        texto.insert("1.0", contenido)
+        texto.config(state="disabled")
+        texto.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+        marco_botones = ttk.Frame(ventana)
+        marco_botones.pack(pady=(0, 8))
+
+        def _copiar():
+            self.clipboard_clear()
+            self.clipboard_append(contenido)
+        ttk.Button(marco_botones, text="Copiar", command=_copiar).pack(side="left", padx=4)
+        ttk.Button(marco_botones, text="Cerrar", command=ventana.destroy).pack(side="left", padx=4)
+
+    def _mostrar_detalle_estadisticas_ui(self):
+        """ Abre una ventana con el desglose por etapas de la última búsqueda. """
+        if self.estadisticas_ultima_busqueda is None:
+            messagebox.showinfo("Detalle de la Búsqueda", "Todavía no se ha realizado ninguna búsqueda.")
+            return
+        self._mostrar_texto_en_ventana("Detalle de la última búsqueda", self.estadisticas_ultima_busqueda.detalle())
+
+    def _activar_perfilador_ui(self):
+        """ Pide cuántas búsquedas perfilar; cada una guarda su archivo y muestra su top de funciones. """
+        if self.motor is None:
+            messagebox.showinfo("Perfilador", "El motor de búsqueda aún se está iniciando.")
+            return
+        cantidad = simpledialog.askinteger("Perfilar Búsquedas", "Número de próximas búsquedas a perfilar (0 para cancelar):",
+                                           parent=self, minvalue=0, maxvalue=100, initialvalue=max(1, self.motor.perfilador.pendientes))
+        if cantidad is None:
+            return
+        self.motor.perfilador.activar(cantidad, directorio=self.config.get("directorio_perfiles"), modo=self.config.get("modo_perfilador", "cprofile"))
+        if cantidad:
+            self._actualizar_mensaje_barra_estado(f"Se perfilarán las próximas {cantidad} búsquedas (archivos en '{self.motor.perfilador.directorio}').")
+        else:
+            self._actualizar_mensaje_barra_estado("Perfilado de búsquedas cancelado.")
+
+    def _mostrar_perfiles_nuevos(self):
+        """ Tras una búsqueda, muestra el perfil capturado (si el perfilador estaba activo). """
+        if self.motor is None or self.motor.perfilador.total_perfiles == self._perfiles_mostrados:
+            return
+        self._perfiles_mostrados = self.motor.perfilador.total_perfiles
+        self._mostrar_ultimo_perfil_ui()
+
+    def _mostrar_ultimo_perfil_ui(self):
+        if self.motor is None or not self.motor.perfilador.perfiles:
+            messagebox.showinfo("Perfil de Búsqueda", "No hay perfiles capturados. Use 'Herramientas > Perfilar próximas búsquedas...'.")
+            return
+        perfil = self.motor.perfilador.perfiles[-1]
+        self._mostrar_texto_en_ventana(f"Perfil: {perfil.consulta}", perfil.informe(), ancho=110, alto=32)
+
+    def _mostrar_informe_memoria_ui(self):
+        """ Muestra la memoria de los DataFrames cargados antes y después de la representación compacta. """
+        if self.motor is None or not self.motor.informes_memoria:
+            messagebox.showinfo("Memoria de los Datos",
+                                "No hay informe de memoria. Active \"memoria_compacta\" en la configuración y vuelva a cargar los archivos.")
+            return
+        contenido = "\n\n".join(informe.detalle() for informe in self.motor.informes_memoria.values())
+        self._mostrar_texto_en_ventana("Memoria de los datos cargados", contenido, ancho=100)
+
     def _mostrar_ayuda_ui(self):
         """ Muestra una ventana de ayuda con la sintaxis de búsqueda. """
         texto_ayuda = (
@@ -292,7 +711,9 @@ class InterfazGrafica(tk.Tk):
             "- Búsqueda numérica por rango: `10-20V` (ej. 10V a 20V, inclusive)\n"
             "  (Unidad opcional, pegada al segundo número o separada por espacio)\n"
             "- Frase exacta: `\"rack de 19 pulgadas\"` (busca la frase literal)\n"
-            "- Negación: `#palabra_a_excluir` o `# \"frase a excluir\"`\n\n"
+            "- Negación: `#palabra_a_excluir` o `# \"frase a excluir\"`\n"
+            "- Difuso: `~palabra` o `~\"frase\"` (admite errores de escritura: 1 en palabras de 4 a 7 letras, 2 en más largas)\n"
+            "  (También en negaciones: `#~palabra`)\n\n"
             "Flujo de Búsqueda (Vía Diccionario por defecto):\n"
             "1. La consulta se busca primero en el 'Diccionario'.\n"
             "2. Si hay coincidencias en el Diccionario (FCDs - Formas Canónicas del Diccionario):\n"
@@ -337,10 +758,10 @@ class InterfazGrafica(tk.Tk):
 
         # Determinar qué DataFrame usar según la tabla
         if tabla == self.tabla_diccionario and self.motor.datos_diccionario is not None:
-            df_para_ordenar = self.motor.datos_diccionario.copy() # Trabajar con una copia
+            df_para_ordenar = self.motor.datos_diccionario # sort_values devuelve un DataFrame nuevo
             indices_para_resaltar_post_orden = self.indices_fcds_resaltados # Mantener resaltados si es tabla diccionario
-        elif tabla == self.tabla_resultados and self.resultados_actuales is not None:
-            df_para_ordenar = self.resultados_actuales.copy()
+        elif tabla == self.tabla_resultados and self.ids_resultados_actuales is not None:
+            df_para_ordenar = self.resultados_actuales
         else: # No hay datos para ordenar
             tabla.heading(columna_id, command=lambda c=columna_id, t=tabla: self._try_except_wrapper(self._ordenar_columna_tabla_ui, t, c, not orden_reverso))
             return
@@ -386,8 +807,8 @@ class InterfazGrafica(tk.Tk):
                                                columnas_a_mostrar=columnas_a_mostrar_en_dicc_ordenado, 
                                                indices_a_resaltar=indices_para_resaltar_post_orden)
         elif tabla == self.tabla_resultados:
-            self.resultados_actuales = df_ordenado # Actualizar el DataFrame de resultados actual
-            self._actualizar_tabla_treeview_ui(tabla, self.resultados_actuales) # Límite de filas por defecto se aplicará
+            self.resultados_actuales = df_ordenado # Solo se guarda el nuevo orden de los ids
+            self._actualizar_tabla_treeview_ui(tabla, df_ordenado) # Límite de filas por defecto se aplicará
 
         # Actualizar el comando de la cabecera para invertir el orden en el próximo clic
         tabla.heading(columna_id, command=lambda c=columna_id, t=tabla: self._try_except_wrapper(self._ordenar_columna_tabla_ui, t, c, not orden_reverso))
@@ -413,6 +834,8 @@ class InterfazGrafica(tk.Tk):
 
         columnas_originales_df = list(datos.columns)
         cols_finales_para_tabla: List[str]
+        if columnas_a_mostrar is None and not es_tabla_diccionario: # Columnas visibles de las descripciones (configuración)
+            columnas_a_mostrar = self.config.get("columnas_visibles_descripcion") or None
 
         # Determinar qué columnas mostrar
         if columnas_a_mostrar:
@@ -471,11 +894,12 @@ class InterfazGrafica(tk.Tk):
              logger.debug(f"Mostrando todas las {num_filas_original_df} filas de '{nombre_tabla_log}' debido a la presencia de índices a resaltar.")
 
         # Insertar filas en la tabla
+        indices_resaltados_set = set(indices_a_resaltar) if es_tabla_diccionario and indices_a_resaltar else set()
         for i, (idx_original_df, fila_datos) in enumerate(df_a_iterar.iterrows()):
             valores_fila = [str(v) if pd.notna(v) else "" for v in fila_datos.values]
             tags_fila = ["par" if i % 2 == 0 else "impar"]
             
-            if es_tabla_diccionario and indices_a_resaltar and idx_original_df in indices_a_resaltar:
+            if idx_original_df in indices_resaltados_set:
                 tags_fila.append("resaltado_azul")
             
             try: # Usar un IID único basado en el índice original del DataFrame para la fila
@@ -495,8 +919,8 @@ class InterfazGrafica(tk.Tk):
         """ Actualiza las etiquetas que muestran los nombres de los archivos cargados. """
         max_longitud_nombre = 25 # Para evitar que las etiquetas se hagan muy largas
         
-        path_diccionario = self.motor.archivo_diccionario_actual
-        path_descripciones = self.motor.archivo_descripcion_actual
+        path_diccionario = self.motor.archivo_diccionario_actual if self.motor else None
+        path_descripciones = self.motor.archivo_descripcion_actual if self.motor else None
 
         nombre_dic = path_diccionario.name if path_diccionario else "Ninguno"
         nombre_desc = path_descripciones.name if path_descripciones else "Ninguno"
@@ -511,8 +935,8 @@ class InterfazGrafica(tk.Tk):
 
     def _actualizar_estado_general_botones_y_controles(self):
         """ Habilita o deshabilita botones según el estado de la aplicación (archivos cargados, resultados, etc.). """
-        diccionario_cargado = self.motor.datos_diccionario is not None
-        descripciones_cargadas = self.motor.datos_descripcion is not None
+        diccionario_cargado = self.motor is not None and self.motor.datos_diccionario is not None
+        descripciones_cargadas = self.motor is not None and self.motor.datos_descripcion is not None
 
         # Actualizar botones de operadores si hay al menos un archivo cargado
         if diccionario_cargado or descripciones_cargadas:
@@ -529,7 +953,7 @@ class InterfazGrafica(tk.Tk):
             # Si fue vía diccionario y hay FCDs O (hay resultados en desc y el origen es de éxito con desc)
             if self.origen_principal_resultados.es_via_diccionario and \
                ((self.fcds_de_ultima_busqueda is not None and not self.fcds_de_ultima_busqueda.empty) or \
-                (self.desc_finales_de_ultima_busqueda is not None and not self.desc_finales_de_ultima_busqueda.empty and \
+                (self.ids_desc_finales_de_ultima_busqueda is not None and not self.ids_desc_finales_de_ultima_busqueda.empty and \
                  self.origen_principal_resultados in [OrigenResultados.VIA_DICCIONARIO_CON_RESULTADOS_DESC, 
                                                     OrigenResultados.VIA_DICCIONARIO_PURAMENTE_NEGATIVA_CON_RESULTADOS_DESC,
                                                     OrigenResultados.VIA_DICCIONARIO_UNIDAD_Y_NUMERICO_EN_DESC])):
@@ -537,12 +961,13 @@ class InterfazGrafica(tk.Tk):
             # Si fue búsqueda directa en descripción (con o sin resultados) y hay un DataFrame de descripción final
             elif (self.origen_principal_resultados.es_directo_descripcion or \
                   self.origen_principal_resultados == OrigenResultados.DIRECTO_DESCRIPCION_VACIA) and \
-                 self.desc_finales_de_ultima_busqueda is not None:
+                 self.ids_desc_finales_de_ultima_busqueda is not None:
                 puede_salvar_regla = True
-        self.btn_salvar_regla["state"] = "normal" if puede_salvar_regla else "disabled"
+        guardando_regla = self._futuro_guardado_regla is not None and not self._futuro_guardado_regla.done()
+        self.btn_salvar_regla["state"] = "normal" if puede_salvar_regla and not guardando_regla else "disabled"
 
         # Botón Exportar: habilitado si hay resultados actuales y no están vacíos
-        self.btn_exportar["state"] = "normal" if (self.resultados_actuales is not None and not self.resultados_actuales.empty) else "disabled"
+        self.btn_exportar["state"] = "normal" if self._hay_resultados_actuales() else "disabled"
 
     def _cargar_diccionario_ui(self):
         """ Abre un diálogo para cargar el archivo de diccionario. """
@@ -560,19 +985,27 @@ class InterfazGrafica(tk.Tk):
 
         nombre_archivo = Path(ruta_seleccionada).name
         self._actualizar_mensaje_barra_estado(f"Cargando diccionario: {nombre_archivo}...")
+        self._limpiar_estado_previo_carga_diccionario()
         
-        # Limpiar vistas previas y estados de búsqueda anteriores
+        # Cargar el archivo usando el motor
+        carga_ok, mensaje_error = self.motor.cargar_excel_diccionario(ruta_seleccionada)
+        self._aplicar_resultado_carga_diccionario(ruta_seleccionada, carga_ok, mensaje_error)
+
+    def _limpiar_estado_previo_carga_diccionario(self):
+        """ Limpia vistas previas y estados de búsqueda anteriores antes de cargar un diccionario. """
         self._actualizar_tabla_treeview_ui(self.tabla_diccionario, None)
         self._actualizar_tabla_treeview_ui(self.tabla_resultados, None)
         self.resultados_actuales = None
         self.fcds_de_ultima_busqueda = None
-        self.desc_finales_de_ultima_busqueda = None
+        self.ids_desc_finales_de_ultima_busqueda = None
         self.origen_principal_resultados = OrigenResultados.NINGUNO
         self.indices_fcds_resaltados = None
-        
-        # Cargar el archivo usando el motor
-        carga_ok, mensaje_error = self.motor.cargar_excel_diccionario(ruta_seleccionada)
-        
+        self._cancelar_busqueda_en_vivo()
+        self._historial_en_vivo = [] # Los FCDs y sinónimos cambian con el diccionario
+
+    def _aplicar_resultado_carga_diccionario(self, ruta_seleccionada: str, carga_ok: bool, mensaje_error: Optional[str]):
+        """ Refleja en la UI el resultado de cargar el diccionario (desde diálogo o en segundo plano). """
+        nombre_archivo = Path(ruta_seleccionada).name
         nombre_archivo_desc_actual = Path(self.motor.archivo_descripcion_actual).name if self.motor.archivo_descripcion_actual else "N/A"
 
         if carga_ok and self.motor.datos_diccionario is not None:
@@ -592,6 +1025,7 @@ class InterfazGrafica(tk.Tk):
             
             self.title(f"Buscador - Dic: {nombre_archivo} | Desc: {nombre_archivo_desc_actual}")
             self._actualizar_mensaje_barra_estado(f"Diccionario '{nombre_archivo}' ({num_filas_dicc} filas) cargado exitosamente.")
+            self._sincronizar_reglas_en_segundo_plano()
         else:
             self._actualizar_mensaje_barra_estado(f"Error al cargar diccionario: {mensaje_error or 'Error desconocido'}")
             messagebox.showerror("Error al Cargar Diccionario", mensaje_error or "Ocurrió un error desconocido al cargar el archivo.")
@@ -616,15 +1050,23 @@ class InterfazGrafica(tk.Tk):
 
         nombre_archivo = Path(ruta_seleccionada).name
         self._actualizar_mensaje_barra_estado(f"Cargando descripciones: {nombre_archivo}...")
+        self._limpiar_estado_previo_carga_descripcion()
+        
+        carga_ok, mensaje_error = self.motor.cargar_excel_descripcion(ruta_seleccionada)
+        self._aplicar_resultado_carga_descripcion(ruta_seleccionada, carga_ok, mensaje_error)
 
-        # Limpiar resultados actuales y tabla de resultados
+    def _limpiar_estado_previo_carga_descripcion(self):
+        """ Limpia resultados actuales y tabla de resultados antes de cargar descripciones. """
         self.resultados_actuales = None
-        self.desc_finales_de_ultima_busqueda = None
+        self.ids_desc_finales_de_ultima_busqueda = None
         self.origen_principal_resultados = OrigenResultados.NINGUNO # Resetear origen
         self._actualizar_tabla_treeview_ui(self.tabla_resultados, None)
+        self._cancelar_busqueda_en_vivo()
+        self._historial_en_vivo = [] # Los ids de fila guardados son de las descripciones anteriores
         
-        carga_ok, mensaje_error = self.motor.cargar_excel_descripcion(ruta_seleccionada)
-        
+    def _aplicar_resultado_carga_descripcion(self, ruta_seleccionada: str, carga_ok: bool, mensaje_error: Optional[str]):
+        """ Refleja en la UI el resultado de cargar las descripciones (desde diálogo o en segundo plano). """
+        nombre_archivo = Path(ruta_seleccionada).name
         nombre_archivo_dicc_actual = Path(self.motor.archivo_diccionario_actual).name if self.motor.archivo_diccionario_actual else "N/A"
 
         if carga_ok and self.motor.datos_descripcion is not None:
@@ -639,6 +1081,7 @@ class InterfazGrafica(tk.Tk):
             self._actualizar_tabla_treeview_ui(self.tabla_resultados, df_desc, limite_filas=200) # Limitar a 200 filas para preview
             
             self.title(f"Buscador - Dic: {nombre_archivo_dicc_actual} | Desc: {nombre_archivo}")
+            self._sincronizar_reglas_en_segundo_plano()
         else:
             error_a_mostrar = mensaje_error or "Ocurrió un error desconocido al cargar el archivo de descripciones."
             self._actualizar_mensaje_barra_estado(f"Error al cargar descripciones: {error_a_mostrar}")
@@ -648,19 +1091,84 @@ class InterfazGrafica(tk.Tk):
         self._actualizar_etiquetas_archivos_cargados()
         self._actualizar_estado_general_botones_y_controles()
 
+    def _restaurar_ultima_sesion_ui(self):
+        """ Carga en paralelo, en hilos de fondo, el diccionario y las descripciones de la última sesión. """
+        rutas_a_restaurar: Dict[str, Path] = {}
+        for tipo_archivo, clave_ruta in [("diccionario", "last_dic_path"), ("descripcion", "last_desc_path")]:
+            ruta_guardada = self.config.get(clave_ruta)
+            if ruta_guardada and Path(ruta_guardada).exists():
+                rutas_a_restaurar[tipo_archivo] = Path(ruta_guardada)
+            elif ruta_guardada:
+                logger.warning(f"No se restaura '{ruta_guardada}' ({tipo_archivo}): el archivo ya no existe.")
+
+        if not rutas_a_restaurar:
+            self._actualizar_mensaje_barra_estado("No hay archivos de la última sesión para restaurar.")
+            return
+
+        # Cada carga construye además su índice, de modo que el primero en llegar ya queda listo
+        funciones_carga = {"diccionario": self.motor.cargar_excel_diccionario, "descripcion": self.motor.cargar_excel_descripcion}
+        self._ejecutor_cargas = ThreadPoolExecutor(max_workers=len(rutas_a_restaurar), thread_name_prefix="carga_sesion")
+        for tipo_archivo, ruta in rutas_a_restaurar.items():
+            if tipo_archivo == "diccionario":
+                self._limpiar_estado_previo_carga_diccionario()
+            else:
+                self._limpiar_estado_previo_carga_descripcion()
+            self._cargas_pendientes[tipo_archivo] = (ruta, self._ejecutor_cargas.submit(funciones_carga[tipo_archivo], str(ruta)))
+
+        self.btn_cargar_diccionario["state"] = "disabled"
+        self.btn_cargar_descripciones["state"] = "disabled"
+        nombres = ", ".join(ruta.name for ruta in rutas_a_restaurar.values())
+        self._actualizar_mensaje_barra_estado(f"Restaurando última sesión en segundo plano: {nombres}...")
+        self.after(100, self._sondear_cargas_en_segundo_plano)
+
+    def _sondear_cargas_en_segundo_plano(self):
+        """ Aplica en el hilo de Tk los resultados de las cargas en segundo plano a medida que terminan. """
+        for tipo_archivo, (ruta, futuro) in list(self._cargas_pendientes.items()):
+            if not futuro.done():
+                continue
+            del self._cargas_pendientes[tipo_archivo]
+            try:
+                carga_ok, mensaje_error = futuro.result()
+            except Exception as e_carga:
+                logger.exception(f"Excepción cargando '{ruta}' ({tipo_archivo}) en segundo plano.")
+                carga_ok, mensaje_error = False, f"Error inesperado: {e_carga}"
+
+            if tipo_archivo == "diccionario":
+                self._try_except_wrapper(self._aplicar_resultado_carga_diccionario, str(ruta), carga_ok, mensaje_error)
+            else:
+                self._try_except_wrapper(self._aplicar_resultado_carga_descripcion, str(ruta), carga_ok, mensaje_error)
+
+        if self._cargas_pendientes:
+            self.after(100, self._sondear_cargas_en_segundo_plano)
+            return
+
+        if self._ejecutor_cargas is not None:
+            self._ejecutor_cargas.shutdown(wait=False)
+            self._ejecutor_cargas = None
+        self.btn_cargar_diccionario["state"] = "normal"
+        self.btn_cargar_descripciones["state"] = "normal"
+        if self.motor.datos_diccionario is not None and self.motor.datos_descripcion is not None:
+            self._actualizar_mensaje_barra_estado("Sesión restaurada. Diccionario y descripciones listos para buscar.")
+        self._actualizar_estado_general_botones_y_controles()
+
     def _ejecutar_busqueda_ui(self):
         """ Ejecuta la búsqueda con el término ingresado y actualiza la UI. """
+        if self.motor is None or self._cargas_pendientes:
+            self._actualizar_mensaje_barra_estado("Espere: el motor o los archivos de la última sesión aún se están cargando...")
+            return
         if self.motor.datos_diccionario is None or self.motor.datos_descripcion is None:
             messagebox.showwarning("Archivos Faltantes", "Cargue el archivo de Diccionario y el archivo de Descripciones antes de buscar.")
             return
 
         termino_busqueda_actual = self.texto_busqueda_var.get()
         self.ultimo_termino_buscado = termino_busqueda_actual # Guardar para posible "Salvar Regla"
+        self._cancelar_busqueda_en_vivo() # La búsqueda completa sustituye a la búsqueda en vivo pendiente
+        self._ocultar_sugerencias()
 
         # Resetear estados de resultados previos de esta búsqueda específica
         self.resultados_actuales = None
         self.fcds_de_ultima_busqueda = None
-        self.desc_finales_de_ultima_busqueda = None
+        self.ids_desc_finales_de_ultima_busqueda = None
         self.origen_principal_resultados = OrigenResultados.NINGUNO
         self.indices_fcds_resaltados = None
         
@@ -669,10 +1177,11 @@ class InterfazGrafica(tk.Tk):
 
         # --- Ejecutar la búsqueda en el motor ---
         # Por defecto, intentar vía diccionario (buscar_via_diccionario_flag=True)
-        resultados_df, origen_actual, fcds_encontrados, indices_resaltar, msg_error_motor = self.motor.buscar(
-            termino_busqueda_original=termino_busqueda_actual, 
-            buscar_via_diccionario_flag=True # Flag para indicar que se intente la lógica vía diccionario
+        estadisticas_busqueda = EstadisticasBusqueda()
+        resultados_df, origen_actual, fcds_encontrados, indices_resaltar, msg_error_motor = self._buscar_en_motor(
+            termino_busqueda_actual, True, estadisticas_busqueda # True: se intenta la lógica vía diccionario
         )
+        self._mostrar_estadisticas_busqueda(estadisticas_busqueda)
 
         # Actualizar estado interno con los resultados de la búsqueda
         self.fcds_de_ultima_busqueda = fcds_encontrados
@@ -683,27 +1192,7 @@ class InterfazGrafica(tk.Tk):
         columnas_df_desc_ref = self.motor.datos_descripcion.columns if self.motor.datos_descripcion is not None else []
 
         # Actualizar tabla de diccionario (resaltando FCDs si los hay)
-        if self.motor.datos_diccionario is not None:
-            num_fcds_resaltados = len(self.indices_fcds_resaltados) if self.indices_fcds_resaltados else 0
-            etiqueta_diccionario = f"Diccionario ({len(self.motor.datos_diccionario)} filas)"
-            if num_fcds_resaltados > 0 and origen_actual.es_via_diccionario and origen_actual != OrigenResultados.DICCIONARIO_SIN_COINCIDENCIAS:
-                etiqueta_diccionario += f" - {num_fcds_resaltados} FCDs resaltados"
-            self.lbl_tabla_diccionario.config(text=etiqueta_diccionario)
-            
-            columnas_preview_dicc_actual, _ = self.motor._obtener_nombres_columnas_busqueda_df(
-                self.motor.datos_diccionario, 
-                self.motor.indices_columnas_busqueda_dic_preview, 
-                "diccionario_preview"
-            )
-            # Mostrar todas las filas del diccionario si hay FCDs resaltados, sino, el límite normal
-            limite_filas_dic_preview = None if self.indices_fcds_resaltados and num_fcds_resaltados > 0 else 100
-            self._actualizar_tabla_treeview_ui(
-                self.tabla_diccionario, 
-                self.motor.datos_diccionario, 
-                limite_filas=limite_filas_dic_preview, 
-                columnas_a_mostrar=columnas_preview_dicc_actual,
-                indices_a_resaltar=self.indices_fcds_resaltados
-            )
+        self._mostrar_fcds_en_diccionario_ui(origen_actual, self.indices_fcds_resaltados)
 
         # --- Procesar resultados y mensajes según el origen de los mismos ---
         if msg_error_motor and origen_actual.es_error_operacional:
@@ -719,8 +1208,9 @@ class InterfazGrafica(tk.Tk):
                                OrigenResultados.VIA_DICCIONARIO_UNIDAD_Y_NUMERICO_EN_DESC]:
             self.resultados_actuales = resultados_df
             num_fcds = len(fcds_encontrados) if fcds_encontrados is not None else 0
-            num_desc = len(resultados_df) if resultados_df is not None else 0
-            self._actualizar_mensaje_barra_estado(f"Búsqueda para '{termino_busqueda_actual}': {num_fcds} FCDs en Diccionario, resultando en {num_desc} filas en Descripciones.")
+            num_desc = estadisticas_busqueda.filas_resultado
+            self._actualizar_mensaje_barra_estado(f"Búsqueda para '{termino_busqueda_actual}': {num_fcds} FCDs en Diccionario, resultando en {num_desc} filas en Descripciones"
+                                                  f"{self._sufijo_relevancia(resultados_df, num_desc)}.")
 
         elif origen_actual == OrigenResultados.DICCIONARIO_SIN_COINCIDENCIAS:
             self.resultados_actuales = resultados_df # Debería ser un DataFrame vacío
@@ -772,13 +1262,38 @@ class InterfazGrafica(tk.Tk):
                     messagebox.showinfo("Información", f"No se encontraron resultados para '{termino_busqueda_actual}' en la búsqueda directa.")
 
         # Asegurar que resultados_actuales sea un DataFrame para la UI, incluso si es vacío
-        if self.resultados_actuales is None:
+        if self.ids_resultados_actuales is None:
             self.resultados_actuales = pd.DataFrame(columns=columnas_df_desc_ref)
         
-        self.desc_finales_de_ultima_busqueda = self.resultados_actuales.copy() # Guardar para "Salvar Regla"
+        self.ids_desc_finales_de_ultima_busqueda = self.ids_resultados_actuales # Guardar para "Salvar Regla" (ids, sin copiar filas)
         self._actualizar_tabla_treeview_ui(self.tabla_resultados, self.resultados_actuales)
         self._actualizar_estado_general_botones_y_controles()
 
+    def _mostrar_fcds_en_diccionario_ui(self, origen: OrigenResultados, indices_resaltar: Optional[List[int]]):
+        """ Actualiza la tabla del diccionario resaltando los FCDs de una búsqueda. """
+        if self.motor.datos_diccionario is None:
+            return
+        num_fcds_resaltados = len(indices_resaltar) if indices_resaltar else 0
+        etiqueta_diccionario = f"Diccionario ({len(self.motor.datos_diccionario)} filas)"
+        if num_fcds_resaltados > 0 and origen.es_via_diccionario and origen != OrigenResultados.DICCIONARIO_SIN_COINCIDENCIAS:
+            etiqueta_diccionario += f" - {num_fcds_resaltados} FCDs resaltados"
+        self.lbl_tabla_diccionario.config(text=etiqueta_diccionario)
+        
+        columnas_preview_dicc_actual, _ = self.motor._obtener_nombres_columnas_busqueda_df(
+            self.motor.datos_diccionario, 
+            self.motor.indices_columnas_busqueda_dic_preview, 
+            "diccionario_preview"
+        )
+        # Mostrar todas las filas del diccionario si hay FCDs resaltados, sino, el límite normal
+        limite_filas_dic_preview = None if indices_resaltar and num_fcds_resaltados > 0 else 100
+        self._actualizar_tabla_treeview_ui(
+            self.tabla_diccionario, 
+            self.motor.datos_diccionario, 
+            limite_filas=limite_filas_dic_preview, 
+            columnas_a_mostrar=columnas_preview_dicc_actual,
+            indices_a_resaltar=indices_resaltar
+        )
+
     def _buscar_directo_en_descripciones_y_actualizar_ui(self, termino_ui_original: str, columnas_df_desc_referencia: List[str]):
         """ Realiza una búsqueda directa en descripciones y actualiza la UI. Se llama como alternativa. """
         self._actualizar_mensaje_barra_estado(f"Iniciando búsqueda directa de '{termino_ui_original}' en descripciones...")
@@ -797,10 +1312,11 @@ class InterfazGrafica(tk.Tk):
             )
         
         # Ejecutar búsqueda directa
-        res_df_directo, orig_directo, _, _, msg_error_directo = self.motor.buscar(
-            termino_busqueda_original=termino_ui_original, 
-            buscar_via_diccionario_flag=False # Indicar búsqueda directa
+        estadisticas_directa = EstadisticasBusqueda()
+        res_df_directo, orig_directo, _, _, msg_error_directo = self._buscar_en_motor(
+            termino_ui_original, False, estadisticas_directa # False: búsqueda directa
         )
+        self._mostrar_estadisticas_busqueda(estadisticas_directa)
         
         self.origen_principal_resultados = orig_directo
         self.fcds_de_ultima_busqueda = None # No hay FCDs en búsqueda directa
@@ -811,72 +1327,196 @@ class InterfazGrafica(tk.Tk):
         else:
             self.resultados_actuales = res_df_directo
 
-        num_resultados_directos = len(self.resultados_actuales) if self.resultados_actuales is not None else 0
-        self._actualizar_mensaje_barra_estado(f"Búsqueda directa de '{termino_ui_original}': {num_resultados_directos} resultados encontrados.")
+        num_resultados_directos = len(self.ids_resultados_actuales) if self.ids_resultados_actuales is not None else 0
+        self._actualizar_mensaje_barra_estado(f"Búsqueda directa de '{termino_ui_original}': {estadisticas_directa.filas_resultado} resultados encontrados"
+                                              f"{self._sufijo_relevancia(self.resultados_actuales, estadisticas_directa.filas_resultado)}.")
         
         if num_resultados_directos == 0 and orig_directo == OrigenResultados.DIRECTO_DESCRIPCION_VACIA and termino_ui_original.strip():
             messagebox.showinfo("Información", f"No se encontraron resultados para '{termino_ui_original}' en la búsqueda directa.")
         
         # Asegurar DataFrame para la UI
-        if self.resultados_actuales is None:
+        if self.ids_resultados_actuales is None:
             self.resultados_actuales = pd.DataFrame(columns=columnas_df_desc_referencia)
             
-        self.desc_finales_de_ultima_busqueda = self.resultados_actuales.copy()
+        self.ids_desc_finales_de_ultima_busqueda = self.ids_resultados_actuales
         self._actualizar_tabla_treeview_ui(self.tabla_resultados, self.resultados_actuales)
         self._actualizar_estado_general_botones_y_controles()
 
-    def _salvar_regla_actual_ui(self):
-        """ Guarda metadatos de la búsqueda actual (no los datos en sí). """
-        origen_actual_nombre = self.origen_principal_resultados.name
+    def _buscar_en_motor(self, termino: str, via_diccionario: bool, estadisticas: EstadisticasBusqueda):
+        """ `motor.buscar`, o `motor.buscar_relevantes` (las mejores filas primero) con el modo relevancia activo. """
+        if self.modo_relevancia_var.get():
+            return self.motor.buscar_relevantes(termino, via_diccionario, int(self.config.get("max_resultados_relevancia", 200)), estadisticas=estadisticas)
+        return self.motor.buscar(termino, via_diccionario, estadisticas)
+
+    def _sufijo_relevancia(self, resultados_df: Optional[pd.DataFrame], total_filas: int) -> str:
+        """ Aclaración para la barra de estado cuando el modo relevancia muestra solo parte de los resultados. """
+        if not self.modo_relevancia_var.get() or resultados_df is None or len(resultados_df) >= total_filas:
+            return ""
+        return f" (se muestran las {len(resultados_df)} más relevantes)"
 
-        # Validar si hay algo que salvar
-        if not self.ultimo_termino_buscado and not \
-           (self.origen_principal_resultados == OrigenResultados.DIRECTO_DESCRIPCION_VACIA and self.desc_finales_de_ultima_busqueda is not None):
+    def _salvar_regla_actual_ui(self):
+        """ Guarda la búsqueda actual como regla en disco, con su resultado, para abrirla después sin buscar. """
+        if self.almacen_reglas is None or self.motor is None or self.motor.datos_descripcion is None:
+            messagebox.showerror("Error al Salvar", "No hay descripciones cargadas o el almacén de reglas no está disponible.")
+            return
+        termino = self.ultimo_termino_buscado or ""
+        if not termino.strip() and self.origen_principal_resultados != OrigenResultados.DIRECTO_DESCRIPCION_VACIA:
             messagebox.showerror("Error al Salvar", "No hay una búsqueda activa o resultados para salvar.")
             return
+        nombre = simpledialog.askstring("Salvar Regla", "Nombre de la regla (si ya existe, se sustituye):",
+                                        parent=self, initialvalue=termino.strip() or "Todas las descripciones")
+        if not nombre or not nombre.strip():
+            return
+        nombre = nombre.strip()
+        # La regla se guarda como la búsqueda que produjo los resultados mostrados (directa si se usó la alternativa)
+        via_diccionario = self.origen_principal_resultados.es_via_diccionario
+        self._actualizar_mensaje_barra_estado(f"Guardando regla '{nombre}'...")
+        # Evaluar la regla y escribir el almacén puede tardar: en el hilo de las reglas, tras cualquier sincronización pendiente
+        self._futuro_guardado_regla = self._obtener_ejecutor_reglas().submit(self._guardar_regla, self.almacen_reglas, self.motor,
+                                                                               nombre, termino, via_diccionario)
+        self._actualizar_estado_general_botones_y_controles()
+        self.after(200, self._sondear_guardado_regla, nombre)
 
-        df_a_considerar_para_salvar: Optional[pd.DataFrame] = None
-        tipo_datos_salvados = "DESCONOCIDO"
-
-        # Determinar qué DataFrame y tipo de datos se están "salvando" (solo metadatos)
-        if self.origen_principal_resultados.es_via_diccionario:
-            if self.desc_finales_de_ultima_busqueda is not None and not self.desc_finales_de_ultima_busqueda.empty:
-                df_a_considerar_para_salvar = self.desc_finales_de_ultima_busqueda
-                tipo_datos_salvados = "DESC_VIA_DICC"
-            elif self.fcds_de_ultima_busqueda is not None and not self.fcds_de_ultima_busqueda.empty:
-                df_a_considerar_para_salvar = self.fcds_de_ultima_busqueda
-                tipo_datos_salvados = "FCDS_DICC_SIN_DESC" # FCDs encontrados, pero no llevaron a resultados en desc
-        
-        elif self.origen_principal_resultados.es_directo_descripcion or \
-             self.origen_principal_resultados == OrigenResultados.DIRECTO_DESCRIPCION_VACIA:
-            if self.desc_finales_de_ultima_busqueda is not None: # Siempre debería haber un DataFrame aquí, aunque sea vacío
-                df_a_considerar_para_salvar = self.desc_finales_de_ultima_busqueda
-                tipo_datos_salvados = "DESC_DIRECTA"
-                # Caso especial: si la query era vacía y se mostraron todas las descripciones
-                if self.origen_principal_resultados == OrigenResultados.DIRECTO_DESCRIPCION_VACIA and \
-                   not (self.ultimo_termino_buscado or "").strip():
-                    tipo_datos_salvados = "TODAS_LAS_DESCRIPCIONES"
-        
-        if df_a_considerar_para_salvar is not None:
-            regla_info = {
-                "termino_buscado": self.ultimo_termino_buscado or "N/A (Query vacía)",
-                "origen_resultados": origen_actual_nombre,
-                "tipo_datos_guardados": tipo_datos_salvados,
-                "numero_filas_resultantes": len(df_a_considerar_para_salvar),
-                "timestamp_guardado": pd.Timestamp.now().isoformat() # Fecha y hora del guardado
-            }
-            self.reglas_guardadas.append(regla_info)
-            self._actualizar_mensaje_barra_estado(f"Búsqueda '{self.ultimo_termino_buscado}' registrada (metadatos).")
-            messagebox.showinfo("Regla Salvada", f"Metadatos de la búsqueda para '{self.ultimo_termino_buscado}' han sido guardados en memoria.")
-            logger.info(f"Regla guardada en memoria: {regla_info}")
-        else:
-            messagebox.showwarning("Nada que Salvar", "No hay datos de resultados claros asociados con la última búsqueda para salvar.")
-        
-        self._actualizar_estado_general_botones_y_controles() # El estado del botón de salvar no cambia aquí
+    @staticmethod
+    def _guardar_regla(almacen_reglas: AlmacenReglas, motor: MotorBusqueda, nombre: str, termino: str, via_diccionario: bool) -> ReglaGuardada:
+        """ `almacen_reglas.guardar_regla` sin perfilar sus búsquedas. Se ejecuta en el hilo de fondo. """
+        with motor.sin_perfilar():
+            return almacen_reglas.guardar_regla(motor, nombre, termino, via_diccionario)
+
+    def _sondear_guardado_regla(self, nombre: str):
+        futuro = self._futuro_guardado_regla
+        if futuro is None:
+            return
+        if not futuro.done():
+            self.after(200, self._sondear_guardado_regla, nombre)
+            return
+        self._actualizar_estado_general_botones_y_controles()
+        try:
+            regla = futuro.result()
+        except Exception as e_guardar:
+            logger.exception(f"Error al guardar la regla '{nombre}'.")
+            self._actualizar_mensaje_barra_estado(f"Error al guardar la regla '{nombre}'.")
+            messagebox.showerror("Error al Salvar", f"No se pudo guardar la regla '{nombre}':\n{e_guardar}")
+            return
+        self._actualizar_mensaje_barra_estado(f"Regla '{nombre}' guardada: {regla.num_filas} filas.")
+        messagebox.showinfo("Regla Salvada", f"La regla '{nombre}' ({regla.num_filas} filas) se ha guardado en '{self.almacen_reglas.ruta}'.")
+
+    def _obtener_ejecutor_reglas(self) -> ThreadPoolExecutor:
+        """ Hilo único de las reglas: sincronizaciones y guardados se ejecutan en orden, fuera del hilo de Tk. """
+        if self._ejecutor_reglas is None:
+            self._ejecutor_reglas = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reglas")
+        return self._ejecutor_reglas
+
+    def _sincronizar_reglas_en_segundo_plano(self):
+        """ Pone al día las reglas guardadas con los archivos recién cargados (solo las filas nuevas o cambiadas). """
+        if self.almacen_reglas is None or not self.almacen_reglas.reglas() or self._cargas_pendientes:
+            return # Con la sesión aún restaurándose, se sincroniza al terminar la última carga
+        if self.motor.datos_descripcion is None or self.motor.datos_diccionario is None:
+            return
+        futuro_previo = self._futuro_reglas
+        self._futuro_reglas = self._obtener_ejecutor_reglas().submit(self._sincronizar_reglas, self.almacen_reglas, self.motor)
+        if futuro_previo is None or futuro_previo.done(): # Si ya había una en curso, su sondeo sigue con la nueva
+            self.after(200, self._sondear_sincronizacion_reglas)
+
+    @staticmethod
+    def _sincronizar_reglas(almacen_reglas: AlmacenReglas, motor: MotorBusqueda) -> Dict[str, Any]:
+        """ `almacen_reglas.sincronizar` sin perfilar sus búsquedas. Se ejecuta en el hilo de fondo. """
+        with motor.sin_perfilar():
+            return almacen_reglas.sincronizar(motor)
+
+    def _sondear_sincronizacion_reglas(self):
+        futuro = self._futuro_reglas
+        if futuro is None:
+            return
+        if not futuro.done():
+            self.after(200, self._sondear_sincronizacion_reglas)
+            return
+        try:
+            resumen = futuro.result()
+        except Exception:
+            logger.exception("Error al sincronizar las reglas guardadas.")
+            self._actualizar_mensaje_barra_estado("Error al actualizar las reglas guardadas. Consulte el log.")
+            return
+        if resumen["reglas"]:
+            self._actualizar_mensaje_barra_estado(f"Reglas guardadas actualizadas: {resumen['reglas']} reglas, {resumen['filas_evaluadas']} "
+                                                  f"de {resumen['filas']} filas evaluadas en {resumen['segundos']:.1f}s.")
+
+    def _mostrar_reglas_guardadas_ui(self):
+        """ Lista de las reglas guardadas: abrir una muestra su resultado guardado, sin volver a buscar. """
+        if self.almacen_reglas is None:
+            messagebox.showinfo("Reglas Guardadas", "El motor de búsqueda aún se está iniciando.")
+            return
+        ventana = tk.Toplevel(self)
+        ventana.title("Reglas guardadas")
+        ventana.transient(self)
+        lista = tk.Listbox(ventana, width=90, height=15, font=("Courier New", 9))
+        lista.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+        nombres: List[str] = []
+
+        def _rellenar():
+            lista.delete(0, "end")
+            nombres.clear()
+            for regla in self.almacen_reglas.reglas():
+                nombres.append(regla.nombre)
+                modo = "dicc." if regla.via_diccionario else "directa"
+                lista.insert("end", f"{regla.nombre}  |  '{regla.termino}' ({modo})  |  {regla.num_filas} filas  |  {regla.fecha_evaluacion or '-'}")
+
+        def _seleccionada() -> Optional[str]:
+            seleccion = lista.curselection()
+            return nombres[seleccion[0]] if seleccion else None
+
+        def _abrir(_evento=None):
+            nombre = _seleccionada()
+            if nombre is not None and self._try_except_wrapper(self._abrir_regla_ui, nombre):
+                ventana.destroy()
+
+        def _eliminar():
+            nombre = _seleccionada()
+            if nombre is not None and messagebox.askyesno("Eliminar Regla", f"¿Eliminar la regla '{nombre}'?", parent=ventana):
+                self.almacen_reglas.eliminar(nombre)
+                _rellenar()
+
+        _rellenar()
+        lista.bind("<Double-Button-1>", _abrir)
+        marco_botones = ttk.Frame(ventana)
+        marco_botones.pack(pady=(0, 8))
+        ttk.Button(marco_botones, text="Abrir", command=_abrir).pack(side="left", padx=4)
+        ttk.Button(marco_botones, text="Eliminar", command=_eliminar).pack(side="left", padx=4)
+        ttk.Button(marco_botones, text="Cerrar", command=ventana.destroy).pack(side="left", padx=4)
+
+    def _abrir_regla_ui(self, nombre: str) -> bool:
+        """ Muestra el resultado guardado de la regla `nombre`. Devuelve True si se pudo mostrar. """
+        regla = self.almacen_reglas.regla(nombre)
+        if regla is None or self.motor is None or self.motor.datos_descripcion is None:
+            messagebox.showwarning("Abrir Regla", "Cargue las descripciones para ver el resultado de la regla.")
+            return False
+        ids_regla = self.almacen_reglas.ids_resultado(regla, self.motor)
+        if ids_regla is None:
+            if self._futuro_reglas is not None and not self._futuro_reglas.done():
+                messagebox.showinfo("Abrir Regla", "Las reglas se están actualizando con los archivos cargados. Inténtelo en unos segundos.")
+            else:
+                self._sincronizar_reglas_en_segundo_plano()
+                messagebox.showinfo("Abrir Regla", "Las reglas no estaban al día con los archivos cargados; se están actualizando.")
+            return False
+
+        self._cancelar_busqueda_en_vivo()
+        self.texto_busqueda_var.set(regla.termino)
+        self._cancelar_busqueda_en_vivo() # El cambio de texto no debe lanzar una búsqueda
+        self._ocultar_sugerencias()
+        self.ultimo_termino_buscado = regla.termino
+        self.origen_principal_resultados = OrigenResultados[regla.origen]
+        self.fcds_de_ultima_busqueda = None
+        self.indices_fcds_resaltados = None
+        self.ids_resultados_actuales = ids_regla
+        self.ids_desc_finales_de_ultima_busqueda = ids_regla
+        self._actualizar_tabla_treeview_ui(self.tabla_resultados, self.resultados_actuales)
+        self._actualizar_mensaje_barra_estado(f"Regla '{regla.nombre}': {regla.num_filas} filas (resultado guardado, evaluado el {regla.fecha_evaluacion}).")
+        self._actualizar_estado_general_botones_y_controles()
+        return True
 
     def _exportar_resultados_ui(self):
         """ Exporta los resultados actuales (de la tabla de descripciones) a un archivo Excel o CSV. """
-        if self.resultados_actuales is None or self.resultados_actuales.empty:
+        if not self._hay_resultados_actuales():
             messagebox.showinfo("Exportar Resultados", "No hay resultados para exportar.")
             return
 
@@ -894,10 +1534,12 @@ class InterfazGrafica(tk.Tk):
             return
 
         try:
+            # Incluye las columnas que, con memoria compacta, no se guardan en memoria (se leen del archivo ahora)
+            df_exportar = self.motor.filas_descripcion_completas(self.resultados_actuales)
             if ruta_archivo_exportar.endswith(".xlsx"):
-                self.resultados_actuales.to_excel(ruta_archivo_exportar, index=False)
+                df_exportar.to_excel(ruta_archivo_exportar, index=False)
             elif ruta_archivo_exportar.endswith(".csv"):
-                self.resultados_actuales.to_csv(ruta_archivo_exportar, index=False, encoding='utf-8-sig') # utf-8-sig para mejor compatibilidad con Excel para CSVs
+                df_exportar.to_csv(ruta_archivo_exportar, index=False, encoding='utf-8-sig') # utf-8-sig para mejor compatibilidad con Excel para CSVs
             else: # Debería ser manejado por defaultextension, pero por si acaso
                 messagebox.showerror("Error de Formato", "Formato de archivo no soportado. Use .xlsx o .csv.")
                 return
@@ -911,7 +1553,7 @@ class InterfazGrafica(tk.Tk):
     def _actualizar_estado_botones_operadores(self):
         """ Habilita o deshabilita los botones de operadores según el contexto del texto de búsqueda. """
         # Si no hay archivos cargados, todos deshabilitados
-        if self.motor.datos_diccionario is None and self.motor.datos_descripcion is None:
+        if self.motor is None or (self.motor.datos_diccionario is None and self.motor.datos_descripcion is None):
             self._deshabilitar_botones_operadores()
             return
 
@@ -931,7 +1573,7 @@ class InterfazGrafica(tk.Tk):
         operadores_comparacion_prefijo = [">", "<"]
 
         # No se puede empezar con operadores lógicos o relacionales de sufijo
-        if not ultimo_caracter_relevante or ultimo_caracter_relevante in operadores_logicos + ["#", "<", ">", "=", "-"]:
+        if not ultimo_caracter_relevante or ultimo_caracter_relevante in operadores_logicos + ["#", "~", "<", ">", "=", "-"]:
             if self.op_buttons.get("+"): self.op_buttons["+"]["state"] = "disabled"
             if self.op_buttons.get("|"): self.op_buttons["|"]["state"] = "disabled"
             # No se puede poner ">=" o "<=" si ya hay un ">" o "<"
@@ -939,6 +1581,10 @@ class InterfazGrafica(tk.Tk):
         # No se puede poner # si el último carácter no es espacio o inicio de query o operador lógico
         if ultimo_caracter_relevante and ultimo_caracter_relevante not in operadores_logicos + [" "]:
              if self.op_buttons.get("#"): self.op_buttons["#"]["state"] = "disabled"
+
+        # ~ (difuso) solo al principio de un término: inicio de query, tras operador lógico o tras #
+        if ultimo_caracter_relevante and ultimo_caracter_relevante not in operadores_logicos + ["#", " "]:
+             if self.op_buttons.get("~"): self.op_buttons["~"]["state"] = "disabled"
         
         # Lógica para operadores de comparación y rango
         if ultimo_caracter_relevante in [">", "<", "="]: # Si ya se escribió un operador de comparación
@@ -971,6 +1617,8 @@ class InterfazGrafica(tk.Tk):
             texto_a_insertar = f"{operador_limpio}"
         elif operador_limpio == "#": # Negación, con espacio después
             texto_a_insertar = f"{operador_limpio} "
+        elif operador_limpio == "~": # Difuso, pegado al término que sigue
+            texto_a_insertar = operador_limpio
         else: # Caso genérico (no debería ocurrir con los botones actuales)
             texto_a_insertar = operador_limpio
             
@@ -988,6 +1636,11 @@ class InterfazGrafica(tk.Tk):
         try:
             logger.info("Cerrando aplicación Buscador Avanzado...")
             self._guardar_configuracion_app() # Guardar configuración antes de salir
+            self._cancelar_busqueda_en_vivo()
+            if self._ejecutor_en_vivo is not None:
+                self._ejecutor_en_vivo.shutdown(wait=False)
+            if self._ejecutor_reglas is not None:
+                self._ejecutor_reglas.shutdown(wait=False)
             self.destroy() # Cerrar la ventana de Tkinter
         except Exception as e: # Captura cualquier error durante el cierre
             func_name = "on_closing_app"
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# buscador_app/registro.py
+
+import atexit
+import itertools
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+FORMATO_LOG = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(funcName)s() - %(message)s"
+NIVEL_PRODUCCION = logging.INFO
+
+# Logger de los mensajes por celda/coincidencia de las rutas calientes del motor. Está separado del
+# resto para que activar DEBUG no inunde el log: solo emite si se activa el modo traza (muestreado).
+NOMBRE_LOGGER_TRAZA = "buscador_app.traza"
+
+
+class MuestreoTraza:
+    """ Decide qué mensajes de traza se emiten: uno de cada `cada_n` (0 = ninguno, 1 = todos).
+
+    Las rutas calientes consultan `activo` (un atributo) antes de nada, así que con la traza
+    desactivada no se formatea ningún mensaje ni se llama al logging por cada celda.
+    """
+
+    def __init__(self):
+        self.cada_n = 0
+        self.activo = False
+        self._contador = itertools.count()
+
+    def configurar(self, cada_n: int):
+        self.cada_n = max(0, int(cada_n))
+        self.activo = self.cada_n > 0
+        logging.getLogger(NOMBRE_LOGGER_TRAZA).setLevel(logging.DEBUG if self.activo else logging.INFO)
+
+    def tomar(self) -> bool:
+        """ True si este mensaje de traza debe emitirse. """
+        return self.activo and next(self._contador) % self.cada_n == 0
+
+
+muestreo_traza = MuestreoTraza()
+logger_traza = logging.getLogger(NOMBRE_LOGGER_TRAZA)
+logger_traza.setLevel(logging.INFO)
+
+
+class ConfiguracionLogging:
+    """ Logging asíncrono: los hilos que registran solo encolan; un hilo escritor formatea y escribe.
+
+    El formateo y la E/S de archivo/consola salen así de las búsquedas (y del hilo de Tk).
+    `detener()` vacía la cola; se registra también con `atexit`.
+    """
+
+    def __init__(self, manejadores: List[logging.Handler], nivel: int):
+        self.nivel = nivel
+        self.manejadores = manejadores
+        self._cola: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.manejador_cola = QueueHandler(self._cola)
+        self.escritor = QueueListener(self._cola, *manejadores, respect_handler_level=True)
+        self._activo = False
+
+    def iniciar(self):
+        raiz = logging.getLogger()
+        for manejador_previo in list(raiz.handlers):
+            raiz.removeHandler(manejador_previo)
+        raiz.addHandler(self.manejador_cola)
+        raiz.setLevel(self.nivel)
+        self.escritor.start()
+        self._activo = True
+        atexit.register(self.detener)
+
+    def detener(self):
+        if not self._activo:
+            return
+        self._activo = False
+        self.escritor.stop() # Procesa lo que quede en la cola antes de volver
+        for manejador in self.manejadores:
+            manejador.close()
+
+
+def nivel_desde_texto(texto: Optional[str], por_defecto: int = NIVEL_PRODUCCION) -> int:
+    """ 'debug', 'INFO', '10'... -> nivel de logging (por defecto si no se reconoce). """
+    if texto is None:
+        return por_defecto
+    texto = str(texto).strip().upper()
+    if texto.isdigit():
+        return int(texto)
+    nivel = logging.getLevelName(texto)
+    return nivel if isinstance(nivel, int) else por_defecto
+
+
+def configurar_logging(nivel: int = NIVEL_PRODUCCION, ruta_archivo: Optional[str] = None, modo_archivo: str = "a",
+                       consola: bool = True, formato: str = FORMATO_LOG, traza_cada_n: int = 0) -> ConfiguracionLogging:
+    """ Configura el logger raíz con un QueueHandler y un QueueListener que escribe en archivo y/o consola.
+
+    `traza_cada_n` activa el modo traza: con nivel DEBUG, emite 1 de cada N mensajes por celda de las
+    rutas calientes del motor (parseo de números, coincidencias numéricas). 0 lo desactiva.
+    """
+    formateador = logging.Formatter(formato)
+    manejadores: List[logging.Handler] = []
+    if ruta_archivo:
+        manejadores.append(logging.FileHandler(ruta_archivo, encoding="utf-8", mode=modo_archivo))
+    if consola:
+        manejadores.append(logging.StreamHandler())
+    for manejador in manejadores:
+        manejador.setFormatter(formateador)
+
+    configuracion = ConfiguracionLogging(manejadores, nivel)
+    configuracion.iniciar()
+    muestreo_traza.configurar(traza_cada_n if nivel <= logging.DEBUG else 0)
+    return configuracion
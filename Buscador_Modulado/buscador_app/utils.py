@@ -30,6 +30,8 @@ class ExtractorMagnitud:
                 sinonimo_norm = self._normalizar_texto(str(sinonimo_original)) 
                 if sinonimo_norm: 
                     self.sinonimo_a_canonico_normalizado[sinonimo_norm] = canonico_norm 
+        # Texto tal cual -> forma canónica (o None): cada texto distinto se normaliza una sola vez
+        self._canonica_por_texto: Dict[str, Optional[str]] = {}
         logger.debug(f"ExtractorMagnitud inicializado/actualizado con {len(self.sinonimo_a_canonico_normalizado)} mapeos normalizados.")
 
 
@@ -50,12 +52,19 @@ class ExtractorMagnitud:
     def obtener_magnitud_normalizada(self, texto_unidad: str) -> Optional[str]:
         if not texto_unidad: 
             return None 
+        try:
+            return self._canonica_por_texto[texto_unidad]
+        except KeyError:
+            pass
         normalizada = self._normalizar_texto(texto_unidad) 
-        return self.sinonimo_a_canonico_normalizado.get(normalizada) if normalizada else None
+        canonica = self.sinonimo_a_canonico_normalizado.get(normalizada) if normalizada else None
+        self._canonica_por_texto[texto_unidad] = canonica # Lo escriben varios hilos, pero siempre con el mismo valor
+        return canonica
 
 class ManejadorExcel:
     @staticmethod
-    def cargar_excel(ruta_archivo: Union[str, Path]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    def cargar_excel(ruta_archivo: Union[str, Path], columnas: Optional[List[str]] = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """ Lee el Excel completo o, si se indican `columnas`, solo esas columnas (por nombre). """
         ruta = Path(ruta_archivo) 
         if not ruta.exists(): 
             mensaje_error = f"¡Archivo no encontrado! Ruta: {ruta}"
@@ -67,7 +76,7 @@ class ManejadorExcel:
                 engine = "openpyxl" 
             
             logger.info(f"ManejadorExcel: Cargando '{ruta.name}' con engine='{engine or 'auto (pandas intentará xlrd para .xls)'}'...")
-            df = pd.read_excel(ruta, engine=engine) 
+            df = pd.read_excel(ruta, engine=engine, usecols=columnas) 
             logger.info(f"ManejadorExcel: Archivo '{ruta.name}' ({len(df)} filas) cargado exitosamente.")
             return df, None 
             
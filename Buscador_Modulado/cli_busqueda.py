@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# cli_busqueda.py (Punto de entrada sin interfaz gráfica para búsquedas por lotes)
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from benchmarks.suite import percentil
+from buscador_app.arranque import verificar_dependencias
+from buscador_app.core.busqueda_en_flujo import FILAS_POR_BLOQUE_FLUJO, BusquedaEnFlujo
+from buscador_app.core.corpus import CorpusDescripciones
+from buscador_app.core.motor_busqueda import MotorBusqueda
+from buscador_app.core.reglas import AlmacenReglas
+from buscador_app.enums import OrigenResultados
+
+logger = logging.getLogger("cli_busqueda")
+
+# Motor (o corpus de varias fuentes) compartido por los trabajadores. En modo procesos con 'fork' los hijos
+# lo heredan ya cargado; con 'spawn' cada proceso lo carga una vez en `_inicializar_trabajador`.
+_MOTOR_GLOBAL: Optional[Union[MotorBusqueda, CorpusDescripciones]] = None
+
+ORIGENES_SIN_RESULTADOS_VIA_DICC = {
+    OrigenResultados.DICCIONARIO_SIN_COINCIDENCIAS,
+    OrigenResultados.VIA_DICCIONARIO_SIN_RESULTADOS_DESC,
+    OrigenResultados.VIA_DICCIONARIO_SIN_TERMINOS_VALIDOS,
+    OrigenResultados.VIA_DICCIONARIO_PURAMENTE_NEGATIVA_SIN_RESULTADOS_DESC,
+    OrigenResultados.VIA_DICCIONARIO_UNIDAD_SIN_RESULTADOS_DESC,
+}
+
+
+def cargar_motor(ruta_diccionario: Optional[str], ruta_descripciones: str, memoria_compacta: bool = False) -> MotorBusqueda:
+    """ Crea un motor y carga los archivos. Lanza RuntimeError si alguna carga falla. """
+    motor = MotorBusqueda()
+    motor.configurar_memoria(memoria_compacta)
+    if ruta_diccionario:
+        ok_dic, err_dic = motor.cargar_excel_diccionario(ruta_diccionario)
+        if not ok_dic:
+            raise RuntimeError(f"No se pudo cargar el diccionario: {err_dic}")
+    ok_desc, err_desc = motor.cargar_excel_descripcion(ruta_descripciones)
+    if not ok_desc:
+        raise RuntimeError(f"No se pudieron cargar las descripciones: {err_desc}")
+    return motor
+
+
+def parsear_fuente(valor: str) -> Tuple[str, str]:
+    """ (nombre, ruta) de "NOMBRE=RUTA"; con solo "RUTA", el nombre es el del archivo sin extensión. """
+    nombre, separador, ruta = valor.partition("=")
+    if not separador or not ruta.strip():
+        return Path(valor).stem, valor
+    return nombre.strip(), ruta.strip()
+
+
+def cargar_corpus(ruta_diccionario: Optional[str], fuentes: List[Tuple[str, str]], memoria_compacta: bool = False) -> CorpusDescripciones:
+    """ Crea un corpus con una fuente por archivo de descripciones. Lanza RuntimeError si alguna carga falla. """
+    corpus = CorpusDescripciones()
+    corpus.motor_base.configurar_memoria(memoria_compacta)
+    if ruta_diccionario:
+        ok_dic, err_dic = corpus.cargar_diccionario(ruta_diccionario)
+        if not ok_dic:
+            raise RuntimeError(f"No se pudo cargar el diccionario: {err_dic}")
+    for nombre, ruta in fuentes:
+        if corpus.fuente(nombre) is not None:
+            raise RuntimeError(f"Fuente '{nombre}' repetida.")
+        ok_fuente, err_fuente = corpus.cargar_fuente(nombre, ruta)
+        if not ok_fuente:
+            raise RuntimeError(f"No se pudo cargar la fuente '{nombre}': {err_fuente}")
+    return corpus
+
+
+def _inicializar_trabajador(ruta_diccionario: Optional[str], ruta_descripciones: Optional[str], nivel_log: int,
+                            fuentes: Optional[List[Tuple[str, str]]] = None, memoria_compacta: bool = False):
+    """ Inicializador de procesos trabajadores: carga el motor (o el corpus) solo si no se heredó del padre. """
+    global _MOTOR_GLOBAL
+    logging.basicConfig(level=nivel_log, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    if _MOTOR_GLOBAL is None:
+        if fuentes:
+            _MOTOR_GLOBAL = cargar_corpus(ruta_diccionario, fuentes, memoria_compacta)
+        else:
+            _MOTOR_GLOBAL = cargar_motor(ruta_diccionario, ruta_descripciones, memoria_compacta)
+
+
+def leer_consultas(ruta_consultas: str, columna: Optional[str] = None) -> List[str]:
+    """ Lee las consultas: una por línea (.txt) o de una columna de un Excel/CSV (por nombre o índice). """
+    ruta = Path(ruta_consultas)
+    sufijo = ruta.suffix.lower()
+    if sufijo in (".xlsx", ".xls", ".csv"):
+        df_consultas = pd.read_csv(ruta, dtype=str) if sufijo == ".csv" else pd.read_excel(ruta, dtype=str)
+        if df_consultas.empty or df_consultas.shape[1] == 0:
+            return []
+        if columna is None:
+            serie = df_consultas.iloc[:, 0]
+        elif columna in df_consultas.columns:
+            serie = df_consultas[columna]
+        elif columna.isdigit() and int(columna) < df_consultas.shape[1]:
+            serie = df_consultas.iloc[:, int(columna)]
+        else:
+            raise ValueError(f"Columna '{columna}' no encontrada en '{ruta.name}'. Columnas: {list(df_consultas.columns)}")
+        return [str(v).strip() for v in serie.dropna() if str(v).strip()]
+
+    # Texto plano: una consulta por línea (no se ignoran líneas con '#', que es el operador de negación)
+    with ruta.open("r", encoding="utf-8-sig") as f:
+        return [linea.strip() for linea in f if linea.strip()]
+
+
+def ejecutar_consulta(id_consulta: int, consulta: str, via_diccionario: bool, respaldo_directo: bool) -> Dict[str, Any]:
+    """ Ejecuta una consulta con el motor (o corpus) global y devuelve resultado y tiempos (se ejecuta en el trabajador). """
+    motor = _MOTOR_GLOBAL
+    inicio = time.perf_counter()
+    resultados_df, origen, fcds, _indices, mensaje_error = motor.buscar(consulta, via_diccionario)
+    if via_diccionario and respaldo_directo and origen in ORIGENES_SIN_RESULTADOS_VIA_DICC:
+        # Igual que la alternativa que ofrece la GUI: buscar la consulta directamente en descripciones
+        resultados_df, origen, fcds, _indices, mensaje_error = motor.buscar(consulta, False)
+    segundos = time.perf_counter() - inicio
+    return {
+        "id": id_consulta,
+        "consulta": consulta,
+        "origen": origen.name,
+        "num_fcds": int(len(fcds)) if fcds is not None else 0,
+        "num_filas": int(len(resultados_df)) if resultados_df is not None else 0,
+        "ms": round(segundos * 1000, 3),
+        "error": mensaje_error,
+        "resultados": resultados_df,
+    }
+
+
+def ejecutar_en_flujo(motor: MotorBusqueda, ruta_descripciones: str, consultas: List[str], via_diccionario: bool,
+                      respaldo_directo: bool, directorio_salida: Path, filas_por_bloque: int) -> List[Dict[str, Any]]:
+    """ Ejecuta todas las consultas leyendo las descripciones (CSV o Parquet) por bloques, en una sola pasada.
+
+    Cada consulta escribe sus filas en su CSV a medida que aparecen. Con `respaldo_directo`, las consultas
+    sin resultados vía diccionario se repiten en modo directo en una segunda pasada.
+    """
+    flujo = BusquedaEnFlujo(motor, ruta_descripciones, filas_por_bloque)
+    archivos = [directorio_salida / f"consulta_{i:05d}.csv" for i in range(1, len(consultas) + 1)]
+    registros = flujo.exportar_lote([(consulta, str(archivo)) for consulta, archivo in zip(consultas, archivos)], via_diccionario)
+    if via_diccionario and respaldo_directo:
+        repetir = [i for i, registro in enumerate(registros) if OrigenResultados[registro["origen"]] in ORIGENES_SIN_RESULTADOS_VIA_DICC]
+        if repetir:
+            directos = flujo.exportar_lote([(consultas[i], str(archivos[i])) for i in repetir], False)
+            for i, registro_directo in zip(repetir, directos):
+                registro_directo["ms"] = round(registro_directo["ms"] + registros[i]["ms"], 3)
+                registros[i] = registro_directo
+    for i, (registro, archivo) in enumerate(zip(registros, archivos), start=1):
+        registro["id"] = i
+        registro["archivo"] = archivo.name if registro["num_filas"] else None
+        if not registro["num_filas"]:
+            archivo.unlink(missing_ok=True) # Como en la búsqueda en memoria: sin filas no hay archivo
+    return registros
+
+
+def construir_resumen(registros: List[Dict[str, Any]], segundos_totales: float, segundos_carga: float, trabajadores: int) -> Dict[str, Any]:
+    tiempos = sorted(r["ms"] for r in registros)
+    conteo_origenes: Dict[str, int] = {}
+    for r in registros:
+        conteo_origenes[r["origen"]] = conteo_origenes.get(r["origen"], 0) + 1
+    return {
+        "consultas": len(registros),
+        "trabajadores": trabajadores,
+        "segundos_carga": round(segundos_carga, 3),
+        "segundos_busqueda": round(segundos_totales, 3),
+        "consultas_por_segundo": round(len(registros) / segundos_totales, 3) if segundos_totales > 0 else None,
+        "ms_p50": percentil(tiempos, 50),
+        "ms_p95": percentil(tiempos, 95),
+        "ms_max": tiempos[-1] if tiempos else 0.0,
+        "ms_total_consultas": round(sum(tiempos), 3),
+        "filas_totales": sum(r["num_filas"] for r in registros),
+        "origenes": conteo_origenes,
+        "por_consulta": sorted(({k: v for k, v in r.items() if k != "resultados"} for r in registros), key=lambda r: r["id"]),
+    }
+
+
+def _crear_ejecutor(tipo_trabajador: str, trabajadores: int, args: argparse.Namespace, nivel_log: int,
+                    fuentes: Optional[List[Tuple[str, str]]] = None) -> Executor:
+    if tipo_trabajador == "procesos":
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context("fork" if "fork" in metodos else "spawn")
+        ruta_diccionario = args.diccionario if args.modo == "diccionario" else None # En modo directo no se usa
+        return ProcessPoolExecutor(max_workers=trabajadores, mp_context=contexto, initializer=_inicializar_trabajador,
+                                   initargs=(ruta_diccionario, args.descripciones, nivel_log, fuentes, args.memoria_compacta))
+    return ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="consulta")
+
+
+def ejecutar_reglas(ruta_reglas: str, ruta_diccionario: Optional[str], ruta_descripciones: str, directorio_salida: Path,
+                    memoria_compacta: bool = False) -> int:
+    """ Aplica las reglas guardadas en `ruta_reglas` a `ruta_descripciones` (p. ej. un catálogo nuevo) en un solo lote. """
+    if not Path(ruta_reglas).exists():
+        logger.critical(f"No existe el archivo de reglas '{ruta_reglas}'.")
+        return 1
+    almacen = AlmacenReglas(ruta_reglas)
+    if not almacen.reglas():
+        logger.warning("El archivo de reglas no contiene ninguna regla.")
+        return 0
+    if not ruta_diccionario and any(regla.via_diccionario for regla in almacen.reglas()):
+        logger.critical("Hay reglas vía diccionario: indique --diccionario.")
+        return 1
+    inicio_carga = time.perf_counter()
+    try:
+        motor = cargar_motor(ruta_diccionario, ruta_descripciones, memoria_compacta)
+    except RuntimeError as e_carga:
+        logger.critical(str(e_carga))
+        return 1
+    segundos_carga = time.perf_counter() - inicio_carga
+
+    aplicacion = almacen.aplicar_a(motor)
+    registros = aplicacion.exportar(str(directorio_salida))
+    for registro in registros:
+        registro["consulta"] = registro["termino"]
+    resumen = construir_resumen(registros, aplicacion.segundos, segundos_carga, 1)
+    resumen["filas_descripciones"] = aplicacion.matriz.num_filas
+    resumen["filas_con_alguna_regla"] = int((aplicacion.matriz.reglas_por_fila() > 0).sum())
+    with (directorio_salida / "resumen.json").open("w", encoding="utf-8") as f_resumen:
+        json.dump(resumen, f_resumen, indent=4, ensure_ascii=False, default=str)
+
+    print(f"Reglas: {resumen['consultas']} | Carga: {resumen['segundos_carga']:.2f}s | Evaluación: {resumen['segundos_busqueda']:.2f}s | "
+          f"Filas con alguna regla: {resumen['filas_con_alguna_regla']} de {resumen['filas_descripciones']}")
+    for nombre_origen, cantidad in sorted(resumen["origenes"].items(), key=lambda kv: -kv[1]):
+        print(f"  {cantidad:6d}  {nombre_origen}")
+    print(f"Resultados en: {directorio_salida.resolve()}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    global _MOTOR_GLOBAL
+    parser = argparse.ArgumentParser(description="Búsqueda por lotes sin interfaz gráfica usando MotorBusqueda.")
+    parser.add_argument("--diccionario", help="Archivo Excel de diccionario (obligatorio en modo 'diccionario').")
+    parser.add_argument("--descripciones", help="Archivo Excel de descripciones (o bien una o más --fuente).")
+    parser.add_argument("--fuente", action="append", default=[], metavar="NOMBRE=RUTA",
+                        help="Fuente de descripciones de un corpus (repetible). Las fuentes se buscan en paralelo y cada fila indica la suya.")
+    parser.add_argument("--consultas", help="Archivo de consultas: .txt (una por línea) o .xlsx/.xls/.csv.")
+    parser.add_argument("--reglas", metavar="ARCHIVO_REGLAS",
+                        help="En lugar de --consultas, aplicar todas las reglas guardadas (reglas_buscador.json) a --descripciones de una vez, "
+                             "cada una en su modo: un CSV por regla, reglas.jsonl y la matriz de pertenencia pertenencia.npz.")
+    parser.add_argument("--columna", default=None, help="Columna de consultas en Excel/CSV (nombre o índice). Por defecto, la primera.")
+    parser.add_argument("--modo", choices=["diccionario", "directo"], default="diccionario", help="Búsqueda vía diccionario o directa en descripciones.")
+    parser.add_argument("--respaldo-directo", action="store_true", help="En modo diccionario, si no hay resultados, repetir la consulta en modo directo (como ofrece la GUI).")
+    parser.add_argument("--salida", default="resultados_lote", help="Directorio de salida (un CSV por consulta, consultas.jsonl y resumen.json).")
+    parser.add_argument("--trabajadores", type=int, default=4, help="Número de trabajadores en paralelo.")
+    parser.add_argument("--tipo-trabajador", choices=["hilos", "procesos"], default="hilos", help="Hilos (memoria compartida) o procesos (paralelismo real de CPU).")
+    parser.add_argument("--flujo", action="store_true",
+                        help="Leer --descripciones (CSV o Parquet) por bloques, sin cargarlas enteras: para archivos que no caben en memoria.")
+    parser.add_argument("--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE_FLUJO, help="Filas por bloque con --flujo.")
+    parser.add_argument("--memoria-compacta", action="store_true", help="Carga los datos en representación compacta (categóricas, cadenas Arrow, números reducidos).")
+    parser.add_argument("--nivel-log", default="WARNING", help="Nivel de logging (DEBUG, INFO, WARNING...).")
+    args = parser.parse_args(argv)
+
+    nivel_log = getattr(logging, str(args.nivel_log).upper(), logging.WARNING)
+    logging.basicConfig(level=nivel_log, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    faltantes, _versiones = verificar_dependencias()
+    if faltantes:
+        logger.critical(f"Faltan dependencias críticas: {', '.join(faltantes)}. Instale con: pip install {' '.join(faltantes)}")
+        return 1
+
+    via_diccionario = args.modo == "diccionario"
+    if bool(args.consultas) == bool(args.reglas):
+        parser.error("Indique --consultas o bien --reglas.")
+    if args.reglas:
+        if not args.descripciones or args.flujo:
+            parser.error("--reglas solo admite --descripciones, sin --flujo.")
+        return ejecutar_reglas(args.reglas, args.diccionario, args.descripciones, Path(args.salida), args.memoria_compacta)
+    if via_diccionario and not args.diccionario:
+        parser.error("--diccionario es obligatorio en modo 'diccionario'.")
+    if bool(args.descripciones) == bool(args.fuente):
+        parser.error("Indique --descripciones o bien una o más --fuente.")
+    if args.flujo and args.fuente:
+        parser.error("--flujo solo admite --descripciones.")
+    fuentes = [parsear_fuente(valor) for valor in args.fuente]
+
+    try:
+        consultas = leer_consultas(args.consultas, args.columna)
+    except Exception as e_consultas:
+        logger.critical(f"No se pudieron leer las consultas de '{args.consultas}': {e_consultas}")
+        return 1
+    if not consultas:
+        logger.warning("El archivo de consultas no contiene ninguna consulta.")
+        return 0
+
+    inicio_carga = time.perf_counter()
+    try:
+        ruta_diccionario = args.diccionario if via_diccionario else None
+        if args.flujo: # Solo el diccionario: las descripciones se leen por bloques al buscar
+            _MOTOR_GLOBAL = MotorBusqueda()
+            _MOTOR_GLOBAL.configurar_memoria(args.memoria_compacta)
+            if ruta_diccionario:
+                ok_dic, err_dic = _MOTOR_GLOBAL.cargar_excel_diccionario(ruta_diccionario)
+                if not ok_dic:
+                    raise RuntimeError(f"No se pudo cargar el diccionario: {err_dic}")
+        elif fuentes:
+            _MOTOR_GLOBAL = cargar_corpus(ruta_diccionario, fuentes, args.memoria_compacta)
+        else:
+            _MOTOR_GLOBAL = cargar_motor(ruta_diccionario, args.descripciones, args.memoria_compacta)
+    except RuntimeError as e_carga:
+        logger.critical(str(e_carga))
+        return 1
+    segundos_carga = time.perf_counter() - inicio_carga
+
+    directorio_salida = Path(args.salida)
+    directorio_salida.mkdir(parents=True, exist_ok=True)
+    trabajadores = max(1, args.trabajadores)
+    registros: List[Dict[str, Any]] = []
+
+    inicio_busqueda = time.perf_counter()
+    if args.flujo:
+        trabajadores = 1 # Una sola lectura del archivo para todas las consultas
+        try:
+            registros = ejecutar_en_flujo(_MOTOR_GLOBAL, args.descripciones, consultas, via_diccionario, args.respaldo_directo,
+                                          directorio_salida, args.filas_por_bloque)
+        except (OSError, ValueError, ImportError) as e_flujo:
+            logger.critical(f"No se pudieron leer las descripciones por bloques: {e_flujo}")
+            return 1
+        with (directorio_salida / "consultas.jsonl").open("w", encoding="utf-8") as f_indice:
+            for registro in registros:
+                f_indice.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    else:
+        registros = _ejecutar_en_memoria(args, consultas, via_diccionario, trabajadores, nivel_log, fuentes, directorio_salida)
+    segundos_busqueda = time.perf_counter() - inicio_busqueda
+    if isinstance(_MOTOR_GLOBAL, CorpusDescripciones):
+        _MOTOR_GLOBAL.cerrar()
+
+    resumen = construir_resumen(registros, segundos_busqueda, segundos_carga, trabajadores)
+    with (directorio_salida / "resumen.json").open("w", encoding="utf-8") as f_resumen:
+        json.dump(resumen, f_resumen, indent=4, ensure_ascii=False)
+
+    print(f"Consultas: {resumen['consultas']} | Trabajadores: {trabajadores} ({'flujo' if args.flujo else args.tipo_trabajador}) | "
+          f"Carga: {resumen['segundos_carga']:.2f}s | Búsqueda: {resumen['segundos_busqueda']:.2f}s | "
+          f"{resumen['consultas_por_segundo']} consultas/s")
+    print(f"Latencia por consulta (ms): p50={resumen['ms_p50']:.1f} p95={resumen['ms_p95']:.1f} max={resumen['ms_max']:.1f}")
+    for nombre_origen, cantidad in sorted(resumen["origenes"].items(), key=lambda kv: -kv[1]):
+        print(f"  {cantidad:6d}  {nombre_origen}")
+    print(f"Resultados en: {directorio_salida.resolve()}")
+    return 0
+
+
+def _ejecutar_en_memoria(args: argparse.Namespace, consultas: List[str], via_diccionario: bool, trabajadores: int, nivel_log: int,
+                         fuentes: List[Tuple[str, str]], directorio_salida: Path) -> List[Dict[str, Any]]:
+    registros: List[Dict[str, Any]] = []
+    with _crear_ejecutor(args.tipo_trabajador, trabajadores, args, nivel_log, fuentes) as ejecutor, \
+         (directorio_salida / "consultas.jsonl").open("w", encoding="utf-8") as f_indice:
+        futuros = {ejecutor.submit(ejecutar_consulta, i, consulta, via_diccionario, args.respaldo_directo): i
+                   for i, consulta in enumerate(consultas, start=1)}
+        # Los resultados se escriben según van terminando, sin esperar al resto del lote
+        for futuro in as_completed(futuros):
+            registro = futuro.result()
+            resultados_df = registro["resultados"]
+            registro["archivo"] = None
+            if resultados_df is not None and not resultados_df.empty:
+                archivo_resultado = directorio_salida / f"consulta_{registro['id']:05d}.csv"
+                resultados_df.to_csv(archivo_resultado, index=False, encoding="utf-8-sig")
+                registro["archivo"] = archivo_resultado.name
+            registro["resultados"] = None # Liberar memoria: ya está en disco
+            f_indice.write(json.dumps({k: v for k, v in registro.items() if k != "resultados"}, ensure_ascii=False) + "\n")
+            f_indice.flush()
+            registros.append(registro)
+            logger.info(f"[{len(registros)}/{len(consultas)}] '{registro['consulta']}': {registro['num_filas']} filas ({registro['origen']}) en {registro['ms']:.1f} ms")
+    return registros
+
+
+if __name__ == "__main__":
+    sys.exit(main())
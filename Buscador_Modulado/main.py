@@ -1,42 +1,59 @@
 # -*- coding: utf-8 -*-
 # main.py (Punto de entrada principal de la aplicación)
 
+import argparse
 import logging
+import threading
 from pathlib import Path
 import tkinter as tk # Para el messagebox en la verificación de dependencias
 from tkinter import messagebox
 import traceback # Para el bloque __main__ try-except final
 
-# Importación desde tu paquete de aplicación
+# Importación desde tu paquete de aplicación (ligera: pandas y el motor se importan tras mostrar la ventana)
+from buscador_app.arranque import MedidorArranque, verificar_dependencias, desglose_importtime
+from buscador_app.registro import FORMATO_LOG, configurar_logging, nivel_desde_texto
 from buscador_app.gui.interfaz_grafica import InterfazGrafica
 from typing import List # Necesario para dependencias_faltantes_main
 
+def _informar_medicion_arranque(app: InterfazGrafica, medidor: MedidorArranque):
+    """ Cuando el motor está listo, registra los hitos de arranque y el desglose de importaciones. """
+    if app.motor is None:
+        app.after(100, _informar_medicion_arranque, app, medidor)
+        return
+    informe_hitos = medidor.informe()
+    logging.getLogger().info(f"\n{informe_hitos}")
+
+    def _medir_importaciones():
+        informe_importaciones = desglose_importtime("buscador_app.core.motor_busqueda")
+        logging.getLogger().info(f"\n{informe_importaciones}")
+    threading.Thread(target=_medir_importaciones, name="medicion_importtime", daemon=True).start()
+
 # --- Punto de Entrada Principal de la Aplicación ---
 if __name__ == "__main__":
+    parser_args = argparse.ArgumentParser(description="Buscador Avanzado (interfaz gráfica).")
+    parser_args.add_argument("--medir-arranque", action="store_true",
+                             help="Registra los tiempos de arranque y un desglose estilo '-X importtime' de los módulos pesados.")
+    parser_args.add_argument("--nivel-log", default="INFO",
+                             help="Nivel de logging (DEBUG, INFO, WARNING...). Por defecto INFO, el de uso normal.")
+    parser_args.add_argument("--traza-muestreo", type=int, default=0, metavar="N",
+                             help="Con --nivel-log DEBUG, registra 1 de cada N mensajes por celda de las búsquedas (0 = ninguno).")
+    args_main = parser_args.parse_args()
+    medidor_arranque = MedidorArranque(activo=args_main.medir_arranque)
+
     LOG_FILE_NAME = "Buscador_Avanzado_App_v1.10.3_Mod.log"
-    # Configuración básica del logging
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(funcName)s() - %(message)s",
-        handlers=[
-            logging.FileHandler(LOG_FILE_NAME, encoding="utf-8", mode="w"),
-            logging.StreamHandler()
-        ]
-    )
+    # Logging asíncrono: la interfaz y las búsquedas solo encolan; un hilo escribe en archivo y consola
+    configurar_logging(nivel=nivel_desde_texto(args_main.nivel_log), ruta_archivo=LOG_FILE_NAME, modo_archivo="w",
+                       formato=FORMATO_LOG, traza_cada_n=args_main.traza_muestreo)
     root_logger = logging.getLogger()
     root_logger.info(f"--- Iniciando Buscador Avanzado v1.10.3 Mod (Modularizado) (Script: {Path(__file__).name}) ---")
     root_logger.info(f"Logs siendo guardados en: {Path(LOG_FILE_NAME).resolve()}")
 
-    # Verificación de dependencias
-    dependencias_faltantes_main: List[str] = []
-    try: import pandas as pd_check_main; root_logger.info(f"Pandas: {pd_check_main.__version__}")
-    except ImportError: dependencias_faltantes_main.append("pandas")
-    try: import openpyxl as opxl_check_main; root_logger.info(f"openpyxl: {opxl_check_main.__version__}")
-    except ImportError: dependencias_faltantes_main.append("openpyxl")
-    try: import numpy as np_check_main; root_logger.info(f"Numpy: {np_check_main.__version__}")
-    except ImportError: dependencias_faltantes_main.append("numpy")
-    try: import xlrd as xlrd_check_main; root_logger.info(f"xlrd: {xlrd_check_main.__version__}")
-    except ImportError: root_logger.warning("xlrd no encontrado. Carga de .xls antiguos podría fallar.")
+    medidor_arranque.marcar("logging_configurado")
+
+    # Verificación de dependencias (sin importar los paquetes: solo especificaciones y metadatos)
+    dependencias_faltantes_main: List[str]
+    dependencias_faltantes_main, _versiones_main = verificar_dependencias()
+    medidor_arranque.marcar("dependencias_verificadas")
 
     if dependencias_faltantes_main:
         mensaje_error_deps_main = (f"Faltan dependencias críticas: {', '.join(dependencias_faltantes_main)}.\nInstale con: pip install {' '.join(dependencias_faltantes_main)}")
@@ -49,7 +66,9 @@ if __name__ == "__main__":
     
     # Inicia la aplicación
     try: 
-        app=InterfazGrafica()
+        app=InterfazGrafica(medidor_arranque=medidor_arranque)
+        if args_main.medir_arranque:
+            app.after(100, _informar_medicion_arranque, app, medidor_arranque)
         app.mainloop()
     except Exception as e_main_app_exc:
         root_logger.critical("Error fatal no controlado en la aplicación principal:", exc_info=True)
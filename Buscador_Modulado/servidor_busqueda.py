@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# servidor_busqueda.py (Servicio HTTP/JSON local que comparte un único motor cargado)
+
+import argparse
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from buscador_app.arranque import verificar_dependencias
+from buscador_app.core.metricas import FORMATO_JSON, FORMATO_PROMETHEUS, ExportadorMetricas
+from buscador_app.core.servicio_busqueda import ServicioBusqueda
+from buscador_app.registro import configurar_logging, nivel_desde_texto
+from cli_busqueda import cargar_motor
+
+logger = logging.getLogger("servidor_busqueda")
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 10000
+VALORES_FALSOS = {"0", "false", "no", "directo"}
+
+
+def _a_bool(valor: Any, por_defecto: bool) -> bool:
+    if valor is None:
+        return por_defecto
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() not in VALORES_FALSOS
+
+
+def _a_entero(valor: Any, por_defecto: int, minimo: int = 0, maximo: Optional[int] = None) -> int:
+    if valor is None or valor == "":
+        return por_defecto
+    entero = int(valor) # ValueError -> 400 en el manejador
+    entero = max(minimo, entero)
+    return min(maximo, entero) if maximo is not None else entero
+
+
+class ManejadorBusqueda(BaseHTTPRequestHandler):
+    """ Endpoints: GET/POST /buscar, GET /estado, GET /metricas, POST /recargar. Todas las respuestas son JSON salvo /metricas. """
+
+    servicio: ServicioBusqueda # Se asigna en `crear_servidor`
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato: str, *args: Any):
+        logger.debug(f"{self.address_string()} - {formato % args}")
+
+    def _responder(self, codigo: int, cuerpo: Dict[str, Any]):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _responder_texto(self, codigo: int, texto: str, tipo_contenido: str):
+        datos = texto.encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo_contenido)
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _atender_metricas(self, parametros: Dict[str, Any]):
+        motor = self.servicio.motor
+        if motor.metricas is None:
+            self._responder(404, {"error": "Métricas desactivadas (inicie el servidor con --metricas)."})
+        elif parametros.get("formato") == FORMATO_JSON:
+            self._responder(200, motor.metricas.a_dict(motor))
+        else:
+            self._responder_texto(200, motor.metricas.a_prometheus(motor), "text/plain; version=0.0.4; charset=utf-8")
+
+    def _leer_json(self) -> Dict[str, Any]:
+        longitud = int(self.headers.get("Content-Length") or 0)
+        if longitud <= 0:
+            return {}
+        cuerpo = json.loads(self.rfile.read(longitud).decode("utf-8"))
+        if not isinstance(cuerpo, dict):
+            raise ValueError("El cuerpo JSON debe ser un objeto.")
+        return cuerpo
+
+    def _atender_busqueda(self, parametros: Dict[str, Any]):
+        consulta = parametros.get("q", parametros.get("consulta"))
+        if consulta is None:
+            self._responder(400, {"error": "Falta el parámetro 'q'."})
+            return
+        resultado = self.servicio.buscar(
+            str(consulta),
+            via_diccionario=_a_bool(parametros.get("via_diccionario"), True),
+            offset=_a_entero(parametros.get("offset"), 0),
+            limite=_a_entero(parametros.get("limite"), LIMITE_POR_DEFECTO, minimo=0, maximo=LIMITE_MAXIMO),
+            relevancia=_a_bool(parametros.get("relevancia"), False),
+            contar=_a_bool(parametros.get("contar"), True),
+        )
+        self._responder(200, resultado)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            if url.path == "/buscar":
+                parametros = {clave: valores[-1] for clave, valores in parse_qs(url.query, keep_blank_values=True).items()}
+                self._atender_busqueda(parametros)
+            elif url.path == "/estado":
+                self._responder(200, self.servicio.estado())
+            elif url.path == "/metricas":
+                self._atender_metricas({clave: valores[-1] for clave, valores in parse_qs(url.query).items()})
+            else:
+                self._responder(404, {"error": f"Ruta desconocida: {url.path}"})
+        except ValueError as e_param:
+            self._responder(400, {"error": f"Parámetro inválido: {e_param}"})
+        except Exception as e_get:
+            logger.exception(f"Error atendiendo GET {self.path}")
+            self._responder(500, {"error": f"Error interno: {e_get}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            cuerpo = self._leer_json()
+            if url.path == "/buscar":
+                self._atender_busqueda(cuerpo)
+            elif url.path == "/recargar":
+                resultado = self.servicio.recargar(cuerpo.get("diccionario"), cuerpo.get("descripciones"))
+                self._responder(200 if resultado.get("ok") else 400, resultado)
+            else:
+                self._responder(404, {"error": f"Ruta desconocida: {url.path}"})
+        except ValueError as e_param: # Incluye json.JSONDecodeError
+            self._responder(400, {"error": f"Petición inválida: {e_param}"})
+        except Exception as e_post:
+            logger.exception(f"Error atendiendo POST {self.path}")
+            self._responder(500, {"error": f"Error interno: {e_post}"})
+
+
+def crear_servidor(servicio: ServicioBusqueda, host: str, puerto: int) -> ThreadingHTTPServer:
+    """ Crea el servidor con un hilo por conexión; todos los hilos comparten el mismo servicio. """
+    manejador = type("ManejadorBusquedaConfigurado", (ManejadorBusqueda,), {"servicio": servicio})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON local del Buscador Avanzado (un motor cargado, muchos clientes).")
+    parser.add_argument("--diccionario", help="Archivo Excel de diccionario.")
+    parser.add_argument("--descripciones", required=True, help="Archivo Excel de descripciones.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto solo local).")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto de escucha.")
+    parser.add_argument("--nivel-log", default="INFO", help="Nivel de logging (DEBUG, INFO, WARNING...).")
+    parser.add_argument("--traza-muestreo", type=int, default=0, metavar="N", help="Con DEBUG, registra 1 de cada N mensajes por celda de las búsquedas (0 = ninguno).")
+    parser.add_argument("--registro-lentas", default=None, help="Archivo JSONL donde registrar las consultas lentas (desactivado si se omite).")
+    parser.add_argument("--umbral-lentas-ms", type=float, default=500.0, help="Duración a partir de la cual una consulta se considera lenta.")
+    parser.add_argument("--metricas", default=None, help="Archivo donde escribir periódicamente las métricas (activa también GET /metricas).")
+    parser.add_argument("--formato-metricas", choices=[FORMATO_PROMETHEUS, FORMATO_JSON], default=FORMATO_PROMETHEUS, help="Formato del archivo de métricas.")
+    parser.add_argument("--intervalo-metricas", type=float, default=15.0, help="Segundos entre escrituras del archivo de métricas.")
+    parser.add_argument("--memoria-compacta", action="store_true", help="Carga los datos en representación compacta (categóricas, cadenas Arrow, números reducidos).")
+    args = parser.parse_args(argv)
+
+    configurar_logging(nivel=nivel_desde_texto(args.nivel_log), formato="%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s",
+                       traza_cada_n=args.traza_muestreo)
+
+    faltantes, _versiones = verificar_dependencias()
+    if faltantes:
+        logger.critical(f"Faltan dependencias críticas: {', '.join(faltantes)}")
+        return 2
+
+    try:
+        motor = cargar_motor(args.diccionario, args.descripciones, memoria_compacta=args.memoria_compacta)
+    except RuntimeError as e_carga:
+        logger.critical(str(e_carga))
+        return 2
+
+    motor.configurar_registro_consultas_lentas(args.registro_lentas, args.umbral_lentas_ms)
+    exportador_metricas: Optional[ExportadorMetricas] = None
+    if args.metricas:
+        motor.activar_metricas()
+    servicio = ServicioBusqueda(motor)
+    if args.metricas:
+        exportador_metricas = ExportadorMetricas(lambda: servicio.motor, args.metricas, args.formato_metricas, args.intervalo_metricas)
+        exportador_metricas.iniciar()
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    logger.info(f"Servicio de búsqueda escuchando en http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Servicio detenido por el usuario.")
+    finally:
+        servidor.server_close()
+        if exportador_metricas is not None:
+            exportador_metricas.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
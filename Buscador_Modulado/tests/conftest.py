@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# tests/conftest.py
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import pytest
+
+from buscador_app.core.motor_busqueda import MotorBusqueda
+
+# Diccionario mínimo: FCD, dos columnas de información y sinónimos desde la cuarta columna
+FILAS_DICCIONARIO: List[List[Optional[str]]] = [
+    ["V", "UNIDAD", "medida", "VOLTIO", "VOLTIOS"],
+    ["W", "UNIDAD", "medida", "VATIO", "VATIOS"],
+    ["A", "UNIDAD", "medida", "AMPERIO", "AMPERIOS"],
+    ["MM", "UNIDAD", "medida", "MILIMETRO", "MILIMETROS"],
+    ["HZ", "UNIDAD", "medida", "HERCIO", None],
+    ["CATE", "CAT00", "articulo", "CATETER", None],
+    ["MIRU", "CAT01", "articulo", "MIRUSA", None],
+    ["CAMI", "CAT02", "articulo", "CAMISA", None],
+    ["TORNILLO", "CAT03", "articulo", "TORNILLOS", "PERNO"],
+    ["CABLE", "CAT04", "articulo", "CABLES", "CONDUCTOR"],
+]
+
+
+@pytest.fixture(autouse=True)
+def _silenciar_logs():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def escribir_excel(tmp_path) -> Callable[[str, pd.DataFrame], str]:
+    def _escribir(nombre: str, df: pd.DataFrame) -> str:
+        ruta = tmp_path / nombre
+        df.to_excel(ruta, index=False)
+        return str(ruta)
+    return _escribir
+
+
+@pytest.fixture
+def crear_motor(escribir_excel) -> Callable[..., MotorBusqueda]:
+    """ Motor con el diccionario de `FILAS_DICCIONARIO` (o `filas_diccionario`) y las `descripciones` indicadas. """
+    def _crear(descripciones: Dict[str, List[object]], filas_diccionario: Optional[List[List[Optional[str]]]] = None,
+               nombre_descripciones: str = "descripciones.xlsx") -> MotorBusqueda:
+        filas = filas_diccionario or FILAS_DICCIONARIO
+        columnas = ["FCD", "CATEGORIA", "INFO"] + [f"SINONIMO_{i}" for i in range(1, max(len(f) for f in filas) - 2)]
+        diccionario = pd.DataFrame([f + [None] * (len(columnas) - len(f)) for f in filas], columns=columnas)
+        motor = MotorBusqueda()
+        ok_dic, err_dic = motor.cargar_excel_diccionario(escribir_excel("diccionario.xlsx", diccionario))
+        ok_desc, err_desc = motor.cargar_excel_descripcion(escribir_excel(nombre_descripciones, pd.DataFrame(descripciones)))
+        assert ok_dic and ok_desc, err_dic or err_desc
+        return motor
+    return _crear
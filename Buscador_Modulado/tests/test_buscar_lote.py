@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# tests/test_buscar_lote.py
+
+import pytest
+
+from buscador_app.enums import OrigenResultados
+
+DESCRIPCIONES = {
+    "DESCRIPCION": ["TORNILLO ACERO 3 MM", "TORNILLO INOX 5 MM", "PERNO 8 MM", "CABLE COBRE 2 MM", "CABLE 220 V",
+                    "FUENTE 12 V", "FUENTE 24 V 50 HZ", "MOTOR 500 W", "CONDUCTOR 4 MM", "PILA 1.5 V",
+                    "CABLES 10 A", "RELE 5 V 2 A", "CAMISA ALGODON", "ARANDELA 6 MM"],
+    "CODIGO": [f"C{i:03d}" for i in range(14)],
+}
+
+# OR, AND, negación (pura y combinada), numéricas, sin coincidencias en el diccionario y errores de sintaxis
+CONSULTAS = [
+    "TORNILLO", "TORNILLO | CABLE", "CABLE + V", "CABLE + #COBRE", "#CABLE", "#TORNILLO + #CABLE", ">10V", "3-5MM",
+    "CABLE + >100V", "50HZ", "ZZZ", "TORNILLO | ZZZ", "TORNILLO + ZZZ", "#ZZZ", "", "((", "~",
+]
+
+
+def _comparar_resultados(lote, individual):
+    resultados_lote, origen_lote, fcds_lote, indices_lote, error_lote = lote
+    resultados, origen, fcds, indices, error = individual
+    assert origen_lote == origen
+    assert error_lote == error
+    assert indices_lote == indices
+    if resultados is None:
+        assert resultados_lote is None
+    else:
+        assert resultados_lote.equals(resultados)
+        assert list(resultados_lote.index) == list(resultados.index)
+    if fcds is None:
+        assert fcds_lote is None
+    else:
+        assert fcds_lote.equals(fcds)
+
+
+@pytest.mark.parametrize("via_diccionario", [True, False])
+def test_lote_igual_que_buscar_una_a_una(crear_motor, via_diccionario):
+    motor = crear_motor(DESCRIPCIONES)
+    consultas = CONSULTAS + CONSULTAS[::-1] # Repetidas y en otro orden: comparten la memoria del lote
+    resultados_lote = motor.buscar_lote(consultas, via_diccionario)
+
+    assert len(resultados_lote) == len(consultas)
+    for consulta, resultado_lote in zip(consultas, resultados_lote):
+        _comparar_resultados(resultado_lote, motor.buscar(consulta, via_diccionario))
+
+
+def test_lote_con_memoria_llena(crear_motor):
+    motor = crear_motor(DESCRIPCIONES)
+    resultados_lote = motor.buscar_lote(CONSULTAS, True, max_entradas_memo=2)
+    for consulta, resultado_lote in zip(CONSULTAS, resultados_lote):
+        _comparar_resultados(resultado_lote, motor.buscar(consulta, True))
+
+
+def test_lote_cubre_los_casos(crear_motor):
+    """ Las consultas del lote recorren caminos distintos del motor, no solo el de una palabra con resultados. """
+    motor = crear_motor(DESCRIPCIONES)
+    origenes = {origen for _df, origen, _fcds, _indices, _error in motor.buscar_lote(CONSULTAS, True)}
+    assert OrigenResultados.DICCIONARIO_SIN_COINCIDENCIAS in origenes
+    assert OrigenResultados.TERMINO_INVALIDO in origenes
+    assert OrigenResultados.ERROR_BUSQUEDA_INTERNA_MOTOR not in origenes
+    assert len(origenes) >= 4
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# tests/test_buscar_perezoso.py
+
+import pytest
+
+from buscador_app.core import motor_busqueda
+
+BASE = ["TORNILLO ACERO 3 MM", "CABLE COBRE 2 MM", "CABLE 220 V", "FUENTE 12 V", "PERNO 8 MM", "RELE 5 V 2 A",
+        "CABLES 10 A", "MOTOR 500 W", "CONDUCTOR 4 MM", "FUENTE 24 V 50 HZ"]
+DESCRIPCIONES = {"DESCRIPCION": [f"{texto} L{i}" for i in range(4) for texto in BASE]}
+
+CONSULTAS = [("TORNILLO", True), ("CABLE", True), ("CABLE", False), (">10V", False), (">10V", True), ("3-5MM", False),
+             ("CABLE + V", True), ("#CABLE", False), ("ZZZ", True), ("TORNILLO + ZZZ", True), ("CABLE + >100V", True), ("~", False)]
+
+
+@pytest.fixture
+def motor(crear_motor, monkeypatch):
+    # Bloques de pocas filas: con 40 descripciones, el límite recorre varios bloques
+    monkeypatch.setattr(motor_busqueda, "FILAS_MIN_BLOQUE_LIMITE", 3)
+    return crear_motor(DESCRIPCIONES)
+
+
+@pytest.mark.parametrize("consulta, via_diccionario", CONSULTAS)
+@pytest.mark.parametrize("limite", [1, 2, 5, 100])
+def test_limite_da_las_primeras_filas_del_resultado_completo(motor, consulta, via_diccionario, limite):
+    resultados, origen, fcds, indices_fcds, error = motor.buscar(consulta, via_diccionario)
+    resultado = motor.buscar_perezoso(consulta, via_diccionario, limite=limite)
+
+    esperado = [] if resultados is None else list(resultados.index[:limite])
+    assert list(resultado.ids_filas) == esperado and resultado.count() == len(esperado)
+    assert (resultado.origen, resultado.indices_fcds, resultado.error) == (origen, indices_fcds, error)
+    assert (resultado.fcds is None and fcds is None) or resultado.fcds.equals(fcds)
+    assert resultado.truncado == (resultados is not None and len(resultados) >= limite)
+    if resultados is not None:
+        assert resultado.to_frame().equals(resultados.iloc[:limite])
+        assert resultado.page(1, 2).equals(resultados.iloc[:limite].iloc[1:3])
+
+
+def test_sin_limite_igual_que_buscar(motor):
+    for consulta, via_diccionario in CONSULTAS:
+        resultados = motor.buscar(consulta, via_diccionario)[0]
+        resultado = motor.buscar_perezoso(consulta, via_diccionario)
+        assert not resultado.truncado
+        if resultados is not None:
+            assert resultado.to_frame().equals(resultados)
+            assert [id_fila for id_fila, _fila in resultado] == list(resultados.index)
+
+
+def test_filtro_numerico_devuelve_todas_las_filas(crear_motor):
+    """ Varias filas que cumplen el filtro en la misma columna: no solo la primera de cada columna. """
+    motor = crear_motor({"DESCRIPCION": BASE})
+    assert list(motor.buscar(">10V", False)[0]["DESCRIPCION"]) == ["CABLE 220 V", "FUENTE 12 V", "FUENTE 24 V 50 HZ"]
+    assert list(motor.buscar(">=5V", False)[0]["DESCRIPCION"]) == ["CABLE 220 V", "FUENTE 12 V", "RELE 5 V 2 A", "FUENTE 24 V 50 HZ"]
+    assert list(motor.buscar("2-4MM", False)[0]["DESCRIPCION"]) == ["TORNILLO ACERO 3 MM", "CABLE COBRE 2 MM", "CONDUCTOR 4 MM"]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# tests/test_busqueda_difusa.py
+
+import random
+
+import pytest
+
+from buscador_app.core.indice_difuso import MAX_VARIANTES_POR_PALABRA, IndiceDifuso, distancia_edicion_acotada, distancia_maxima_para
+
+DESCRIPCIONES = {"DESCRIPCION": ["TRANSFORMADOR 220 V", "TRANSFORMADOR OBSOLETO", "CABLE UTP CAT6", "CABLE COAXIAL",
+                                 "CAMARA IP", "MOTOR 500 W", "TORNILLO 3 MM"]}
+
+
+def _levenshtein(a, b):
+    fila = list(range(len(b) + 1))
+    for i, caracter_a in enumerate(a, 1):
+        anterior, fila[0] = fila[0], i
+        for j, caracter_b in enumerate(b, 1):
+            anterior, fila[j] = fila[j], min(fila[j] + 1, fila[j - 1] + 1, anterior + (caracter_a != caracter_b))
+    return fila[-1]
+
+
+def test_distancia_maxima_segun_longitud():
+    assert [distancia_maxima_para("X" * n) for n in (1, 3, 4, 7, 8, 20)] == [0, 0, 1, 1, 2, 2]
+
+
+def test_candidatos_iguales_que_recorrer_todo_el_vocabulario():
+    """ El filtro de trigramas y longitudes no descarta ninguna palabra que esté dentro de la distancia. """
+    aleatorio = random.Random(7)
+    vocabulario = {"".join(aleatorio.choice("ACEMNORT") for _ in range(aleatorio.randint(2, 10))) for _ in range(400)}
+    indice = IndiceDifuso(vocabulario)
+    for palabra in sorted(vocabulario)[:60] + ["TRANSFORMADOR", "CAMARA", "X"]:
+        for distancia in (1, 2):
+            esperado = {otra: _levenshtein(palabra, otra) for otra in vocabulario if _levenshtein(palabra, otra) <= distancia}
+            candidatos = indice.candidatos(palabra, distancia)
+            if len(esperado) <= MAX_VARIANTES_POR_PALABRA:
+                assert set(candidatos) == set(esperado)
+            else: # Recortadas a las más cercanas
+                assert len(candidatos) == MAX_VARIANTES_POR_PALABRA and set(candidatos) <= set(esperado)
+                descartadas = set(esperado) - set(candidatos)
+                assert max(esperado[c] for c in candidatos) <= min(esperado[d] for d in descartadas)
+            for otra in list(vocabulario)[:20]:
+                real = _levenshtein(palabra, otra)
+                assert distancia_edicion_acotada(palabra, otra, distancia) == (real if real <= distancia else distancia + 1)
+
+
+def _descripciones(motor, consulta, via_diccionario=False):
+    resultados, _origen, _fcds, _indices, error = motor.buscar(consulta, via_diccionario)
+    assert error is None
+    return list(resultados["DESCRIPCION"])
+
+
+@pytest.mark.parametrize("consulta, esperado", [
+    ("~TRANFORMADOR", ["TRANSFORMADOR 220 V", "TRANSFORMADOR OBSOLETO"]), # 13 letras: un error
+    ("~TRANSFRMADR", ["TRANSFORMADOR 220 V", "TRANSFORMADOR OBSOLETO"]), # Dos errores, el máximo
+    ("~TRNSFRMADR", []), # Tres errores: uno de más
+    ("~CABLX", ["CABLE UTP CAT6", "CABLE COAXIAL"]), # 5 letras: un error
+    ("~CABEL", []), # Una transposición son dos ediciones
+    ("~UTP", ["CABLE UTP CAT6"]),
+    ("~UTB", []), # 3 letras o menos: exactas
+    ('~"CABLX UTP"', ["CABLE UTP CAT6"]),
+])
+def test_umbral_de_distancia(crear_motor, consulta, esperado):
+    assert _descripciones(crear_motor(DESCRIPCIONES), consulta) == esperado
+
+
+@pytest.mark.parametrize("consulta, esperado", [
+    ("~TRANFORMADOR + 220", ["TRANSFORMADOR 220 V"]),
+    ("~CABLX | ~MOTR", ["CABLE UTP CAT6", "CABLE COAXIAL", "MOTOR 500 W"]),
+    ("~CABLX #~COAXIL", ["CABLE UTP CAT6"]),
+    ("~CABLX #~COAXAIL", ["CABLE UTP CAT6", "CABLE COAXIAL"]), # La negación difusa también respeta el umbral
+    ("TRANSFORMADOR #~OBSLETO", ["TRANSFORMADOR 220 V"]),
+    ("#~CABLX", ["TRANSFORMADOR 220 V", "TRANSFORMADOR OBSOLETO", "CAMARA IP", "MOTOR 500 W", "TORNILLO 3 MM"]),
+])
+def test_difusa_con_and_or_y_negacion(crear_motor, consulta, esperado):
+    assert _descripciones(crear_motor(DESCRIPCIONES), consulta) == esperado
+
+
+def test_difusa_via_diccionario(crear_motor):
+    motor = crear_motor(DESCRIPCIONES)
+    assert _descripciones(motor, "~TORNILO", True) == _descripciones(motor, "TORNILLO", True) == ["TORNILLO 3 MM"]
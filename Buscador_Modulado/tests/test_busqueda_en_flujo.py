@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# tests/test_busqueda_en_flujo.py
+
+import pandas as pd
+import pytest
+
+from buscador_app.core.busqueda_en_flujo import BusquedaEnFlujo
+
+BASE = ["TORNILLO ACERO 3 MM", "CABLE COBRE 2 MM", "CABLE 220 V", "FUENTE 12 V", "PERNO 8 MM", "RELE 5 V 2 A",
+        "CABLES 10 A", "MOTOR 500 W", "CONDUCTOR 4 MM", "FUENTE 24 V 50 HZ", "CAMISA ALGODON"]
+DESCRIPCIONES = {"DESCRIPCION": [f"{texto} L{i}" for i in range(4) for texto in BASE],
+                 "CODIGO": [f"C{i:03d}" for i in range(4 * len(BASE))]}
+
+CONSULTAS = ["TORNILLO", "CABLE | PERNO", "CABLE + V", "CABLE #COBRE", "#CABLE", "#CABLE #TORNILLO", ">10V", "3-5MM",
+             "CABLE + >100V", "~CABLX", "ZZZ", "TORNILLO + ZZZ", "#ZZZ", "MOTOR"]
+
+
+@pytest.fixture
+def motor_y_flujo(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    ruta_csv = tmp_path / "flujo" / "descripciones.csv"
+    ruta_csv.parent.mkdir()
+    pd.DataFrame(DESCRIPCIONES).to_csv(ruta_csv, index=False, encoding="utf-8-sig")
+    # 44 filas en bloques de 7: el último bloque es parcial y varios no tienen filas de algunas consultas
+    return motor, BusquedaEnFlujo(motor, str(ruta_csv), filas_por_bloque=7)
+
+
+@pytest.mark.parametrize("via_diccionario", [True, False])
+@pytest.mark.parametrize("consulta", CONSULTAS)
+def test_bloques_unidos_igual_que_buscar(motor_y_flujo, consulta, via_diccionario):
+    motor, flujo = motor_y_flujo
+    resultados, origen, _fcds, _indices, error = motor.buscar(consulta, via_diccionario)
+    resultado_flujo = flujo.buscar(consulta, via_diccionario)
+    bloques = list(resultado_flujo)
+
+    assert resultado_flujo.error == error and resultado_flujo.bloques_leidos == 7
+    unidos = pd.concat(bloques) if bloques else resultados.iloc[:0]
+    assert list(unidos.index) == list(resultados.index)
+    assert unidos.astype(str).equals(resultados.astype(str))
+    assert resultado_flujo.filas_encontradas == len(resultados)
+    if not resultados.empty:
+        assert resultado_flujo.origen == origen
+
+
+def test_exportar_lote_igual_que_buscar(motor_y_flujo, tmp_path):
+    motor, flujo = motor_y_flujo
+    consultas = ["#CABLE", "CABLE | PERNO", "ZZZ"]
+    salidas = [str(tmp_path / "flujo" / f"salida_{i}.csv") for i in range(len(consultas))]
+    resumenes = flujo.exportar_lote(list(zip(consultas, salidas)), True)
+    for consulta, salida, resumen in zip(consultas, salidas, resumenes):
+        esperado = motor.buscar(consulta, True)[0]
+        escrito = pd.read_csv(salida, encoding="utf-8-sig", dtype=str)
+        assert resumen["num_filas"] == len(esperado) == len(escrito)
+        assert list(escrito["CODIGO"]) == list(esperado["CODIGO"]) and list(escrito.columns) == list(esperado.columns)
+
+
+def test_error_de_sintaxis_detiene_la_busqueda(motor_y_flujo):
+    motor, flujo = motor_y_flujo
+    resultado_flujo = flujo.buscar("~", False)
+    assert list(resultado_flujo) == []
+    assert resultado_flujo.error == motor.buscar("~", False)[4] and resultado_flujo.bloques_leidos == 1
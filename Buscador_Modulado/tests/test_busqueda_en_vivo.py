@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# tests/test_busqueda_en_vivo.py
+
+import pytest
+
+DESCRIPCIONES = {
+    "DESCRIPCION": ["TORNILLO ACERO 3 MM", "TORNILLO INOX 5 MM", "PERNO 8 MM", "CABLE COBRE 2 MM", "CABLE 220 V",
+                    "CABLES ROJOS 10 A", "CONDUCTOR 4 MM", "FUENTE 12 V", "TORNILLO CABLE", "ARANDELA 6 MM"],
+}
+
+# (consulta previa, consulta nueva, ¿es refinamiento vía diccionario?)
+PARES = [
+    ("CABLE", "CABLE #COBRE", True), # Se añade una negación
+    ("CABLE #COBRE", "CABLE #COBRE #ROJOS", True),
+    ("TORNILLO + MM", "TORNILLO + MM #INOX", True),
+    ("CABLE + MM", "CABLE + MM + V", True), # Se añade una parte AND
+    ("TORNILLO + MM", "TORNILLO + MM + CABLE", True),
+    ("TORNILLO", "TORNILLO + MM", False), # Vía diccionario, "A" y "A + B" siguen flujos distintos
+    ("CABLE", "CABLE | PERNO", False), # Un OR amplía el resultado
+    ("CABLE", "CABLES", False),
+    ("#COBRE", "CABLE #COBRE", False),
+]
+
+
+def _iguales(a, b):
+    resultados_a, origen_a, fcds_a, indices_a, error_a = a
+    resultados_b, origen_b, fcds_b, indices_b, error_b = b
+    assert (origen_a, indices_a, error_a) == (origen_b, indices_b, error_b)
+    assert list(resultados_a.index) == list(resultados_b.index) and resultados_a.equals(resultados_b)
+    assert (fcds_a is None and fcds_b is None) or fcds_a.equals(fcds_b)
+
+
+@pytest.mark.parametrize("previa, nueva, refinamiento", PARES)
+def test_refinar_sobre_el_resultado_previo_da_lo_mismo(crear_motor, previa, nueva, refinamiento):
+    motor = crear_motor(DESCRIPCIONES)
+    assert motor.es_refinamiento(previa, nueva, True) == refinamiento
+    if not refinamiento:
+        return
+    candidatas = motor.buscar(previa, True)[0].index
+    refinada, completa = motor.buscar(nueva, True, filas_candidatas=candidatas), motor.buscar(nueva, True)
+    assert list(refinada[0].index) == list(completa[0].index)
+    if not completa[0].empty: # Sin filas, el flujo AND corta antes: el origen y los FCDs pueden diferir
+        _iguales(refinada, completa)
+
+
+def test_busqueda_en_vivo_de_la_interfaz(crear_motor, tmp_path):
+    pytest.importorskip("tkinter")
+    from buscador_app.gui.interfaz_grafica import InterfazGrafica
+
+    motor = crear_motor(DESCRIPCIONES)
+    casos = [("CABLE", "CABLE #COBRE", True),
+             ("TORNILLO + MM", "TORNILLO + MM + CABLE", False)] # Sin filas sobre las candidatas se repite la búsqueda completa
+    for previa, nueva, refinada_esperada in casos:
+        candidatas = motor.buscar(previa, True)[0].index
+        esperado = motor.buscar(nueva, True)
+        motor.perfilador.activar(1, directorio=str(tmp_path / "perfiles"))
+        resultado, estadisticas, refinada = InterfazGrafica._buscar_en_vivo(motor, nueva, candidatas)
+        assert refinada == refinada_esperada and estadisticas.consulta == nueva
+        _iguales(resultado, esperado)
+        # Las búsquedas en vivo no gastan la búsqueda pendiente del perfilador
+        assert motor.perfilador.pendientes == 1 and motor.perfilador.total_perfiles == 0
+        motor.perfilador.activar(0)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# tests/test_consultas_lentas.py
+
+import pandas as pd
+
+from buscador_app.core.registro_consultas_lentas import analizar_registro, huella_dataframe, leer_registro
+
+DESCRIPCIONES = {"DESCRIPCION": ["TORNILLO ACERO 3 MM", "CABLE 220 V", "PERNO 8 MM", "FUENTE 12 V"]}
+
+
+def test_huella_depende_del_orden_y_del_contenido():
+    df = pd.DataFrame({"A": ["X", "Y", "Z"], "B": [1, 2, 3]})
+    assert huella_dataframe(df) == huella_dataframe(df.copy())
+    assert huella_dataframe(None) is None
+
+    otras_huellas = [
+        df.iloc[[1, 0, 2]].reset_index(drop=True), # Mismas filas, otro orden
+        df.iloc[[1, 0, 2]], # También con el índice reordenado
+        df.assign(B=[1, 2, 4]),
+        df.rename(columns={"B": "C"}),
+    ]
+    hashes = {huella_dataframe(df)["hash"]} | {huella_dataframe(otro)["hash"] for otro in otras_huellas}
+    assert len(hashes) == len(otras_huellas) + 1
+    assert huella_dataframe(df) == {"filas": 3, "columnas": 2, "hash": huella_dataframe(df)["hash"]}
+
+
+def test_registra_solo_las_busquedas_sobre_el_umbral(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    ruta = tmp_path / "lentas.jsonl"
+
+    motor.configurar_registro_consultas_lentas(str(ruta), umbral_ms=60_000)
+    motor.buscar("TORNILLO", True)
+    assert not ruta.exists()
+
+    motor.configurar_registro_consultas_lentas(str(ruta), umbral_ms=0)
+    motor.buscar("TORNILLO", True)
+    motor.buscar(">10V", False)
+    entradas = list(leer_registro(str(ruta)))
+    assert [(e["consulta"], e["via_diccionario"]) for e in entradas] == [("TORNILLO", True), (">10V", False)]
+    assert motor.registro_consultas_lentas.consultas_registradas == 2
+
+    entrada = entradas[0]
+    assert entrada["origen"] == "VIA_DICCIONARIO_CON_RESULTADOS_DESC"
+    assert entrada["filas_resultado"] == 2 and entrada["fcds_encontrados"] == 1 # TORNILLO y su sinónimo PERNO
+    assert entrada["plan"] and entrada["etapas"]
+    assert entrada["datos"]["descripciones"]["hash"] == huella_dataframe(motor.datos_descripcion)["hash"]
+    assert entrada["datos"]["descripciones"]["archivo"] == "descripciones.xlsx"
+
+    motor.configurar_registro_consultas_lentas(None)
+    motor.buscar("CABLE", True)
+    assert len(list(leer_registro(str(ruta)))) == 2
+
+
+def test_analisis_agrupa_y_salta_lineas_corruptas(tmp_path):
+    ruta = tmp_path / "lentas.jsonl"
+    ruta.write_text(
+        '{"consulta": "cable", "via_diccionario": true, "ms": 700, "origen": "A", "etapas": {"busqueda": {"segundos": 0.6}}}\n'
+        '{"consulta": "corta\n'
+        '{"consulta": "CABLE ", "via_diccionario": true, "ms": 900, "origen": "A", "etapas": {"busqueda": {"segundos": 0.8}}}\n'
+        '{"consulta": "perno", "via_diccionario": false, "ms": 1200, "origen": "B"}\n',
+        encoding="utf-8")
+    entradas = list(leer_registro(str(ruta)))
+    assert len(entradas) == 3
+
+    filas = analizar_registro(entradas, top=5)
+    assert [(f["consulta"], f["veces"], f["total_ms"]) for f in filas] == [("cable", 2, 1600.0), ("perno", 1, 1200.0)]
+    assert filas[0]["max_ms"] == 900.0 and filas[0]["etapa_dominante"] == "busqueda"
+    assert analizar_registro(entradas, criterio="max")[0]["consulta"] == "perno"
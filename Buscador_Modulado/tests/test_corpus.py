@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# tests/test_corpus.py
+
+import pandas as pd
+
+from buscador_app.core.corpus import COLUMNA_FUENTE, COLUMNA_FUENTE_DEL_ARCHIVO, NIVEL_INDICE_FUENTE, CorpusDescripciones
+
+NORTE = pd.DataFrame({"DESCRIPCION": ["CABLE 220 V", "TORNILLO 3 MM", "CABLE COBRE"], "CODIGO": ["N1", "N2", "N3"]})
+# Una fuente con su propia columna "Fuente" (p. ej. de alimentación), que no debe confundirse con la del corpus
+SUR = pd.DataFrame({"DESCRIPCION": ["FUENTE 12 V", "CABLE ROJO", "PERNO 8 MM"], "Fuente": ["CONMUTADA", "-", "-"]})
+
+
+def _corpus(crear_motor, escribir_excel) -> CorpusDescripciones:
+    corpus = CorpusDescripciones(crear_motor({"DESCRIPCION": ["SIN USO"]}), max_hilos=2)
+    assert corpus.cargar_fuente("norte", escribir_excel("norte.xlsx", NORTE)) == (True, None)
+    assert corpus.cargar_fuente("sur", escribir_excel("sur.xlsx", SUR)) == (True, None)
+    return corpus
+
+
+def test_une_las_fuentes_en_orden(crear_motor, escribir_excel):
+    corpus = _corpus(crear_motor, escribir_excel)
+    try:
+        resultados, _origen, _fcds, _indices, error = corpus.buscar("CABLE", False)
+        assert error is None
+        assert list(resultados.index) == [("norte", 0), ("norte", 2), ("sur", 1)]
+        assert resultados.index.names[0] == NIVEL_INDICE_FUENTE
+        assert list(resultados[COLUMNA_FUENTE]) == ["norte", "norte", "sur"]
+        por_fuente = corpus.buscar_por_fuente("CABLE", False)
+        assert list(resultados.loc["norte", "DESCRIPCION"]) == list(por_fuente["norte"][0]["DESCRIPCION"])
+    finally:
+        corpus.cerrar()
+
+
+def test_columna_fuente_de_una_fuente_no_se_duplica(crear_motor, escribir_excel):
+    corpus = _corpus(crear_motor, escribir_excel)
+    try:
+        resultados = corpus.buscar("FUENTE | TORNILLO", False)[0]
+        assert resultados.columns.is_unique
+        assert list(resultados.columns[:1]) == [COLUMNA_FUENTE] and COLUMNA_FUENTE_DEL_ARCHIVO in resultados.columns
+        assert list(resultados[COLUMNA_FUENTE]) == ["norte", "sur"]
+        assert resultados[COLUMNA_FUENTE_DEL_ARCHIVO].tolist()[1] == "CONMUTADA"
+        # Ni el nivel del índice coincide con una columna: agrupar por la fuente no es ambiguo
+        assert resultados.groupby(COLUMNA_FUENTE).size().to_dict() == {"norte": 1, "sur": 1}
+        # También cuando solo se busca en esa fuente
+        assert corpus.buscar("FUENTE", False, fuentes=["sur"])[0].columns.is_unique
+    finally:
+        corpus.cerrar()
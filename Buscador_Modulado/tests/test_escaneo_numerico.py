@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# tests/test_escaneo_numerico.py
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from buscador_app.core.motor_busqueda import MotorBusqueda
+from buscador_app.utils import ExtractorMagnitud
+
+TEXTOS = [
+    "TORNILLO 3 MM", "CABLE 220V", "12 V 2 A", "A12V", "12VX", "12V-24V", "10-20 KW", "3,5MM", "1.5V 2A", "5.5.5 HZ",
+    "500 w", "2 kW", "1/2 PULG", "Ø 8mm", "ÁB 5 mm", "µ5", "5 µF", "30 Ω", "x²5", "5", "", "   ", "SIN NUMEROS",
+    "12\x00V", "\x0015 A", "7 MM\x00", "١٢ V", "3_A", "4.V", "1,234.5 W", "NaN V", "12v12v", "8 - MM",
+]
+
+
+def _ocurrencias_texto_a_texto(motor: MotorBusqueda, textos):
+    """ Las ocurrencias como las sacaba el motor antes: `finditer` sobre cada texto y una resolución de unidad por coincidencia. """
+    filas = []
+    for posicion, texto in enumerate(textos):
+        for coincidencia in motor.patron_num_unidad_df.finditer(texto):
+            inicio, fin = coincidencia.start(), coincidencia.end()
+            if (inicio > 0 and texto[inicio - 1].isalnum()) or (fin < len(texto) and texto[fin].isalnum()):
+                continue
+            numero = motor._parse_numero(coincidencia.group(1))
+            if numero is None or np.isnan(numero):
+                continue
+            unidad = coincidencia.group(2)
+            resuelta = motor.algebra_unidades.resolver(unidad.strip()) if unidad and unidad.strip() else None
+            filas.append((posicion, numero, None, numero) if resuelta is None else (posicion, numero, resuelta[0], numero * resuelta[1]))
+    return filas
+
+
+def _como_filas(ocurrencias: pd.DataFrame):
+    return list(zip(ocurrencias["texto"].tolist(), ocurrencias["numero"].tolist(), ocurrencias["unidad"].tolist(), ocurrencias["numero_base"].tolist()))
+
+
+@pytest.fixture
+def motor(crear_motor) -> MotorBusqueda:
+    return crear_motor({"DESCRIPCION": ["CABLE 220 V"]})
+
+
+def test_una_pasada_igual_que_texto_a_texto(motor):
+    esperado = _ocurrencias_texto_a_texto(motor, TEXTOS)
+    assert esperado # Hay ocurrencias con y sin unidad reconocida
+    assert _como_filas(motor._escanear_ocurrencias_numericas(pd.Series(TEXTOS, dtype=object))) == esperado
+
+
+def test_una_pasada_con_textos_aleatorios(motor, crear_motor):
+    aleatorio = random.Random(11)
+    caracteres = "0123456789      ..,,--/_AVWMKHZmkvwzÁñµΩ²x\x00"
+    textos = ["".join(aleatorio.choice(caracteres) for _ in range(aleatorio.randint(0, 20))) for _ in range(2000)]
+    esperado = _ocurrencias_texto_a_texto(crear_motor({"DESCRIPCION": ["CABLE 220 V"]}), textos) # Memorias de unidades vacías
+    assert _como_filas(motor._escanear_ocurrencias_numericas(pd.Series(textos, dtype=object))) == esperado
+
+
+def test_memoria_de_unidades_por_texto(motor):
+    """ La consulta memorizada por texto sin normalizar da lo mismo que normalizar y buscar cada vez. """
+    extractor = motor.extractor_magnitud
+    for texto in ["V", "v", " V ", "VOLTIOS", "voltios", "MM", "milímetros", "KW", "ZZ", "", "V"]:
+        normalizada = ExtractorMagnitud._normalizar_texto(texto) if texto else ""
+        esperada = extractor.sinonimo_a_canonico_normalizado.get(normalizada) if normalizada else None
+        assert extractor.obtener_magnitud_normalizada(texto) == extractor.obtener_magnitud_normalizada(texto) == esperada
+        assert motor.algebra_unidades.resolver(texto) == motor.algebra_unidades._resolver_normalizada(normalizada)
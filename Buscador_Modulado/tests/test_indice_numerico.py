@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# tests/test_indice_numerico.py
+
+import numpy as np
+import pytest
+
+from benchmarks.diferencial_numeros import generar_numeros_escaneo, generar_textos_numericos
+from buscador_app.core.indice_numerico import parsear_numeros
+from buscador_app.core.motor_busqueda import MotorBusqueda
+
+CASOS_LIMITE = [
+    # Signos
+    "5", "-5", "+5", "--5", "-", "5-", "-0", "-0,0", "- 5",
+    # Separadores de miles y decimales
+    "1.234", "1,234", "1.234,5", "1,234.56", "1,5", "1.05", "1.234.567", "1,234,567.891", "0.001", "12.3456",
+    # Separadores sueltos o finales
+    "5.", "5,", ".5", ",5", "1..2", "1.,2", ".", ",",
+    # Exponentes
+    "1e5", "1E5", "E-3", "2.5e-3", "1,5E3", "e5",
+    # Espacios, NaN, infinitos y valores que no son texto
+    "", " ", " 12 ", "\t7", "nan", "NaN", "inf", "-inf", None, 5, 2.5, -0.0,
+    # Texto no numérico y otros dígitos
+    "kg", "12kg", "1_000", "١٢", "²", "1\n2",
+    # Más dígitos de los que un float representa exactamente
+    "12345678901234567890", "1.234567890123456789", "-98765432109876543210,12",
+]
+
+
+@pytest.fixture(scope="module")
+def motor() -> MotorBusqueda:
+    return MotorBusqueda()
+
+
+def assert_mismos_numeros(textos, motor: MotorBusqueda) -> None:
+    """ `parsear_numeros` da lo mismo que `_parse_numero` texto a texto: el mismo float (con su signo) o NaN si no interpreta. """
+    vectorizados = parsear_numeros(textos, motor._parse_numero)
+    assert len(vectorizados) == len(textos)
+    for texto, vectorizado in zip(textos, vectorizados):
+        escalar = motor._parse_numero(texto)
+        if escalar is None or np.isnan(escalar):
+            assert np.isnan(vectorizado), texto
+        else:
+            assert vectorizado == escalar and np.signbit(vectorizado) == np.signbit(escalar), texto
+
+
+@pytest.mark.parametrize("texto", CASOS_LIMITE)
+def test_caso_limite_solo(texto, motor):
+    assert_mismos_numeros([texto], motor)
+
+
+def test_casos_limite_juntos(motor):
+    assert_mismos_numeros(CASOS_LIMITE, motor)
+
+
+def test_textos_generados(motor):
+    assert_mismos_numeros(generar_textos_numericos(5000, semilla=3), motor)
+    assert_mismos_numeros(generar_numeros_escaneo(5000, semilla=3), motor)
+
+
+def test_sin_textos(motor):
+    assert len(parsear_numeros([], motor._parse_numero)) == 0
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# tests/test_interfaz_reglas.py
+
+import threading
+
+import pytest
+
+from buscador_app.core.reglas import AlmacenReglas
+from buscador_app.enums import OrigenResultados
+
+tkinter = pytest.importorskip("tkinter")
+from buscador_app.gui import interfaz_grafica # noqa: E402 (solo si hay tkinter)
+from buscador_app.gui.interfaz_grafica import InterfazGrafica # noqa: E402
+
+DESCRIPCIONES = {"DESCRIPCION": ["TORNILLO ACERO 3 MM", "CABLE 220 V", "PERNO 8 MM", "FUENTE 12 V"]}
+
+
+class _VentanaSinTk:
+    """ Lo que "Salvar Regla" usa de la ventana, sin crear una ventana de Tk: `after` solo encola la llamada. """
+
+    _salvar_regla_actual_ui = InterfazGrafica._salvar_regla_actual_ui
+    _sondear_guardado_regla = InterfazGrafica._sondear_guardado_regla
+    _obtener_ejecutor_reglas = InterfazGrafica._obtener_ejecutor_reglas
+    _guardar_regla = staticmethod(InterfazGrafica._guardar_regla)
+
+    def __init__(self, motor, almacen_reglas):
+        self.motor = motor
+        self.almacen_reglas = almacen_reglas
+        self.ultimo_termino_buscado = "TORNILLO"
+        self.origen_principal_resultados = OrigenResultados.VIA_DICCIONARIO_CON_RESULTADOS_DESC
+        self._ejecutor_reglas = None
+        self._futuro_guardado_regla = None
+        self.llamadas_after = []
+        self.mensajes = []
+
+    def after(self, _ms, funcion, *args):
+        self.llamadas_after.append((funcion, args))
+
+    def _actualizar_mensaje_barra_estado(self, mensaje):
+        self.mensajes.append(mensaje)
+
+    def _actualizar_estado_general_botones_y_controles(self):
+        pass
+
+
+def test_salvar_regla_fuera_del_hilo_de_la_interfaz(crear_motor, tmp_path, monkeypatch):
+    motor = crear_motor(DESCRIPCIONES)
+    almacen = AlmacenReglas(str(tmp_path / "reglas" / "reglas.json"))
+    ventana = _VentanaSinTk(motor, almacen)
+    avisos = []
+    monkeypatch.setattr(interfaz_grafica.simpledialog, "askstring", lambda *args, **kwargs: "tornillos")
+    monkeypatch.setattr(interfaz_grafica.messagebox, "showinfo", lambda titulo, mensaje: avisos.append(titulo))
+
+    hilos_guardado = []
+    guardar_regla = almacen.guardar_regla
+    continuar = threading.Event()
+
+    def guardar_regla_lento(*args, **kwargs):
+        hilos_guardado.append(threading.current_thread())
+        assert continuar.wait(10)
+        return guardar_regla(*args, **kwargs)
+
+    monkeypatch.setattr(almacen, "guardar_regla", guardar_regla_lento)
+    motor.perfilador.activar(1, directorio=str(tmp_path / "perfiles"))
+    try:
+        ventana._salvar_regla_actual_ui() # Vuelve sin esperar a que se evalúe la regla
+        assert not ventana._futuro_guardado_regla.done() and almacen.regla("tornillos") is None
+        continuar.set()
+        ventana._futuro_guardado_regla.result(10)
+        while ventana.llamadas_after: # Los sondeos que Tk haría cada 200 ms
+            funcion, args = ventana.llamadas_after.pop(0)
+            funcion(*args)
+    finally:
+        continuar.set()
+        ventana._ejecutor_reglas.shutdown(wait=True)
+
+    assert hilos_guardado and hilos_guardado[0] is not threading.main_thread()
+    assert almacen.regla("tornillos").num_filas == 2 and avisos == ["Regla Salvada"]
+    assert ventana.mensajes[-1] == "Regla 'tornillos' guardada: 2 filas."
+    assert motor.perfilador.pendientes == 1 # El guardado no gasta la búsqueda pendiente del perfilador
+    motor.perfilador.activar(0)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# tests/test_metricas.py
+
+import json
+
+from buscador_app.core.metricas import FORMATO_JSON, ExportadorMetricas, Histograma, MetricasMotor, escribir_metricas
+
+DESCRIPCIONES = {"DESCRIPCION": ["TORNILLO ACERO 3 MM", "CABLE 220 V", "PERNO 8 MM", "FUENTE 12 V"]}
+
+# (consulta, vía diccionario) -> (origen, clase, modo) esperados
+BUSQUEDAS = [
+    (("TORNILLO", True), ("VIA_DICCIONARIO_CON_RESULTADOS_DESC", "simple", "diccionario")),
+    (("CABLE", False), ("DIRECTO_DESCRIPCION_CON_RESULTADOS", "simple", "directo")),
+    ((">10V", False), ("DIRECTO_DESCRIPCION_CON_RESULTADOS", "numerica", "directo")),
+    (("#CABLE", False), ("DIRECTO_DESCRIPCION_CON_RESULTADOS", "negacion_pura", "directo")),
+    (("CABLE | PERNO", False), ("DIRECTO_DESCRIPCION_CON_RESULTADOS", "or", "directo")),
+    (("ZZZ", True), ("DICCIONARIO_SIN_COINCIDENCIAS", "simple", "diccionario")),
+    (("~", False), ("TERMINO_INVALIDO", "simple", "directo")),
+]
+
+
+def _motor_con_busquedas(crear_motor):
+    motor = crear_motor(DESCRIPCIONES)
+    metricas = motor.activar_metricas()
+    filas = 0
+    for (consulta, via_diccionario), _clave in BUSQUEDAS:
+        resultados = motor.buscar(consulta, via_diccionario)[0]
+        filas += 0 if resultados is None else len(resultados)
+    return motor, metricas, filas
+
+
+def test_cuenta_busquedas_por_flujo_clase_y_modo(crear_motor):
+    motor, metricas, filas = _motor_con_busquedas(crear_motor)
+    assert metricas.busquedas == {clave: 1 for _consulta, clave in BUSQUEDAS}
+    assert metricas.errores == 1 # Solo "~" termina con mensaje de error
+    assert metricas.filas_resultado_total == filas == 10
+    assert sum(h.cuenta for h in metricas.latencia_por_origen.values()) == len(BUSQUEDAS)
+    assert metricas.latencia_por_clase["simple"].cuenta == 4
+    assert set(metricas.construcciones_indice) == {"diccionario", "descripcion"} # Ya construidos al activar
+    assert metricas.aciertos_cache.get("indice_normalizado", 0) > 0
+
+    # Un motor recargado con la misma configuración sigue acumulando en las mismas métricas
+    nuevo = motor.motor_con_misma_configuracion()
+    nuevo.compartir_datos_de(motor)
+    nuevo.buscar("CABLE", False)
+    assert nuevo.metricas is metricas
+    assert metricas.busquedas[("DIRECTO_DESCRIPCION_CON_RESULTADOS", "simple", "directo")] == 2
+
+
+def test_histograma_acumula_cubos():
+    histograma = Histograma(cubos=(0.01, 0.1))
+    for valor in (0.005, 0.05, 0.05, 3.0):
+        histograma.observar(valor)
+    assert histograma.cubos_acumulados() == [("0.01", 1), ("0.1", 3), ("+Inf", 4)]
+    assert histograma.a_dict()["cuenta"] == 4 and histograma.a_dict()["suma_segundos"] == 3.105
+
+
+def test_exporta_prometheus_y_json(crear_motor, tmp_path):
+    motor, metricas, _filas = _motor_con_busquedas(crear_motor)
+
+    texto = metricas.a_prometheus(motor)
+    assert 'buscador_busquedas_total{origen="TERMINO_INVALIDO",clase="simple",modo="directo"} 1' in texto
+    assert "buscador_errores_total 1\n" in texto and "buscador_filas_resultado_total 10\n" in texto
+    assert 'buscador_latencia_clase_segundos_count{clase="simple"} 4' in texto
+    assert 'buscador_latencia_clase_segundos_bucket{clase="simple",le="+Inf"} 4' in texto
+    assert 'buscador_memoria_bytes{componente="descripciones"}' in texto
+
+    instantanea = metricas.a_dict(motor)
+    assert instantanea["busquedas_total"] == len(BUSQUEDAS) and instantanea["errores_total"] == 1
+    assert {(b["origen"], b["clase"], b["modo"]) for b in instantanea["busquedas"]} == {clave for _consulta, clave in BUSQUEDAS}
+    assert instantanea["memoria_bytes"]["descripciones"] > 0
+
+    ruta = tmp_path / "metricas" / "buscador.json"
+    escribir_metricas(metricas, motor, str(ruta), FORMATO_JSON)
+    assert json.loads(ruta.read_text(encoding="utf-8"))["busquedas_total"] == len(BUSQUEDAS)
+    assert not ruta.with_name(ruta.name + ".tmp").exists()
+
+
+def test_exportador_escribe_al_iniciar_y_al_detener(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    ruta = tmp_path / "metricas" / "buscador.prom"
+    exportador = ExportadorMetricas(lambda: motor, str(ruta), intervalo_segundos=60)
+
+    exportador.iniciar() # Sin métricas activas no escribe nada
+    assert not ruta.exists()
+    motor.activar_metricas(MetricasMotor())
+    motor.buscar("CABLE", False)
+    exportador.detener()
+    assert 'buscador_busquedas_total{origen="DIRECTO_DESCRIPCION_CON_RESULTADOS",clase="simple",modo="directo"} 1' in ruta.read_text(encoding="utf-8")
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# tests/test_perfilador.py
+
+import pstats
+
+DESCRIPCIONES = {"DESCRIPCION": ["TORNILLO ACERO 3 MM", "CABLE 220 V", "PERNO 8 MM", "FUENTE 12 V"]}
+
+
+def test_perfila_solo_las_proximas_busquedas(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    esperado = motor.buscar("TORNILLO", True)
+    motor.perfilador.activar(2, directorio=str(tmp_path / "perfiles"))
+
+    resultados = [motor.buscar(consulta, True) for consulta in ("TORNILLO", "CABLE", "PERNO")]
+    assert resultados[0][0].equals(esperado[0]) and resultados[0][1] == esperado[1] # Perfilar no cambia el resultado
+    assert motor.perfilador.pendientes == 0 and motor.perfilador.total_perfiles == 2
+    assert [perfil.consulta for perfil in motor.perfilador.perfiles] == ["TORNILLO", "CABLE"]
+
+    perfil = motor.perfilador.perfiles[0]
+    assert perfil.ruta_archivo.parent == tmp_path / "perfiles" and perfil.ruta_archivo.suffix == ".pstats"
+    assert pstats.Stats(str(perfil.ruta_archivo)).total_calls > 0
+    assert perfil.top_funciones and "Consulta: 'TORNILLO'" in perfil.informe()
+    assert len(list((tmp_path / "perfiles").iterdir())) == 2
+
+
+def test_busquedas_sin_perfilar_no_gastan_pendientes(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    motor.perfilador.activar(1, directorio=str(tmp_path / "perfiles"))
+
+    with motor.sin_perfilar():
+        motor.buscar("CABLE", True)
+        motor.buscar_lote(["TORNILLO", "PERNO"], True)
+    assert motor.perfilador.pendientes == 1 and motor.perfilador.total_perfiles == 0
+
+    motor.buscar("FUENTE", False)
+    assert motor.perfilador.pendientes == 0
+    assert [perfil.consulta for perfil in motor.perfilador.perfiles] == ["FUENTE"]
+
+
+def test_activar_cero_cancela(crear_motor, tmp_path):
+    motor = crear_motor(DESCRIPCIONES)
+    motor.perfilador.activar(3, directorio=str(tmp_path / "perfiles"))
+    motor.perfilador.activar(0)
+    motor.buscar("CABLE", True)
+    assert motor.perfilador.total_perfiles == 0 and not (tmp_path / "perfiles").exists()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# tests/test_reglas.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from buscador_app.core.motor_busqueda import MotorBusqueda
+from buscador_app.core.reglas import AlmacenReglas, MatrizPertenencia
+
+from .conftest import FILAS_DICCIONARIO
+
+DESCRIPCIONES = [
+    "TORNILLO ACERO 3 MM", "TORNILLO INOX 5 MM", "PERNO 8 MM", "CABLE COBRE 2 MM", "CABLE 220 V",
+    "FUENTE 12 V", "FUENTE 24 V 50 HZ", "MOTOR 500 W", "MOTOR 1 KW 50 HZ", "CATETER 3 MM",
+    "CAMISA ALGODON", "MIRUSA AZUL", "CONDUCTOR 4 MM", "BOMBILLA 60 W", "PILA 1.5 V",
+    "TORNILLOS VARIOS", "CABLES 10 A", "RELE 5 V 2 A", "VENTILADOR 12 V 100 HZ", "ARANDELA 6 MM",
+]
+
+# (término, vía diccionario): palabras, sinónimos, comparaciones, rangos, negaciones, sin resultados y errores
+CONSULTAS = [
+    ("TORNILLO", True), ("PERNO", True), ("CABLE", False), ("CABLE", True), (">10V", False), ("3-5MM", False),
+    ("50HZ", False), ("#CABLE", False), ("FUENTE + V", False), ("ZZZ", False), ("", False), ("((", False),
+    ("TORNILLO + MM", True), ("CABLE + V", True), ("CABLE #COBRE", True), ("LAMPARA", False),
+    ("CABLE + A", True), ("TORNILLO + INOX", True), ("CABLE + 220", True), ("MM + HZ", True), ("CATE + MM", True),
+]
+
+
+def _posiciones_esperadas(motor: MotorBusqueda, termino: str, via_diccionario: bool):
+    resultados_df, origen, fcds_df, _indices, mensaje_error = motor.buscar(termino, via_diccionario)
+    posiciones = np.array([], dtype=np.int64)
+    if resultados_df is not None and not resultados_df.empty:
+        posiciones = motor.datos_descripcion.index.get_indexer(resultados_df.index)
+    return posiciones, origen.name, mensaje_error, (len(fcds_df) if fcds_df is not None else 0)
+
+
+def _datos_modificados() -> pd.DataFrame:
+    """ Las descripciones base sin algunas filas, con otras cambiadas, filas nuevas en medio y otro orden. """
+    filas = [d for i, d in enumerate(DESCRIPCIONES) if i not in (1, 4, 13)]
+    filas[0] = "TORNILLO ACERO 4 MM"
+    filas[5] = "FUENTE 48 V 60 HZ"
+    filas = filas[:8] + ["CABLE NUEVO 15 V", "PERNO 3 MM 50 HZ", "LAMPARA"] + filas[8:]
+    return pd.DataFrame({"DESCRIPCION": filas[::-1]})
+
+
+@pytest.fixture
+def motor_base(crear_motor) -> MotorBusqueda:
+    return crear_motor({"DESCRIPCION": DESCRIPCIONES})
+
+
+def test_sincronizar_incremental_igual_a_evaluacion_completa(motor_base, escribir_excel, tmp_path):
+    ruta_reglas = str(tmp_path / "reglas.json")
+    almacen = AlmacenReglas(ruta_reglas)
+    for i, (termino, via_diccionario) in enumerate(CONSULTAS):
+        almacen.guardar_regla(motor_base, f"regla_{i}", termino, via_diccionario)
+
+    modificados = _datos_modificados()
+    motor = MotorBusqueda()
+    motor.compartir_datos_de(motor_base, descripcion=False)
+    ok, error = motor.cargar_excel_descripcion(escribir_excel("modificadas.xlsx", modificados))
+    assert ok, error
+
+    recargado = AlmacenReglas(ruta_reglas) # Desde disco: hashes de filas y resultados materializados
+    resumen = recargado.sincronizar(motor)
+    nuevas = len(set(modificados["DESCRIPCION"]) - set(DESCRIPCIONES))
+    assert not resumen["completa"]
+    assert resumen["filas_evaluadas"] == nuevas < len(modificados)
+    assert recargado.sincronizada_con(motor)
+
+    for i, (termino, via_diccionario) in enumerate(CONSULTAS):
+        regla = recargado.regla(f"regla_{i}")
+        posiciones, origen, mensaje_error, num_fcds = _posiciones_esperadas(motor, termino, via_diccionario)
+        assert np.array_equal(regla.posiciones, posiciones), termino
+        assert regla.origen == origen, termino
+        assert regla.num_fcds == num_fcds, termino
+        assert (regla.error is None) == (mensaje_error is None), termino
+
+
+def test_sincronizar_mismas_filas_reordenadas_no_evalua(motor_base, escribir_excel, tmp_path):
+    almacen = AlmacenReglas(str(tmp_path / "reglas.json"))
+    almacen.guardar_regla(motor_base, "cables", "CABLE", True)
+
+    motor = MotorBusqueda()
+    motor.compartir_datos_de(motor_base, descripcion=False)
+    ok, error = motor.cargar_excel_descripcion(escribir_excel("reordenadas.xlsx", pd.DataFrame({"DESCRIPCION": DESCRIPCIONES[::-1]})))
+    assert ok, error
+
+    resumen = almacen.sincronizar(motor)
+    assert not resumen["completa"] and resumen["filas_evaluadas"] == 0
+    posiciones, _origen, _error, _num_fcds = _posiciones_esperadas(motor, "CABLE", True)
+    assert np.array_equal(almacen.regla("cables").posiciones, posiciones)
+
+
+def test_sincronizar_con_otro_diccionario_evalua_todo(motor_base, crear_motor, tmp_path):
+    almacen = AlmacenReglas(str(tmp_path / "reglas.json"))
+    almacen.guardar_regla(motor_base, "tornillos", "TORNILLO", True)
+
+    otras_filas = [fila if fila[0] != "TORNILLO" else ["TORNILLO", "CAT03", "articulo", "TORNILLOS", "ARANDELA"] for fila in FILAS_DICCIONARIO]
+    motor = crear_motor({"DESCRIPCION": DESCRIPCIONES}, filas_diccionario=otras_filas, nombre_descripciones="otra.xlsx")
+
+    resumen = almacen.sincronizar(motor)
+    assert resumen["completa"] and resumen["filas_evaluadas"] == len(DESCRIPCIONES)
+    posiciones, _origen, _error, _num_fcds = _posiciones_esperadas(motor, "TORNILLO", True)
+    assert np.array_equal(almacen.regla("tornillos").posiciones, posiciones)
+
+
+def test_aplicar_a_igual_a_cada_regla_por_separado(motor_base, crear_motor, tmp_path):
+    almacen = AlmacenReglas(str(tmp_path / "reglas.json"))
+    for i, (termino, via_diccionario) in enumerate(CONSULTAS):
+        almacen.guardar_regla(motor_base, f"regla_{i}", termino, via_diccionario)
+    antes = {regla.nombre: regla.posiciones.copy() for regla in almacen.reglas()}
+
+    catalogo = crear_motor({"DESCRIPCION": _datos_modificados()["DESCRIPCION"].tolist()}, nombre_descripciones="catalogo.xlsx")
+    aplicacion = almacen.aplicar_a(catalogo)
+    matriz = aplicacion.matriz
+    assert len(matriz) == len(CONSULTAS) and matriz.num_filas == len(catalogo.datos_descripcion)
+
+    densa = np.zeros((len(CONSULTAS), matriz.num_filas), dtype=bool)
+    for i, (termino, via_diccionario) in enumerate(CONSULTAS):
+        posiciones, origen, mensaje_error, num_fcds = _posiciones_esperadas(catalogo, termino, via_diccionario)
+        regla = aplicacion.reglas[i]
+        assert np.array_equal(matriz.filas_de(f"regla_{i}"), posiciones), termino
+        assert regla.origen == origen and (regla.error is None) == (mensaje_error is None), termino
+        densa[i, posiciones] = True
+    assert densa.any()
+
+    assert np.array_equal(matriz.densa(), densa)
+    assert np.array_equal(matriz.reglas_por_fila(), densa.sum(axis=0))
+    for fila in range(matriz.num_filas):
+        assert matriz.reglas_de_fila(fila) == [f"regla_{i}" for i in np.flatnonzero(densa[:, fila])]
+    # Las reglas guardadas no cambian al aplicarlas a otro catálogo
+    assert all(np.array_equal(regla.posiciones, antes[regla.nombre]) for regla in almacen.reglas())
+
+
+def test_aplicar_a_solo_las_reglas_indicadas(motor_base, tmp_path):
+    almacen = AlmacenReglas(str(tmp_path / "reglas.json"))
+    almacen.guardar_regla(motor_base, "cables", "CABLE", True)
+    almacen.guardar_regla(motor_base, "tornillos", "TORNILLO", True)
+
+    aplicacion = almacen.aplicar_a(motor_base, nombres=["tornillos"])
+    assert aplicacion.matriz.nombres == ["tornillos"]
+    posiciones, _origen, _error, _num_fcds = _posiciones_esperadas(motor_base, "TORNILLO", True)
+    assert aplicacion.filas_de("tornillos").index.equals(motor_base.datos_descripcion.index[posiciones])
+
+
+def test_matriz_pertenencia_guardar_y_cargar(tmp_path):
+    posiciones = [np.array([0, 3, 4]), np.array([], dtype=np.int64), np.array([4])]
+    matriz = MatrizPertenencia(["a", "b", "c"], 6, posiciones)
+    ruta = str(tmp_path / "pertenencia.npz")
+    matriz.guardar(ruta)
+
+    cargada = MatrizPertenencia.cargar(ruta)
+    assert cargada.nombres == ["a", "b", "c"] and cargada.num_filas == 6
+    assert np.array_equal(cargada.densa(), matriz.densa())
+    assert np.array_equal(cargada.reglas_por_fila(), [1, 0, 0, 1, 2, 0])
+    assert cargada.reglas_de_fila(4) == ["a", "c"] and cargada.reglas_de_fila(5) == []
+    assert len(cargada.filas_de("b")) == 0
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# tests/test_relevancia.py
+
+import pytest
+
+from buscador_app.core.estadisticas import EstadisticasBusqueda
+
+DESCRIPCIONES = {
+    "DESCRIPCION": ["TORNILLO ACERO", "TORNILLO TORNILLO INOX", "PERNO LARGO", "CABLE COBRE", "TORNILLO", "ARANDELA",
+                    "TORNILLOS SURTIDOS", "TORNILLO CABEZA PLANA", "PERNO CORTO", "CABLE"],
+    "CODIGO": [f"C{i:03d}" for i in range(10)],
+    "PRECIO": [1.5, 2.0, 3.25, 4.0, 0.5, 0.1, 9.9, 1.0, 2.5, 3.0],
+}
+
+
+@pytest.mark.parametrize("termino, via_diccionario", [("TORNILLO", True), ("TORNILLO", False), ("PERNO | CABLE", False), ("", False)])
+def test_relevantes_son_filas_del_resultado_completas(crear_motor, termino, via_diccionario):
+    motor = crear_motor(DESCRIPCIONES)
+    resultados_df = motor.buscar(termino, via_diccionario)[0]
+    estadisticas = EstadisticasBusqueda()
+
+    mejores_df, origen, _fcds, _indices, error = motor.buscar_relevantes(termino, via_diccionario, 3, estadisticas)
+    assert error is None and origen == motor.buscar(termino, via_diccionario)[1]
+    assert len(mejores_df) == min(3, len(resultados_df))
+    assert set(mejores_df.index) <= set(resultados_df.index)
+    # Filas de las descripciones con todas sus columnas, no las de la búsqueda por ids
+    assert list(mejores_df.columns) == list(motor.datos_descripcion.columns)
+    assert mejores_df.equals(motor.datos_descripcion.loc[mejores_df.index])
+    assert estadisticas.filas_resultado == len(resultados_df)
+
+
+def test_relevantes_ordena_por_puntuacion(crear_motor):
+    motor = crear_motor(DESCRIPCIONES)
+    mejores_df = motor.buscar_relevantes("TORNILLO", False, 1)[0]
+    assert mejores_df["DESCRIPCION"].tolist() == ["TORNILLO TORNILLO INOX"]
+
+
+def test_relevantes_con_filas_candidatas_y_sin_resultados(crear_motor):
+    motor = crear_motor(DESCRIPCIONES)
+    candidatas = motor.buscar("TORNILLO | PERNO", False)[0].index
+    mejores_df = motor.buscar_relevantes("PERNO", False, 5, filas_candidatas=candidatas)[0]
+    assert sorted(mejores_df["DESCRIPCION"]) == ["PERNO CORTO", "PERNO LARGO"]
+
+    vacio_df, _origen, _fcds, _indices, error = motor.buscar_relevantes("ZZZ", False, 5)
+    assert error is None and vacio_df.empty and list(vacio_df.columns) == list(motor.datos_descripcion.columns)
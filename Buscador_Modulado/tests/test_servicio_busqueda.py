@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# tests/test_servicio_busqueda.py
+
+import threading
+
+import pandas as pd
+
+from buscador_app.core.servicio_busqueda import ServicioBusqueda
+
+DESCRIPCIONES_A = ["CABLE COBRE 2 MM", "CABLE 220 V", "TORNILLO 3 MM"]
+DESCRIPCIONES_B = ["CABLE ROJO", "TORNILLO 5 MM", "TORNILLO 8 MM", "PERNO 8 MM"]
+
+
+def test_recarga_no_espera_a_una_busqueda_en_curso(crear_motor, escribir_excel):
+    motor = crear_motor({"Descripcion": DESCRIPCIONES_A})
+    servicio = ServicioBusqueda(motor)
+    ruta_b = escribir_excel("descripciones_b.xlsx", pd.DataFrame({"Descripcion": DESCRIPCIONES_B}))
+
+    buscando, continuar = threading.Event(), threading.Event()
+    buscar_original = motor.buscar
+
+    def buscar_bloqueado(*args, **kwargs):
+        buscando.set()
+        assert continuar.wait(10)
+        return buscar_original(*args, **kwargs)
+
+    motor.buscar = buscar_bloqueado
+    respuestas = []
+    hilo_busqueda = threading.Thread(target=lambda: respuestas.append(servicio.buscar("CABLE", False)))
+    hilo_busqueda.start()
+    assert buscando.wait(10)
+    assert servicio.estado()["busquedas_en_curso"] == 1
+
+    hilo_recarga = threading.Thread(target=lambda: respuestas.append(servicio.recargar(ruta_descripciones=ruta_b)))
+    hilo_recarga.start()
+    hilo_recarga.join(10)
+    try:
+        assert not hilo_recarga.is_alive() # La recarga se publica sin esperar a la búsqueda
+        assert respuestas[0]["ok"] and servicio.estado()["version_datos"] == 2
+        assert servicio.buscar("CABLE", False)["total"] == 1 # Las búsquedas nuevas ven los datos recargados
+    finally:
+        continuar.set()
+        hilo_busqueda.join(10)
+        hilo_recarga.join(10)
+
+    # La búsqueda que estaba en curso termina con los datos con que empezó
+    assert respuestas[1]["version_datos"] == 1 and respuestas[1]["total"] == 2
+    assert servicio.estado()["busquedas_en_curso"] == 0
+
+
+def test_busquedas_concurrentes_con_recargas(crear_motor, escribir_excel):
+    servicio = ServicioBusqueda(crear_motor({"Descripcion": DESCRIPCIONES_A}))
+    rutas = [escribir_excel("a.xlsx", pd.DataFrame({"Descripcion": DESCRIPCIONES_A})),
+             escribir_excel("b.xlsx", pd.DataFrame({"Descripcion": DESCRIPCIONES_B}))]
+    # Versión impar: datos A; par: datos B
+    totales_por_paridad = {1: {"CABLE": 2, "TORNILLO": 1}, 0: {"CABLE": 1, "TORNILLO": 2}}
+    errores = []
+    terminar = threading.Event()
+
+    def consultar():
+        while not terminar.is_set():
+            for consulta in ("CABLE", "TORNILLO"):
+                respuesta = servicio.buscar(consulta, False, limite=None)
+                esperado = totales_por_paridad[respuesta["version_datos"] % 2][consulta]
+                if respuesta["total"] != esperado or len(respuesta["filas"]) != esperado:
+                    errores.append(respuesta)
+
+    hilos = [threading.Thread(target=consultar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        for i in range(6):
+            assert servicio.recargar(ruta_descripciones=rutas[(i + 1) % 2])["ok"]
+    finally:
+        terminar.set()
+        for hilo in hilos:
+            hilo.join(30)
+    assert servicio.estado()["version_datos"] == 7
+    assert servicio.estado()["busquedas_en_curso"] == 0
+    assert not errores
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# tests/test_terminos.py
+
+import numpy as np
+import pytest
+
+from buscador_app.core.terminos import TerminoAnalizado
+
+NUMEROS = [0.0, 1.0, 2.9999999, 3.0, 3.0000001, 3.0001, 4.0, 5.0, 5.00000001, 6.0, 1e6, -3.0, float("inf"), float("-inf")]
+
+
+def _cumple_con_isclose(tipo, valor, numero):
+    """ Comparación con np.isclose por celda, como la hacía el motor con los dicts por término. """
+    if tipo == "eq":
+        return bool(np.isclose(numero, valor))
+    if tipo == "gt":
+        return numero > valor and not np.isclose(numero, valor)
+    if tipo == "lt":
+        return numero < valor and not np.isclose(numero, valor)
+    if tipo == "ge":
+        return numero >= valor or bool(np.isclose(numero, valor))
+    if tipo == "le":
+        return numero <= valor or bool(np.isclose(numero, valor))
+    minimo, maximo = valor
+    return (minimo <= numero or bool(np.isclose(numero, minimo))) and (numero <= maximo or bool(np.isclose(numero, maximo)))
+
+
+@pytest.mark.parametrize("tipo, valor", [("eq", 3.0), ("gt", 3.0), ("lt", 3.0), ("ge", 3.0), ("le", 3.0), ("range", [3.0, 5.0]),
+                                         ("gt", 0.0), ("eq", float("inf"))])
+def test_cotas_precalculadas_equivalen_a_isclose(tipo, valor):
+    termino = TerminoAnalizado(f"{tipo}{valor}", tipo, valor, "")
+    esperado = [_cumple_con_isclose(tipo, valor, numero) for numero in NUMEROS]
+    assert [termino.cumple(numero) for numero in NUMEROS] == esperado
+    assert termino.cumple_array(np.array(NUMEROS)).tolist() == esperado
+
+
+def test_terminos_con_slots():
+    termino = TerminoAnalizado("CABLE ROJO", "str", "CABLE ROJO", "CABLE ROJO", es_frase=True)
+    assert not hasattr(termino, "__dict__")
+    with pytest.raises(AttributeError):
+        termino.otro_atributo = 1
+    assert termino.tokens == ("CABLE", "ROJO") and termino.patron.search("UN CABLE ROJO 2 MM")
+    assert not termino.patron.search("CABLEROJO") and termino.cotas == ()
+
+
+def test_analisis_y_plan_de_la_consulta(crear_motor):
+    motor = crear_motor({"DESCRIPCION": ["CABLE 220 V"]})
+    terminos = motor._analizar_terminos(["TORNILLO", ">10V", "3-5MM", '"CABLE ROJO"', "<ABC"])
+    assert [t.a_dict() for t in terminos] == [
+        {"original": "TORNILLO", "tipo": "str", "valor": "TORNILLO"},
+        {"original": ">10V", "tipo": "gt", "valor": 10.0, "unidad_busqueda": "V"},
+        {"original": "3-5MM", "tipo": "range", "valor": [3.0, 5.0], "unidad_busqueda": "MM", "unidad_base": "M", "factor_unidad": 0.001},
+        {"original": "CABLE ROJO", "tipo": "str", "valor": "CABLE ROJO"},
+        {"original": "<ABC", "tipo": "str", "valor": "ABC"}, # Sin número: término de texto
+    ]
+    assert terminos[3].es_frase and [t.es_numerico for t in terminos] == [False, True, True, False, False]
+    assert terminos[1].patron_original.search("10V") and terminos[1].patron is None
+
+    plan = motor._construir_plan("TORNILLO | CABLE")
+    assert plan.operador == "OR" and [s.texto for s in plan.segmentos] == ["TORNILLO", "CABLE"]
+    plan = motor._construir_plan("CABLE + >10V")
+    assert [[t.original for t in s.terminos] for s in plan.segmentos] == [["CABLE", ">10V"]]
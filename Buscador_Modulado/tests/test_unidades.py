@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# tests/test_unidades.py
+
+import pytest
+
+from buscador_app.core.unidades import AlgebraUnidades
+from buscador_app.utils import ExtractorMagnitud
+
+from .conftest import FILAS_DICCIONARIO
+
+
+@pytest.fixture
+def algebra() -> AlgebraUnidades:
+    mapeo = {fila[0]: [s for s in fila[3:] if s] for fila in FILAS_DICCIONARIO}
+    return AlgebraUnidades(ExtractorMagnitud(mapeo), {"PULGADA": (25.4, "MM")})
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("KV", ("V", 1e3)),
+    ("MV", ("V", 1e-3)),
+    ("KW", ("W", 1e3)),
+    ("MW", ("W", 1e6)), # M es mega delante de W
+    ("KILOVATIO", ("W", 1e3)),
+    ("MA", ("A", 1e-3)),
+    ("MHZ", ("HZ", 1e6)), # y delante de HZ
+    ("KHZ", ("HZ", 1e3)),
+    ("MM", ("M", 1e-3)),
+    ("MILIMETRO", ("M", 1e-3)),
+    ("CM", ("M", 1e-2)),
+    ("M", ("M", 1.0)),
+    ("PULGADA", ("M", 25.4e-3)),
+])
+def test_unidades_con_prefijo(algebra, texto, esperado):
+    base, factor = algebra.resolver(texto)
+    assert base == esperado[0]
+    assert factor == pytest.approx(esperado[1])
+
+
+@pytest.mark.parametrize("texto", ["CV", "NM", "CA", "GA", "NA", "ATE"])
+def test_no_parte_textos_que_no_son_unidades_con_prefijo(algebra, texto):
+    assert algebra.resolver(texto) is None
+
+
+@pytest.mark.parametrize("fcd", ["CATE", "MIRU", "CAMI", "TORNILLO", "CABLE"])
+def test_fcds_que_no_son_unidades_no_tienen_escala(algebra, fcd):
+    assert algebra.resolver(fcd) == (fcd, 1.0)
+
+
+def test_comparacion_directa_no_confunde_caballos_con_voltios(crear_motor):
+    motor = crear_motor({"Descripcion": ["MOTOR 200 CV", "FUENTE 12 V", "FUENTE 500 MV"]})
+    resultados, _origen, _fcds, _indices, error = motor.buscar(">1V", False)
+    assert error is None
+    assert list(resultados["Descripcion"]) == ["FUENTE 12 V"]
+
+
+def test_rango_en_milimetros_no_incluye_newton_metro(crear_motor):
+    motor = crear_motor({"Descripcion": ["CABLE 3 NM", "TORNILLO 3 MM", "TORNILLO 0.2 CM", "TORNILLO 1 CM"]})
+    resultados, _origen, _fcds, _indices, error = motor.buscar("<5MM", False)
+    assert error is None
+    assert list(resultados["Descripcion"]) == ["TORNILLO 3 MM", "TORNILLO 0.2 CM"]